@@ -2,10 +2,25 @@
 
 This controller receives motor commands from Scenic via Webots communication
 and controls the robot's motors accordingly.
+
+Commands arrive as binary packets (see scenic.simulators.webots.motor_channel)
+holding records addressed by robot ID. The supervisor writes this robot's ID
+and channel into its customData; the receiver is then switched to that channel
+so it only sees packets meant for this robot (or for robots sharing its
+channel, whose records are skipped by ID without being decoded). JSON
+commands from older supervisors are still accepted.
 """
 
 from controller import Robot, Receiver, Emitter
 import json
+import struct
+
+MOTOR_PACKET = 0x4D
+WAYPOINT_PACKET = 0x57
+MOTOR_HEADER = struct.Struct("<BH")
+MOTOR_RECORD = struct.Struct("<Hff")
+WAYPOINT_MESSAGE = struct.Struct("<BHi")
+RECORD_ID = struct.Struct("<H")
 
 class SimpleRobotController:
     def __init__(self):
@@ -30,6 +45,8 @@ class SimpleRobotController:
                 print("ERROR: rightMotor not found")
         
         # Communication with Scenic supervisor
+        self.custom_data = None
+        self.robot_id = None
         self.receiver = self.robot.getDevice("receiver")
         if self.receiver:
             self.receiver.enable(self.timestep)
@@ -37,49 +54,72 @@ class SimpleRobotController:
         else:
             print("ERROR: No receiver found")
     
+    def configure(self):
+        """Pick up the robot ID and channel assigned by the supervisor.
+
+        The supervisor writes them into customData when a simulation starts,
+        which may be after this controller started, so this runs every step;
+        it only does work when customData changes.
+        """
+        custom_data = self.robot.getCustomData()
+        if custom_data == self.custom_data:
+            return
+        self.custom_data = custom_data
+        try:
+            fields = [int(field) for field in custom_data.split()]
+        except ValueError:
+            fields = []
+        self.robot_id = fields[0] if fields else None
+        if len(fields) > 1 and self.receiver:
+            self.receiver.setChannel(fields[1])
+            print(f"Robot controller - robot {self.robot_id} on channel {fields[1]}")
+
     def run(self):
         """Main control loop."""
         print("Robot controller starting main loop")
-        
+
         while self.robot.step(self.timestep) != -1:
+            self.configure()
+
             # Check for commands from Scenic
-            if self.receiver and self.receiver.getQueueLength() > 0:
-                message = self.receiver.getString()
+            while self.receiver and self.receiver.getQueueLength() > 0:
+                packet = self.receiver.getBytes()
                 self.receiver.nextPacket()
-                
+
                 try:
-                    command = json.loads(message)
-                    self.handle_command(command)
+                    if packet[:1] == b"{":
+                        self.handle_command(json.loads(packet))
+                    else:
+                        self.handle_packet(packet)
                 except json.JSONDecodeError:
-                    print(f"ERROR: Invalid JSON command: {message}")
+                    print(f"ERROR: Invalid JSON command: {packet}")
                 except Exception as e:
                     print(f"ERROR: Command handling error: {e}")
-    
+
+    def handle_packet(self, packet):
+        """Handle a binary packet from the Scenic supervisor."""
+        kind = packet[0]
+        my_id = self.robot_id
+        if kind == MOTOR_PACKET:
+            _, count = MOTOR_HEADER.unpack_from(packet, 0)
+            offset = MOTOR_HEADER.size
+            for _ in range(count):
+                # Without an assigned ID (single-robot worlds), take the first record
+                if my_id is None or RECORD_ID.unpack_from(packet, offset)[0] == my_id:
+                    _, left, right = MOTOR_RECORD.unpack_from(packet, offset)
+                    self.set_speeds(left, right)
+                    break
+                offset += MOTOR_RECORD.size
+        elif kind == WAYPOINT_PACKET:
+            if my_id is None or RECORD_ID.unpack_from(packet, 1)[0] == my_id:
+                _, _, waypoint_num = WAYPOINT_MESSAGE.unpack(packet)
+                print(f"✓ Waypoint {waypoint_num} reached!")
+
     def handle_command(self, command):
         """Handle motor commands from Scenic."""
         if command.get("type") == "motor_command":
-            left_in = float(command.get("left_speed", 0))
-            right_in = float(command.get("right_speed", 0))
-
-            # Scale inputs: accept either percent (0..100) or rad/s.
-            maxL = self.left_motor.getMaxVelocity() if self.left_motor else 0.0
-            maxR = self.right_motor.getMaxVelocity() if self.right_motor else 0.0
-
-            def to_vel(val, vmax):
-                if vmax <= 0:
-                    return 0.0
-                # Heuristic: values > 1.5*vmax likely already rad/s; else treat as %
-                if abs(val) <= 120.0:
-                    return max(-vmax, min(vmax, (val / 100.0) * vmax))
-                return max(-vmax, min(vmax, val))
-
-            lvel = to_vel(left_in, maxL)
-            rvel = to_vel(right_in, maxR)
-
-            if self.left_motor:
-                self.left_motor.setVelocity(lvel)
-            if self.right_motor:
-                self.right_motor.setVelocity(rvel)
+            self.set_speeds(float(command.get("left_speed", 0)),
+                            float(command.get("right_speed", 0)))
         elif command.get("type") == "waypoint_reached":
             waypoint_num = command.get("waypoint_num", "?")
             if isinstance(waypoint_num, str):
@@ -87,6 +127,28 @@ class SimpleRobotController:
             else:
                 print(f"✓ Waypoint {waypoint_num} reached!")
 
+    def set_speeds(self, left_in, right_in):
+        """Apply motor speeds given in percent (or, if large, in rad/s)."""
+        # Scale inputs: accept either percent (0..100) or rad/s.
+        maxL = self.left_motor.getMaxVelocity() if self.left_motor else 0.0
+        maxR = self.right_motor.getMaxVelocity() if self.right_motor else 0.0
+
+        def to_vel(val, vmax):
+            if vmax <= 0:
+                return 0.0
+            # Heuristic: values > 1.5*vmax likely already rad/s; else treat as %
+            if abs(val) <= 120.0:
+                return max(-vmax, min(vmax, (val / 100.0) * vmax))
+            return max(-vmax, min(vmax, val))
+
+        lvel = to_vel(left_in, maxL)
+        rvel = to_vel(right_in, maxR)
+
+        if self.left_motor:
+            self.left_motor.setVelocity(lvel)
+        if self.right_motor:
+            self.right_motor.setVelocity(rvel)
+
 # Create and run the controller
 controller = SimpleRobotController()
 controller.run()
@@ -0,0 +1,293 @@
+# Rigid-body-only fast path for NAT_FRAMEOFDATA packets.
+#
+# The general-purpose decoder in NatNetClient.py slices the packet at every
+# nested unpack call, builds MoCapData objects for every section and formats
+# trace strings even when tracing is disabled. When only rigid body poses are
+# needed (the usual case for robot tracking) this decoder walks the packet
+# once with precompiled structs, skips every other section by its length and
+# writes the rigid bodies straight into a preallocated NumPy structured array.
+#
+# Only NatNet 3.0 and later are supported; NatNetClient falls back to the
+# general-purpose decoder for older streams.
+
+import struct
+
+import numpy as np
+
+NAT_FRAMEOFDATA = 7
+
+# Output layout: one row per rigid body in the frame.
+RIGID_BODY_DTYPE = np.dtype([
+    ("id", "<i4"),
+    ("pos", "<f4", (3,)),
+    ("quat", "<f4", (4,)),
+    ("error", "<f4"),
+    ("valid", "?"),
+])
+
+# Wire layout of a rigid body in NatNet 3.0 and later (38 bytes, unaligned).
+WIRE_RIGID_BODY_DTYPE = np.dtype([
+    ("id", "<i4"),
+    ("pos", "<f4", (3,)),
+    ("quat", "<f4", (4,)),
+    ("error", "<f4"),
+    ("params", "<i2"),
+])
+RIGID_BODY_SIZE = WIRE_RIGID_BODY_DTYPE.itemsize
+
+# Fixed-size records which are skipped without being decoded.
+LABELED_MARKER_SIZE = 26  # id, pos[3], size, params (short), residual
+MARKER_POS_SIZE = 12
+
+Header = struct.Struct('<hh')
+Int32 = struct.Struct('<i')
+Int32Pair = struct.Struct('<ii')
+# Frame suffix: timecode, timecode sub, timestamp, 3 hi-res stamps, then (from
+# NatNet 4.1) the precision timestamp seconds and fraction, and the params short.
+Suffix = struct.Struct('<iidqqqh')
+PrecisionSuffix = struct.Struct('<iidqqqIIh')
+
+
+def supports_version(major, minor):
+    """Whether the fast path can decode streams of the given NatNet version."""
+    return major >= 3
+
+
+def has_size_fields(major, minor):
+    """NatNet 4.1 and later prefix each section with its length in bytes."""
+    return (major == 4 and minor > 0) or major > 4
+
+
+class RigidBodyFrameDecoder:
+    """Decodes the rigid bodies of NAT_FRAMEOFDATA packets into a NumPy array.
+
+    The decoder owns a preallocated structured array with dtype
+    RIGID_BODY_DTYPE; each call to decode overwrites its first
+    rigid_body_count rows and returns a view onto them. The view is only
+    valid until the next call, so copy it if it needs to be kept around.
+
+    Rigid bodies belonging to skeletons and assets are not reported, and
+    marker sets, labeled markers, force plates and devices are skipped.
+    """
+
+    def __init__(self, max_rigid_bodies=64):
+        self.rigid_bodies = np.zeros(max_rigid_bodies, dtype=RIGID_BODY_DTYPE)
+        self.rigid_body_count = 0
+        self.frame_number = -1
+        self.timestamp = 0.0
+        self.stamp_camera_mid_exposure = 0
+        self.stamp_data_received = 0
+        self.stamp_transmit = 0
+        self.prec_timestamp_secs = 0
+        self.prec_timestamp_frac_secs = 0
+        self.frame_params = 0
+
+    def decode(self, packet, major, minor):
+        """Decode a complete packet (including its 4-byte message header).
+
+        Returns a view onto the rigid bodies of the frame, or None if the
+        packet is not a frame of data.
+        """
+        message_id, packet_size = Header.unpack_from(packet, 0)
+        if message_id != NAT_FRAMEOFDATA:
+            return None
+        if not supports_version(major, minor):
+            raise ValueError(
+                "fast decoder does not support NatNet %d.%d" % (major, minor))
+        return self.decode_frame(packet, 4, major, minor)
+
+    def decode_frame(self, data, offset, major, minor):
+        """Decode frame data starting at the given offset into data."""
+        sized = has_size_fields(major, minor)
+
+        self.frame_number, = Int32.unpack_from(data, offset)
+        offset += 4
+
+        # Marker sets: names are variable length, so without a size field
+        # each one has to be walked.
+        count, = Int32.unpack_from(data, offset)
+        offset += 4
+        if sized:
+            size, = Int32.unpack_from(data, offset)
+            offset += 4 + size
+        else:
+            raw = data if isinstance(data, bytes) else bytes(data)
+            for _ in range(count):
+                offset = raw.index(b'\0', offset) + 1
+                marker_count, = Int32.unpack_from(raw, offset)
+                offset += 4 + marker_count * MARKER_POS_SIZE
+
+        # Legacy "other" markers
+        offset = self.__skip_records(data, offset, MARKER_POS_SIZE, sized)
+
+        # Rigid bodies
+        count, = Int32.unpack_from(data, offset)
+        offset += 4
+        if sized:
+            offset += 4
+        self.__store_rigid_bodies(data, offset, count)
+        offset += count * RIGID_BODY_SIZE
+
+        # Skeletons
+        count, = Int32.unpack_from(data, offset)
+        offset += 4
+        if sized:
+            size, = Int32.unpack_from(data, offset)
+            offset += 4 + size
+        else:
+            for _ in range(count):
+                _, rb_count = Int32Pair.unpack_from(data, offset)
+                offset += 8 + rb_count * RIGID_BODY_SIZE
+
+        # Assets (only present, and always sized, from NatNet 4.1)
+        if sized:
+            _, size = Int32Pair.unpack_from(data, offset)
+            offset += 8 + size
+
+        # Labeled markers
+        offset = self.__skip_records(data, offset, LABELED_MARKER_SIZE, sized)
+
+        # Force plates and devices share a layout
+        offset = self.__skip_channel_data(data, offset, sized)
+        offset = self.__skip_channel_data(data, offset, sized)
+
+        # Frame suffix, with the precision timestamp from NatNet 4.1
+        if sized:
+            suffix = PrecisionSuffix
+            if len(data) - offset >= suffix.size:
+                (_, _, self.timestamp, self.stamp_camera_mid_exposure,
+                 self.stamp_data_received, self.stamp_transmit,
+                 self.prec_timestamp_secs, self.prec_timestamp_frac_secs,
+                 self.frame_params) = suffix.unpack_from(data, offset)
+        else:
+            suffix = Suffix
+            if len(data) - offset >= suffix.size:
+                (_, _, self.timestamp, self.stamp_camera_mid_exposure,
+                 self.stamp_data_received, self.stamp_transmit,
+                 self.frame_params) = suffix.unpack_from(data, offset)
+
+        return self.rigid_bodies[:self.rigid_body_count]
+
+    def __store_rigid_bodies(self, data, offset, count):
+        if count > len(self.rigid_bodies):
+            capacity = len(self.rigid_bodies)
+            while capacity < count:
+                capacity *= 2
+            self.rigid_bodies = np.zeros(capacity, dtype=RIGID_BODY_DTYPE)
+        self.rigid_body_count = count
+        if count == 0:
+            return
+        # A view onto the packet itself: no bytes are copied until the
+        # field-wise assignments into the preallocated output below.
+        wire = np.frombuffer(data, dtype=WIRE_RIGID_BODY_DTYPE,
+                             count=count, offset=offset)
+        out = self.rigid_bodies[:count]
+        out['id'] = wire['id']
+        out['pos'] = wire['pos']
+        out['quat'] = wire['quat']
+        out['error'] = wire['error']
+        np.bitwise_and(wire['params'], 1, out=out['valid'], casting='unsafe')
+
+    def __skip_records(self, data, offset, record_size, sized):
+        count, = Int32.unpack_from(data, offset)
+        offset += 4
+        if sized:
+            offset += 4
+        return offset + count * record_size
+
+    def __skip_channel_data(self, data, offset, sized):
+        count, = Int32.unpack_from(data, offset)
+        offset += 4
+        if sized:
+            size, = Int32.unpack_from(data, offset)
+            return offset + 4 + size
+        for _ in range(count):
+            _, channel_count = Int32Pair.unpack_from(data, offset)
+            offset += 8
+            for _ in range(channel_count):
+                frame_count, = Int32.unpack_from(data, offset)
+                offset += 4 + 4 * frame_count
+        return offset
+
+
+# Packet construction, used to synthesize recordings for tests and benchmarks.
+
+def _pack_rigid_body(rigid_body):
+    new_id, pos, rot, error, valid = rigid_body
+    return struct.pack('<i3f4ffh', new_id, *pos, *rot, error, 1 if valid else 0)
+
+
+def _pack_section(count, body, sized):
+    out = Int32.pack(count)
+    if sized:
+        out += Int32.pack(len(body))
+    return out + body
+
+
+def _pack_channel_data(items, sized):
+    body = b''
+    for new_id, channels in items:
+        body += Int32Pair.pack(new_id, len(channels))
+        for frames in channels:
+            body += Int32.pack(len(frames))
+            body += struct.pack('<%df' % len(frames), *frames)
+    return _pack_section(len(items), body, sized)
+
+
+def pack_frame_of_data(frame_number, rigid_bodies, major=4, minor=1, *,
+                       marker_sets=(), legacy_markers=(), skeletons=(),
+                       assets=(), labeled_markers=(), force_plates=(),
+                       devices=(), timestamp=0.0, stamps=(0, 0, 0),
+                       prec_timestamp=(0, 0), params=0):
+    """Build a complete NAT_FRAMEOFDATA packet for NatNet 3.0 and later.
+
+    Rigid bodies are (id, pos, quat, error, valid) tuples. Marker sets are
+    (name, positions) pairs, skeletons and assets are (id, rigid_bodies)
+    pairs, labeled markers are (id, pos, size) tuples, and force plates and
+    devices are (id, channels) pairs where each channel is a list of floats.
+    Stamps are the camera mid-exposure, data received and transmit stamps,
+    and the precision timestamp (seconds, fraction) is only sent from 4.1.
+    """
+    sized = has_size_fields(major, minor)
+    data = Int32.pack(frame_number)
+
+    body = b''
+    for name, positions in marker_sets:
+        body += name.encode('utf-8') + b'\0' + Int32.pack(len(positions))
+        for pos in positions:
+            body += struct.pack('<3f', *pos)
+    data += _pack_section(len(marker_sets), body, sized)
+
+    body = b''.join(struct.pack('<3f', *pos) for pos in legacy_markers)
+    data += _pack_section(len(legacy_markers), body, sized)
+
+    body = b''.join(_pack_rigid_body(rb) for rb in rigid_bodies)
+    data += _pack_section(len(rigid_bodies), body, sized)
+
+    body = b''
+    for new_id, bones in skeletons:
+        body += Int32Pair.pack(new_id, len(bones))
+        body += b''.join(_pack_rigid_body(rb) for rb in bones)
+    data += _pack_section(len(skeletons), body, sized)
+
+    if sized:
+        body = b''
+        for new_id, asset_bodies in assets:
+            body += Int32Pair.pack(new_id, len(asset_bodies))
+            body += b''.join(_pack_rigid_body(rb) for rb in asset_bodies)
+            body += Int32.pack(0)  # asset markers
+        data += _pack_section(len(assets), body, sized)
+
+    body = b''.join(struct.pack('<i3ffhf', new_id, *pos, size, 0, 0.0)
+                    for new_id, pos, size in labeled_markers)
+    data += _pack_section(len(labeled_markers), body, sized)
+
+    data += _pack_channel_data(force_plates, sized)
+    data += _pack_channel_data(devices, sized)
+
+    if sized:
+        data += PrecisionSuffix.pack(0, 0, timestamp, *stamps, *prec_timestamp,
+                                     params)
+    else:
+        data += Suffix.pack(0, 0, timestamp, *stamps, params)
+    return Header.pack(NAT_FRAMEOFDATA, len(data)) + data
@@ -28,6 +28,7 @@ import copy
 import time
 from . import DataDescriptions
 from . import MoCapData
+from . import FastDecoder
 
 
 def trace(*args):
@@ -97,6 +98,19 @@ class NatNetClient:
         self.new_frame_listener = None
         self.new_frame_with_data_listener = None
 
+        # Rigid-body-only fast path (see FastDecoder.py). When enabled,
+        # frames are decoded straight into a NumPy structured array and
+        # passed to rigid_body_frame_listener(frame_number, timestamp,
+        # rigid_bodies); rigid_body_listener is still called per rigid body,
+        # but the new_frame listeners are not.
+        self.use_fast_decoder = False
+        self.rigid_body_frame_listener = None
+        self.fast_decoder = FastDecoder.RigidBodyFrameDecoder()
+
+        # Called with every raw packet received on the data socket,
+        # e.g. to record a session for later replay.
+        self.packet_listener = None
+
         # Set Application Name
         self.__application_name = "Not Set"
 
@@ -158,6 +172,9 @@ class NatNetClient:
         if not self.__is_locked:
             self.use_multicast = use_multicast
 
+    def set_use_fast_decoder(self, use_fast_decoder):
+        self.use_fast_decoder = use_fast_decoder
+
     def can_change_bitstream_version(self):
         return self.__can_change_bitstream_version
 
@@ -876,6 +893,7 @@ class NatNetClient:
         offset += 8
         trace_mf("Timestamp: %3.2f" % timestamp)
         frame_suffix_data.timestamp = timestamp
+        stamp_camera_mid_exposure = int.from_bytes(data[offset:offset+8], byteorder='little',  signed=True) #type: ignore  # noqa E501
         trace_mf("Mid-exposure timestamp        : %3.1d" % stamp_camera_mid_exposure) #type: ignore  # noqa E501
         offset += 8
         frame_suffix_data.stamp_camera_mid_exposure = stamp_camera_mid_exposure #type: ignore  # noqa E501
@@ -991,10 +1009,10 @@ class NatNetClient:
                 data, offset, frame_suffix_data, param = self.__unpack_frame_suffix_data_pre_2_7(data, offset, frame_suffix_data, param)#type: ignore  # noqa E501
             elif (major == 2 and minor >= 7 and major < 3):
                 data, offset, frame_suffix_data, param = self.__unpack_frame_suffix_data_2_7_to_3(data, offset, frame_suffix_data, param) #type: ignore  # noqa E501
-            elif (major >= 3 or (major == 4 and minor == 0)):
-                data, offset, frame_suffix_data, param = self.__unpack_frame_suffix_data_3_to_4(data, offset, frame_suffix_data, param) #type: ignore  # noqa E501
-            elif (major >= 4 and minor != 0):
+            elif ((major == 4 and minor > 0) or major > 4):
                 data, offset, frame_suffix_data, param = self.__unpack_frame_suffix_data_4_1_to_present(data, offset, frame_suffix_data, param) #type: ignore  # noqa E501
+            elif (major >= 3):
+                data, offset, frame_suffix_data, param = self.__unpack_frame_suffix_data_3_to_4(data, offset, frame_suffix_data, param) #type: ignore  # noqa E501
 
         is_recording = (param & 0x01) != 0
         tracked_models_changed = (param & 0x02) != 0
@@ -2046,6 +2064,8 @@ class NatNetClient:
                 print("ERROR: data socket access timeout occurred. Server not responding") #type: ignore  # noqa E501
                 # return 4
             if len(data) > 0:
+                if self.packet_listener is not None:
+                    self.packet_listener(data)
                 # peek ahead at message_id
                 message_id = get_message_id(data)
                 tmp_str = "mi_%1.1d" % message_id
@@ -2083,7 +2103,11 @@ class NatNetClient:
 
         # skip the 4 bytes for message ID and packet_size
         offset = 4
-        if message_id == self.NAT_FRAMEOFDATA:
+        if message_id == self.NAT_FRAMEOFDATA and self.use_fast_decoder \
+                and FastDecoder.supports_version(major, minor):
+            self.__process_fast_frame(data, major, minor)
+
+        elif message_id == self.NAT_FRAMEOFDATA:
             trace("Message ID : %3.1d NAT_FRAMEOFDATA" % message_id)
             trace("Packet Size: ", packet_size)
 
@@ -2162,6 +2186,18 @@ class NatNetClient:
         trace("End Packet\n-----------------")
         return message_id
 
+    def __process_fast_frame(self, data, major, minor):
+        decoder = self.fast_decoder
+        rigid_bodies = decoder.decode_frame(data, 4, major, minor)
+        if self.rigid_body_frame_listener is not None:
+            self.rigid_body_frame_listener(decoder.frame_number,
+                                           decoder.timestamp, rigid_bodies)
+        if self.rigid_body_listener is not None:
+            for new_id, pos, rot in zip(rigid_bodies['id'].tolist(),
+                                        rigid_bodies['pos'].tolist(),
+                                        rigid_bodies['quat'].tolist()):
+                self.rigid_body_listener(new_id, tuple(pos), tuple(rot))
+
     def send_request(self, in_socket, command, command_str, address):
         # Compose the message in our known message format
         packet_size = 0
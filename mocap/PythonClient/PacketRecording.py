@@ -0,0 +1,118 @@
+# Raw NatNet packet recordings.
+#
+# A recording is a flat file of packets, each prefixed with the time it was
+# received (float64 seconds) and its length (uint32), both little endian.
+# Recordings are made by attaching a PacketRecorder as the packet_listener of
+# a NatNetClient, and can be replayed through the decoders offline, either
+# directly with read_packets or in (scaled) real time with a PacketReplayer.
+
+import struct
+import threading
+import time
+
+from .FastDecoder import RigidBodyFrameDecoder
+
+RecordHeader = struct.Struct('<dI')
+
+
+class PacketRecorder:
+    """Appends every packet it is called with to a recording file."""
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.lock = threading.Lock()
+        self.packet_count = 0
+
+    def __call__(self, packet):
+        with self.lock:
+            self.file.write(RecordHeader.pack(time.time(), len(packet)))
+            self.file.write(packet)
+            self.packet_count += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_packets(path):
+    """Yield (receive_time, packet) pairs from a recording file."""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(RecordHeader.size)
+            if len(header) < RecordHeader.size:
+                return
+            receive_time, size = RecordHeader.unpack(header)
+            packet = f.read(size)
+            if len(packet) < size:
+                return
+            yield receive_time, packet
+
+
+def write_packets(path, packets, period=1/240):
+    """Write packets to a recording, spacing their receive times by period."""
+    with open(path, 'wb') as f:
+        for i, packet in enumerate(packets):
+            f.write(RecordHeader.pack(i * period, len(packet)))
+            f.write(packet)
+
+
+class PacketReplayer:
+    """Replays a recording as if it were a live NatNet stream.
+
+    Frames are decoded with the rigid-body fast path and passed to listener
+    with the same arguments as NatNetClient.rigid_body_frame_listener, so a
+    MultiMocapEstimator created with start=False can be fed by passing its
+    on_frame method. Packets are delivered on a background thread, spaced by
+    their recorded receive times divided by speed; a speed of None replays
+    as fast as possible.
+    """
+
+    def __init__(self, path, listener, major=4, minor=1, speed=1.0, loop=False):
+        self.packets = list(read_packets(path))
+        self.listener = listener
+        self.major = major
+        self.minor = minor
+        self.speed = speed
+        self.loop = loop
+        self.decoder = RigidBodyFrameDecoder()
+        self.frame_count = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def run(self):
+        """Replay the recording on the calling thread."""
+        while not self.stop_event.is_set():
+            self.__replay_once()
+            if not self.loop or not self.packets:
+                return
+
+    def __replay_once(self):
+        if not self.packets:
+            return
+        first_time = self.packets[0][0]
+        start = time.monotonic()
+        for receive_time, packet in self.packets:
+            if self.stop_event.is_set():
+                return
+            if self.speed is not None:
+                delay = (receive_time - first_time) / self.speed
+                remaining = start + delay - time.monotonic()
+                if remaining > 0:
+                    self.stop_event.wait(remaining)
+            rigid_bodies = self.decoder.decode(packet, self.major, self.minor)
+            if rigid_bodies is None:
+                continue
+            self.frame_count += 1
+            self.listener(self.decoder.frame_number, self.decoder.timestamp,
+                          rigid_bodies)
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
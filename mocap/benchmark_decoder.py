@@ -0,0 +1,89 @@
+"""Microbenchmark: general-purpose NatNet decoder vs. the rigid-body fast path.
+
+Decodes the same NAT_FRAMEOFDATA packets with both paths of NatNetClient and
+reports the time per frame. Packets come from a recording made with
+PythonClient.PacketRecording, or are synthesized if none is given:
+
+    python benchmark_decoder.py --bodies 20 --markers 5
+    python benchmark_decoder.py --recording session.natnet --version 4.1
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+from PythonClient import FastDecoder, PacketRecording
+from PythonClient.NatNetClient import NatNetClient
+
+
+def synthesize_packets(count, bodies, markers, major, minor):
+    packets = []
+    for frame in range(count):
+        rigid_bodies = [
+            (i, (0.01 * frame, 0.5 * i, 0.02), (0.0, 0.0, 0.0, 1.0), 0.0005, True)
+            for i in range(bodies)
+        ]
+        marker_sets = [
+            ("body_%d" % i, [(0.1 * j, 0.0, 0.02) for j in range(markers)])
+            for i in range(bodies)
+        ]
+        labeled = [(j, (0.1 * j, 0.0, 0.02), 0.014) for j in range(bodies * markers)]
+        packets.append(FastDecoder.pack_frame_of_data(
+            frame, rigid_bodies, major, minor, marker_sets=marker_sets,
+            labeled_markers=labeled, timestamp=frame / 240))
+    return packets
+
+
+def time_client(packets, major, minor, fast, repeat):
+    client = NatNetClient()
+    client._NatNetClient__nat_net_requested_version = [major, minor, 0, 0]
+    client.set_use_fast_decoder(fast)
+    # A trivial listener, as a controller would install.
+    latest = {}
+    client.rigid_body_frame_listener = lambda n, t, rbs: latest.update(n=n)
+    if not fast:
+        client.rigid_body_listener = lambda i, pos, rot: latest.update(i=pos)
+    process = client._NatNetClient__process_message
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for packet in packets:
+            process(packet)
+        best = min(best, time.perf_counter() - start)
+    return best / len(packets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recording', help='packet recording to decode')
+    parser.add_argument('--version', default='4.1', help='NatNet version')
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--bodies', type=int, default=20)
+    parser.add_argument('--markers', type=int, default=4,
+                        help='markers per rigid body')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    major, minor = (int(v) for v in args.version.split('.'))
+
+    if args.recording:
+        packets = [p for _, p in PacketRecording.read_packets(args.recording)
+                   if FastDecoder.Header.unpack_from(p)[0] == FastDecoder.NAT_FRAMEOFDATA]
+        source = args.recording
+    else:
+        packets = synthesize_packets(args.frames, args.bodies, args.markers,
+                                     major, minor)
+        source = '%d synthetic frames, %d bodies' % (args.frames, args.bodies)
+
+    legacy = time_client(packets, major, minor, False, args.repeat)
+    fast = time_client(packets, major, minor, True, args.repeat)
+    print("Packets: %s (NatNet %d.%d)" % (source, major, minor))
+    print("  general-purpose: %8.1f us/frame" % (legacy * 1e6))
+    print("  fast path      : %8.1f us/frame" % (fast * 1e6))
+    print("  speedup        : %8.1fx" % (legacy / fast))
+    print("  CPU at 240 Hz  : %.1f%% -> %.1f%%" % (legacy * 24000, fast * 24000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+# Asynchronous, coalescing BLE command transport for several robots.
+#
+# Each robot gets one BleakClient connection and a latest-value-wins mailbox.
+# Producers (the NatNet thread, a Scenic simulation, ...) never block: they
+# overwrite the robot's mailbox, and a per-robot writer task on the
+# transport's event loop sends whatever is newest once the previous write has
+# finished. Setpoints that are overwritten before they could be sent are
+# counted as dropped instead of being queued and delivered late, so the radio
+# link itself provides the backpressure. Links which fail are reconnected with
+# exponential backoff.
+#
+# The transport runs its own asyncio event loop on a background thread. The
+# BLE client is created through client_factory, so tests can substitute the
+# stand-in peripherals of fake_gatt.py for real radios.
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from motor_protocol import MAX_WRITE_SIZE, SetpointEncoder
+
+CHAR_UUID = "FFE1"
+
+
+def encode_legacy(left, right):
+    """Encode motor speeds for the original single-letter firmware commands.
+
+    Those commands only know forward, backward and stop, so anything other
+    than both wheels turning the same way is sent as stop. Current firmware
+    understands the binary frames of motor_protocol.py, which are the
+    default.
+    """
+    if left > 0 and right > 0:
+        return b'F'
+    if left < 0 and right < 0:
+        return b'B'
+    return b'S'
+
+
+@dataclass
+class LinkStats:
+    """Counters for one robot's link. Latencies are in seconds, measured
+    from submission of a setpoint to completion of its write."""
+    connected: bool = False
+    sent: int = 0
+    dropped: int = 0     # overwritten in the mailbox before being sent
+    failed: int = 0      # writes which raised or timed out
+    reconnects: int = 0  # connection attempts after the first
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+
+    @property
+    def mean_latency(self):
+        return self.total_latency / self.sent if self.sent else 0.0
+
+
+class Mailbox:
+    """Thread-safe single slot holding the newest unsent setpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.item = None
+
+    def put(self, payload):
+        """Store a payload; returns True if an unsent one was overwritten."""
+        with self.lock:
+            dropped = self.item is not None
+            self.item = (payload, time.monotonic())
+            return dropped
+
+    def take(self):
+        """Remove and return (payload, submit_time), or None if empty."""
+        with self.lock:
+            item, self.item = self.item, None
+            return item
+
+    def restore(self, item):
+        """Put back an item whose write failed, unless it was superseded."""
+        with self.lock:
+            if self.item is None:
+                self.item = item
+
+    def empty(self):
+        with self.lock:
+            return self.item is None
+
+
+class RobotLink:
+    def __init__(self, robot_id, address):
+        self.robot_id = robot_id
+        self.address = address
+        self.mailbox = Mailbox()
+        self.stats = LinkStats()
+        self.client = None
+        self.wakeup = None  # asyncio.Event, created on the transport's loop
+        self.busy = False
+        self.task = None
+
+
+class BleTransport:
+    """Sends motor setpoints to several robots over BLE.
+
+    Args:
+        robots: Maps robot IDs (usually their rigid body IDs) to BLE
+            addresses or devices, as accepted by BleakClient.
+        encoder: Function turning (left, right) motor speeds in percent into
+            the bytes written by send; defaults to a
+            motor_protocol.SetpointEncoder.
+        client_factory: Called as client_factory(address,
+            disconnected_callback=...) to create a client; defaults to
+            BleakClient.
+        min_interval: Minimum time between writes to the same robot, to
+            stay within what the BLE module can forward to its UART.
+        write_timeout: Writes taking longer than this count as failed and
+            cause a reconnect.
+        backoff_initial, backoff_max: Bounds of the exponential backoff
+            between reconnection attempts.
+
+    It can be used directly from any thread through submit, or as a
+    transport for scenic.simulators.realrobot through connect, send and
+    close.
+    """
+
+    def __init__(self, robots, char_uuid=CHAR_UUID, encoder=None,
+                 client_factory=None, min_interval=0.0, write_timeout=1.0,
+                 backoff_initial=0.25, backoff_max=8.0, response=False):
+        self.links = {robot_id: RobotLink(robot_id, address)
+                      for robot_id, address in robots.items()}
+        self.char_uuid = char_uuid
+        self.encoder = SetpointEncoder() if encoder is None else encoder
+        self.client_factory = client_factory
+        self.min_interval = min_interval
+        self.write_timeout = write_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.response = response
+        self.loop = None
+        self.thread = None
+        self.closing = False
+
+    # Lifecycle
+
+    def start(self):
+        """Start the event loop thread and begin connecting to every robot."""
+        if self.thread is not None:
+            return
+        if self.client_factory is None:
+            from bleak import BleakClient
+            self.client_factory = BleakClient
+        self.closing = False
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.call_soon(started.set)
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait()
+        asyncio.run_coroutine_threadsafe(self.__start_links(), self.loop).result()
+
+    async def __start_links(self):
+        for link in self.links.values():
+            link.wakeup = asyncio.Event()
+            if not link.mailbox.empty():
+                link.wakeup.set()
+            link.task = asyncio.ensure_future(self.__run_link(link))
+
+    def close(self):
+        """Stop all writer tasks, disconnect and stop the event loop.
+
+        Setpoints still waiting for connected robots (typically a final stop
+        command) are flushed first, for at most write_timeout.
+        """
+        if self.thread is None:
+            return
+        deadline = time.monotonic() + self.write_timeout
+        while any(link.stats.connected and (link.busy or not link.mailbox.empty())
+                  for link in self.links.values()):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.001)
+        self.closing = True
+        future = asyncio.run_coroutine_threadsafe(self.__stop_links(), self.loop)
+        future.result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.thread = None
+        self.loop = None
+
+    async def __stop_links(self):
+        for link in self.links.values():
+            link.wakeup.set()
+        await asyncio.gather(*(link.task for link in self.links.values()),
+                             return_exceptions=True)
+        for link in self.links.values():
+            await self.__disconnect(link)
+
+    # Producer side (any thread)
+
+    def submit(self, robot_id, payload):
+        """Make payload the next thing written to the given robot.
+
+        Never blocks. If an earlier payload for the robot has not been
+        written yet it is replaced, and counted as dropped.
+        """
+        if len(payload) > MAX_WRITE_SIZE:
+            raise ValueError(f"payload of {len(payload)} bytes does not fit "
+                             f"in one {MAX_WRITE_SIZE}-byte write")
+        link = self.links[robot_id]
+        if link.mailbox.put(bytes(payload)):
+            link.stats.dropped += 1
+        loop = self.loop
+        if loop is not None and link.wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(link.wakeup.set)
+            except RuntimeError:
+                pass  # closed concurrently; the payload is sent on restart
+
+    def busy(self, robot_id):
+        """Whether a write to the robot is in flight or waiting to be sent."""
+        link = self.links[robot_id]
+        return link.busy or not link.mailbox.empty()
+
+    def stats(self):
+        """Snapshot of the LinkStats of every robot, keyed by robot ID."""
+        return {robot_id: replace(link.stats)
+                for robot_id, link in self.links.items()}
+
+    def wait_idle(self, timeout=None):
+        """Wait until every submitted payload has been written or dropped.
+
+        Returns False if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(self.busy(robot_id) for robot_id in self.links):
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    # scenic.simulators.realrobot Transport interface
+
+    def connect(self, robot_ids):
+        missing = set(robot_ids) - set(self.links)
+        if missing:
+            raise KeyError(f"no BLE address for robots {sorted(missing)}")
+        self.start()
+
+    def send(self, commands):
+        for robot_id, (left, right) in commands.items():
+            self.submit(robot_id, self.encoder(left, right))
+
+    # Event loop side
+
+    async def __run_link(self, link):
+        backoff = self.backoff_initial
+        first_attempt = True
+        while not self.closing:
+            if link.client is None or not link.client.is_connected:
+                if not first_attempt:
+                    link.stats.reconnects += 1
+                first_attempt = False
+                if await self.__connect(link):
+                    backoff = self.backoff_initial
+                else:
+                    await self.__sleep(link, backoff)
+                    backoff = min(2 * backoff, self.backoff_max)
+                continue
+
+            await link.wakeup.wait()
+            link.wakeup.clear()
+            if link.client is None or not link.client.is_connected:
+                continue
+            item = link.mailbox.take()
+            if item is None or self.closing:
+                continue
+            payload, submitted = item
+            link.busy = True
+            try:
+                await asyncio.wait_for(
+                    link.client.write_gatt_char(self.char_uuid, payload,
+                                                response=self.response),
+                    self.write_timeout)
+            except Exception:
+                link.stats.failed += 1
+                link.mailbox.restore(item)
+                await self.__disconnect(link)
+            else:
+                latency = time.monotonic() - submitted
+                stats = link.stats
+                stats.sent += 1
+                stats.last_latency = latency
+                stats.total_latency += latency
+                stats.max_latency = max(stats.max_latency, latency)
+                if self.min_interval > 0:
+                    await asyncio.sleep(self.min_interval)
+            finally:
+                link.busy = False
+            if not link.mailbox.empty():
+                link.wakeup.set()
+
+    async def __connect(self, link):
+        def on_disconnect(client):
+            link.stats.connected = False
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(link.wakeup.set)
+
+        try:
+            link.client = self.client_factory(link.address,
+                                              disconnected_callback=on_disconnect)
+            await link.client.connect()
+        except Exception:
+            link.client = None
+            return False
+        link.stats.connected = True
+        if not link.mailbox.empty():
+            link.wakeup.set()
+        return True
+
+    async def __disconnect(self, link):
+        client, link.client = link.client, None
+        link.stats.connected = False
+        if client is not None:
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+
+    async def __sleep(self, link, delay):
+        # Sleep for the backoff delay, but wake up early when closing.
+        try:
+            await asyncio.wait_for(self.__wait_closing(link), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def __wait_closing(self, link):
+        while not self.closing:
+            await link.wakeup.wait()
+            link.wakeup.clear()
@@ -0,0 +1,83 @@
+# Stand-in BLE peripherals for testing without radios.
+#
+# FakeGattServer plays the part of a set of HM-10 modules: its
+# client_factory creates clients with the same interface as BleakClient (as
+# far as ble_transport.py uses it), and every write is recorded per address
+# and optionally passed to an on_write callback, e.g. a firmware emulator.
+# Links can be made slow, made to refuse connections, or dropped to exercise
+# the transport's coalescing and reconnection logic.
+
+import asyncio
+import threading
+import time
+
+
+class FakeGattServer:
+    def __init__(self, write_delay=0.0, connect_delay=0.0, on_write=None):
+        self.write_delay = write_delay
+        self.connect_delay = connect_delay
+        self.on_write = on_write
+        self.lock = threading.Lock()
+        self.writes = {}            # address -> [(receive_time, bytes)]
+        self.refuse_connections = {}  # address -> number of attempts to refuse
+        self.connect_attempts = {}  # address -> count
+        self.clients = {}           # address -> currently connected client
+
+    def client_factory(self, address, disconnected_callback=None):
+        return FakeBleakClient(self, address, disconnected_callback)
+
+    def received(self, address):
+        """The payloads written to the given address, in order."""
+        with self.lock:
+            return [payload for _, payload in self.writes.get(address, ())]
+
+    def drop_link(self, address):
+        """Simulate the peripheral going out of range."""
+        client = self.clients.pop(address, None)
+        if client is not None:
+            client._drop()
+
+
+class FakeBleakClient:
+    def __init__(self, server, address, disconnected_callback=None):
+        self.server = server
+        self.address = address
+        self.disconnected_callback = disconnected_callback
+        self.is_connected = False
+
+    async def connect(self):
+        server = self.server
+        server.connect_attempts[self.address] = server.connect_attempts.get(self.address, 0) + 1
+        if server.connect_delay:
+            await asyncio.sleep(server.connect_delay)
+        remaining = server.refuse_connections.get(self.address, 0)
+        if remaining:
+            server.refuse_connections[self.address] = remaining - 1
+            raise OSError(f"connection to {self.address} refused")
+        self.is_connected = True
+        server.clients[self.address] = self
+        return True
+
+    async def disconnect(self):
+        self.is_connected = False
+        if self.server.clients.get(self.address) is self:
+            del self.server.clients[self.address]
+        return True
+
+    async def write_gatt_char(self, char_specifier, data, response=False):
+        if not self.is_connected:
+            raise OSError(f"{self.address} is not connected")
+        if self.server.write_delay:
+            await asyncio.sleep(self.server.write_delay)
+        if not self.is_connected:
+            raise OSError(f"{self.address} disconnected during write")
+        payload = bytes(data)
+        with self.server.lock:
+            self.server.writes.setdefault(self.address, []).append((time.monotonic(), payload))
+        if self.server.on_write:
+            self.server.on_write(self.address, payload)
+
+    def _drop(self):
+        self.is_connected = False
+        if self.disconnected_callback:
+            self.disconnected_callback(self)
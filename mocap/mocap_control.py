@@ -1,17 +1,19 @@
 import asyncio
 import threading
-from bleak import BleakScanner, BleakClient
+import time
+from bleak import BleakScanner
 from PythonClient.NatNetClient import NatNetClient
+from ble_transport import BleTransport
 
 # --- CONFIGURATION ---
 SERVICE_UUID = "FFE0"
 CHAR_UUID    = "FFE1"
 TARGET_NAMES = {"HMSoft", "HM-10", "DSD TECH"}
 TARGET_ID    = 15
+DRIVE_SPEED  = 20  # percent
 
 # --- GLOBAL STATE ---
-ble_client = None
-main_loop = None
+transport = None
 current_state = None  # To track what we last sent
 print_counter = 0
 
@@ -25,19 +27,15 @@ async def find_hm10():
     return None
 
 # 2. HELPER TO SEND COMMAND SAFELY
-def send_ble_command(cmd_bytes):
-    """Schedules a BLE write on the main asyncio loop."""
-    global ble_client, main_loop
-    if ble_client and ble_client.is_connected and main_loop:
-        try:
-            # We use fire-and-forget (run_coroutine_threadsafe)
-            asyncio.run_coroutine_threadsafe(
-                ble_client.write_gatt_char(CHAR_UUID, cmd_bytes, response=False),
-                main_loop
-            )
-            print(f"Sent command: {cmd_bytes}")
-        except Exception as e:
-            print(f"Failed to schedule write: {e}")
+def send_ble_command(left, right):
+    """Hands a motor setpoint (in percent) to the BLE transport without blocking.
+
+    The transport only ever sends the newest command, so commands issued
+    faster than the link can carry them are dropped instead of queued.
+    """
+    if transport is not None:
+        transport.send({TARGET_ID: (left, right)})
+        print(f"Sent command: L={left} R={right}")
 
 # 3. NATNET LISTENER (Runs at 120Hz)
 def pololu_rigid_body_listener(id, pos, rot):
@@ -45,17 +43,17 @@ def pololu_rigid_body_listener(id, pos, rot):
     
     if id == TARGET_ID:
         # Determine what the robot SHOULD be doing
-        desired_command = b'S'
+        desired_command = (0, 0)
         if pos[0] > -0.9:
-            desired_command = b'F'
+            desired_command = (DRIVE_SPEED, DRIVE_SPEED)
         elif pos[0] < -1.1:
-            desired_command = b'B'
+            desired_command = (-DRIVE_SPEED, -DRIVE_SPEED)
         
         # --- CRITICAL FIX: STATE CHECK ---
         # Only send if the command is DIFFERENT from the last one we sent
         if desired_command != current_state:
             print(f"Position: {pos}, Desired Command: {desired_command}")
-            send_ble_command(desired_command)
+            send_ble_command(*desired_command)
             current_state = desired_command
 
 # 4. START NATNET
@@ -70,34 +68,35 @@ def start_natnet():
     if not streaming_client.run('d'):
         print("ERROR: NatNet failed to start.")
 
-# 5. MAIN ASYNC LOOP
-async def main():
-    global ble_client, main_loop
-    
-    # Capture the loop so the thread can access it
-    main_loop = asyncio.get_running_loop()
+# 5. MAIN LOOP
+def main():
+    global transport
 
-    # Connect to BLE
-    dev = await find_hm10()
+    dev = asyncio.run(find_hm10())
     if not dev:
         print("Device not found.")
         return
 
-    async with BleakClient(dev) as client:
-        ble_client = client
-        print("BLE Connected!")
-        
+    transport = BleTransport({TARGET_ID: dev.address}, char_uuid=CHAR_UUID)
+    transport.start()
+    try:
         # Start NatNet in a separate thread
         t = threading.Thread(target=start_natnet, daemon=True)
         t.start()
         print("NatNet started. Move robot to trigger commands.")
 
-        # Keep the script alive forever
+        # Keep the script alive forever, reporting link health
         while True:
-            await asyncio.sleep(1)
+            time.sleep(5)
+            stats = transport.stats()[TARGET_ID]
+            print(f"BLE connected={stats.connected} sent={stats.sent} "
+                  f"dropped={stats.dropped} reconnects={stats.reconnects} "
+                  f"latency={1000 * stats.mean_latency:.1f} ms")
+    finally:
+        transport.close()
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        main()
     except KeyboardInterrupt:
-        print("Stopping...")
\ No newline at end of file
+        print("Stopping...")
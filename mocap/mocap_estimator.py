@@ -106,6 +106,212 @@ class MocapEstimator:
             )
         
         
+
+HISTORY_DTYPE = np.dtype([
+    ("frame", np.int64),        # NatNet frame number
+    ("timestamp", np.float64),  # NatNet server timestamp (s)
+    ("received", np.float64),   # local time.monotonic() at receipt (s)
+    ("pose", np.float64, (7,)), # x, y, z, qx, qy, qz, qw
+])
+
+
+def slerp(q0, q1, u):
+    """Spherical linear interpolation between unit quaternions [x, y, z, w].
+
+    Values of u outside [0, 1] extrapolate along the same great circle.
+    """
+    q0 = np.asarray(q0, dtype=np.float64)
+    q1 = np.asarray(q1, dtype=np.float64)
+    dot = np.dot(q0, q1)
+    if dot < 0.0:  # take the short way around
+        q1 = -q1
+        dot = -dot
+    if dot > 0.9995:  # nearly parallel: fall back to normalized lerp
+        q = q0 + u * (q1 - q0)
+        return q / np.linalg.norm(q)
+    theta = np.arccos(min(dot, 1.0))
+    sin_theta = np.sin(theta)
+    return (np.sin((1 - u) * theta) * q0 + np.sin(u * theta) * q1) / sin_theta
+
+
+class PoseHistory:
+    """Fixed-size ring buffer of timestamped poses for one rigid body.
+
+    There must be a single writer (the NatNet thread) but there may be any
+    number of readers, none of which take a lock. The writer fills a slot
+    and only then publishes it by bumping ``count``; readers copy what they
+    need and retry if the writer lapped them in the meantime (a seqlock).
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self.buffer = np.zeros(size, dtype=HISTORY_DTYPE)
+        self.count = 0  # total number of samples ever written
+
+    def append(self, frame, timestamp, received, pos, rot):
+        slot = self.buffer[self.count % self.size]
+        slot["frame"] = frame
+        slot["timestamp"] = timestamp
+        slot["received"] = received
+        slot["pose"][:3] = pos
+        slot["pose"][3:] = rot
+        self.count += 1
+
+    def latest(self):
+        """Copy of the newest sample, or None if there is none yet."""
+        while True:
+            count = self.count
+            if count == 0:
+                return None
+            sample = self.buffer[(count - 1) % self.size].copy()
+            if self.count - count < self.size - 1:
+                return sample
+
+    def last(self, n):
+        """Copy of up to the n newest samples, oldest first."""
+        while True:
+            count = self.count
+            n = min(n, count, self.size - 1)
+            start = (count - n) % self.size
+            if start + n <= self.size:
+                samples = self.buffer[start:start + n].copy()
+            else:
+                samples = np.concatenate(
+                    (self.buffer[start:], self.buffer[:start + n - self.size]))
+            # Slots overwritten while copying belong to samples older than
+            # the ones we wanted only if the writer advanced less than the
+            # free space left in the ring.
+            if self.count - count < self.size - n:
+                return samples
+
+
+class MultiMocapEstimator:
+    """Tracks several rigid bodies from a single NatNet stream.
+
+    Every valid rigid body in each frame is appended to a per-body
+    `PoseHistory`, so controllers can read the latest pose, a window of
+    recent history, or a pose interpolated to an arbitrary server time
+    without contending with the 240 Hz NatNet callback.
+
+    Args:
+        target_ids: IDs of the rigid bodies to track, or None to track
+            every rigid body in the stream.
+        history_size: Number of samples kept per rigid body.
+        start: Whether to connect to the NatNet server immediately. Frames
+            can also be fed in manually through `on_frame`, e.g. from a
+            recorded session.
+    """
+
+    def __init__(self, target_ids=None, history_size=256, server_ip="169.254.10.221",
+                 client_ip="169.254.10.222", use_multicast=False, start=True):
+        self.target_ids = None if target_ids is None else set(target_ids)
+        self.history_size = history_size
+        self.histories = {}
+        self.server_ip = server_ip
+        self.client_ip = client_ip
+        self.use_multicast = use_multicast
+        self.streaming_client = None
+        if start:
+            self.start()
+
+    def start(self):
+        print("------------------------------")
+        print("Initializing MultiMocapEstimator:")
+        print(f"* Target IDs: {'all' if self.target_ids is None else sorted(self.target_ids)}")
+        print(f"* Server IP: {self.server_ip}")
+        print(f"* Client IP: {self.client_ip}")
+        print("------------------------------")
+
+        self.streaming_client = NatNetClient()
+        self.streaming_client.set_print_level(0)
+        self.streaming_client.set_client_address(self.client_ip)
+        self.streaming_client.set_server_address(self.server_ip)
+        self.streaming_client.set_use_multicast(self.use_multicast)
+        self.streaming_client.set_use_fast_decoder(True)
+        self.streaming_client.rigid_body_frame_listener = self.on_frame
+        if not self.streaming_client.run('d'):
+            print("ERROR: Could not start streaming client.")
+            self.shutdown()
+
+    def shutdown(self):
+        if self.streaming_client is not None:
+            self.streaming_client.shutdown()
+            self.streaming_client = None
+
+    def on_frame(self, frame_number, timestamp, rigid_bodies):
+        """Record one decoded frame (see FastDecoder.RIGID_BODY_DTYPE)."""
+        received = time.monotonic()
+        for row in rigid_bodies:
+            if not row["valid"]:
+                continue
+            body_id = int(row["id"])
+            history = self.histories.get(body_id)
+            if history is None:
+                if self.target_ids is not None and body_id not in self.target_ids:
+                    continue
+                history = self.histories[body_id] = PoseHistory(self.history_size)
+            history.append(frame_number, timestamp, received, row["pos"], row["quat"])
+
+    def ids(self):
+        return sorted(self.histories)
+
+    def get_pose(self, body_id):
+        """Latest pose of the rigid body, or None if it has not been seen."""
+        history = self.histories.get(body_id)
+        sample = history.latest() if history else None
+        return None if sample is None else Pose(*sample["pose"].tolist())
+
+    def get_history(self, body_id, n):
+        """Up to n most recent samples, oldest first, as a HISTORY_DTYPE array."""
+        history = self.histories.get(body_id)
+        if history is None:
+            return np.zeros(0, dtype=HISTORY_DTYPE)
+        return history.last(n)
+
+    def server_time_now(self, body_id=None):
+        """Estimate of the current NatNet server time.
+
+        Extrapolated from the newest sample (of the given body, or of any
+        body) by the local time elapsed since it was received.
+        """
+        if body_id is None:
+            samples = [h.latest() for h in list(self.histories.values())]
+        else:
+            samples = [self.histories[body_id].latest()] if body_id in self.histories else []
+        samples = [s for s in samples if s is not None]
+        if not samples:
+            return None
+        newest = max(samples, key=lambda s: s["received"])
+        return float(newest["timestamp"] + (time.monotonic() - newest["received"]))
+
+    def get_pose_at(self, body_id, t, max_extrapolation=0.05):
+        """Pose of the rigid body at server time t.
+
+        Interpolates between the samples bracketing t (linearly for position,
+        slerp for orientation). Beyond the newest sample the motion is
+        extrapolated for at most max_extrapolation seconds; before the
+        oldest retained sample the oldest pose is returned.
+        """
+        samples = self.get_history(body_id, self.history_size)
+        if len(samples) == 0:
+            return None
+        times = samples["timestamp"]
+        poses = samples["pose"]
+        if len(samples) == 1 or t <= times[0]:
+            return Pose(*(poses[0] if t <= times[0] else poses[-1]).tolist())
+        if t >= times[-1]:
+            t = min(t, times[-1] + max_extrapolation)
+            i = len(samples) - 1
+        else:
+            i = int(np.searchsorted(times, t, side="right"))
+        t0, t1 = times[i - 1], times[i]
+        u = 0.0 if t1 == t0 else (t - t0) / (t1 - t0)
+        p0, p1 = poses[i - 1], poses[i]
+        pos = p0[:3] + u * (p1[:3] - p0[:3])
+        rot = slerp(p0[3:], p1[3:], u)
+        return Pose(*pos.tolist(), *rot.tolist())
+
+
 if __name__ == "__main__":
     est = MocapEstimator(target_id=8)
     while True:
@@ -0,0 +1,249 @@
+# Binary motor-setpoint protocol for the BLE link to the robots.
+#
+# Every command is one self-contained frame (little endian):
+#
+#   offset  size  field
+#        0     1  sync byte, 0xA5
+#        1     1  flags: bit 0 = duration present, bit 1 = resync
+#        2     2  sequence number (uint16, wraps)
+#        4     2  left speed  (int16, hundredths of a percent, +-10000)
+#        6     2  right speed (int16, hundredths of a percent, +-10000)
+#      [ 8     2  duration in milliseconds (uint16), if flag bit 0 ]
+#      8/10    2  CRC-16/CCITT-FALSE of bytes 1 up to the CRC
+#
+# A frame is 10 bytes, or 12 with a duration, so a single 20-byte HM-10
+# write always carries a whole differential-drive command. The robot drops
+# frames with a bad CRC and frames whose sequence number is not newer than
+# the last one it applied; the resync flag (set on the first frame of each
+# encoder) makes it accept the sequence number unconditionally. With a
+# duration the robot stops by itself once it expires, unless a newer command
+# arrives first.
+#
+# The firmware parser is in pololu-3pi-2040/src/bluetooth_pololu.c;
+# FrameParser below mirrors it byte for byte. Until the first valid frame
+# arrives, the firmware still accepts the legacy single-byte commands F, B
+# and S outside frames. The bytes of a frame which fails its checks are
+# never taken as legacy commands (a corrupted frame must not move the
+# robot), only searched for the next sync byte.
+
+import binascii
+import struct
+from dataclasses import dataclass
+
+SYNC = 0xA5
+FLAG_DURATION = 0x01
+FLAG_RESYNC = 0x02
+
+SPEED_SCALE = 100  # protocol units per percent
+MAX_SPEED = 100 * SPEED_SCALE
+MAX_DURATION_MS = 0xFFFF
+MAX_WRITE_SIZE = 20  # HM-10 GATT write limit
+
+Header = struct.Struct('<BBHhh')
+Duration = struct.Struct('<H')
+Crc = struct.Struct('<H')
+FRAME_SIZE = Header.size + Crc.size
+FRAME_SIZE_WITH_DURATION = FRAME_SIZE + Duration.size
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (polynomial 0x1021, initial value 0xFFFF)."""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def speed_to_units(percent):
+    units = int(round(percent * SPEED_SCALE))
+    return max(-MAX_SPEED, min(MAX_SPEED, units))
+
+
+def duration_to_ms(duration):
+    return max(0, min(MAX_DURATION_MS, int(round(duration * 1000))))
+
+
+@dataclass(frozen=True)
+class Setpoint:
+    """A decoded frame. Speeds are in percent, duration in seconds."""
+    seq: int
+    left: float
+    right: float
+    duration: float = None
+    resync: bool = False
+
+
+def frame_size(flags):
+    return FRAME_SIZE_WITH_DURATION if flags & FLAG_DURATION else FRAME_SIZE
+
+
+def pack_into(buffer, offset, seq, left, right, duration=None, resync=False):
+    """Encode one frame into buffer at offset; returns the offset after it."""
+    flags = FLAG_RESYNC if resync else 0
+    if duration is not None:
+        flags |= FLAG_DURATION
+    Header.pack_into(buffer, offset, SYNC, flags, seq & 0xFFFF,
+                     speed_to_units(left), speed_to_units(right))
+    end = offset + Header.size
+    if duration is not None:
+        Duration.pack_into(buffer, end, duration_to_ms(duration))
+        end += Duration.size
+    crc = crc16(memoryview(buffer)[offset + 1:end])
+    Crc.pack_into(buffer, end, crc)
+    return end + Crc.size
+
+
+def encode(seq, left, right, duration=None, resync=False):
+    """Encode one frame."""
+    size = FRAME_SIZE if duration is None else FRAME_SIZE_WITH_DURATION
+    buffer = bytearray(size)
+    pack_into(buffer, 0, seq, left, right, duration, resync)
+    return bytes(buffer)
+
+
+def decode(frame):
+    """Decode exactly one frame, raising ValueError if it is malformed."""
+    if len(frame) < FRAME_SIZE or frame[0] != SYNC:
+        raise ValueError("not a setpoint frame")
+    _, flags, seq, left, right = Header.unpack_from(frame, 0)
+    if flags & ~(FLAG_DURATION | FLAG_RESYNC):
+        raise ValueError(f"unknown flags 0x{flags:02X}")
+    size = frame_size(flags)
+    if len(frame) != size:
+        raise ValueError(f"frame is {len(frame)} bytes, expected {size}")
+    crc, = Crc.unpack_from(frame, size - Crc.size)
+    if crc != crc16(frame[1:size - Crc.size]):
+        raise ValueError("CRC mismatch")
+    duration = None
+    if flags & FLAG_DURATION:
+        duration = Duration.unpack_from(frame, Header.size)[0] / 1000
+    return Setpoint(seq, left / SPEED_SCALE, right / SPEED_SCALE, duration,
+                    bool(flags & FLAG_RESYNC))
+
+
+def split_writes(data, max_write=MAX_WRITE_SIZE):
+    """Split a buffer of frames into writes of at most max_write bytes.
+
+    Frames are never split across writes, so each write can be lost or
+    reordered on its own without corrupting its neighbours.
+    """
+    writes = []
+    start = offset = 0
+    view = memoryview(data)
+    while offset < len(data):
+        size = frame_size(data[offset + 1])
+        if offset + size - start > max_write:
+            writes.append(bytes(view[start:offset]))
+            start = offset
+        offset += size
+    if start < len(data):
+        writes.append(bytes(view[start:]))
+    return writes
+
+
+class SetpointEncoder:
+    """Numbers and encodes setpoints for one link.
+
+    Can be passed as the encoder of ble_transport.BleTransport. The first
+    frame it produces carries the resync flag, so a robot which saw a
+    previous session with higher sequence numbers still accepts it.
+
+    Args:
+        duration: Default command duration in seconds (None for commands
+            which hold until replaced).
+    """
+
+    def __init__(self, duration=None):
+        self.duration = duration
+        self.seq = 0
+        self.resync = True
+
+    def __next_seq(self):
+        seq, resync = self.seq, self.resync
+        self.seq = (self.seq + 1) & 0xFFFF
+        self.resync = False
+        return seq, resync
+
+    def __call__(self, left, right, duration=None):
+        if duration is None:
+            duration = self.duration
+        seq, resync = self.__next_seq()
+        return encode(seq, left, right, duration, resync)
+
+    def encode_batch(self, commands):
+        """Encode (left, right) or (left, right, duration) commands into one
+        contiguous buffer of consecutive frames."""
+        commands = list(commands)
+        buffer = bytearray(len(commands) * FRAME_SIZE_WITH_DURATION)
+        offset = 0
+        for command in commands:
+            left, right = command[0], command[1]
+            duration = command[2] if len(command) > 2 else self.duration
+            seq, resync = self.__next_seq()
+            offset = pack_into(buffer, offset, seq, left, right, duration, resync)
+        return bytes(buffer[:offset])
+
+
+class FrameParser:
+    """Incremental parser for a byte stream of frames, as run on the robot.
+
+    Bytes may arrive split or merged arbitrarily. Each complete, valid and
+    sufficiently new frame is returned by feed; until the first valid frame,
+    the legacy commands F, B and S outside frames are returned as
+    single-character strings.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.framed = False  # whether a valid frame has been seen
+        self.quiet = 0  # bytes left of a rejected frame, not legacy commands
+        self.last_seq = None
+        self.crc_errors = 0
+        self.stale = 0
+
+    def feed(self, data):
+        out = []
+        buffer = self.buffer
+        buffer += data
+        i = 0
+        while i < len(buffer):
+            byte = buffer[i]
+            if byte != SYNC:
+                if self.quiet:
+                    self.quiet -= 1
+                elif not self.framed and byte in b'FBS':
+                    out.append(chr(byte))
+                i += 1
+                continue
+            if len(buffer) - i < 2:
+                break
+            flags = buffer[i + 1]
+            size = frame_size(flags)
+            try:
+                if flags & ~(FLAG_DURATION | FLAG_RESYNC):
+                    # No need to wait for the rest of the frame
+                    raise ValueError(f"unknown flags 0x{flags:02X}")
+                if len(buffer) - i < size:
+                    break
+                setpoint = decode(bytes(buffer[i:i + size]))
+            except ValueError:
+                # Not a frame after all: resume hunting after the sync byte,
+                # ignoring the rest of the rejected frame (as long as the
+                # longest frame, since its flags may be corrupted too)
+                self.crc_errors += 1
+                self.quiet = max(self.quiet - 1, FRAME_SIZE_WITH_DURATION - 1)
+                i += 1
+                continue
+            i += size
+            self.framed = True
+            self.quiet = 0
+            if self.accept(setpoint):
+                out.append(setpoint)
+        del buffer[:i]
+        return out
+
+    def accept(self, setpoint):
+        if not setpoint.resync and self.last_seq is not None:
+            delta = (setpoint.seq - self.last_seq) & 0xFFFF
+            if delta == 0 or delta >= 0x8000:
+                self.stale += 1
+                return False
+        self.last_seq = setpoint.seq
+        return True
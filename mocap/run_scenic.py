@@ -0,0 +1,90 @@
+# Run a Scenic scenario on the real robots, using motion capture for poses.
+#
+# Robots in the scenario are matched to the NatNet stream by their
+# rigidBodyId property (see scenic.simulators.realrobot.model). Poses come
+# either from a live Motive server or, with --recording, from a packet
+# recording made with PythonClient.PacketRecording.PacketRecorder.
+#
+# Motor setpoints are sent over BLE to the robots given with --robot
+# ID=ADDRESS. Without any --robot options they go through a loopback
+# transport which just prints them, so this can be used to dry-run a scenario
+# against recorded tracking data before driving any hardware.
+
+import argparse
+import os
+import sys
+
+import scenic
+from scenic.simulators.realrobot import LoopbackTransport, RealRobotSimulator
+
+sys.path.append(os.path.dirname(__file__))
+from ble_transport import BleTransport
+from mocap_estimator import MultiMocapEstimator
+from PythonClient.PacketRecording import PacketReplayer
+
+
+def print_commands(commands):
+    for robot_id, (left, right) in sorted(commands.items()):
+        print(f"  robot {robot_id}: L={left:6.1f} R={right:6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('scenario', help='Scenic file to run')
+    parser.add_argument('--recording', help='replay this packet recording '
+                        'instead of connecting to Motive')
+    parser.add_argument('--version', default='4.1',
+                        help='NatNet version of the recording (default 4.1)')
+    parser.add_argument('--server', default="169.254.10.221")
+    parser.add_argument('--client', default="169.254.10.222")
+    parser.add_argument('--timestep', type=float, default=0.05)
+    parser.add_argument('--time', type=int, default=None,
+                        help='number of time steps to run')
+    parser.add_argument('--robot', action='append', default=[],
+                        metavar='ID=ADDRESS',
+                        help='send setpoints for rigid body ID to this BLE '
+                        'address (may be repeated)')
+    parser.add_argument('--quiet', action='store_true',
+                        help='do not print motor setpoints')
+    args = parser.parse_args()
+
+    estimator = MultiMocapEstimator(server_ip=args.server, client_ip=args.client,
+                                    start=args.recording is None)
+    replayer = None
+    if args.recording:
+        major, minor = (int(part) for part in args.version.split('.'))
+        replayer = PacketReplayer(args.recording, estimator.on_frame,
+                                  major=major, minor=minor)
+        replayer.start()
+
+    if args.robot:
+        robots = {}
+        for spec in args.robot:
+            robot_id, address = spec.split('=', 1)
+            robots[int(robot_id)] = address
+        transport = BleTransport(robots)
+    else:
+        transport = LoopbackTransport(None if args.quiet else print_commands)
+    simulator = RealRobotSimulator(estimator, transport, timestep=args.timestep)
+    scenario = scenic.scenarioFromFile(args.scenario, mode2D=True)
+    try:
+        scene, _ = scenario.generate()
+        simulation = simulator.simulate(scene, maxSteps=args.time, verbosity=1)
+        if simulation is not None:
+            print(f"Deadline misses: {simulation.deadlineMisses} "
+                  f"of {len(simulation.stepSlack)} steps")
+        if isinstance(transport, BleTransport):
+            for robot_id, stats in sorted(transport.stats().items()):
+                print(f"Robot {robot_id}: sent {stats.sent}, dropped "
+                      f"{stats.dropped}, failed {stats.failed}, reconnects "
+                      f"{stats.reconnects}, mean latency "
+                      f"{1000 * stats.mean_latency:.1f} ms")
+    finally:
+        simulator.destroy()
+        if replayer is not None:
+            replayer.stop()
+        estimator.shutdown()
+
+
+if __name__ == "__main__":
+    main()
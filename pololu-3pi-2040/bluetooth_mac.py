@@ -1,7 +1,13 @@
 # bluetooth_mac.py  (macOS + Bleak ≥ 1.0)
 import asyncio
+import os
+import sys
 from bleak import BleakScanner, BleakClient
 
+# Binary setpoint frames, shared with the mocap tools
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "mocap"))
+from motor_protocol import SetpointEncoder
+
 SERVICE_UUID = "FFE0"
 CHAR_UUID    = "FFE1"
 
@@ -29,15 +35,22 @@ async def main():
     async with BleakClient(dev) as client:
         # subscribe notification (optional)
         await client.start_notify(CHAR_UUID, lambda c, d: None)
-        # then send command
+        # then send commands: F/B/S as before, or "<left> <right> [seconds]"
+        # in percent, sent as binary setpoint frames
+        encoder = SetpointEncoder()
         while True:
-            command = input("Enter command: F, B, S: ")
-            if command == "F":
-                await write_cmd(client, b"F")
-            elif command == "B":
-                await write_cmd(client, b"B")
-            elif command == "S":
-                await write_cmd(client, b"S")
+            command = input("Enter command: F, B, S or LEFT RIGHT [SECONDS]: ")
+            if command in ("F", "B", "S"):
+                await write_cmd(client, command.encode())
+                continue
+            try:
+                values = [float(v) for v in command.split()]
+            except ValueError:
+                values = []
+            if len(values) == 2:
+                await write_cmd(client, encoder(*values))
+            elif len(values) == 3:
+                await write_cmd(client, encoder(values[0], values[1], duration=values[2]))
             else:
                 print("Invalid command")
 
@@ -14,6 +14,8 @@
 #define R_PWM_PIN      14
 #define L_PWM_PIN      15
 
+#define SPEED_MAX      10000
+
 static uint slice7;
 
 static void pwm_init_20k_on_pin(uint pin){
@@ -27,22 +29,132 @@ static void pwm_init_20k_on_pin(uint pin){
     slice7 = slice;
 }
 
-static inline void set_motor_speed(int l_pct, int r_pct){
+// Speeds in hundredths of a percent (-10000..10000), as in the binary protocol.
+static inline void set_motor_speed(int l_spd, int r_spd){
     gpio_set_function(25, 0);
-    if (l_pct>100) l_pct=100; if (l_pct<-100) l_pct=-100;
-    if (r_pct>100) r_pct=100; if (r_pct<-100) r_pct=-100;
-    gpio_put(L_DIR_PIN, l_pct>=0);
-    gpio_put(R_DIR_PIN, r_pct>=0);
-    uint16_t top = pwm_hw->slice[slice7].top;
-    uint16_t ll = (uint16_t)(top * (l_pct>=0 ? l_pct : -l_pct) / 100);
-    uint16_t rl = (uint16_t)(top * (r_pct>=0 ? r_pct : -r_pct) / 100);
+    if (l_spd>SPEED_MAX) l_spd=SPEED_MAX; if (l_spd<-SPEED_MAX) l_spd=-SPEED_MAX;
+    if (r_spd>SPEED_MAX) r_spd=SPEED_MAX; if (r_spd<-SPEED_MAX) r_spd=-SPEED_MAX;
+    gpio_put(L_DIR_PIN, l_spd>=0);
+    gpio_put(R_DIR_PIN, r_spd>=0);
+    uint32_t top = pwm_hw->slice[slice7].top;
+    uint16_t ll = (uint16_t)(top * (uint32_t)(l_spd>=0 ? l_spd : -l_spd) / SPEED_MAX);
+    uint16_t rl = (uint16_t)(top * (uint32_t)(r_spd>=0 ? r_spd : -r_spd) / SPEED_MAX);
     pwm_set_chan_level(pwm_gpio_to_slice_num(L_PWM_PIN), pwm_gpio_to_channel(L_PWM_PIN), ll);
     pwm_set_chan_level(pwm_gpio_to_slice_num(R_PWM_PIN), pwm_gpio_to_channel(R_PWM_PIN), rl);
 }
 
+// ---------------------------------------------------------------------------
+// Binary setpoint frames (see mocap/motor_protocol.py, which mirrors this
+// parser byte for byte):
+//   0xA5, flags, seq (u16), left (i16), right (i16), [duration ms (u16)], CRC
+// All fields are little endian; the CRC-16/CCITT-FALSE covers every byte
+// after the sync byte. Frames are applied straight from the UART bytes, with
+// no text parsing. Until the first valid frame, the legacy commands F, B and
+// S still work outside frames; the bytes of a rejected frame are never taken
+// as legacy commands, so a corrupted frame cannot move the robot.
+// ---------------------------------------------------------------------------
+
+#define FRAME_SYNC          0xA5
+#define FLAG_DURATION       0x01
+#define FLAG_RESYNC         0x02
+#define FRAME_SIZE          10
+#define FRAME_SIZE_DURATION 12
+#define LEGACY_SPEED        2000   // 20%
+
+typedef struct {
+    uint8_t  buf[FRAME_SIZE_DURATION];
+    uint8_t  len;
+    uint8_t  quiet;      // bytes left of a rejected frame
+    bool     framed;     // a valid frame has been seen
+    bool     have_seq;
+    uint16_t last_seq;
+    uint32_t crc_errors;
+    uint32_t stale;
+} frame_parser_t;
+
+static frame_parser_t parser;
+static absolute_time_t command_deadline;
+static bool command_expires = false;
+
+static uint16_t crc16_ccitt(const uint8_t *data, uint len){
+    uint16_t crc = 0xFFFF;
+    for (uint i = 0; i < len; i++){
+        crc ^= (uint16_t)data[i] << 8;
+        for (int b = 0; b < 8; b++)
+            crc = (crc & 0x8000) ? (uint16_t)((crc << 1) ^ 0x1021) : (uint16_t)(crc << 1);
+    }
+    return crc;
+}
+
+static inline uint16_t read_u16(const uint8_t *p){ return (uint16_t)(p[0] | (p[1] << 8)); }
+
+static void apply_legacy_command(uint8_t c){
+    command_expires = false;
+    switch (c){
+        case 'F': set_motor_speed(+LEGACY_SPEED, +LEGACY_SPEED); printf("Command F → forward\n"); break;
+        case 'B': set_motor_speed(-LEGACY_SPEED, -LEGACY_SPEED); printf("Command B → backward\n"); break;
+        case 'S': set_motor_speed(0, 0);                         printf("Command S → stop\n");     break;
+        default: break;
+    }
+}
+
+// Validates a complete frame in parser.buf and applies it. Returns false if
+// the bytes were not a valid frame.
+static bool apply_frame(void){
+    const uint8_t *f = parser.buf;
+    uint8_t flags = f[1];
+    if (flags & ~(FLAG_DURATION | FLAG_RESYNC)) return false;
+    uint8_t size = parser.len;
+    if (read_u16(&f[size - 2]) != crc16_ccitt(&f[1], size - 3)) return false;
+    parser.framed = true;
+    parser.quiet = 0;
+
+    uint16_t seq = read_u16(&f[2]);
+    if (!(flags & FLAG_RESYNC) && parser.have_seq){
+        uint16_t delta = (uint16_t)(seq - parser.last_seq);
+        if (delta == 0 || delta >= 0x8000){ parser.stale++; return true; }
+    }
+    parser.have_seq = true;
+    parser.last_seq = seq;
+
+    set_motor_speed((int16_t)read_u16(&f[4]), (int16_t)read_u16(&f[6]));
+    command_expires = (flags & FLAG_DURATION) != 0;
+    if (command_expires) command_deadline = make_timeout_time_ms(read_u16(&f[8]));
+    return true;
+}
+
+static void parser_feed(uint8_t c){
+    if (parser.len == 0){
+        if (c == FRAME_SYNC) parser.buf[parser.len++] = c;
+        else if (parser.quiet) parser.quiet--;
+        else if (!parser.framed) apply_legacy_command(c);
+        return;
+    }
+    parser.buf[parser.len++] = c;
+    if (parser.len < 2) return;
+    uint8_t size = (parser.buf[1] & FLAG_DURATION) ? FRAME_SIZE_DURATION : FRAME_SIZE;
+    // With unknown flags there is no need to wait for the rest of the frame.
+    bool bad_flags = (parser.buf[1] & ~(FLAG_DURATION | FLAG_RESYNC)) != 0;
+    if (!bad_flags && parser.len < size) return;
+
+    if (!bad_flags && apply_frame()){
+        parser.len = 0;
+        return;
+    }
+    // Not a frame after all: resume hunting right after the sync byte,
+    // ignoring the rest of the rejected frame (as long as the longest frame,
+    // since its flags may be corrupted too).
+    parser.crc_errors++;
+    uint8_t rest[FRAME_SIZE_DURATION];
+    uint8_t n = parser.len - 1;
+    parser.quiet = parser.quiet > FRAME_SIZE_DURATION ? parser.quiet - 1 : FRAME_SIZE_DURATION - 1;
+    for (uint8_t i = 0; i < n; i++) rest[i] = parser.buf[i + 1];
+    parser.len = 0;
+    for (uint8_t i = 0; i < n; i++) parser_feed(rest[i]);
+}
+
 int main(void){
     stdio_init_all();     // initialize USB serial (if CMake open USB stdio)
-    printf("Ready for commands\n");  // debug hint
 
     gpio_init(R_DIR_PIN); gpio_set_dir(R_DIR_PIN, GPIO_OUT); gpio_put(R_DIR_PIN, 0);
     gpio_init(L_DIR_PIN); gpio_set_dir(L_DIR_PIN, GPIO_OUT); gpio_put(L_DIR_PIN, 0);
@@ -57,30 +169,16 @@ int main(void){
     uart_set_format(UART_ID, 8, 1, UART_PARITY_NONE);
     uart_set_fifo_enabled(UART_ID, true);
 
+    printf("Ready for commands\n");
     while (true){
-        printf("Waiting for command...\n");
-        if (uart_is_readable(UART_ID)){
-            printf("UART is readable\n");
-            uint8_t c = uart_getc(UART_ID);
-            printf("Received char: %c (0x%02X)\n", c, c);  // print received char
-            switch (c){
-                case 'F':
-                    set_motor_speed(+20, +20);
-                    printf("Command F → forward\n");
-                    break;
-                case 'B':
-                    set_motor_speed(-20, -20);
-                    printf("Command B → backward\n");
-                    break;
-                case 'S':
-                    set_motor_speed(0, 0);
-                    printf("Command S → stop\n");
-                    break;
-                default:
-                    printf("Unknown command: 0x%02X\n", c);
-                    break;
-            }
-            uart_putc(UART_ID, c); // echo to HM-10 (optional)
+        // Drain everything the HM-10 has forwarded before touching the motors
+        // again, so bursts of frames cost one pass through the loop.
+        while (uart_is_readable(UART_ID)){
+            parser_feed(uart_getc(UART_ID));
+        }
+        if (command_expires && time_reached(command_deadline)){
+            set_motor_speed(0, 0);
+            command_expires = false;
         }
         tight_loop_contents();
     }
@@ -2,7 +2,24 @@
 
 import scenic.core.errors as _errors
 from scenic.core.errors import setDebuggingOptions
-from scenic.syntax.translator import scenarioFromFile, scenarioFromString
 
 _errors.showInternalBacktrace = False  # see comment in errors module
 del _errors
+
+# The compiler depends on most of Scenic (and through it on trimesh, shapely, etc.),
+# so it is only imported when first used.
+_compilerFunctions = ("scenarioFromFile", "scenarioFromString")
+
+
+def __getattr__(name):
+    if name in _compilerFunctions:
+        import scenic.syntax.translator as translator
+
+        function = getattr(translator, name)
+        globals()[name] = function
+        return function
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_compilerFunctions))
@@ -56,6 +56,14 @@ mainOptions.add_argument(
     type=int,
     default=0,
 )
+mainOptions.add_argument(
+    "-j",
+    "--jobs",
+    help="number of worker processes to generate scenes with (default 1)",
+    type=int,
+    default=1,
+    metavar="K",
+)
 mainOptions.add_argument(
     "-m", "--model", help="specify a Scenic world model", default=None
 )
@@ -79,6 +87,11 @@ simOpts.add_argument(
     metavar="N",
     help="max # of rejected simulations before sampling a new scene (default 1)",
 )
+simOpts.add_argument(
+    "--results",
+    metavar="FILE",
+    help="append the results of simulations to FILE as JSON lines",
+)
 
 # Interactive rendering options
 intOptions = parser.add_argument_group("static scene diagramming options")
@@ -134,6 +147,11 @@ debugOpts.add_argument(
     "--dump-python", help="dump Python equivalent of final AST", action="store_true"
 )
 debugOpts.add_argument("--no-pruning", help="disable pruning", action="store_true")
+debugOpts.add_argument(
+    "--no-translation-cache",
+    help="do not use or save cached translations of Scenic files",
+    action="store_true",
+)
 debugOpts.add_argument(
     "--gather-stats",
     type=int,
@@ -181,6 +199,7 @@ translator.dumpScenicAST = args.dump_scenic_ast
 translator.dumpFinalAST = args.dump_ast
 translator.dumpASTPython = args.dump_python
 translator.usePruning = not args.no_pruning
+translator.cacheTranslations = not args.no_translation_cache
 if args.seed is not None:
     if args.verbosity >= 1:
         print(f"Using random seed = {args.seed}")
@@ -205,15 +224,26 @@ totalTime = time.time() - startTime
 if args.verbosity >= 1:
     print(f"Scenario constructed in {totalTime:.2f} seconds.")
 
-if args.simulate:
+if args.jobs < 1:
+    parser.error("number of jobs must be positive")
+sceneStream = None
+
+# Run simulations in worker processes, each with its own simulator
+useFarm = args.simulate and (args.jobs > 1 or args.results)
+if args.simulate and not useFarm:
     simulator = errors.callBeginningScenicTrace(scenario.getSimulator)
 
 
 def generateScene(maxIterations=2000):
     startTime = time.time()
-    scene, iterations = errors.callBeginningScenicTrace(
-        lambda: scenario.generate(maxIterations=maxIterations, verbosity=args.verbosity)
-    )
+    if sceneStream is not None:
+        scene, iterations = errors.callBeginningScenicTrace(lambda: next(sceneStream))
+    else:
+        scene, iterations = errors.callBeginningScenicTrace(
+            lambda: scenario.generate(
+                maxIterations=maxIterations, verbosity=args.verbosity
+            )
+        )
     if args.verbosity >= 1:
         totalTime = time.time() - startTime
         print(f"  Generated scene in {iterations} iterations, {totalTime:.4g} seconds.")
@@ -256,7 +286,23 @@ def runSimulation(scene, sceneCount):
 
 
 try:
-    if args.gather_stats is None:
+    if useFarm:
+        from scenic.core.simulation_farm import SimulationFarm
+
+        farm = SimulationFarm(
+            scenario,
+            args.jobs,
+            results=args.results,
+            maxSteps=args.time,
+            maxIterations=args.max_sims_per_scene,
+        )
+        metrics = errors.callBeginningScenicTrace(
+            lambda: farm.run(args.count or None, verbosity=args.verbosity)
+        )
+        if args.verbosity >= 1:
+            print(f"Ran {metrics.summary()}.")
+
+    elif args.gather_stats is None:
         # Generate scenes interactively until killed/count reached
         if not args.simulate:  # will need matplotlib to draw scene schematic
             import matplotlib
@@ -268,6 +314,13 @@ try:
                     "(try installing python3-tk)"
                 )
 
+        if args.jobs > 1:
+            sceneStream = scenario.generateParallel(
+                args.count or None,
+                args.jobs,
+                verbosity=args.verbosity,
+            )
+
         sceneCount = 0
         successCount = 0
         while True:
@@ -333,7 +386,9 @@ except KeyboardInterrupt:
     pass
 
 finally:
-    if args.simulate:
+    if sceneStream is not None:
+        sceneStream.close()
+    if args.simulate and not useFarm:
         simulator.destroy()
 
 
@@ -161,6 +161,30 @@ class Samplable(LazilyEvaluable):
         """
         raise NotImplementedError
 
+    def sampleBatchGiven(self, value, count, rng):
+        """Sample **count** values of this value at once, given their dependencies.
+
+        Used by `SamplingPlan.sampleBatch`. Implemented by subclasses whose values
+        can be computed column-wise with NumPy; the default implementation returns
+        `None`, meaning that this value must be sampled one candidate at a time.
+
+        Args:
+            value (DefaultIdentityDict): dictionary mapping objects to arrays of
+                their sampled values, indexed by candidate along the first axis.
+                Guaranteed to provide arrays for all dependencies which are not
+                constants.
+            count (int): number of candidates to sample.
+            rng (numpy.random.Generator): generator to draw random numbers from.
+
+        Returns:
+            An array of **count** values, or `None`.
+        """
+        return None
+
+    def valuesFromBatch(self, batch):
+        """Convert an array returned by `sampleBatchGiven` into a list of values."""
+        return batch.tolist()
+
     def serializeValue(self, values, serializer):
         for child in self._conditioned._dependencies:
             serializer.writeSamplable(child, values)
@@ -183,6 +207,214 @@ class Samplable(LazilyEvaluable):
         return value
 
 
+class SamplingPlan:
+    """A compiled plan for repeatedly sampling a fixed sequence of quantities.
+
+    Compiling the plan walks the dependency graph once, recording the order in which
+    `Samplable.sampleAll` would sample each node (a topological order). Executing the
+    plan then calls `Samplable.sampleGiven` on each node in turn, storing its value
+    directly into the slot of the result keyed by the node, without the recursion
+    and membership tests of `Samplable.sample`. Since the calls happen in the same
+    order, the plan produces exactly the same samples as `Samplable.sampleAll` for
+    the same random state.
+
+    The plan captures the proxies set by `Samplable.conditionTo`, so it must be
+    recompiled if any quantity in the graph is conditioned after compilation.
+
+    Args:
+        quantities: sequence of values to sample, as for `Samplable.sampleAll`.
+
+    Attributes:
+        nodes (tuple): the values sampled, in the order they are sampled.
+        parents (tuple): for each node, the indices in **nodes** of its dependencies.
+    """
+
+    def __init__(self, quantities):
+        self.quantities = tuple(quantities)
+        nodes = []
+        indices = {}  # maps id of node to its index in nodes
+        parents = []
+        program = []
+
+        def addNode(node, sampler, deps):
+            indices[id(node)] = len(nodes)
+            nodes.append(node)
+            parents.append(tuple(indices[id(dep)] for dep in deps))
+            program.append((id(node), node, sampler))
+
+        for q in self.quantities:
+            if id(q) in indices:
+                continue
+            if not needsSampling(q):
+                addNode(q, None, ())
+                continue
+            # Iterative post-order traversal, visiting dependencies in the same
+            # order as Samplable.sample.
+            stack = [(q, iter(q._conditioned._dependencies))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if id(child) not in indices:
+                        stack.append((child, iter(child._conditioned._dependencies)))
+                        break
+                else:
+                    stack.pop()
+                    conditioned = node._conditioned
+                    addNode(node, conditioned.sampleGiven, conditioned._dependencies)
+
+        self.nodes = tuple(nodes)
+        self.parents = tuple(parents)
+        self._program = tuple(program)
+        self._indices = indices
+        self._cones = {}
+
+    def sample(self):
+        """Sample all the quantities, returning a `DefaultIdentityDict` of values."""
+        values = DefaultIdentityDict()
+        storage = values.storage
+        for key, node, sampler in self._program:
+            storage[key] = node if sampler is None else sampler(values)
+        return values
+
+    def cone(self, quantities):
+        """Indices of the nodes to resample in order to resample the given values.
+
+        These are the nodes the values depend on (including the values themselves),
+        together with all nodes depending on those, in sampling order. Values which
+        are not nodes of the plan (e.g. constants) are ignored.
+        """
+        key = frozenset(id(q) for q in quantities)
+        cone = self._cones.get(key)
+        if cone is None:
+            ancestors = set()
+            stack = [self._indices[q] for q in key if q in self._indices]
+            while stack:
+                index = stack.pop()
+                if index not in ancestors:
+                    ancestors.add(index)
+                    stack.extend(self.parents[index])
+            resampled = set()
+            for index in range(min(ancestors, default=len(self.nodes)), len(self.nodes)):
+                if index in ancestors or any(p in resampled for p in self.parents[index]):
+                    resampled.add(index)
+            cone = self._cones[key] = tuple(sorted(resampled))
+        return cone
+
+    def resample(self, values, cone):
+        """Resample the nodes in a cone (see `cone`), keeping the other values.
+
+        Args:
+            values (DefaultIdentityDict): values returned by `sample` or `resample`,
+                which are left unchanged.
+            cone: indices of the nodes to resample, as returned by `cone`.
+
+        Returns:
+            A new `DefaultIdentityDict` of values.
+        """
+        newValues = DefaultIdentityDict()
+        storage = newValues.storage
+        storage.update(values.storage)
+        program = self._program
+        for index in cone:
+            key, node, sampler = program[index]
+            if sampler is not None:
+                storage[key] = sampler(newValues)
+        return newValues
+
+    def sampleBatch(self, count, rng):
+        """Sample a batch of **count** candidate assignments at once.
+
+        Every node supporting `Samplable.sampleBatchGiven` whose dependencies were
+        all sampled in batch (e.g. primitive distributions with constant parameters,
+        and arithmetic on them) is sampled for all candidates at once using the
+        given NumPy generator. The remaining nodes are sampled one candidate at a
+        time by `SampleBatch.sample`.
+
+        Args:
+            count (int): number of candidates.
+            rng (numpy.random.Generator): generator for the batched nodes.
+
+        Returns:
+            A `SampleBatch`.
+        """
+        columns = DefaultIdentityDict()
+        storage = columns.storage
+        batched = []
+        for (key, node, sampler), parents in zip(self._program, self.parents):
+            if sampler is not None and all(batched[parent] for parent in parents):
+                column = node._conditioned.sampleBatchGiven(columns, count, rng)
+                if column is not None:
+                    storage[key] = column
+                    batched.append(True)
+                    continue
+            batched.append(False)
+        return SampleBatch(self, columns, batched, count)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __reduce__(self):
+        # Node IDs are only valid in this process, so recompile when unpickling.
+        return (type(self), (self.quantities,))
+
+
+class SampleBatch:
+    """A batch of candidate samples drawn by `SamplingPlan.sampleBatch`.
+
+    Attributes:
+        count (int): number of candidates.
+        columns (DefaultIdentityDict): dictionary mapping each node sampled in batch
+            to an array of its values, indexed by candidate along the first axis.
+    """
+
+    def __init__(self, plan, columns, batched, count):
+        self.count = count
+        self.columns = columns
+        self._values = tuple(
+            (key, node._conditioned.valuesFromBatch(columns.storage[key]))
+            for (key, node, _), isBatched in zip(plan._program, batched)
+            if isBatched
+        )
+        self._program = tuple(
+            step for step, isBatched in zip(plan._program, batched) if not isBatched
+        )
+
+    def sample(self, index):
+        """Complete the candidate with the given index, sampling its remaining nodes.
+
+        Returns:
+            A `DefaultIdentityDict` of values, as for `SamplingPlan.sample`.
+        """
+        values = DefaultIdentityDict()
+        storage = values.storage
+        for key, column in self._values:
+            storage[key] = column[index]
+        for key, node, sampler in self._program:
+            storage[key] = node if sampler is None else sampler(values)
+        return values
+
+
+def batchKind(thing):
+    """The kind of a value in a batch: ``"f"`` for floats, ``"i"`` for integers.
+
+    Numeric arrays (with one value per candidate) and numeric constants have a
+    kind; other values, including vectors and booleans, have kind `None`.
+    """
+    if isinstance(thing, numpy.ndarray):
+        if thing.ndim == 1 and thing.dtype.kind in "iuf":
+            return "f" if thing.dtype.kind == "f" else "i"
+    elif isinstance(thing, float):
+        return "f"
+    elif isinstance(thing, int) and not isinstance(thing, bool):
+        return "i"
+    return None
+
+
+def isScalarBatch(*things):
+    """Whether the given values are all numeric arrays or constants (see `batchKind`)."""
+    return all(batchKind(thing) for thing in things)
+
+
 class ConstantSamplable(Samplable):
     """A samplable which always evaluates to a constant value.
 
@@ -815,6 +1047,19 @@ class OperatorDistribution(Distribution):
             )
         return result
 
+    def sampleBatchGiven(self, value, count, rng):
+        op = batchOperators.get(self.operator)
+        if op is None or self.kwoperands:
+            return None
+        args = [value[self.object]] + [value[child] for child in self.operands]
+        if not isScalarBatch(*args):
+            return None
+        if self.operator in ("__truediv__", "__rtruediv__"):
+            divisor = args[1] if self.operator == "__truediv__" else args[0]
+            if numpy.any(divisor == 0):
+                return None  # let the scalar path raise ZeroDivisionError
+        return numpy.broadcast_to(op(*args), (count,))
+
     def evaluateInner(self, context):
         obj = valueInContext(self.object, context)
         operands = tuple(valueInContext(arg, context) for arg in self.operands)
@@ -918,6 +1163,22 @@ allowedReversibleOperators = {
 }
 
 
+#: Operators which `OperatorDistribution` can apply column-wise to numeric batches.
+batchOperators = {
+    "__neg__": lambda x: -x,
+    "__pos__": lambda x: +x,
+    "__abs__": abs,
+    "__add__": lambda x, y: x + y,
+    "__radd__": lambda x, y: y + x,
+    "__sub__": lambda x, y: x - y,
+    "__rsub__": lambda x, y: y - x,
+    "__mul__": lambda x, y: x * y,
+    "__rmul__": lambda x, y: y * x,
+    "__truediv__": lambda x, y: x / y,
+    "__rtruediv__": lambda x, y: y / x,
+}
+
+
 def makeOperatorHandler(op, ty):
     # Various special cases to simplify the expression forest by removing some
     # operations that do nothing (such as adding zero to a random number).
@@ -993,6 +1254,17 @@ class MultiplexerDistribution(Distribution):
         assert 0 <= idx < len(self.options), (idx, len(self.options))
         return value[self.options[idx]]
 
+    def sampleBatchGiven(self, value, count, rng):
+        index = value[self.index]
+        options = [value[opt] for opt in self.options]
+        if not isinstance(index, numpy.ndarray) or batchKind(index) != "i":
+            return None
+        kinds = set(batchKind(opt) for opt in options)
+        if len(kinds) != 1 or None in kinds:
+            return None  # non-numeric options, or a mix of ints and floats
+        table = numpy.stack([numpy.broadcast_to(opt, (count,)) for opt in options])
+        return table[index, numpy.arange(count)]
+
     def serializeValue(self, values, serializer):
         # We override this method to save space: we don't need to serialize all
         # of our options, only the one we're selecting.
@@ -1049,6 +1321,12 @@ class Range(Distribution):
     def sampleGiven(self, value):
         return random.uniform(value[self.low], value[self.high])
 
+    def sampleBatchGiven(self, value, count, rng):
+        low, high = value[self.low], value[self.high]
+        if not isScalarBatch(low, high):
+            return None
+        return low + (high - low) * rng.random(count)
+
     def evaluateInner(self, context):
         low = valueInContext(self.low, context)
         high = valueInContext(self.high, context)
@@ -1127,6 +1405,12 @@ class Normal(Distribution):
     def sampleGiven(self, value):
         return random.gauss(value[self.mean], value[self.stddev])
 
+    def sampleBatchGiven(self, value, count, rng):
+        mean, stddev = value[self.mean], value[self.stddev]
+        if not isScalarBatch(mean, stddev):
+            return None
+        return mean + stddev * rng.standard_normal(count)
+
     def evaluateInner(self, context):
         mean = valueInContext(self.mean, context)
         stddev = valueInContext(self.stddev, context)
@@ -1205,6 +1489,19 @@ class TruncatedNormal(Normal):
         p = alpha_cdf + unif * (beta_cdf - alpha_cdf)
         return mean + (stddev * Normal.cdfinv(0, 1, p))
 
+    def sampleBatchGiven(self, value, count, rng):
+        import scipy.special  # slow import not often needed
+
+        mean, stddev = value[self.mean], value[self.stddev]
+        if not isScalarBatch(mean, stddev):
+            return None
+        alpha_cdf = scipy.special.ndtr((self.low - mean) / stddev)
+        beta_cdf = scipy.special.ndtr((self.high - mean) / stddev)
+        if numpy.any(beta_cdf - alpha_cdf < 1e-15):
+            warnings.warn("low precision when sampling TruncatedNormal")
+        p = alpha_cdf + rng.random(count) * (beta_cdf - alpha_cdf)
+        return mean + (stddev * scipy.special.ndtri(p))
+
     def evaluateInner(self, context):
         mean = valueInContext(self.mean, context)
         stddev = valueInContext(self.stddev, context)
@@ -1264,6 +1561,21 @@ class DiscreteRange(Distribution):
             raise RejectionException(self.emptyMessage)
         return random.randint(left, right)
 
+    def sampleBatchGiven(self, value, count, rng):
+        if self.weights:
+            total = self.cumulativeWeights[-1]
+            choices = numpy.searchsorted(
+                self.cumulativeWeights, rng.random(count) * total, side="right"
+            )
+            return self.low + numpy.minimum(choices, len(self.options) - 1)
+        low, high = value[self.low], value[self.high]
+        if not isScalarBatch(low, high):
+            return None
+        left, right = numpy.ceil(low), numpy.floor(high)
+        if numpy.any(right < left):
+            return None  # let the scalar path reject the empty candidates
+        return rng.integers(left.astype(int), right.astype(int), count, endpoint=True)
+
     def supportInterval(self):
         ll, lh = supportInterval(self.low)
         hl, hh = supportInterval(self.high)
@@ -136,6 +136,18 @@ class Constructible(Samplable):
                     if attr not in clearers:
                         clearers[attr] = clearer
         cls._cache_clearers = clearers
+        # Cached properties store their values in attributes which can be deleted
+        # directly, which is much faster than calling their clearers.
+        cls._cacheStorageNames = tuple(
+            clearer.storageName
+            for clearer in clearers.values()
+            if hasattr(clearer, "storageName")
+        )
+        cls._otherCacheClearers = tuple(
+            clearer
+            for clearer in clearers.values()
+            if not hasattr(clearer, "storageName")
+        )
 
         # Find all defaults provided by the class or its superclasses
         allDefs = collections.defaultdict(list)
@@ -567,7 +579,11 @@ class Constructible(Samplable):
         return self._withProperties(props, constProps=constProps)
 
     def _clearCaches(self):
-        for clearer in self._cache_clearers.values():
+        storage = self.__dict__
+        for name in self._cacheStorageNames:
+            if name in storage:
+                del storage[name]
+        for clearer in self._otherCacheClearers:
             clearer(self)
 
     def dumpAsScenicCode(self, stream, skipConstProperties=True):
@@ -807,6 +823,15 @@ class Point(Constructible):
             occludingObjects: A list of objects that can occlude visibility.
         """
         return canSee(
+            **self._viewParameters(),
+            target=other,
+            occludingObjects=occludingObjects,
+            debug=debug,
+        )
+
+    def _viewParameters(self):
+        # Arguments to `scenic.core.visibility.canSee` describing this viewer.
+        return dict(
             position=self.position,
             orientation=None,
             visibleDistance=self.visibleDistance,
@@ -814,9 +839,6 @@ class Point(Constructible):
             rayCount=self.viewRayCount,
             rayDensity=self.viewRayDensity,
             distanceScaling=self.viewRayDistanceScaling,
-            target=other,
-            occludingObjects=occludingObjects,
-            debug=debug,
         )
 
     @cached_property
@@ -964,6 +986,14 @@ class OrientedPoint(Point):
             occludingObjects: A list of objects that can occlude visibility.
         """
         return canSee(
+            **self._viewParameters(),
+            target=other,
+            occludingObjects=occludingObjects,
+            debug=debug,
+        )
+
+    def _viewParameters(self):
+        return dict(
             position=self.position,
             orientation=self.orientation,
             visibleDistance=self.visibleDistance,
@@ -971,9 +1001,6 @@ class OrientedPoint(Point):
             rayCount=self.viewRayCount,
             rayDensity=self.viewRayDensity,
             distanceScaling=self.viewRayDistanceScaling,
-            target=other,
-            occludingObjects=occludingObjects,
-            debug=debug,
         )
 
     def relativize(self, vec):
@@ -1300,20 +1327,21 @@ class Object(OrientedPoint):
               for visibility.
             occludingObjects: A list of objects that can occlude visibility.
         """
-        true_position = self.position.offsetLocally(self.orientation, self.cameraOffset)
         return canSee(
-            position=true_position,
-            orientation=self.orientation,
-            visibleDistance=self.visibleDistance,
-            viewAngles=self.viewAngles,
-            rayCount=self.viewRayCount,
-            rayDensity=self.viewRayDensity,
-            distanceScaling=self.viewRayDistanceScaling,
+            **self._viewParameters(),
             target=other,
             occludingObjects=occludingObjects,
             debug=debug,
         )
 
+    def _viewParameters(self):
+        params = super()._viewParameters()
+        # The camera may be offset from the object's position.
+        params["position"] = self.position.offsetLocally(
+            self.orientation, self.cameraOffset
+        )
+        return params
+
     @cached_property
     def corners(self):
         """A tuple containing the corners of this object's bounding box"""
@@ -12,6 +12,7 @@ import itertools
 import math
 import random
 import warnings
+import weakref
 
 import fcl
 import numpy
@@ -59,6 +60,7 @@ from scenic.core.geometry import (
 from scenic.core.lazy_eval import isLazy, valueInContext
 from scenic.core.type_support import toOrientation, toScalar, toVector
 from scenic.core.utils import (
+    AliasTable,
     cached,
     cached_method,
     cached_property,
@@ -200,6 +202,30 @@ class Region(Samplable, ABC):
         """
         return self.containsPoint(point)
 
+    def containsPoints(self, points):
+        """Check which of an array of points this `Region` contains.
+
+        By default this method calls `containsPoint` on each point, but can be
+        overridden to answer many queries at once more efficiently.
+
+        Returns:
+            A boolean array with one entry per point.
+        """
+        return numpy.array(
+            [self.containsPoint(Vector(*point)) for point in points], dtype=bool
+        )
+
+    def containsObjects(self, objs):
+        """Check which of a sequence of objects this `Region` contains.
+
+        By default this method calls `containsObject` on each object, but can be
+        overridden to answer many queries at once more efficiently.
+
+        Returns:
+            A boolean array with one entry per object.
+        """
+        return numpy.array([self.containsObject(obj) for obj in objs], dtype=bool)
+
     ## Generic Methods (not to be overriden by subclasses) ##
     @cached_method
     def containsRegion(self, reg, tolerance=0):
@@ -770,6 +796,191 @@ class SurfaceCollisionTrimesh(trimesh.Trimesh):
         return False
 
 
+class _SurfaceSamplingTable:
+    """Precomputed table for sampling points uniformly on the surface of a mesh.
+
+    Faces are chosen with an alias table weighted by area, so that each point is
+    drawn in constant time.
+    """
+
+    def __init__(self, mesh):
+        triangles = mesh.triangles
+        self.origins = triangles[:, 0]
+        self.edges = triangles[:, 1:] - triangles[:, :1]
+        self.faces = AliasTable(mesh.area_faces)
+
+    def sample(self, count):
+        faces = self.faces.sample(count)
+        coords = numpy.random.random((count, 2))
+        # Fold points of the parallelogram spanned by the edges into the triangle.
+        flip = coords.sum(axis=1) > 1
+        coords[flip] = 1 - coords[flip]
+        return self.origins[faces] + numpy.einsum("ij,ijk->ik", coords, self.edges[faces])
+
+    def samplePoint(self):
+        return self.sample(1)[0]
+
+
+class _TetrahedralSamplingTable:
+    """Precomputed table for sampling points uniformly in a convex mesh.
+
+    The mesh is split into tetrahedra joining each face to the centroid, which are
+    chosen with an alias table weighted by volume, so that each point is drawn in
+    constant time.
+    """
+
+    def __init__(self, mesh):
+        triangles = mesh.triangles
+        apex = numpy.broadcast_to(mesh.centroid, (len(triangles), 1, 3))
+        self.vertices = numpy.concatenate((apex, triangles), axis=1)
+        edges = triangles - apex
+        volumes = numpy.abs(
+            numpy.einsum("ij,ij->i", edges[:, 0], numpy.cross(edges[:, 1], edges[:, 2]))
+        )
+        self.tetrahedra = AliasTable(volumes)
+
+    def sample(self, count):
+        tetrahedra = self.tetrahedra.sample(count)
+        # Normalized exponential variates are uniform barycentric coordinates.
+        coords = -numpy.log1p(-numpy.random.random((count, 4)))
+        coords /= coords.sum(axis=1, keepdims=True)
+        return numpy.einsum("ij,ijk->ik", coords, self.vertices[tetrahedra])
+
+    def samplePoint(self):
+        return self.sample(1)[0]
+
+
+class _SignedDistanceGrid:
+    """Signed distances from the centers of a grid of cubic cells to a mesh.
+
+    The bounding box of the mesh is divided into a grid of cubic cells, and the
+    signed distance (positive inside) from the center of each cell to the surface of
+    the mesh is computed. Since signed distance changes no faster than position, the
+    distance at any point of a cell is within the distance from the point to the
+    center of the cell of the distance at the center.
+
+    Args:
+        mesh: The mesh.
+        cells: Approximate number of cells in the grid.
+    """
+
+    def __init__(self, mesh, cells=4096):
+        low, high = mesh.bounds
+        extents = high - low
+        pitch = max(
+            (numpy.prod(extents) / cells) ** (1 / 3),
+            numpy.max(extents) / cells ** (1 / 2),
+        )
+        shape = numpy.maximum(numpy.ceil(extents / pitch), 1).astype(int)
+
+        self.mesh = mesh
+        self.low = low
+        self.pitch = pitch
+        self.shape = shape
+        self.centers = low + (numpy.indices(shape).reshape(3, -1).T + 0.5) * pitch
+        self.distances = trimesh.proximity.signed_distance(mesh, self.centers)
+
+    def bounds(self, points, lower, upper):
+        """Tighten lower and upper bounds on the signed distances of points, in place."""
+        cells = numpy.floor((points - self.low) / self.pitch).astype(int)
+        (inGrid,) = numpy.nonzero(numpy.all((cells >= 0) & (cells < self.shape), axis=1))
+        indices = numpy.ravel_multi_index(cells[inGrid].T, self.shape)
+        offsets = points[inGrid] - self.centers[indices]
+        radii = numpy.sqrt(numpy.einsum("ij,ij->i", offsets, offsets))
+        distances = self.distances[indices]
+        lower[inGrid] = numpy.maximum(lower[inGrid], distances - radii)
+        upper[inGrid] = numpy.minimum(upper[inGrid], distances + radii)
+
+
+class _VoxelSamplingTable:
+    """Precomputed table for sampling points uniformly in an arbitrary mesh.
+
+    Uses the cells of a `_SignedDistanceGrid` which may intersect the mesh according
+    to the signed distance from their centers to its surface. Candidate points are
+    drawn uniformly from these cells. A candidate closer to the center of its cell
+    than the distance from the center to the surface is known to be inside the mesh
+    (or outside, depending on the sign); only the others need to be tested for
+    containment.
+
+    Args:
+        grid: The `_SignedDistanceGrid` of the mesh.
+    """
+
+    def __init__(self, grid):
+        mesh, pitch = grid.mesh, grid.pitch
+        keep = grid.distances > -pitch * math.sqrt(3) / 2
+
+        self.mesh = mesh
+        self.pitch = pitch
+        self.centers = grid.centers[keep]
+        self.distances = grid.distances[keep]
+
+        # Number of candidates giving 99% probability of success, with at least 8
+        # as in MeshVolumeRegion.num_samples
+        acceptance = mesh.volume / (len(self.centers) * pitch**3)
+        if acceptance > 0.99:
+            candidates = 1
+        else:
+            candidates = math.ceil(min(1e6, max(1, math.log(0.01, 1 - acceptance))))
+        self.candidates = max(candidates, 8)
+
+    def _candidates(self, count):
+        cells = numpy.random.randint(len(self.centers), size=count)
+        offsets = (numpy.random.random((count, 3)) - 0.5) * self.pitch
+        points = self.centers[cells] + offsets
+        distances = self.distances[cells]
+        radii = numpy.sqrt(numpy.einsum("ij,ij->i", offsets, offsets))
+        inside = radii < distances
+        unknown = ~inside & (radii >= -distances)
+        return points, inside, unknown
+
+    def sample(self, count):
+        """Draw **count** candidates, returning those inside the mesh."""
+        points, inside, unknown = self._candidates(count)
+        if unknown.any():
+            inside[unknown] = self.mesh.contains(points[unknown])
+        return points[inside]
+
+    def samplePoint(self):
+        """Draw candidates until one is inside the mesh, or return `None`.
+
+        Only the undecided candidates preceding the first one known to be inside the
+        mesh need to be tested for containment.
+        """
+        points, inside, unknown = self._candidates(self.candidates)
+        stop = inside.argmax() if inside.any() else len(points)
+        (tests,) = unknown[:stop].nonzero()
+        if len(tests) > 0:
+            contained = self.mesh.contains(points[tests])
+            if contained.any():
+                return points[tests[contained.argmax()]]
+        return points[stop] if stop < len(points) else None
+
+
+# Sampling tables of meshes, keyed by the identity of the mesh and whether it is centered
+_meshSamplingTables = {}
+
+
+def _meshSamplingTable(mesh, centerMesh):
+    """Table for sampling points uniformly in a (possibly centered) mesh.
+
+    The table is built once per mesh object and shared by all the regions placing
+    that mesh, e.g. the regions obtained by sampling a region with a random position.
+    Convex meshes are split into tetrahedra; other meshes use a voxel grid.
+    """
+    key = (id(mesh), centerMesh)
+    table = _meshSamplingTables.get(key)
+    if table is None:
+        base = MeshVolumeRegion(mesh, centerMesh=centerMesh, _internal=True).mesh
+        if base.is_convex:
+            table = _TetrahedralSamplingTable(base)
+        else:
+            table = _VoxelSamplingTable(_SignedDistanceGrid(base))
+        _meshSamplingTables[key] = table
+        weakref.finalize(mesh, _meshSamplingTables.pop, key, None)
+    return table
+
+
 class MeshRegion(Region):
     """Region given by a scaled, positioned, and rotated mesh.
 
@@ -884,6 +1095,20 @@ class MeshRegion(Region):
         else:
             assert False
 
+        # Keep the data precomputed from the shape of an object, if it is fixed.
+        kwargs = {}
+        if (
+            cls is MeshVolumeRegion
+            and self._shape is not None
+            and not needsSampling(self._shape)
+        ):
+            kwargs = dict(
+                _internal=True,
+                _isConvex=self._isConvex,
+                _shape=self._shape,
+                _scaledShape=self._scaledShape,
+            )
+
         return cls(
             mesh=value[self._mesh],
             dimensions=value[self.dimensions],
@@ -898,6 +1123,7 @@ class MeshRegion(Region):
             centerMesh=self.centerMesh,
             onDirection=self.onDirection,
             name=self.name,
+            **kwargs,
         )
 
     def evaluateInner(self, context):
@@ -1098,6 +1324,7 @@ class MeshRegion(Region):
         state = self.__dict__.copy()
         # Make copy of mesh to clear non-picklable cache
         state["_mesh"] = self._mesh.copy()
+        state.pop("_cached__samplingTable", None)  # rebuilt on demand
         return state
 
 
@@ -1313,6 +1540,26 @@ class MeshVolumeRegion(MeshRegion):
     def _containsPointExact(self, point):
         return self.mesh.contains([point])[0]
 
+    def containsPoints(self, points):
+        """Check which of an array of points this region's volume contains.
+
+        Equivalent to calling `containsPoint` on each point, but points which are
+        clearly inside or outside the region are decided without computing their
+        exact distances to it (see `_signedDistanceBounds`), and the remaining
+        distances are computed in a single query.
+
+        Returns:
+            A boolean array with one entry per point.
+        """
+        points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+        lower, upper = self._signedDistanceBounds(points)
+        contained = lower >= -self.tolerance
+        unknown = ~contained & (upper >= -self.tolerance)
+        if unknown.any():
+            distances = self._exactSignedDistances(points[unknown])
+            contained[unknown] = distances >= -self.tolerance
+        return contained
+
     @distributionFunction
     def containsObject(self, obj):
         """Check if this region's volume contains an :obj:`~scenic.core.object_types.Object`."""
@@ -1424,6 +1671,122 @@ class MeshVolumeRegion(MeshRegion):
 
         return isinstance(diff_region, EmptyRegion)
 
+    def containsObjects(self, objs):
+        """Check which of a sequence of objects this region's volume contains.
+
+        Equivalent to calling `containsObject` on each object, but the cheap passes of
+        that method are done for all the objects at once: the bounding box test, and
+        the tests of the objects' vertices against the region's signed distance (see
+        `containsPoints`). For non-convex regions, objects whose circumscribed
+        spheres are inside the region are known to be contained, and objects with a
+        vertex outside the region are known not to be; only the remaining objects
+        are checked individually.
+
+        Returns:
+            A boolean array with one entry per object.
+        """
+        objs = list(objs)
+        contained = numpy.zeros(len(objs), dtype=bool)
+        if not objs:
+            return contained
+        spaces = [obj.occupiedSpace for obj in objs]
+
+        # PASS 1 (as in containsObject)
+        low, high = self.mesh.bounds
+        bounds = numpy.array([space.mesh.bounds for space in spaces])
+        overlaps = numpy.all((low <= bounds[:, 1]) & (bounds[:, 0] <= high), axis=1)
+        (candidates,) = numpy.nonzero(overlaps)
+
+        # PASS 2 (as in containsObject)
+        if self.isConvex:
+            corners = [objs[i].boundingBox.mesh.vertices for i in candidates]
+            inside = self._allInside(corners, numpy.zeros(len(candidates)))
+            contained[candidates[inside]] = True
+            rest = candidates[~inside]
+            vertices = [spaces[i].mesh.vertices for i in rest]
+            contained[rest] = self._allInside(vertices, numpy.zeros(len(rest)))
+            return contained
+
+        # An object is contained if its circumscribed sphere about its position is.
+        centers = numpy.array([tuple(objs[i].position) for i in candidates]).reshape(
+            -1, 3
+        )
+        radii = numpy.array(
+            [
+                numpy.max(numpy.linalg.norm(spaces[i].mesh.vertices - center, axis=1))
+                for i, center in zip(candidates, centers)
+            ]
+        )
+        inside = self._allInside(list(centers[:, numpy.newaxis]), radii)
+        contained[candidates[inside]] = True
+        candidates = candidates[~inside]
+
+        # An object is not contained if one of its vertices is outside the region.
+        vertices = [spaces[i].mesh.vertices for i in candidates]
+        outside = ~self._allInside(
+            vertices, numpy.full(len(candidates), -self.tolerance), exact=False
+        )
+        for i in candidates[~outside]:
+            contained[i] = self.containsObject(objs[i])
+        return contained
+
+    def _allInside(self, pointSets, thresholds, exact=True):
+        """Check for each array of points whether all of them are inside the region.
+
+        A point is inside if its signed distance to the surface of the region is
+        greater than the threshold for its array. If **exact** is false, only the
+        bounds on signed distances are used, so that an array is reported as inside
+        unless one of its points is known not to be.
+        """
+        if not pointSets:
+            return numpy.zeros(0, dtype=bool)
+        points = numpy.concatenate(pointSets)
+        owners = numpy.repeat(numpy.arange(len(pointSets)), [len(p) for p in pointSets])
+        thresholds = thresholds[owners]
+        lower, upper = self._signedDistanceBounds(points)
+        failed = numpy.zeros(len(pointSets), dtype=bool)
+        failed[owners[upper <= thresholds]] = True
+        if exact:
+            # Only compute distances for arrays which have not already failed.
+            (unknown,) = numpy.nonzero((lower <= thresholds) & ~failed[owners])
+            if len(unknown) > 0:
+                distances = self._exactSignedDistances(points[unknown])
+                failed[owners[unknown[distances <= thresholds[unknown]]]] = True
+        return ~failed
+
+    # Number of exact signed distances computed by this region, and the number after
+    # which computing a `_SignedDistanceGrid` (which costs about as much) pays off.
+    _exactDistanceCount = 0
+    _distanceGridThreshold = 4096
+
+    def _signedDistanceBounds(self, points):
+        """Lower and upper bounds on the signed distances from points to this region.
+
+        Signed distances are positive inside the region. Since the region lies inside
+        the bounding box of its mesh, the signed distance to the box is an upper bound;
+        once enough exact distances have been computed, tighter bounds are obtained
+        from the region's `_SignedDistanceGrid`.
+        """
+        low, high = self.mesh.bounds
+        margins = numpy.minimum(points - low, high - points)
+        gaps = numpy.maximum(-margins, 0)
+        lower = numpy.full(len(points), -numpy.inf)
+        upper = numpy.where(
+            numpy.all(margins >= 0, axis=1),
+            numpy.min(margins, axis=1),
+            -numpy.sqrt(numpy.einsum("ij,ij->i", gaps, gaps)),
+        )
+        if (
+            self._exactDistanceCount >= self._distanceGridThreshold
+            or "_cached__distanceGrid" in self.__dict__
+        ):
+            self._distanceGrid.bounds(points, lower, upper)
+        return lower, upper
+
+    def _exactSignedDistances(self, points):
+        self._exactDistanceCount += len(points)
+        return trimesh.proximity.signed_distance(self.mesh, points)
+
     def containsRegionInner(self, reg, tolerance):
         if tolerance != 0:
             warnings.warn(
@@ -1730,14 +2093,36 @@ class MeshVolumeRegion(MeshRegion):
         return super().difference(other)
 
     def uniformPointInner(self):
-        # TODO: Look into tetrahedralization, perhaps to be turned on when a heuristic
-        # is met. Currently using Trimesh's rejection sampling.
-        sample = trimesh.sample.volume_mesh(self.mesh, self.num_samples)
+        # Sample the untransformed mesh and transform the point, so that all
+        # placements of the mesh share one sampling table (for the occupied space of
+        # an object, the table of its shape, scaled to unit dimensions). Affine
+        # transformations preserve uniformity.
+        if self._shape:
+            table, transform = self._shape._samplingTable, self._shapeTransform
+        else:
+            table, transform = self._samplingTable, self._transform
+        sample = table.samplePoint()
 
-        if len(sample) == 0:
+        if sample is None:
             raise RejectionException("Rejection sampling MeshVolumeRegion failed.")
         else:
-            return Vector(*sample[0])
+            return Vector(*numpy.dot(transform, numpy.append(sample, [1]))[:3])
+
+    @property
+    def _samplingTable(self):
+        """Table for sampling points uniformly in this region's mesh before `_transform`.
+
+        :meta private:
+        """
+        return _meshSamplingTable(self._mesh, self.centerMesh)
+
+    @cached_property
+    def _distanceGrid(self):
+        """Grid bounding the signed distances from points to this region's surface.
+
+        :meta private:
+        """
+        return _SignedDistanceGrid(self.mesh)
 
     @distributionFunction
     def distanceTo(self, point):
@@ -1860,6 +2245,11 @@ class MeshVolumeRegion(MeshRegion):
 
     @property
     def num_samples(self):
+        """Number of candidates for rejection sampling in the bounding box.
+
+        Used to find interior points of the mesh; sampling uniformly from the volume
+        uses a `_samplingTable` instead.
+        """
         if self._num_samples is not None:
             return self._num_samples
 
@@ -1947,6 +2337,7 @@ class MeshVolumeRegion(MeshRegion):
     def __getstate__(self):
         state = self.__dict__.copy()
         state.pop("_cached__fclData", None)  # remove non-picklable FCL objects
+        state.pop("_cached__distanceGrid", None)
         return state
 
 
@@ -2068,7 +2459,15 @@ class MeshSurfaceRegion(MeshRegion):
         raise NotImplementedError
 
     def uniformPointInner(self):
-        return Vector(*trimesh.sample.sample_surface(self.mesh, 1)[0][0])
+        return Vector(*self._samplingTable.samplePoint())
+
+    @cached_property
+    def _samplingTable(self):
+        """Table for sampling points uniformly on this region.
+
+        :meta private:
+        """
+        return _SurfaceSamplingTable(self.mesh)
 
     @distributionFunction
     def distanceTo(self, point):
@@ -1,10 +1,13 @@
 """Support for hard and soft requirements."""
 
 from abc import ABC, abstractmethod
+import ast
 import enum
 from functools import reduce
 import inspect
 import itertools
+import numbers
+import operator
 
 import fcl
 import numpy
@@ -15,6 +18,8 @@ from scenic.core.distributions import Samplable, needsSampling, toDistribution
 from scenic.core.errors import InvalidScenarioError
 from scenic.core.lazy_eval import needsLazyEvaluation
 from scenic.core.propositions import Atomic, PropositionNode
+from scenic.core.regions import PolygonalFootprintRegion
+from scenic.core.visibility import VisibilityEngine
 import scenic.syntax.relations as relations
 
 
@@ -149,7 +154,82 @@ class PendingRequirement:
                     )
             return result
 
-        return CompiledRequirement(self, closure, deps, condition)
+        batchEvaluator = batchEvaluatorFor(syntax, allBindings) if syntax else None
+        return CompiledRequirement(self, closure, deps, condition, batchEvaluator)
+
+
+_batchComparisons = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+_batchBinaryOperators = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_batchUnaryOperators = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def batchEvaluatorFor(syntax, bindings):
+    """Compile a requirement into a function evaluating it column-wise, if possible.
+
+    This is only done for requirements which are a single comparison between
+    arithmetic expressions over names and numeric constants, which give the same
+    result when evaluated on arrays of values.
+
+    Args:
+        syntax: The AST of the requirement's condition.
+        bindings: The values of the names used in the requirement.
+
+    Returns:
+        A pair ``(evaluate, values)``, where ``values`` is the set of random values
+        used by the requirement and ``evaluate`` is a function taking the columns of
+        a `SampleBatch` which contain all of them; or `None` if the requirement
+        cannot be evaluated column-wise.
+    """
+    values = set()
+
+    def compileOperand(node):
+        if isinstance(node, ast.Constant):
+            value = node.value
+        elif isinstance(node, ast.Name):
+            if node.id not in bindings:
+                return None
+            value = bindings[node.id]
+            if needsSampling(value):
+                values.add(value)
+                return lambda columns: columns[value]
+        elif isinstance(node, ast.BinOp):
+            op = _batchBinaryOperators.get(type(node.op))
+            left, right = compileOperand(node.left), compileOperand(node.right)
+            if op is None or left is None or right is None:
+                return None
+            return lambda columns: op(left(columns), right(columns))
+        elif isinstance(node, ast.UnaryOp):
+            op = _batchUnaryOperators.get(type(node.op))
+            operand = compileOperand(node.operand)
+            if op is None or operand is None:
+                return None
+            return lambda columns: op(operand(columns))
+        else:
+            return None
+        if not isinstance(value, numbers.Real) or isinstance(value, bool):
+            return None
+        return lambda columns: value
+
+    if not isinstance(syntax, ast.Compare) or len(syntax.ops) != 1:
+        return None  # chained comparisons use "and", which needs scalars
+    op = _batchComparisons.get(type(syntax.ops[0]))
+    left = compileOperand(syntax.left)
+    right = compileOperand(syntax.comparators[0])
+    if op is None or left is None or right is None or not values:
+        return None
+    return (lambda columns: op(left(columns), right(columns))), values
 
 
 def getNameBindings(req, restrictTo=None):
@@ -315,6 +395,28 @@ class SamplingRequirement(ABC):
         assert self.active
         return self.falsifiedByInner(sample)
 
+    def violationDependencies(self):
+        """Values whose resampling may fix the last violation of this requirement.
+
+        Used for incremental resampling (see `Scenario.configureSampling`). The
+        default implementation returns `None`, meaning that the whole sample must
+        be resampled.
+        """
+        return None
+
+    def prefilter(self):
+        """A cheap conservative test to try before the exact one, if any.
+
+        Used by `AdaptiveChecker`. The default implementation returns `None`,
+        meaning that there is no such test.
+
+        Returns:
+            `None`, or a function taking a sample and returning `True` if the sample
+            certainly falsifies this requirement, `False` if it certainly satisfies
+            it, and `None` if the exact test is needed to tell.
+        """
+        return None
+
     @property
     @abstractmethod
     def violationMsg(self):
@@ -337,11 +439,102 @@ class IntersectionRequirement(SamplingRequirement):
             return False
         return objA.intersects(objB)
 
+    def violationDependencies(self):
+        return (self.objA, self.objB)
+
+    def prefilter(self):
+        objA, objB = self.objA, self.objB
+
+        def separated(sample):
+            a, b = sample[objA], sample[objB]
+            if a.allowCollisions or b.allowCollisions:
+                return False
+            # Each object lies within the circumscribed sphere of its bounding box.
+            posA, posB = a.position, b.position
+            dx, dy, dz = posA.x - posB.x, posA.y - posB.y, posA.z - posB.z
+            radii = a.radius + b.radius
+            if dx * dx + dy * dy + dz * dz > radii * radii:
+                return False
+            return None
+
+        return separated
+
     @property
     def violationMsg(self):
         return f"Intersection violation: {self.objA} intersects {self.objB}"
 
 
+class IntersectionGroupRequirement(SamplingRequirement):
+    """Requirement that no two objects of a given set intersect.
+
+    Equivalent to an `IntersectionRequirement` for every pair of the objects, but
+    checked using a broadphase: a sweep-and-prune over the axis-aligned bounding
+    boxes of the objects' circumscribed spheres (see `Object.radius`) finds the
+    candidate pairs whose spheres overlap, and only those are checked exactly,
+    in the same order as the pairwise requirements would be.
+    """
+
+    def __init__(self, objects, optional=False):
+        super().__init__(optional=optional)
+        self.objects = tuple(objects)
+        self._collidingPair = None
+
+    def falsifiedByInner(self, sample):
+        objects = [sample[obj] for obj in self.objects]
+        indices = [i for i, obj in enumerate(objects) if not obj.allowCollisions]
+        for i, j in self.candidatePairs([objects[i] for i in indices]):
+            i, j = indices[i], indices[j]
+            if objects[i].intersects(objects[j]):
+                self._collidingPair = (self.objects[i], self.objects[j])
+                return True
+        return False
+
+    @staticmethod
+    def candidatePairs(objects):
+        """Pairs of indices of objects whose circumscribed spheres overlap.
+
+        The pairs ``(i, j)`` have ``i < j`` and are in lexicographic order.
+        """
+        if len(objects) < 2:
+            return ()
+        centers = numpy.array([tuple(obj.position) for obj in objects], dtype=float)
+        radii = numpy.array([obj.radius for obj in objects], dtype=float)
+
+        # Sweep along the x axis: sorting the boxes by their lower x bounds, each box
+        # can only overlap the boxes following it which start before it ends.
+        lows = centers[:, 0] - radii
+        order = numpy.argsort(lows, kind="stable")
+        sortedLows = lows[order]
+        highs = sortedLows + 2 * radii[order]
+        count = len(objects)
+        ends = numpy.searchsorted(sortedLows, highs, side="right")
+        spans = numpy.maximum(ends - numpy.arange(1, count + 1), 0)
+        first = numpy.repeat(numpy.arange(count), spans)
+        offsets = numpy.arange(len(first)) - numpy.repeat(
+            numpy.cumsum(spans) - spans, spans
+        )
+        second = first + 1 + offsets
+        first, second = order[first], order[second]
+
+        # Prune pairs whose spheres are disjoint (which also covers the y and z axes).
+        deltas = centers[first] - centers[second]
+        reach = radii[first] + radii[second]
+        close = numpy.einsum("ij,ij->i", deltas, deltas) <= reach * reach
+        first, second = first[close], second[close]
+        pairs = numpy.stack((numpy.minimum(first, second), numpy.maximum(first, second)))
+        pairs = pairs[:, numpy.lexsort((pairs[1], pairs[0]))]
+        return pairs.T.tolist()
+
+    def violationDependencies(self):
+        return self._collidingPair
+
+    @property
+    def violationMsg(self):
+        assert self._collidingPair is not None
+        objA, objB = self._collidingPair
+        return f"Intersection violation: {objA} intersects {objB}"
+
+
 class BlanketCollisionRequirement(SamplingRequirement):
     """Requirement that the surfaces of a given set of objects do not intersect.
 
@@ -357,30 +550,104 @@ class BlanketCollisionRequirement(SamplingRequirement):
         super().__init__(optional=optional)
         self.objects = objects
         self._collidingObjects = None
+        self._collidingIndices = None
+        self._manager = None
 
     def falsifiedByInner(self, sample):
         objects = tuple(sample[obj] for obj in self.objects)
-        manager = fcl.DynamicAABBTreeCollisionManager()
-        objForGeom = {}
-        for i, obj in enumerate(objects):
+        if self._manager is None:
+            self._setupManager(objects)
+        manager = self._manager
+        collisionObjects = self._collisionObjects
+        indicesForGeom = self._indicesForGeom
+
+        # Update the objects whose geometry or placement is random.
+        moved = []
+        for i in self._randomIndices:
+            obj = objects[i]
+            collisionObject = collisionObjects[i]
             if obj.allowCollisions:
+                if collisionObject:
+                    manager.unregisterObject(collisionObject[1])
+                    collisionObjects[i] = None
                 continue
             geom, trans = obj.occupiedSpace._fclData
-            collisionObject = fcl.CollisionObject(geom, trans)
-            objForGeom[geom] = obj
-            manager.registerObject(collisionObject)
+            if collisionObject and collisionObject[0] is geom:
+                # Same geometry as the last sample (e.g. only the position is random).
+                collisionObject[1].setTransform(trans)
+                moved.append(collisionObject[1])
+            else:
+                if collisionObject:
+                    manager.unregisterObject(collisionObject[1])
+                    indicesForGeom[collisionObject[0]].remove(i)
+                newObject = fcl.CollisionObject(geom, trans)
+                collisionObjects[i] = (geom, newObject)
+                indicesForGeom.setdefault(geom, []).append(i)
+                manager.registerObject(newObject)
+        if moved:
+            manager.update(moved)
 
-        manager.setup()
         cdata = fcl.CollisionData()
         manager.collide(cdata, fcl.defaultCollisionCallback)
         collision = cdata.result.is_collision
 
         if collision:
-            contact = cdata.result.contacts[0]
-            self._collidingObjects = (objForGeom[contact.o1], objForGeom[contact.o2])
+            self._collidingIndices = self._indicesForContact(cdata.result.contacts[0])
+            self._collidingObjects = tuple(objects[i] for i in self._collidingIndices)
 
         return collision
 
+    def _indicesForContact(self, contact):
+        """Indices of the objects involved in a contact found by the manager.
+
+        FCL only reports the geometries in contact, and objects with identical
+        shapes may share the same geometry; in that case we find which of the
+        objects having those geometries actually collide.
+        """
+        firsts = self._indicesForGeom[contact.o1]
+        seconds = self._indicesForGeom[contact.o2]
+        if len(firsts) == 1 and len(seconds) == 1:
+            return (firsts[0], seconds[0])
+        collisionObjects = self._collisionObjects
+        for i in sorted(firsts):
+            for j in sorted(seconds):
+                if i != j and fcl.collide(collisionObjects[i][1], collisionObjects[j][1]):
+                    return (i, j)
+        assert False, "collision not found between objects with the reported geometries"
+
+    def _setupManager(self, objects):
+        """Create the collision manager, which is reused across samples.
+
+        Objects whose geometry and placement do not depend on random values are
+        registered once and for all; the others are (re)registered or moved as
+        needed for each sample.
+        """
+        self._manager = manager = fcl.DynamicAABBTreeCollisionManager()
+        self._collisionObjects = [None] * len(objects)
+        self._indicesForGeom = {}
+        randomIndices = []
+        for i, (obj, sampledObj) in enumerate(zip(self.objects, objects)):
+            if needsSampling(obj.allowCollisions) or not obj._hasStaticBounds:
+                randomIndices.append(i)
+            elif not sampledObj.allowCollisions:
+                geom, trans = sampledObj.occupiedSpace._fclData
+                collisionObject = fcl.CollisionObject(geom, trans)
+                self._collisionObjects[i] = (geom, collisionObject)
+                self._indicesForGeom.setdefault(geom, []).append(i)
+                manager.registerObject(collisionObject)
+        self._randomIndices = tuple(randomIndices)
+        manager.setup()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_manager"] = None  # FCL objects are not picklable; rebuild on demand
+        state.pop("_collisionObjects", None)
+        state.pop("_indicesForGeom", None)
+        return state
+
+    def violationDependencies(self):
+        return tuple(self.objects[i] for i in self._collidingIndices)
+
     @property
     def violationMsg(self):
         assert self._collidingObjects is not None
@@ -399,11 +666,92 @@ class ContainmentRequirement(SamplingRequirement):
         container = sample[self.container]
         return not container.containsObject(obj)
 
+    def violationDependencies(self):
+        return (self.obj, self.container)
+
+    def prefilter(self):
+        container = self.container
+        if needsSampling(container) or needsLazyEvaluation(container):
+            return None
+        if isinstance(container, PolygonalFootprintRegion):
+            xmin, ymin, xmax, ymax = container.polygons.bounds  # unbounded in z
+        else:
+            try:
+                (xmin, ymin, _), (xmax, ymax, _) = container.AABB
+            except (NotImplementedError, TypeError):
+                return None
+        obj = self.obj
+
+        def outsideBounds(sample):
+            # An object's position is the center of its bounding box, which must
+            # lie within the container's bounding box if the object is contained.
+            position = sample[obj].position
+            x, y = position.x, position.y
+            if x < xmin or x > xmax or y < ymin or y > ymax:
+                return True
+            return None
+
+        return outsideBounds
+
     @property
     def violationMsg(self):
         return f"Containment violation: {self.obj} is not contained in its container"
 
 
+class ContainmentGroupRequirement(SamplingRequirement):
+    """Requirement that each of a given set of objects be contained in a container.
+
+    Equivalent to a `ContainmentRequirement` for each of the objects, but checked
+    with a single call to the container's `Region.containsObjects`, so that regions
+    supporting batched queries (like `MeshVolumeRegion`) can answer them all at once.
+    """
+
+    def __init__(self, objects, container, optional=False):
+        super().__init__(optional=optional)
+        self.objects = tuple(objects)
+        self.container = container
+        self._uncontained = None
+
+    def falsifiedByInner(self, sample):
+        objects = [sample[obj] for obj in self.objects]
+        container = sample[self.container]
+        contained = container.containsObjects(objects)
+        if contained.all():
+            return False
+        self._uncontained = self.objects[contained.argmin()]
+        return True
+
+    def violationDependencies(self):
+        return (self._uncontained, self.container)
+
+    def prefilter(self):
+        container = self.container
+        if needsSampling(container) or needsLazyEvaluation(container):
+            return None
+        try:
+            (xmin, ymin, _), (xmax, ymax, _) = container.AABB
+        except (NotImplementedError, TypeError):
+            return None
+        objects = self.objects
+
+        def outsideBounds(sample):
+            # As in ContainmentRequirement.prefilter.
+            for obj in objects:
+                position = sample[obj].position
+                x, y = position.x, position.y
+                if x < xmin or x > xmax or y < ymin or y > ymax:
+                    self._uncontained = obj
+                    return True
+            return None
+
+        return outsideBounds
+
+    @property
+    def violationMsg(self):
+        assert self._uncontained is not None
+        return f"Containment violation: {self._uncontained} is not contained in its container"
+
+
 class VisibilityRequirement(SamplingRequirement):
     def __init__(self, source, target, objects, optional=False):
         super().__init__(optional=optional)
@@ -414,11 +762,19 @@ class VisibilityRequirement(SamplingRequirement):
         )
 
     def falsifiedByInner(self, sample):
+        source, target, occluders = self.query(sample)
+        return not source.canSee(target, occludingObjects=occluders)
+
+    def query(self, sample):
+        """The viewer, target, and occluding objects to check in the given sample."""
         source = sample[self.source]
         target = sample[self.target]
         potential_occluders = tuple(sample[obj] for obj in self.potential_occluders)
         occluders = tuple(obj for obj in potential_occluders if obj.occluding)
-        return not source.canSee(target, occludingObjects=occluders)
+        return source, target, occluders
+
+    def violationDependencies(self):
+        return (self.source, self.target)
 
     @property
     def violationMsg(self):
@@ -434,8 +790,42 @@ class NonVisibilityRequirement(VisibilityRequirement):
         return f"Non-visibility violation: {self.target} is visible from {self.source}"
 
 
+class VisibilityGroupRequirement(SamplingRequirement):
+    """Requirement that each of a set of (non-)visibility requirements holds.
+
+    Equivalent to checking each of the `VisibilityRequirement` and
+    `NonVisibilityRequirement` objects in turn, but the visibility queries of all of
+    them are answered together by a `VisibilityEngine`, which casts their rays in
+    shared batches.
+    """
+
+    def __init__(self, requirements, optional=False):
+        super().__init__(optional=optional)
+        self.requirements = tuple(requirements)
+        self._violated = None
+
+    def falsifiedByInner(self, sample):
+        queries = [req.query(sample) for req in self.requirements]
+        results = VisibilityEngine().canSee(queries)
+        for req, visible in zip(self.requirements, results):
+            if visible == isinstance(req, NonVisibilityRequirement):
+                self._violated = req
+                return True
+        return False
+
+    def violationDependencies(self):
+        return self._violated.violationDependencies()
+
+    @property
+    def violationMsg(self):
+        assert self._violated is not None
+        return self._violated.violationMsg
+
+
 class CompiledRequirement(SamplingRequirement):
-    def __init__(self, pendingReq, closure, dependencies, proposition):
+    def __init__(
+        self, pendingReq, closure, dependencies, proposition, batchEvaluator=None
+    ):
         super().__init__(optional=False)
         self.ty = pendingReq.ty
         self.closure = closure
@@ -445,6 +835,8 @@ class CompiledRequirement(SamplingRequirement):
         self.recConfig = pendingReq.recConfig
         self.dependencies = dependencies
         self.proposition = proposition
+        self.egoObject = pendingReq.egoObject
+        self.batchEvaluator = batchEvaluator  # see batchEvaluatorFor
 
     @property
     def constrainsSampling(self):
@@ -454,6 +846,40 @@ class CompiledRequirement(SamplingRequirement):
         one_time_monitor = self.proposition.create_monitor()
         return self.closure(sample, one_time_monitor) == rv_ltl.B4.FALSE
 
+    def violationDependencies(self):
+        return self.dependencies
+
+    def falsifiedByBatch(self, batch):
+        """Evaluate this requirement column-wise on a `SampleBatch`, if possible.
+
+        This is possible when the requirement is a comparison of arithmetic
+        expressions (see `batchEvaluatorFor`) and all the random values it uses were
+        sampled in batch. The requirement's closure is not run.
+
+        Returns:
+            A boolean array marking the candidates which falsify the requirement,
+            or `None` if the requirement cannot be evaluated on the batch.
+        """
+        assert self.active
+        if self.batchEvaluator is None:
+            return None
+        evaluate, values = self.batchEvaluator
+        columns = batch.columns
+        if any(value not in columns for value in values):
+            return None
+        try:
+            with numpy.errstate(all="ignore"):
+                result = evaluate(columns)
+        except ValueError:
+            return None  # e.g. columns of vectors and scalars cannot be broadcast
+        if not (
+            isinstance(result, numpy.ndarray)
+            and result.dtype == bool
+            and result.shape == (batch.count,)
+        ):
+            return None
+        return ~result
+
     def __str__(self):
         if self.name:
             return self.name
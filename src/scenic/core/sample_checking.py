@@ -2,15 +2,29 @@
 
 from abc import ABC, abstractmethod
 from collections import deque
+import math
 import time
 
 from scenic.core.distributions import RejectionException
-from scenic.core.requirements import BlanketCollisionRequirement, IntersectionRequirement
+from scenic.core.requirements import (
+    BlanketCollisionRequirement,
+    IntersectionGroupRequirement,
+    IntersectionRequirement,
+)
 
 
 class SampleChecker(ABC):
+    """Abstract class for checking the requirements of a sample.
+
+    Attributes:
+        violatedRequirement: The requirement found to be violated by the last call
+            to `checkRequirements`, or `None` if there was none (or the check was
+            interrupted by a `RejectionException`).
+    """
+
     def __init__(self):
         self.requirements = None
+        self.violatedRequirement = None
 
     def setRequirements(self, requirements):
         assert self.requirements is None
@@ -22,11 +36,37 @@ class SampleChecker(ABC):
 
     def checkRequirements(self, sample):
         assert self.requirements is not None
+        self.violatedRequirement = None
         try:
             return self.checkRequirementsInner(sample)
         except RejectionException as e:
             return e
 
+    def checkBatch(self, batch):
+        """Check the requirements which can be evaluated column-wise on a batch.
+
+        Args:
+            batch (SampleBatch): Candidate samples drawn by `SamplingPlan.sampleBatch`.
+
+        Returns:
+            A list giving, for each candidate, the violation message of a requirement
+            it falsifies, or `None` if it falsifies none of the requirements which
+            could be checked (so that it must still be checked with
+            `checkRequirements` once complete).
+        """
+        assert self.requirements is not None
+        rejections = [None] * batch.count
+        for req in self.requirements:
+            if not req.active or not hasattr(req, "falsifiedByBatch"):
+                continue
+            falsified = req.falsifiedByBatch(batch)
+            if falsified is None:
+                continue
+            for index in falsified.nonzero()[0].tolist():
+                if rejections[index] is None:
+                    rejections[index] = req.violationMsg
+        return rejections
+
 
 class BasicChecker(SampleChecker):
     """Basic requirement checker.
@@ -46,8 +86,7 @@ class BasicChecker(SampleChecker):
                 if (
                     isinstance(req, BlanketCollisionRequirement)
                     and self.initialCollisionCheck
-                    and sum(isinstance(r, IntersectionRequirement) for r in requirements)
-                    >= 3
+                    and intersectionPairs(requirements) >= 3
                 ):
                     target_reqs.append(req)
             else:
@@ -58,11 +97,23 @@ class BasicChecker(SampleChecker):
     def checkRequirementsInner(self, sample):
         for req in self.requirements:
             if req.active and req.falsifiedBy(sample):
+                self.violatedRequirement = req
                 return req.violationMsg
 
         return None
 
 
+def intersectionPairs(requirements):
+    """Number of pairs of objects checked for intersection by the given requirements."""
+    pairs = 0
+    for req in requirements:
+        if isinstance(req, IntersectionRequirement):
+            pairs += 1
+        elif isinstance(req, IntersectionGroupRequirement):
+            pairs += math.comb(len(req.objects), 2)
+    return pairs
+
+
 class WeightedAcceptanceChecker(SampleChecker):
     """Picks the requirement with the lowest time-weighted acceptance chance.
 
@@ -98,6 +149,7 @@ class WeightedAcceptanceChecker(SampleChecker):
             self.updateMetrics(req, metrics)
 
             if rejected:
+                self.violatedRequirement = req
                 return req.violationMsg
 
         return None
@@ -141,3 +193,97 @@ class WeightedAcceptanceChecker(SampleChecker):
             return (runtime / rej_prob, 0)
         else:
             return (float("inf"), runtime)
+
+
+class AdaptiveChecker(SampleChecker):
+    """Checks requirements in an adaptive order, trying cheap bounds first.
+
+    Each requirement is compiled into a cascade: a cheap conservative test (see
+    `SamplingRequirement.prefilter`), such as comparing the bounding spheres of two
+    objects, followed by the exact test only if the cheap one is inconclusive. The
+    expected cost and rejection rate of each cascade are estimated with exponentially
+    weighted moving averages, and every **sortInterval** samples the requirements
+    are re-sorted by expected cost per rejection.
+
+    The averages start out as plain means of the first ``1/decay`` observations, and
+    requirements never checked so far are estimated to be free and to reject every
+    sample, so that they are tried early.
+
+    Args:
+        decay: Weight given to each new observation in the moving averages.
+        sortInterval: Number of samples to check between re-sorts.
+    """
+
+    def __init__(self, decay=0.1, sortInterval=10):
+        super().__init__()
+        if not 0 < decay <= 1:
+            raise ValueError(f"decay must be in (0, 1], not {decay}")
+        if sortInterval < 1:
+            raise ValueError(f"sort interval must be positive, not {sortInterval}")
+        self.decay = decay
+        self.sortInterval = sortInterval
+        self.cascades = None
+        self.costs = None
+        self.rejectionRates = None
+        self.observations = None
+        self._order = None
+        self._untilSort = 0
+
+    def setRequirements(self, requirements):
+        super().setRequirements(requirements)
+
+        self.cascades = tuple((req, req.prefilter()) for req in self.requirements)
+        self.costs = [0.0] * len(self.cascades)
+        self.rejectionRates = [1.0] * len(self.cascades)
+        self.observations = [0] * len(self.cascades)
+        self.sortRequirements()
+
+    def checkRequirementsInner(self, sample):
+        self._untilSort -= 1
+        if self._untilSort <= 0:
+            self.sortRequirements()
+
+        decay = self.decay
+        costs, rejectionRates = self.costs, self.rejectionRates
+        observations = self.observations
+        cascades = self.cascades
+        order = [index for index in self._order if cascades[index][0].active]
+
+        # Optional requirements are useless once all others have been checked.
+        while order and cascades[order[-1]][0].optional:
+            order.pop()
+
+        for index in order:
+            req, prefilter = cascades[index]
+            start = time.perf_counter()
+            rejected = prefilter(sample) if prefilter else None
+            if rejected is None:
+                rejected = req.falsifiedBy(sample)
+            elapsed = time.perf_counter() - start
+
+            count = observations[index] = observations[index] + 1
+            weight = max(decay, 1 / count)
+            costs[index] += weight * (elapsed - costs[index])
+            rejectionRates[index] += weight * (bool(rejected) - rejectionRates[index])
+
+            if rejected:
+                self.violatedRequirement = req
+                return req.violationMsg
+
+        return None
+
+    def sortRequirements(self):
+        """Re-sort the requirements according to the current estimates."""
+        order = sorted(range(len(self.cascades)), key=self.getRequirementCost)
+        self._order = tuple(order)
+        self._untilSort = self.sortInterval
+
+    def getRequirementCost(self, index):
+        # As in WeightedAcceptanceChecker, the expected cost of a requirement is its
+        # average runtime divided by its rejection probability, with ties between
+        # requirements which never reject broken using runtime.
+        cost, rejectionRate = self.costs[index], self.rejectionRates[index]
+        if rejectionRate > 0:
+            return (cost / rejectionRate, 0)
+        else:
+            return (float("inf"), cost)
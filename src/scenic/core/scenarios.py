@@ -1,8 +1,10 @@
 """Scenario and scene objects."""
 
+import collections
 import dataclasses
 import io
 import itertools
+import multiprocessing
 import random
 import sys
 import time
@@ -15,6 +17,7 @@ from scenic.core.distributions import (
     ConstantSamplable,
     RejectionException,
     Samplable,
+    SamplingPlan,
     distributionFunction,
     needsSampling,
 )
@@ -25,24 +28,34 @@ from scenic.core.lazy_eval import needsLazyEvaluation
 from scenic.core.regions import (
     AllRegion,
     EmptyRegion,
+    MeshVolumeRegion,
     PointInRegionDistribution,
     convertToFootprint,
 )
 from scenic.core.requirements import (
     BlanketCollisionRequirement,
     BoundRequirement,
+    ContainmentGroupRequirement,
     ContainmentRequirement,
+    IntersectionGroupRequirement,
     IntersectionRequirement,
     NonVisibilityRequirement,
+    VisibilityGroupRequirement,
     VisibilityRequirement,
 )
-from scenic.core.sample_checking import BasicChecker, WeightedAcceptanceChecker
+from scenic.core.sample_checking import AdaptiveChecker, BasicChecker
 from scenic.core.serialization import Serializer, dumpAsScenicCode
 from scenic.core.vectors import Vector
 
 # Global params
 
 INITIAL_COLLISION_CHECK = True
+# Number of objects from which intersections are checked by a single
+# IntersectionGroupRequirement rather than one IntersectionRequirement per pair
+INTERSECTION_GROUP_THRESHOLD = 8
+# Number of visibility requirements from which they are checked together by a
+# VisibilityGroupRequirement
+VISIBILITY_GROUP_THRESHOLD = 2
 
 # Pickling support
 
@@ -59,9 +72,13 @@ class _ScenarioPickleMixin:
             self.compileOptions,
             paramOverrides=self.params,  # save all params, not just those from --param
         )
+        state = self.__dict__
+        if state.get("_samplingPlan") is not None:
+            # Compiled plans refer to objects by ID, so recompile after unpickling
+            state = dict(state, _samplingPlan=None)
         elements = (
             _Activator(options, oldModules),
-            self.__dict__,
+            state,
             _Deactivator(oldModules),
         )
         return elements
@@ -315,10 +332,74 @@ class Scenario(_ScenarioPickleMixin):
         self.dependencies = (
             self._instances + paramDeps + tuple(requirementDeps) + tuple(behaviorDeps)
         )
+        self._samplingPlan = None  # compiled on first use, after pruning
+        self.sampleBatchSize = None
+        self.incrementalResampling = 0
 
         # Setup the default checker
         self.defaultRequirements = self.generateDefaultRequirements()
-        self.setSampleChecker(WeightedAcceptanceChecker(bufferSize=100))
+        self.setSampleChecker(AdaptiveChecker())
+
+    @property
+    def samplingPlan(self):
+        """The `SamplingPlan` used to sample the dependencies of this scenario."""
+        if self._samplingPlan is None:
+            self._samplingPlan = SamplingPlan(self.dependencies)
+        return self._samplingPlan
+
+    def configureSampling(self, batchSize=None, incremental=False, restartInterval=100):
+        """Configure how candidate samples are drawn during rejection sampling.
+
+        Args:
+            batchSize (int): If not `None`, draw candidates in batches of this size:
+                primitive distributions and arithmetic on them are sampled for the
+                whole batch at once with NumPy (see `SamplingPlan.sampleBatch`), and
+                requirements depending only on such values are checked column-wise
+                to discard candidates before the rest of their values are sampled.
+                This can greatly speed up scenarios whose requirements reject most
+                samples. The scenes generated are still reproducible given the
+                random seed, but differ from those generated without batching.
+            incremental (bool): Whether to resample incrementally: when a candidate
+                violates a requirement, only the values it depends on (see
+                `SamplingRequirement.violationDependencies`) and the values depending
+                on those are resampled, keeping the rest of the candidate. This is
+                much faster for large scenes where violations are local, e.g. one
+                object colliding with another. When several requirements are
+                violated, the first one in declaration order is used, so the scenes
+                generated are still reproducible given the random seed.
+
+                .. warning::
+
+                    Incremental resampling is a Markov chain (block Gibbs-style)
+                    kernel, not rejection sampling: in general the scenes it
+                    generates do **not** follow the distribution defined by the
+                    scenario. It is exact only when the values involved in
+                    different requirements are independent (e.g. objects placed
+                    independently, each with its own containment requirement);
+                    with requirements coupling objects, such as the default
+                    requirement that objects not intersect, configurations which
+                    are easier to reach one object at a time are favored.
+
+            restartInterval (int): When resampling incrementally, number of
+                consecutive incremental resamples after which a completely new
+                candidate is drawn, so that sampling cannot get stuck.
+        """
+        if batchSize is not None or incremental:
+            if self.externalSampler is not None:
+                raise RuntimeError(
+                    "batch and incremental sampling do not support external samplers"
+                )
+        if batchSize is not None:
+            if batchSize < 1:
+                raise ValueError(f"batch size must be positive, not {batchSize}")
+            if incremental:
+                raise ValueError(
+                    "batch sampling and incremental resampling cannot be combined"
+                )
+        if incremental and restartInterval < 1:
+            raise ValueError(f"restart interval must be positive, not {restartInterval}")
+        self.sampleBatchSize = batchSize
+        self.incrementalResampling = restartInterval if incremental else 0
 
     def setSampleChecker(self, checker):
         self.checker = checker
@@ -404,7 +485,13 @@ class Scenario(_ScenarioPickleMixin):
         return scenes[0], iterations
 
     def generateBatch(
-        self, numScenes, maxIterations=float("inf"), verbosity=0, feedback=None
+        self,
+        numScenes,
+        maxIterations=float("inf"),
+        verbosity=0,
+        feedback=None,
+        *,
+        workers=None,
     ):
         """Sample several `Scene` objects from this scenario.
 
@@ -416,6 +503,8 @@ class Scenario(_ScenarioPickleMixin):
             verbosity (int): Verbosity level.
             feedback (float): Feedback to pass to external samplers doing active sampling.
                 See :mod:`scenic.core.external_params`.
+            workers (int): If not `None`, generate the scenes in parallel with this many
+                worker processes, as in `generateParallel`.
 
         Returns:
             A pair with a list of the sampled `Scene` objects and the total number
@@ -427,6 +516,25 @@ class Scenario(_ScenarioPickleMixin):
         totalIterations = 0
         scenes = []
 
+        if workers is not None:
+            if feedback is not None:
+                raise RuntimeError("cannot pass feedback to parallel scene generation")
+            try:
+                stream = self.generateParallel(
+                    numScenes, workers, maxIterations=maxIterations, verbosity=verbosity
+                )
+                for scene, iterations in stream:
+                    scenes.append(scene)
+                    totalIterations += iterations
+            except RejectionException:
+                totalIterations = float("inf")
+            # Workers sample independently, so the budget is checked at the end.
+            if totalIterations > maxIterations:
+                raise RejectionException(
+                    f"failed to generate scenario in {maxIterations} iterations"
+                )
+            return scenes, totalIterations
+
         for _ in range(numScenes):
             try:
                 remainingIts = maxIterations - totalIterations
@@ -440,6 +548,79 @@ class Scenario(_ScenarioPickleMixin):
 
         return scenes, totalIterations
 
+    def generateParallel(
+        self, numScenes, workers, maxIterations=2000, verbosity=0, *, context=None
+    ):
+        """Sample scenes using several worker processes.
+
+        Each worker holds its own copy of this scenario (inherited when forking, or
+        pickled with :mod:`dill` otherwise) and sends back the scenes it samples
+        encoded with `sceneToBytes`. Scenes are yielded in order as they become
+        available, with only a few scenes sampled ahead of the consumer, so this
+        method can also be used to generate an unbounded stream of scenes.
+
+        The *i*-th scene is sampled with its own seed, derived from a master seed
+        drawn from Python's `random` module. So if the random seed is set beforehand,
+        the sequence of scenes is reproducible, and does not depend on the number of
+        workers (it does however differ from the sequence generated by `generate`).
+
+        Args:
+            numScenes (int): Number of scenes to generate, or `None` to generate
+                scenes until the generator is closed.
+            workers (int): Number of worker processes.
+            maxIterations (int): Maximum number of rejection sampling iterations for
+                each scene.
+            verbosity (int): Verbosity level.
+            context (str): The `multiprocessing` start method to use, e.g.
+                ``"spawn"``; if `None`, the platform's default is used.
+
+        Yields:
+            Pairs consisting of a sampled `Scene` and the number of iterations used.
+
+        Raises:
+            `RejectionException`: if some scene could not be generated in
+                **maxIterations** iterations.
+        """
+        if workers < 1:
+            raise ValueError(f"number of workers must be positive, not {workers}")
+        if self.externalSampler is not None:
+            raise RuntimeError(
+                "parallel scene generation does not support external samplers"
+            )
+
+        masterSeed = random.getrandbits(64)
+        indices = itertools.count() if numScenes is None else iter(range(numScenes))
+        mpContext = multiprocessing.get_context(context)
+        scenario = self._shareWithWorkers(mpContext)
+        with mpContext.Pool(workers, _initGenerationWorker, (scenario,)) as pool:
+            pending = collections.deque()
+
+            def submit(count):
+                for index in itertools.islice(indices, count):
+                    args = (masterSeed, index, maxIterations, verbosity)
+                    pending.append(pool.apply_async(_generateInWorker, args))
+
+            submit(2 * workers)
+            while pending:
+                data, iterations = pending.popleft().get()
+                submit(1)
+                yield self.sceneFromBytes(data, allowPickle=True), iterations
+
+    def _shareWithWorkers(self, mpContext):
+        """Prepare this scenario to be passed to processes of the given context.
+
+        The result should be passed to `_scenarioInWorker` in the worker process.
+        """
+        if mpContext.get_start_method() == "fork":
+            return self  # inherited by the workers
+        try:
+            import dill
+        except ModuleNotFoundError:
+            raise RuntimeError(
+                "using worker processes without forking requires dill"
+            ) from None
+        return dill.dumps(self)
+
     def _generateInner(self, maxIterations, verbosity, feedback):
         # choose which custom requirements will be enforced for this sample
         for req in self.userRequirements:
@@ -451,6 +632,10 @@ class Scenario(_ScenarioPickleMixin):
         # do rejection sampling until requirements are satisfied
         rejection = True
         iterations = 0
+        if self.sampleBatchSize:
+            candidates = self._batchCandidates(self.sampleBatchSize)
+        cone = None  # nodes to resample incrementally, if any
+        partialResamples = 0
         while rejection is not None:
             if iterations > 0:  # rejected the last sample
                 if verbosity >= 2:
@@ -465,10 +650,21 @@ class Scenario(_ScenarioPickleMixin):
             try:
                 if self.externalSampler is not None:
                     self.externalSampler.sample(feedback)
-                sample = Samplable.sampleAll(self.dependencies)
+                if self.sampleBatchSize:
+                    batch, index, rejection = next(candidates)
+                    if rejection is not None:
+                        continue
+                    sample = batch.sample(index)
+                elif cone is not None:
+                    sample = self.samplingPlan.resample(sample, cone)
+                    partialResamples += 1
+                else:
+                    sample = self.samplingPlan.sample()
+                    partialResamples = 0
             except RejectionException as e:
                 optionallyDebugRejection(e)
                 rejection = e
+                cone = None
                 continue
             rejection = None
 
@@ -486,11 +682,51 @@ class Scenario(_ScenarioPickleMixin):
 
             if rejection is not None:
                 optionallyDebugRejection()
+                cone = None
+                if partialResamples < self.incrementalResampling:
+                    cone = self._resamplingCone(sample)
 
         # obtained a valid sample; assemble a scene from it
         scene = self._makeSceneFromSample(sample)
         return scene, iterations
 
+    def _resamplingCone(self, sample):
+        """Nodes to resample incrementally to fix a violated requirement.
+
+        Which violated requirement the checker finds first can depend on timing
+        (e.g. with the `AdaptiveChecker`), so for reproducibility we use the first
+        one in declaration order, found by checking the requirements again.
+        """
+        if self.checker.violatedRequirement is None:
+            return None
+        requirement = None
+        rand_state, np_state = random.getstate(), numpy.random.get_state()
+        try:
+            for req in self.checker.requirements:
+                if req.active and not req.optional and req.falsifiedBy(sample):
+                    requirement = req
+                    break
+        except RejectionException:
+            pass
+        finally:
+            random.setstate(rand_state)
+            numpy.random.set_state(np_state)
+        if requirement is None:
+            return None
+        dependencies = requirement.violationDependencies()
+        if dependencies is None:
+            return None
+        return self.samplingPlan.cone(dependencies) or None
+
+    def _batchCandidates(self, batchSize):
+        """Yield candidate samples drawn in batches, with their batch rejections."""
+        while True:
+            rng = numpy.random.default_rng(random.getrandbits(64))
+            batch = self.samplingPlan.sampleBatch(batchSize, rng)
+            rejections = self.checker.checkBatch(batch)
+            for index, rejection in enumerate(rejections):
+                yield batch, index, rejection
+
     def generateDefaultRequirements(self):
         requirements = []
 
@@ -501,32 +737,51 @@ class Scenario(_ScenarioPickleMixin):
 
         ## Mandatory Requirements ##
         # Pairwise object intersection
-        colliding_objects = (
+        colliding_objects = tuple(
             obj
             for obj in self.objects
             if needsSampling(obj.allowCollisions) or not obj.allowCollisions
         )
-        for objA, objB in itertools.combinations(colliding_objects, 2):
-            requirements.append(IntersectionRequirement(objA, objB))
+        if len(colliding_objects) >= INTERSECTION_GROUP_THRESHOLD:
+            requirements.append(IntersectionGroupRequirement(colliding_objects))
+        else:
+            for objA, objB in itertools.combinations(colliding_objects, 2):
+                requirements.append(IntersectionRequirement(objA, objB))
 
-        # Object containment
+        # Object containment; objects sharing a fixed mesh container are checked
+        # together, so that the container can batch their queries
+        groups = {}
         for obj in self.objects:
             container = self.containerOfObject(obj)
-            if not isinstance(container, AllRegion):
+            if isinstance(container, AllRegion):
+                continue
+            if (
+                isinstance(container, MeshVolumeRegion)
+                and not needsSampling(container)
+                and not needsLazyEvaluation(container)
+            ):
+                groups.setdefault(id(container), (container, []))[1].append(obj)
+            else:
                 requirements.append(ContainmentRequirement(obj, container))
+        for container, objs in groups.values():
+            if len(objs) == 1:
+                requirements.append(ContainmentRequirement(objs[0], container))
+            else:
+                requirements.append(ContainmentGroupRequirement(objs, container))
 
         # Observing entity visibility
+        visibilityRequirements = []
         possible_occluders = filter(
             lambda x: (needsSampling(x.occluding) or x.occluding), self.objects
         )
         for obj in filter(lambda x: x._observingEntity is not None, self._instances):
-            requirements.append(
+            visibilityRequirements.append(
                 VisibilityRequirement(obj._observingEntity, obj, possible_occluders)
             )
 
         # Observing entity non visibility
         for obj in filter(lambda x: x._nonObservingEntity is not None, self._instances):
-            requirements.append(
+            visibilityRequirements.append(
                 NonVisibilityRequirement(obj._nonObservingEntity, obj, possible_occluders)
             )
 
@@ -538,7 +793,15 @@ class Scenario(_ScenarioPickleMixin):
                 raise InvalidScenarioError(
                     "requireVisible set to true but no ego is defined"
                 )
-            requirements.append(VisibilityRequirement(self.egoObject, obj, self.objects))
+            visibilityRequirements.append(
+                VisibilityRequirement(self.egoObject, obj, self.objects)
+            )
+
+        # Visibility requirements are checked together when there are several
+        if len(visibilityRequirements) >= VISIBILITY_GROUP_THRESHOLD:
+            requirements.append(VisibilityGroupRequirement(visibilityRequirements))
+        else:
+            requirements.extend(visibilityRequirements)
 
         return tuple(requirements)
 
@@ -640,6 +903,7 @@ class Scenario(_ScenarioPickleMixin):
         """
         assert objects or params
         assert bool(scene) == bool(objects)
+        self._samplingPlan = None
         if scene:
             assert len(self.objects) == len(scene.objects)
         for i in objects:
@@ -753,3 +1017,32 @@ class Scenario(_ScenarioPickleMixin):
             data = io.BytesIO(data)
         scene = self.sceneFromBytes(data, verify=verify, allowPickle=allowPickle)
         return simulator.simulate(scene, replay=data, **kwargs)
+
+
+# Worker processes
+
+_workerScenario = None
+
+
+def _scenarioInWorker(scenario):
+    if isinstance(scenario, bytes):
+        import dill
+
+        scenario = dill.loads(scenario)
+    return scenario
+
+
+def _initGenerationWorker(scenario):
+    global _workerScenario
+    _workerScenario = _scenarioInWorker(scenario)
+
+
+def _generateInWorker(masterSeed, index, maxIterations, verbosity):
+    # Seed the worker from the index of the scene, so that the scenes generated do
+    # not depend on which worker generates them.
+    seeds = numpy.random.SeedSequence(masterSeed, spawn_key=(index,))
+    random.seed(int(seeds.generate_state(1, numpy.uint64)[0]))
+    numpy.random.seed(seeds.generate_state(4))
+    scenario = _workerScenario
+    scene, iterations = scenario._generateInner(maxIterations, verbosity, None)
+    return scenario.sceneToBytes(scene, allowPickle=True), iterations
@@ -8,8 +8,6 @@ import pickle
 import sys
 from typing import Literal, Tuple
 
-import PIL.Image
-import cv2
 import numpy as np
 
 
@@ -212,13 +210,30 @@ def prepareImageData(data, intOnly=False):
 
 
 def pilHandler(path, value, options):
+    import PIL.Image
+
     image = PIL.Image.fromarray(prepareImageData(value))
     image.save(path, **options)
 
 
-for ext, name in PIL.Image.registered_extensions().items():
-    if name in PIL.Image.SAVE:
-        valueExtHandlers[ext[1:]] = pilHandler
+_imageHandlersRegistered = False
+
+
+def registerImageHandlers():
+    """Register `pilHandler` for all the image formats PIL can save.
+
+    This is done on demand rather than when this module is imported, since importing
+    PIL is slow. Handlers already registered for an extension are kept.
+    """
+    global _imageHandlersRegistered
+    if _imageHandlersRegistered:
+        return
+    import PIL.Image
+
+    for ext, name in PIL.Image.registered_extensions().items():
+        if name in PIL.Image.SAVE:
+            valueExtHandlers.setdefault(ext[1:], pilHandler)
+    _imageHandlersRegistered = True
 
 
 def npyHandler(path, value, options):
@@ -251,6 +266,8 @@ def videoHandler(path, values, timestep, options):
             codec = "mp4v"
     elif len(codec) != 4:
         raise ValueError("video codec must be a 4-character string (FourCC)")
+    import cv2  # slow import only needed for videos
+
     fourcc = cv2.VideoWriter_fourcc(*codec)
     height, width = values[0][1].shape[:2]
     writer = cv2.VideoWriter(path, fourcc, 1.0 / timestep, (width, height))
@@ -304,6 +321,7 @@ class Files(Recorder):
         if not ext:
             ext = ".npy"
             self.pattern += ".npy"
+        registerImageHandlers()
         self.handler = valueExtHandlers.get(ext[1:])
         if self.handler is None:
             raise ValueError(
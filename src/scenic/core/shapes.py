@@ -77,6 +77,14 @@ class Shape(ABC):
     def _multipoint(self):
         return shapely.multipoints(self.mesh.vertices)
 
+    @cached_property
+    def _samplingTable(self):
+        # Table for sampling points uniformly in the mesh, shared by all regions
+        # occupied by objects with this shape.
+        from scenic.core.regions import _meshSamplingTable
+
+        return _meshSamplingTable(self.mesh, centerMesh=False)
+
 
 ###################################################################################################
 # 3D Shape Classes
@@ -173,6 +181,7 @@ class MeshShape(Shape):
     def __getstate__(self):
         state = self.__dict__.copy()
         state["_mesh"] = self._mesh.copy()
+        state.pop("_cached__samplingTable", None)  # rebuilt on demand
         return state
 
 
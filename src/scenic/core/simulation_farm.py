@@ -0,0 +1,333 @@
+"""Running many simulations in parallel on a pool of simulators.
+
+A `SimulationFarm` owns a set of worker processes, each holding its own copy of a
+compiled `Scenario` and its own `Simulator` instance (e.g. a `NewtonianSimulator`,
+a `DiffDriveSimulator`, or one of several Webots instances). Scenes are sampled in
+the main process and handed out to the workers through a queue; as simulations
+finish, their results are written incrementally to a JSON Lines file, one object
+per simulation, so that long-running sweeps can be monitored and analyzed while
+they run, and lose nothing if interrupted.
+"""
+
+import base64
+import dataclasses
+import json
+import multiprocessing
+import numbers
+import os
+import queue
+import random
+import time
+import traceback
+
+import numpy
+
+from scenic.core.vectors import Orientation, Vector
+
+
+@dataclasses.dataclass
+class FarmMetrics:
+    """Throughput and utilization statistics of a `SimulationFarm` run.
+
+    Attributes:
+        completed (int): Number of simulations which ran to completion.
+        rejected (int): Number of scenes for which every simulation was rejected.
+        failed (int): Number of simulations which raised an exception.
+        steps (int): Total number of time steps simulated.
+        wallTime (float): Duration of the run in seconds.
+        busyTime (list): For each worker, the total time in seconds it spent
+            running simulations.
+    """
+
+    completed: int = 0
+    rejected: int = 0
+    failed: int = 0
+    steps: int = 0
+    wallTime: float = 0
+    busyTime: list = dataclasses.field(default_factory=list)
+
+    @property
+    def simulations(self):
+        """Total number of scenes simulated."""
+        return self.completed + self.rejected + self.failed
+
+    @property
+    def throughput(self):
+        """Number of scenes simulated per second."""
+        return self.simulations / self.wallTime if self.wallTime else 0
+
+    @property
+    def utilization(self):
+        """For each worker, the fraction of the run it spent running simulations."""
+        return [busy / self.wallTime if self.wallTime else 0 for busy in self.busyTime]
+
+    def summary(self):
+        """A human-readable summary of these metrics."""
+        utilization = ", ".join(f"{100 * u:.0f}%" for u in self.utilization)
+        return (
+            f"{self.simulations} simulations ({self.completed} completed, "
+            f"{self.rejected} rejected, {self.failed} failed) in {self.wallTime:.2f} s: "
+            f"{self.throughput:.2f} simulations/s, "
+            f"{self.steps / self.wallTime if self.wallTime else 0:.0f} steps/s; "
+            f"worker utilization {utilization}"
+        )
+
+
+class SimulationFarm:
+    """A pool of worker processes running simulations of a scenario.
+
+    Each line of the results file is a JSON object with the following keys:
+
+    * ``index``: the index of the simulation, in the order scenes were sampled;
+    * ``worker``: the index of the worker which ran it;
+    * ``status``: ``"completed"``, ``"rejected"`` or ``"failed"``;
+    * ``steps``, ``terminationType``, ``terminationReason`` and ``records``: the
+      length of the simulation and the corresponding attributes of its
+      `SimulationResult` (`None` unless completed), with record values converted
+      to JSON (vectors become lists, and unknown types their `repr`);
+    * ``error``: the traceback of the exception, if the simulation failed;
+    * ``time``: how long the simulation took, in seconds;
+    * ``scene``: the scene, encoded with `Scenario.sceneToBytes` and Base64;
+    * ``replay``: the path to the file holding the simulation's replay, encoded
+      with `Scenario.simulationToBytes`, if **replayDir** was given.
+
+    Args:
+        scenario (Scenario): The scenario to simulate.
+        workers (int): Number of worker processes.
+        simulatorFactory: Function called in each worker with the worker's index
+            to create its `Simulator`, e.g. to connect to a different simulator
+            instance from each worker. If `None`, each worker calls
+            `Scenario.getSimulator`.
+        results (str): Path of the JSON Lines file to write results to, or `None`
+            to not write results.
+        replayDir (str): Directory in which to save a replay of every completed
+            simulation, or `None` to not save replays.
+        context (str): The `multiprocessing` start method to use; see
+            `Scenario.generateParallel`.
+        simulateOptions: Additional arguments for `Simulator.simulate`, such as
+            **maxSteps**.
+    """
+
+    def __init__(
+        self,
+        scenario,
+        workers,
+        simulatorFactory=None,
+        *,
+        results=None,
+        replayDir=None,
+        context=None,
+        **simulateOptions,
+    ):
+        if workers < 1:
+            raise ValueError(f"number of workers must be positive, not {workers}")
+        self.scenario = scenario
+        self.workers = workers
+        self.simulatorFactory = simulatorFactory
+        self.results = results
+        self.replayDir = replayDir
+        self.context = context
+        self.simulateOptions = simulateOptions
+        if replayDir is not None:
+            os.makedirs(replayDir, exist_ok=True)
+
+    def run(self, count=None, scenes=None, maxIterations=2000, verbosity=0):
+        """Run simulations until **count** of them complete.
+
+        At most two scenes per worker are queued at any time, and no more than
+        needed to reach **count** if no simulation is rejected or fails.
+
+        Args:
+            count (int): Number of completed simulations to stop after, or `None`
+                to continue until **scenes** is exhausted (or forever).
+            scenes: An iterable of scenes of the scenario to simulate, such as the
+                stream produced by `Scenario.generateParallel`. If `None`, scenes
+                are sampled in this process using `Scenario.generate`.
+            maxIterations (int): Maximum number of rejection sampling iterations
+                for each scene sampled by this method.
+            verbosity (int): Verbosity level.
+
+        Returns:
+            The `FarmMetrics` of this run.
+        """
+        if scenes is None:
+            scenes = self._sampleScenes(maxIterations)
+        scenes = iter(scenes)
+        metrics = FarmMetrics(busyTime=[0] * self.workers)
+        mpContext = multiprocessing.get_context(self.context)
+        tasks = mpContext.Queue()
+        results = mpContext.Queue()
+        args = (
+            self.scenario._shareWithWorkers(mpContext),
+            self.simulatorFactory,
+            self.replayDir,
+            self.simulateOptions,
+            tasks,
+            results,
+        )
+        processes = [
+            mpContext.Process(target=_farmWorker, args=(i, *args), daemon=True)
+            for i in range(self.workers)
+        ]
+        output = open(self.results, "a") if self.results else None
+
+        startTime = time.monotonic()
+        nextIndex = 0
+        running = 0
+
+        def submit():
+            nonlocal nextIndex, running
+            try:
+                scene = next(scenes)
+            except StopIteration:
+                return False
+            data = self.scenario.sceneToBytes(scene, allowPickle=True)
+            tasks.put((nextIndex, data, random.getrandbits(32)))
+            nextIndex += 1
+            running += 1
+            return True
+
+        try:
+            for process in processes:
+                process.start()
+
+            # Keep every worker busy, with one more scene queued for each, but
+            # without queueing more scenes than needed to reach the count.
+            def wanted():
+                return count is None or metrics.completed + running < count
+
+            while running < 2 * self.workers and wanted():
+                if not submit():
+                    break
+            while running:
+                result = self._nextResult(results, processes)
+                running -= 1
+                metrics.busyTime[result["worker"]] += result["time"]
+                status = result["status"]
+                if status == "completed":
+                    metrics.completed += 1
+                    metrics.steps += result["steps"]
+                elif status == "rejected":
+                    metrics.rejected += 1
+                else:
+                    metrics.failed += 1
+                if output:
+                    output.write(json.dumps(result) + "\n")
+                    output.flush()
+                if verbosity >= 1:
+                    print(
+                        f"  Simulation {result['index']} {status} on worker "
+                        f"{result['worker']} in {result['time']:.4g} seconds."
+                    )
+                    if verbosity >= 2 and result["error"]:
+                        print(result["error"])
+                if wanted():
+                    submit()
+        finally:
+            for _ in processes:
+                tasks.put(None)
+            for process in processes:
+                if process.pid is None:
+                    continue  # never started
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+            if output:
+                output.close()
+            metrics.wallTime = time.monotonic() - startTime
+        return metrics
+
+    def _sampleScenes(self, maxIterations):
+        while True:
+            scene, _ = self.scenario.generate(maxIterations=maxIterations)
+            yield scene
+
+    @staticmethod
+    def _nextResult(results, processes):
+        while True:
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                # Workers only exit when told to, so a dead worker has crashed
+                # (possibly taking a scene with it).
+                for i, process in enumerate(processes):
+                    if not process.is_alive():
+                        raise RuntimeError(
+                            f"simulation farm worker {i} exited with code "
+                            f"{process.exitcode}"
+                        ) from None
+
+
+def _farmWorker(
+    workerIndex, scenario, simulatorFactory, replayDir, simulateOptions, tasks, results
+):
+    from scenic.core.scenarios import _scenarioInWorker
+
+    scenario = _scenarioInWorker(scenario)
+    if simulatorFactory is None:
+        simulator = scenario.getSimulator()
+    else:
+        simulator = simulatorFactory(workerIndex)
+    try:
+        while (task := tasks.get()) is not None:
+            index, sceneData, seed = task
+            startTime = time.monotonic()
+            result = dict(
+                index=index,
+                worker=workerIndex,
+                status="rejected",
+                steps=None,
+                terminationType=None,
+                terminationReason=None,
+                records=None,
+                error=None,
+            )
+            try:
+                # Seed each simulation from the main process, so that its random
+                # choices do not depend on which worker runs it.
+                random.seed(seed)
+                numpy.random.seed(seed)
+                scene = scenario.sceneFromBytes(sceneData, allowPickle=True)
+                simulation = simulator.simulate(
+                    scene, name=str(index), verbosity=0, **simulateOptions
+                )
+                if simulation:
+                    simResult = simulation.result
+                    result.update(
+                        status="completed",
+                        steps=len(simResult.trajectory) - 1,
+                        terminationType=simResult.terminationType.name,
+                        terminationReason=simResult.terminationReason,
+                        records=_toJSON(simResult.records),
+                    )
+                    if replayDir is not None:
+                        path = os.path.join(replayDir, f"simulation{index}.dat")
+                        with open(path, "wb") as f:
+                            f.write(
+                                scenario.simulationToBytes(simulation, allowPickle=True)
+                            )
+                        result["replay"] = path
+            except Exception:
+                result["status"] = "failed"
+                result["error"] = traceback.format_exc()
+            result["time"] = time.monotonic() - startTime
+            result["scene"] = base64.b64encode(sceneData).decode("ascii")
+            results.put(result)
+    finally:
+        simulator.destroy()
+
+
+def _toJSON(value):
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(key): _toJSON(val) for key, val in value.items()}
+    if isinstance(value, (Vector, list, tuple, numpy.ndarray)):
+        return [_toJSON(elem) for elem in value]
+    if isinstance(value, Orientation):
+        return list(value.eulerAngles)
+    return repr(value)
@@ -11,6 +11,7 @@ simulation as a `SimulationResult` object).
 """
 
 import abc
+import bisect
 from collections import defaultdict
 import enum
 import math
@@ -18,6 +19,8 @@ import numbers
 import time
 import types
 
+import numpy
+
 from scenic.core.distributions import RejectionException
 from scenic.core.dynamics import GuardViolation, RejectSimulationException
 from scenic.core.dynamics.actions import Action, _EndScenarioAction, _EndSimulationAction
@@ -31,6 +34,7 @@ from scenic.core.object_types import (
 )
 from scenic.core.requirements import RequirementType
 from scenic.core.serialization import Serializer
+from scenic.core.trajectories import TrajectoryStore, TrajectoryView
 from scenic.core.vectors import Vector
 
 
@@ -89,6 +93,7 @@ class Simulator(abc.ABC):
         divergenceTolerance=0,
         continueAfterDivergence=False,
         allowPickle=False,
+        trajectoryDirectory=None,
     ):
         """Run a simulation for a given scene.
 
@@ -136,6 +141,9 @@ class Simulator(abc.ABC):
             allowPickle (bool): Whether to use `pickle` to (de)serialize custom object
                 types. See `sceneFromBytes` for a discussion of when this may be needed
                 (rarely) and its security implications.
+            trajectoryDirectory (str): If not `None`, directory in which to store the
+                trajectory of the simulation in memory-mapped temporary files rather
+                than in memory. Useful for very long simulations with many objects.
 
         Returns:
             A `Simulation` object representing the completed simulation, or `None` if no
@@ -195,6 +203,7 @@ class Simulator(abc.ABC):
                 divergenceTolerance=divergenceTolerance,
                 continueAfterDivergence=continueAfterDivergence,
                 allowPickle=allowPickle,
+                trajectoryDirectory=trajectoryDirectory,
             )
         return simulation
 
@@ -309,11 +318,16 @@ class Simulation(abc.ABC):
             yet completed. This is the primary object which should be inspected to get
             data out of the simulation: the other undocumented attributes of this class
             are for internal use only.
+        trajectoryProperties (tuple): Names of the properties of objects saved at every
+            time step in `SimulationResult.trajectoryStore`. Subclasses may extend this
+            with other `Vector` or scalar properties provided by the simulator.
 
     Raises:
         RejectSimulationException: if a requirement is violated.
     """
 
+    trajectoryProperties = ("position", "heading", "velocity")
+
     def __init_subclass__(cls):
         super().__init_subclass__()
 
@@ -337,12 +351,24 @@ class Simulation(abc.ABC):
         divergenceTolerance=0,
         continueAfterDivergence=False,
         verbosity=0,
+        trajectoryDirectory=None,
     ):
         self.screen = None
         self.result = None
         self.scene = scene
         self.objects = []
-        self.trajectory = []
+        self._propertyPlans = {}
+        self._objectPlans = []  # plan of each object in self.objects
+        self._batchGroups = {}  # indices in self.objects of the objects with each plan
+        if type(self).currentState is Simulation.currentState:
+            # Store the trajectory in columnar form instead of as tuples of Vectors.
+            self.trajectoryStore = TrajectoryStore(
+                self.trajectoryProperties, spillDirectory=trajectoryDirectory
+            )
+            self.trajectory = TrajectoryView(self.trajectoryStore)
+        else:
+            self.trajectoryStore = None
+            self.trajectory = []
         self.records = defaultdict(list)
         self.currentTime = 0
         self.timestep = 1 if timestep is None else float(timestep)
@@ -568,6 +594,9 @@ class Simulation(abc.ABC):
         self.objects.append(obj)
         if obj.behavior:
             self.agents.append(obj)
+        plan = self._propertyPlan(obj)
+        self._objectPlans.append(plan)
+        self._batchGroups.setdefault(plan, []).append(len(self.objects) - 1)
 
         # Enable dynamic proxy for the object so that any mutations will not
         # affect the original object (e.g. if the simulator sets some of its
@@ -614,7 +643,10 @@ class Simulation(abc.ABC):
         for name, val in values.items():
             records[name].append((self.currentTime, val))
 
-        self.trajectory.append(self.currentState())
+        if self.trajectoryStore is not None:
+            self.trajectoryStore.record(self.objects)
+        else:
+            self.trajectory.append(self.currentState())
 
     def replayCanContinue(self):
         if not self.replaying:
@@ -693,36 +725,29 @@ class Simulation(abc.ABC):
         """Update the positions and other properties of objects from the simulation.
 
         Subclasses likely do not need to override this method: they should implement its
-        subroutine `getProperties` below.
+        subroutine `getProperties` below (and optionally `getPropertiesBatch`).
         """
-        for obj in self.objects:
+        batchedValues = self._getBatchedProperties()
+        for index, obj in enumerate(self.objects):
             # Get latest values of dynamic properties from simulation and assign them
-            dynTypes = obj._simulatorProvidedProperties
-            properties = set(dynTypes)
-            values = self.getProperties(obj, properties)
-            assert properties == set(values), properties ^ set(values)
-            for prop, value in values.items():
-                # Check new value has the expected type
-                ty = dynTypes[prop]
-                if ty is float and isinstance(value, numbers.Real):
-                    # Special case for scalars so that we don't penalize simulator interfaces
-                    # for returning ints, NumPy scalar types, etc.
-                    value = float(value)
-                elif ty is type(None):
-                    # Special case for properties with initial value None: the simulator sets
-                    # their actual initial value, so we'll assume the type is correct here.
-                    ty = type(value)
-                    dynTypes[prop] = ty
-                if not isinstance(value, ty):
-                    actual = type(value).__name__
-                    expected = ty.__name__
-                    raise RuntimeError(
-                        f'simulator provided value for property "{prop}" '
-                        f"with type {actual} instead of expected {expected}"
-                    )
+            properties, plan = self._objectPlans[index]
+            values = batchedValues[index] if batchedValues else None
+            if values is None:
+                values = self.getProperties(obj, set(properties))
+                assert values.keys() == properties, properties ^ set(values)
+            retyped = False
+            for prop, ty in plan:
+                # Check new value has the expected type (unless it has exactly that type)
+                value = values[prop]
+                if type(value) is not ty:
+                    value = self._checkPropertyType(obj, prop, ty, value)
+                    retyped = retyped or ty is type(None)
 
                 # Assign the new value
                 setattr(obj, prop, value)
+            if retyped:
+                self._replanObject(index, obj)
+            dynTypes = obj._simulatorProvidedProperties  # as updated by the checks
 
             # If saving a replay with divergence-checking support, save all the new values;
             # if running a replay with such support, check for divergence.
@@ -756,6 +781,85 @@ class Simulation(abc.ABC):
             # are recomputed
             obj._clearCaches()
 
+    def _propertyPlan(self, obj):
+        # Names and expected types of the simulator-provided properties of the object.
+        # These are cached by the types themselves rather than by class, since they
+        # are looked up on the object and may change (see _checkPropertyType); the
+        # plan of each object is kept in _objectPlans and only looked up again when
+        # its types change (see _replanObject).
+        types = tuple(obj._simulatorProvidedProperties.items())
+        plan = self._propertyPlans.get(types)
+        if plan is None:
+            plan = (frozenset(obj._simulatorProvidedProperties), types)
+            self._propertyPlans[types] = plan
+        return plan
+
+    def _replanObject(self, index, obj):
+        # Update the plan of an object whose property types have changed, moving it
+        # to the batch group of objects with its new plan.
+        old, new = self._objectPlans[index], self._propertyPlan(obj)
+        if new is old:
+            return
+        self._objectPlans[index] = new
+        groups = self._batchGroups
+        groups[old].remove(index)
+        if not groups[old]:
+            del groups[old]
+        bisect.insort(groups.setdefault(new, []), index)
+
+    @staticmethod
+    def _checkPropertyType(obj, prop, ty, value):
+        if ty is float and isinstance(value, numbers.Real):
+            # Special case for scalars so that we don't penalize simulator interfaces
+            # for returning ints, NumPy scalar types, etc.
+            value = float(value)
+        elif ty is type(None):
+            # Special case for properties with initial value None: the simulator sets
+            # their actual initial value, so we'll assume the type is correct here.
+            # (The types are stored per object, since other instances of the class
+            # may have values of a different type.)
+            ty = type(value)
+            if "_simulatorProvidedProperties" not in obj.__dict__:
+                obj._simulatorProvidedProperties = dict(obj._simulatorProvidedProperties)
+            obj._simulatorProvidedProperties[prop] = ty
+        if not isinstance(value, ty):
+            actual = type(value).__name__
+            expected = ty.__name__
+            raise RuntimeError(
+                f'simulator provided value for property "{prop}" '
+                f"with type {actual} instead of expected {expected}"
+            )
+        return value
+
+    def _getBatchedProperties(self):
+        # Read the properties of all objects with getPropertiesBatch, if implemented,
+        # calling it once for each group of objects with the same properties; returns
+        # a dict of values for each object, or None for objects whose properties need
+        # to be read with getProperties.
+        if type(self).getPropertiesBatch is Simulation.getPropertiesBatch:
+            return None
+        objects = self.objects
+        values = [None] * len(objects)
+        for (properties, plan), indices in self._batchGroups.items():
+            columns = self.getPropertiesBatch([objects[index] for index in indices])
+            if columns is None:
+                continue
+            assert columns.keys() == properties, properties ^ set(columns)
+            names = [prop for prop, ty in plan]
+            rows = zip(*(self._batchColumn(columns[prop], ty) for prop, ty in plan))
+            for index, row in zip(indices, rows):
+                values[index] = dict(zip(names, row))
+        return values
+
+    @staticmethod
+    def _batchColumn(column, ty):
+        # Convert an array of values from getPropertiesBatch to a list of values.
+        if isinstance(column, numpy.ndarray):
+            if ty is Vector and column.ndim == 2:
+                return [Vector(*row) for row in column.tolist()]
+            return column.tolist()
+        return column
+
     def valuesHaveDiverged(self, obj, prop, expected, actual):
         """Decide whether the value of a dynamic property has diverged from the replay.
 
@@ -803,6 +907,29 @@ class Simulation(abc.ABC):
         """
         raise NotImplementedError
 
+    def getPropertiesBatch(self, objects):
+        """Read the values of the properties of many objects from the simulator at once.
+
+        Optionally implemented by subclasses whose simulators can read back the states
+        of many objects more cheaply in one call than one object at a time. If this
+        method is implemented, `updateObjects` uses it instead of `getProperties`.
+
+        The objects passed in one call all have the same simulator-provided properties,
+        namely the keys of ``objects[0]._simulatorProvidedProperties``; if the objects
+        in the simulation have different sets of properties, this method is called once
+        for each set.
+
+        Args:
+            objects (list): Scenic objects in question.
+
+        Returns:
+            A `dict` mapping each property to a sequence of its values for the given
+            objects, in order. Each sequence may be a NumPy array: for `Vector`-valued
+            properties an array of shape (n, 3), and for scalar properties an array of
+            shape (n,). Alternatively, `None` to use `getProperties` for these objects.
+        """
+        return None
+
     def currentState(self):
         """Return the current state of the simulation.
 
@@ -810,6 +937,8 @@ class Simulation(abc.ABC):
         at each time step to define the 'trajectory' of the simulation.
 
         The default implementation returns a tuple of the positions of all objects.
+        When it is not overridden, the trajectory is kept in a `TrajectoryStore`
+        which also records the other properties listed in `trajectoryProperties`.
         """
         return tuple(obj.position for obj in self.objects)
 
@@ -891,6 +1020,23 @@ class DummySimulation(Simulation):
                 vals[prop] = None
         return vals
 
+    def getPropertiesBatch(self, objects):
+        count = len(objects)
+        vals = dict(
+            position=[obj.position for obj in objects],
+            yaw=[obj.yaw for obj in objects],
+            pitch=[obj.pitch for obj in objects],
+            roll=[obj.roll for obj in objects],
+            velocity=numpy.zeros((count, 3)),
+            angularVelocity=numpy.zeros((count, 3)),
+            speed=numpy.zeros(count),
+            angularSpeed=numpy.zeros(count),
+        )
+        for prop in objects[0]._simulatorProvidedProperties:
+            if prop not in vals:
+                vals[prop] = [None] * count
+        return vals
+
 
 @enum.unique
 class TerminationType(enum.Enum):
@@ -922,8 +1068,14 @@ class SimulationResult:
     """Result of running a simulation.
 
     Attributes:
-        trajectory: A tuple giving for each time step the simulation's 'state': by
+        trajectory: A sequence giving for each time step the simulation's 'state': by
             default the positions of every object. See `Simulation.currentState`.
+            This is a tuple, or a `TrajectoryView` behaving like one, if the
+            simulator uses the default notion of state.
+        trajectoryStore (`TrajectoryStore`): If the simulator uses the default notion
+            of state, the columnar storage backing **trajectory**, giving arrays of the
+            values of the properties in `Simulation.trajectoryProperties` at every time
+            step; otherwise `None`.
         finalState: The last 'state' of the simulation, as above.
         actions: A tuple giving for each time step a dict specifying for each agent the
             (possibly-empty) tuple of actions it took at that time step.
@@ -935,7 +1087,12 @@ class SimulationResult:
     """
 
     def __init__(self, trajectory, actions, terminationType, terminationReason, records):
-        self.trajectory = tuple(trajectory)
+        if isinstance(trajectory, TrajectoryView):
+            self.trajectory = trajectory
+            self.trajectoryStore = trajectory.store
+        else:
+            self.trajectory = tuple(trajectory)
+            self.trajectoryStore = None
         assert self.trajectory
         self.finalState = self.trajectory[-1]
         self.actions = tuple(actions)
@@ -0,0 +1,311 @@
+"""Columnar storage for the trajectories of simulations."""
+
+import collections.abc
+import numbers
+import operator
+import tempfile
+
+import numpy
+
+from scenic.core.vectors import Vector
+
+
+class TrajectoryStore:
+    """Structure-of-arrays storage for the states of objects during a simulation.
+
+    At each time step, `record` appends the values of a fixed set of properties of
+    every object in the simulation to a NumPy array indexed by time step, object, and
+    field, where a `Vector` property occupies 3 fields and a scalar property 1.
+    Objects are indexed by their position in ``Simulation.objects`` at the time step
+    in question, so the number of objects can grow as objects are created dynamically.
+    The array is preallocated and grown geometrically, so recording a time step does
+    not create any long-lived Python objects.
+
+    A property which does not have a `Vector` or real value for every object (e.g. a
+    velocity left as `None` by the simulator) is instead stored in an object column,
+    holding a tuple of the values of the property for each time step.
+
+    Args:
+        properties: Names of the properties to record.
+        spillDirectory: If not `None`, directory in which to store the array in a
+            memory-mapped temporary file instead of in memory, for very long
+            simulations. The file is deleted when the store is garbage-collected.
+        capacity (int): Number of time steps to preallocate space for.
+    """
+
+    def __init__(self, properties=("position",), spillDirectory=None, capacity=64):
+        self.properties = tuple(properties)
+        self.spillDirectory = spillDirectory
+        self._length = 0
+        self._counts = numpy.zeros(max(capacity, 1), dtype=numpy.int32)
+        self._fields = None  # slice of the fields of each property; set by _grow
+        self._columns = {}  # values of properties stored in object columns
+        self._plan = None
+        self._array = None
+        self._file = None
+
+    def record(self, objects):
+        """Append the current values of the recorded properties of the given objects."""
+        step, count = self._length, len(objects)
+        array = self._array
+        if step >= len(self._counts) or (
+            count and (array is None or count > array.shape[1])
+        ):
+            self._grow(step + 1, objects)
+            array = self._array
+        self._counts[step] = count
+        if count:
+            try:
+                self._recordArray(array[step, :count], objects)
+            except (AttributeError, TypeError, ValueError):
+                # Some property does not have numeric values: move it to an
+                # object column and try again.
+                if not self._demoteProperties(objects):
+                    raise
+                self._recordArray(self._array[step, :count], objects)
+        for prop, column in self._columns.items():
+            getter = operator.attrgetter(prop)
+            column.append(tuple(getter(obj) for obj in objects))
+        self._length = step + 1
+
+    def _recordArray(self, array, objects):
+        row = []
+        extend, append = row.extend, row.append
+        for obj in objects:
+            for getter, isVector in self._plan:
+                if isVector:
+                    extend(getter(obj).coordinates)
+                else:
+                    append(getter(obj))
+        array = array.reshape(-1)
+        array[:] = row
+        # NumPy silently converts None to NaN.
+        if numpy.isnan(array).any() and None in row:
+            raise TypeError("cannot store None in trajectory array")
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def counts(self):
+        """Array giving the number of objects at each time step."""
+        return self._counts[: self._length]
+
+    def array(self, prop):
+        """Get the recorded values of a property.
+
+        Returns:
+            An array of shape (steps, objects, fields), where objects is at least the
+            largest number of objects at any time step. Entries for objects which did
+            not exist at a given time step (see `counts`) are meaningless. For a
+            property stored in an object column, an array of objects of shape
+            (steps, objects) instead, with entries `None` for missing objects.
+        """
+        if prop not in self.properties:
+            raise KeyError(f'property "{prop}" was not recorded in trajectory')
+        if prop in self._columns:
+            column = self._columns[prop]
+            width = max((len(values) for values in column), default=0)
+            array = numpy.full((self._length, width), None, dtype=object)
+            for step, values in enumerate(column):
+                for index, value in enumerate(values):
+                    array[step, index] = value  # not a slice, so Vectors stay whole
+            return array
+        if self._array is None:  # no objects were ever recorded
+            return numpy.zeros((self._length, 0, 1))
+        return self._array[: self._length, :, self._fields[prop]]
+
+    def vectors(self, step, prop="position"):
+        """Get the values of a `Vector` property at a given time step as a tuple."""
+        if not 0 <= step < self._length:
+            raise IndexError("trajectory index out of range")
+        if prop in self._columns:
+            return self._columns[prop][step]
+        count = self._counts[step]
+        if not count:
+            return ()
+        rows = self._array[step, :count, self._fields[prop]].tolist()
+        return tuple(Vector(*row) for row in rows)
+
+    def _demoteProperties(self, objects):
+        """Move properties without numeric values for all objects to object columns.
+
+        Returns:
+            Whether any property was moved.
+        """
+        demoted = []
+        for prop, fields in self._fields.items():
+            getter = operator.attrgetter(prop)
+            if fields.stop - fields.start == 3:
+                valid = all(isinstance(getter(obj), Vector) for obj in objects)
+            else:
+                valid = all(isinstance(getter(obj), numbers.Real) for obj in objects)
+            if not valid:
+                demoted.append(prop)
+        if not demoted:
+            return False
+
+        # Convert the values recorded so far.
+        for prop in demoted:
+            fields = self._fields[prop]
+            column = []
+            for step in range(self._length):
+                values = self._array[step, : self._counts[step], fields].tolist()
+                if fields.stop - fields.start == 3:
+                    column.append(tuple(Vector(*value) for value in values))
+                else:
+                    column.append(tuple(value for (value,) in values))
+            self._columns[prop] = column
+
+        # Remove the fields of the demoted properties from the array.
+        keep = [self._fields[prop] for prop in self._fields if prop not in demoted]
+        columns = [field for fields in keep for field in range(fields.start, fields.stop)]
+        self._fields = self._layout(
+            [prop for prop in self._fields if prop not in demoted],
+            [fields.stop - fields.start for fields in keep],
+        )
+        self._plan = self._makePlan()
+        shape = self._array.shape[:2] + (len(columns),)
+        self._array = self._resize(shape, columns)
+        return True
+
+    @staticmethod
+    def _layout(properties, sizes):
+        fields = {}
+        width = 0
+        for prop, size in zip(properties, sizes):
+            fields[prop] = slice(width, width + size)
+            width += size
+        return fields
+
+    def _grow(self, minSteps, objects):
+        steps = len(self._counts)
+        while steps < minSteps:
+            steps *= 2
+        if steps > len(self._counts):
+            counts = numpy.zeros(steps, dtype=numpy.int32)
+            counts[: self._length] = self._counts[: self._length]
+            self._counts = counts
+
+        if self._fields is None:
+            if not objects:
+                return
+            sizes = {}
+            for prop in self.properties:
+                value = getattr(objects[0], prop)
+                if isinstance(value, Vector):
+                    sizes[prop] = 3
+                elif isinstance(value, numbers.Real):
+                    sizes[prop] = 1
+                else:
+                    # Not numeric, so store in an object column (from the start).
+                    self._columns[prop] = [()] * self._length
+            self._fields = self._layout(sizes, sizes.values())
+            self._plan = self._makePlan()
+            shape = (steps, len(objects), sum(sizes.values()))
+        else:
+            old = self._array.shape
+            # Leave room for further dynamically-created objects.
+            capacity = old[1] if len(objects) <= old[1] else max(len(objects), 2 * old[1])
+            shape = (steps, capacity, old[2])
+        self._array = self._resize(shape)
+
+    def _makePlan(self):
+        # Getter for each property stored in the array, and whether it is a Vector.
+        return [
+            (
+                operator.attrgetter(prop),
+                self._fields[prop].stop - self._fields[prop].start == 3,
+            )
+            for prop in self._fields
+        ]
+
+    def _resize(self, shape, fields=None):
+        # Copy the recorded data into a new array of the given shape, keeping only
+        # the given fields if any.
+        old = self._array
+        size = int(numpy.prod(shape)) * numpy.dtype(float).itemsize
+        if self.spillDirectory is None:
+            array = numpy.zeros(shape)
+        elif old is not None and old.shape[1:] == shape[1:] and fields is None:
+            # Only the number of time steps has changed, so we can extend the file
+            # in place rather than copying the existing data.
+            self._file.truncate(size)
+            return numpy.memmap(self._file, dtype=float, mode="r+", shape=shape)
+        else:
+            file = tempfile.TemporaryFile(dir=self.spillDirectory)
+            file.truncate(size)
+            array = numpy.memmap(file, dtype=float, mode="r+", shape=shape)
+            self._file = file
+        if old is not None:
+            recorded = old[: self._length]
+            if fields is not None:
+                recorded = recorded[:, :, fields]
+            array[: self._length, : old.shape[1]] = recorded
+        return array
+
+    def __getstate__(self):
+        # Pickle only the recorded data, in memory.
+        state = self.__dict__.copy()
+        state["spillDirectory"] = None
+        state["_file"] = None
+        state["_plan"] = None
+        steps = max(self._length, 1)
+        state["_counts"] = self._counts[:steps].copy()
+        if self._array is not None:
+            state["_array"] = numpy.array(self._array[:steps])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._fields is not None:
+            self._plan = self._makePlan()
+
+
+class TrajectoryView(collections.abc.Sequence):
+    """Read-only view of a `TrajectoryStore` as a sequence of states.
+
+    Each state is a tuple giving the value of a `Vector` property (by default the
+    position) of every object at that time step, as returned by the default
+    implementation of `Simulation.currentState`. States are built on demand from
+    the underlying arrays.
+
+    Like the tuple of states it replaces, a view compares equal to the tuple of its
+    states and has the same hash; slicing it or concatenating it with a tuple gives
+    a tuple.
+    """
+
+    def __init__(self, store, prop="position"):
+        self.store = store
+        self.prop = prop
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        return self.store.vectors(index, self.prop)
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, TrajectoryView)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __add__(self, other):
+        if isinstance(other, (tuple, TrajectoryView)):
+            return tuple(self) + tuple(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, tuple):
+            return other + tuple(self)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TrajectoryView({tuple(self)!r})"
@@ -15,7 +15,6 @@ import warnings
 import weakref
 
 import numpy
-import trimesh
 
 sqrt2 = math.sqrt(2)
 
@@ -51,6 +50,7 @@ def cached(oldMethod):
         except AttributeError:
             pass
 
+    clearer.storageName = storageName
     wrapper._scenic_cache_clearer = clearer
 
     return wrapper
@@ -135,6 +135,8 @@ def unifyMesh(mesh, verbose=False):
     2. From each volume, subtract each hole that is fully contained.
     3. Union all the resulting volumes.
     """
+    import trimesh  # slow import only needed for mesh boolean operations
+
     assert mesh.is_volume
 
     # No need to unify a mesh with less than 2 bodies
@@ -349,6 +351,49 @@ def findMeshInteriorPoint(mesh, num_samples=None):
     return surfacePt  # pragma: no cover
 
 
+class AliasTable:
+    """Table for sampling from a discrete distribution in constant time.
+
+    Built in linear time using Vose's alias method. Random numbers are drawn from
+    NumPy's global random number generator.
+
+    Args:
+        weights: Nonnegative weights of the outcomes, not necessarily normalized.
+    """
+
+    def __init__(self, weights):
+        weights = numpy.asarray(weights, dtype=float)
+        total = weights.sum()
+        if weights.ndim != 1 or not total > 0 or (weights < 0).any():
+            raise ValueError("alias table needs nonnegative weights with positive sum")
+        size = len(weights)
+        scaled = (weights * (size / total)).tolist()
+        probabilities = [1.0] * size
+        aliases = list(range(size))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probabilities[less] = scaled[less]
+            aliases[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+        # Any outcomes left over have probability 1 up to rounding error.
+        self.probabilities = numpy.array(probabilities)
+        self.aliases = numpy.array(aliases)
+
+    def __len__(self):
+        return len(self.probabilities)
+
+    def sample(self, count):
+        """Draw an array of **count** outcomes (indices into the weights)."""
+        size = len(self.probabilities)
+        draws = numpy.random.random(count) * size
+        indices = numpy.minimum(draws.astype(int), size - 1)
+        keep = (draws - indices) < self.probabilities[indices]
+        return numpy.where(keep, indices, self.aliases[indices])
+
+
 class DefaultIdentityDict:
     """Dictionary which is the identity map by default.
 
@@ -23,8 +23,10 @@ from scenic.core.distributions import (
     RejectionException,
     Samplable,
     TupleDistribution,
+    batchOperators,
     distributionFunction,
     distributionMethod,
+    isScalarBatch,
     makeOperatorHandler,
     needsSampling,
 )
@@ -56,6 +58,9 @@ warnings.filterwarnings(
 class VectorDistribution(Distribution):
     """A distribution over Vectors."""
 
+    def valuesFromBatch(self, batch):
+        return [Vector(*coords) for coords in batch.tolist()]
+
     _defaultValueType = None  # will be set after Vector is defined
 
     def toVector(self):
@@ -77,6 +82,26 @@ class VectorOperatorDistribution(VectorDistribution):
         op = getattr(first, self.operator)
         return op(*rest)
 
+    def sampleBatchGiven(self, value, count, rng):
+        first = vectorBatch(value[self.object])
+        if first is None or len(self.operands) != 1:
+            return None
+        operand = value[self.operands[0]]
+        if self.operator in ("__add__", "__radd__", "__sub__", "__rsub__"):
+            operand = vectorBatch(operand)
+            if operand is None:
+                return None
+        elif self.operator in ("__mul__", "__rmul__", "__truediv__"):
+            if not isScalarBatch(operand):
+                return None
+            operand = numpy.asarray(operand, dtype=float)[..., numpy.newaxis]
+            if self.operator == "__truediv__" and numpy.any(operand == 0):
+                return None  # let the scalar path raise ZeroDivisionError
+        else:
+            return None
+        result = batchOperators[self.operator](first, operand)
+        return numpy.broadcast_to(result, (count, 3))
+
     def evaluateInner(self, context):
         obj = valueInContext(self.object, context)
         operands = tuple(valueInContext(arg, context) for arg in self.operands)
@@ -112,6 +137,25 @@ class VectorMethodDistribution(VectorDistribution):
         return f"{self.object!r}.{self.method.__name__}({args})"
 
 
+def vectorBatch(thing):
+    """Convert a batch of vectors or a constant vector to an array, if possible.
+
+    Returns an array with one row per candidate, a single row for a constant, or
+    `None` if **thing** is neither.
+    """
+    if isinstance(thing, numpy.ndarray):
+        return thing if thing.ndim == 2 and thing.shape[1] == 3 else None
+    if isinstance(thing, Vector) and not needsSampling(thing):
+        coords = thing.coordinates
+    elif isinstance(thing, (tuple, list)) and 2 <= len(thing) <= 3:
+        coords = tuple(thing) + (0,) * (3 - len(thing))
+    else:
+        return None
+    if not isScalarBatch(*coords):
+        return None
+    return numpy.array(coords, dtype=float)
+
+
 def scalarOperator(method):
     """Decorator for vector operators that yield scalars."""
     op = method.__name__
@@ -215,14 +259,35 @@ def vectorDistributionMethod(method):
 class Orientation:
     """An orientation in 3D space."""
 
+    # Orientations are stored as unit quaternions in plain tuples, since creating
+    # SciPy rotations is relatively expensive; a `Rotation` is only created when
+    # requested through `r` or `getRotation`.
+    __slots__ = (
+        "_quat",
+        "_cached_r",
+        "_cached_q",
+        "_cached_eulerAngles",
+        "_cached_inverse",
+        "_cached__inverseRotation",
+        "_cached__matrix",
+    )
+
     def __init__(self, rotation):
         if not isinstance(rotation, Rotation):
             raise TypeError(
                 "Orientation's 'rotation' parameter must be a SciPy rotation."
                 " Perhaps you want to use a factory method?"
             )
-        self.r = rotation
-        self.q = rotation.as_quat()
+        self._quat = tuple(rotation.as_quat().tolist())
+        self._cached_r = rotation
+
+    @classmethod
+    def _fromQuat(cls, quat) -> Orientation:
+        # Create an `Orientation` from a unit quaternion (x,y,z,w) given as a tuple
+        # of floats, without normalizing it.
+        orientation = cls.__new__(cls)
+        orientation._quat = quat
+        return orientation
 
     @classmethod
     def fromQuaternion(cls, quaternion) -> Orientation:
@@ -239,30 +304,52 @@ class Orientation:
     @classmethod
     def _fromEuler(cls, yaw, pitch, roll) -> Orientation:
         # Inner version of `fromEuler` which doesn't accept distributions.
-        r = Rotation.from_euler("ZXY", [yaw, pitch, roll], degrees=False)
-        return cls(r)
+        # Composes the elementary rotations about the Z, X, and Y axes the same way
+        # as `Rotation.from_euler("ZXY", ...)`.
+        zs, zc = sin(yaw / 2), cos(yaw / 2)
+        xs, xc = sin(pitch / 2), cos(pitch / 2)
+        ys, yc = sin(roll / 2), cos(roll / 2)
+        quat = _composeQuaternions((0.0, 0.0, zs, zc), (xs, 0.0, 0.0, xc))
+        quat = _composeQuaternions(quat, (0.0, ys, 0.0, yc))
+        return cls._fromQuat(quat)
 
     @classmethod
     def _fromHeading(cls, heading) -> Orientation:
-        # This method is faster than `from_euler` if we only have 1 angle.
-        r = Rotation.from_rotvec([0, 0, heading], degrees=False)
-        return cls(r)
+        # This method is faster than `_fromEuler` if we only have 1 angle.
+        # Matches `Rotation.from_rotvec([0, 0, heading])`.
+        angle = abs(heading)
+        if angle <= 1e-3:  # small-angle approximation used by SciPy
+            angle2 = angle * angle
+            scale = 0.5 - angle2 / 48 + angle2 * angle2 / 3840
+        else:
+            scale = sin(angle / 2) / angle
+        return cls._fromQuat((0.0, 0.0, heading * scale, cos(angle / 2)))
+
+    @cached_property
+    def r(self) -> Rotation:
+        """This orientation as a SciPy `Rotation`."""
+        return Rotation(self._quat, normalize=False)
+
+    @cached_property
+    def q(self) -> numpy.ndarray:
+        """This orientation as a quaternion array (of the form (x,y,z,w))."""
+        return numpy.array(self._quat)
 
     @property
     def w(self) -> float:
-        return self.q[3]
+        return self._quat[3]
 
     @property
     def x(self) -> float:
-        return self.q[0]
+        return self._quat[0]
 
     @property
     def y(self) -> float:
-        return self.q[1]
+        return self._quat[1]
 
     @property
     def z(self) -> float:
-        return self.q[2]
+        return self._quat[2]
 
     @property
     def yaw(self) -> float:
@@ -309,7 +396,25 @@ class Orientation:
     @cached_property
     def eulerAngles(self) -> typing.Tuple[float, float, float]:
         """Global intrinsic Euler angles yaw, pitch, roll."""
-        return self.r.as_euler("ZXY", degrees=False)
+        # Same algorithm as `Rotation.as_euler("ZXY")`, specialized to that sequence;
+        # see Bernardes & Viollet, "Quaternion to Euler angles conversion: A direct,
+        # general and computationally efficient method" (2022).
+        x, y, z, w = self._quat
+        a, b, c, d = w - x, y - z, x + w, -z - y
+        halfSum = math.atan2(b, a)
+        halfDiff = math.atan2(d, c)
+        pitch = 2 * math.atan2(math.hypot(c, d), math.hypot(a, b))
+        if abs(pitch) <= 1e-7:  # gimbal lock; set roll to zero
+            yaw, roll = -2 * halfSum, 0.0
+        elif abs(pitch - math.pi) <= 1e-7:
+            yaw, roll = -2 * halfDiff, 0.0
+        else:
+            yaw, roll = -(halfSum + halfDiff), halfSum - halfDiff
+        return (
+            _wrapAngle(yaw),
+            _wrapAngle(pitch - math.pi / 2),
+            _wrapAngle(roll),
+        )
 
     def _trimeshEulerAngles(self):
         return self.r.as_euler("xyz", degrees=False)
@@ -319,12 +424,41 @@ class Orientation:
 
     @cached_property
     def inverse(self) -> Orientation:
-        return Orientation(self.r.inv())
+        x, y, z, w = self._quat
+        return Orientation._fromQuat((-x, -y, -z, w))
 
     @cached_property
     def _inverseRotation(self):
         return self.r.inv()
 
+    @cached_property
+    def _matrix(self):
+        # Rotation matrix, as a flat tuple in row-major order (computed as in SciPy).
+        x, y, z, w = self._quat
+        x2, y2, z2, w2 = x * x, y * y, z * z, w * w
+        xy, zw, xz, yw, yz, xw = x * y, z * w, x * z, y * w, y * z, x * w
+        return (
+            x2 - y2 - z2 + w2,
+            2 * (xy - zw),
+            2 * (xz + yw),
+            2 * (xy + zw),
+            -x2 + y2 - z2 + w2,
+            2 * (yz - xw),
+            2 * (xz - yw),
+            2 * (yz + xw),
+            -x2 - y2 + z2 + w2,
+        )
+
+    def _apply(self, vector):
+        # Rotate a 3D vector (given as any sequence); returns a tuple.
+        m00, m01, m02, m10, m11, m12, m20, m21, m22 = self._matrix
+        vx, vy, vz = vector
+        return (
+            m00 * vx + m01 * vy + m02 * vz,
+            m10 * vx + m11 * vy + m12 * vz,
+            m20 * vx + m21 * vy + m22 * vz,
+        )
+
     # will be converted to a distributionMethod after the class definition
     def __mul__(self, other) -> Orientation:
         """Apply a rotation to this orientation, yielding a new orientation.
@@ -342,7 +476,10 @@ class Orientation:
             return other
         if other == globalOrientation:
             return self
-        return Orientation(self.r * other.r)
+        # Like SciPy, normalize the product to avoid accumulating rounding errors.
+        x, y, z, w = _composeQuaternions(self._quat, other._quat)
+        norm = math.sqrt(x * x + y * y + z * z + w * w)
+        return Orientation._fromQuat((x / norm, y / norm, z / norm, w / norm))
 
     @distributionMethod
     def __add__(self, other) -> Orientation:
@@ -364,7 +501,8 @@ class Orientation:
         return f"Orientation.fromEuler{tuple(self.eulerAngles)!r}"
 
     def __hash__(self):
-        return hash(tuple(self.q)) + hash(tuple(-self.q))
+        x, y, z, w = self._quat
+        return hash(self._quat) + hash((-x, -y, -z, -w))
 
     @distributionFunction
     def localAnglesFor(self, orientation) -> typing.Tuple[float, float, float]:
@@ -388,24 +526,47 @@ class Orientation:
     def __eq__(self, other):
         if not isinstance(other, Orientation):
             return NotImplemented
-        return numpy.array_equal(self.q, other.q) or numpy.array_equal(self.q, -other.q)
+        if self._quat == other._quat:
+            return True
+        x, y, z, w = other._quat
+        return self._quat == (-x, -y, -z, -w)
 
     def approxEq(self, other, tol=1e-10):
         if not isinstance(other, Orientation):
             return NotImplemented
-        return abs(numpy.dot(self.q, other.q)) > 1 - tol
+        dot = sum(a * b for a, b in zip(self._quat, other._quat))
+        return abs(dot) > 1 - tol
 
     @classmethod
     def encodeTo(cls, orientation, stream):
-        stream.write(struct.pack("<dddd", *orientation.q))
+        stream.write(struct.pack("<dddd", *orientation._quat))
 
     @classmethod
     def decodeFrom(cls, stream):
-        # Quaternion constructor does not roundtrip so we manually
-        # construct a rotation and pass that in.
-        quaternion = struct.unpack("<dddd", stream.read(32))
-        rotation = Rotation(quaternion, normalize=False)
-        return cls(rotation)
+        # Don't normalize the quaternion, so that orientations roundtrip exactly.
+        return cls._fromQuat(struct.unpack("<dddd", stream.read(32)))
+
+
+def _composeQuaternions(p, q):
+    # Hamilton product of quaternions given as (x,y,z,w) tuples, computed the same
+    # way as in SciPy.
+    px, py, pz, pw = p
+    qx, qy, qz, qw = q
+    return (
+        pw * qx + qw * px + (py * qz - pz * qy),
+        pw * qy + qw * py + (pz * qx - px * qz),
+        pw * qz + qw * pz + (px * qy - py * qx),
+        pw * qw - px * qx - py * qy - pz * qz,
+    )
+
+
+def _wrapAngle(angle):
+    # Wrap an angle computed by `Orientation.eulerAngles` into [-pi, pi].
+    if angle < -math.pi:
+        return angle + 2 * math.pi
+    if angle > math.pi:
+        return angle - 2 * math.pi
+    return angle
 
 
 globalOrientation = Orientation.fromEuler(0, 0, 0)
@@ -463,6 +624,15 @@ class Vector(Samplable, collections.abc.Sequence):
     def sampleGiven(self, value):
         return Vector(*(value[coord] for coord in self.coordinates))
 
+    def sampleBatchGiven(self, value, count, rng):
+        coords = [value[coord] for coord in self.coordinates]
+        if not isScalarBatch(*coords):
+            return None
+        return numpy.stack([numpy.broadcast_to(c, (count,)) for c in coords], axis=1)
+
+    def valuesFromBatch(self, batch):
+        return [Vector(*coords) for coords in batch.tolist()]
+
     def evaluateInner(self, context):
         return Vector(*(valueInContext(coord, context) for coord in self.coordinates))
 
@@ -470,8 +640,7 @@ class Vector(Samplable, collections.abc.Sequence):
     def applyRotation(self, rotation):
         if not isinstance(rotation, Orientation):
             return TypeError("rotation must be an Orientation")
-        r = rotation.getRotation()
-        return Vector(*r.apply(self.coordinates))
+        return Vector(*rotation._apply(self.coordinates))
 
     @vectorOperator
     def sphericalCoordinates(self):
@@ -498,10 +667,8 @@ class Vector(Samplable, collections.abc.Sequence):
     @vectorOperator
     def offsetLocally(self, orientation, offset) -> Vector:
         # Faster version of `offsetRotated` that only accepts Orientations.
-        r = orientation.getRotation()
-        ro = r.apply(offset)
-        x, y, z = self
-        ox, oy, oz = ro
+        ox, oy, oz = orientation._apply(offset)
+        x, y, z = self.coordinates
         return Vector(x + ox, y + oy, z + oz)
 
     @vectorOperator
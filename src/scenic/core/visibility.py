@@ -93,21 +93,9 @@ def canSee(
         obj for obj in occludingObjects if position.distanceTo(obj) <= visibleDistance
     ]
 
-    if rayCount is None:
-        rayCount = (
-            math.degrees(viewAngles[0]) * rayDensity,
-            math.degrees(viewAngles[1]) * rayDensity,
-        )
-
-        if distanceScaling:
-            target_distance = target.position.distanceTo(position)
-
-            rayCount = (rayCount[0] * target_distance, rayCount[1] * target_distance)
-
-        altitudeScaling = True
-    else:
-        # Do not scale ray counts with altitude or distance if explicitly given
-        altitudeScaling = False
+    rayCount, altitudeScaling = _rayCounts(
+        position, viewAngles, rayCount, rayDensity, distanceScaling, target
+    )
 
     if isinstance(target, (Region, Object)):
         # Extract the target region from the object or region.
@@ -134,224 +122,12 @@ def canSee(
         if target.distanceTo(position) > visibleDistance:
             return False
 
-        # Orient the object so that it has the same relative position and orientation to the
-        # origin as it did to the viewer
-        target_vertices = target_region.mesh.vertices - np.array(position.coordinates)
-
-        if orientation is not None:
-            target_vertices = orientation._inverseRotation.apply(target_vertices)
-
-        # Add additional points along each edge that could potentially have a higher altitude
-        # than the endpoints.
-        vec_1s = np.asarray(target_vertices[target_region.mesh.edges[:, 0], :])
-        vec_2s = np.asarray(target_vertices[target_region.mesh.edges[:, 1], :])
-        x1, y1, z1 = vec_1s[:, 0], vec_1s[:, 1], vec_1s[:, 2]
-        x2, y2, z2 = vec_2s[:, 0], vec_2s[:, 1], vec_2s[:, 2]
-        D = x1 * x2 + y1 * y2
-        N = (x1**2 + y1**2) * z2 - D * z1
-        M = (x2**2 + y2**2) * z1 - D * z2
-        with np.errstate(divide="ignore", invalid="ignore"):
-            t_vals = N / (N + M)  # t values that can be an altitude local optimum
-
-        # Keep only points where the t_value is between 0 and 1
-        t_mask = np.logical_and(t_vals > 0, t_vals < 1)
-        interpolated_points = vec_1s[t_mask] + t_vals[t_mask][:, None] * (
-            vec_2s[t_mask] - vec_1s[t_mask]
+        ray_vectors = _candidateRays(
+            position, orientation, viewAngles, rayCount, altitudeScaling, target_region
         )
-
-        target_vertices = np.concatenate((target_vertices, interpolated_points), axis=0)
-
-        ## Check if the object crosses the y axis ahead and/or behind the viewer
-
-        # Extract the two vectors that are part of each edge crossing the y axis.
-        with np.errstate(divide="ignore", invalid="ignore"):
-            y_cross_edges = (vec_1s[:, 0] / vec_2s[:, 0]) < 0
-        vec_1s = vec_1s[y_cross_edges]
-        vec_2s = vec_2s[y_cross_edges]
-
-        # Figure out for which t value the vectors cross the y axis
-        t = (-vec_1s[:, 0]) / (vec_2s[:, 0] - vec_1s[:, 0])
-
-        # Figure out what the y value is when the y axis is crossed
-        y_intercept_points = t * (vec_2s[:, 1] - vec_1s[:, 1]) + vec_1s[:, 1]
-
-        # If the object crosses ahead and behind the object, or through 0,
-        # we will not optimize ray casting.
-        target_crosses_ahead = np.any(y_intercept_points >= 0)
-        target_crosses_behind = np.any(y_intercept_points <= 0)
-
-        ## Compute the horizontal/vertical angle ranges which bound the object
-        ## (from the origin facing forwards)
-        spherical_angles = np.zeros((len(target_vertices[:, 0]), 2))
-
-        spherical_angles[:, 0] = np.arctan2(target_vertices[:, 1], target_vertices[:, 0])
-        spherical_angles[:, 1] = np.arcsin(
-            target_vertices[:, 2] / (np.linalg.norm(target_vertices, axis=1))
-        )
-
-        # Align azimuthal angle with y axis.
-        spherical_angles[:, 0] = spherical_angles[:, 0] - math.pi / 2
-
-        # Normalize angles between (-Pi,Pi)
-        spherical_angles[:, 0] = np.mod(spherical_angles[:, 0] + np.pi, 2 * np.pi) - np.pi
-        spherical_angles[:, 1] = np.mod(spherical_angles[:, 1] + np.pi, 2 * np.pi) - np.pi
-
-        # First we check if the vertical angles overlap with the vertical view angles.
-        # If not, then the object cannot be visible.
-        if (
-            np.min(spherical_angles[:, 1]) > viewAngles[1] / 2
-            or np.max(spherical_angles[:, 1]) < -viewAngles[1] / 2
-        ):
+        if ray_vectors is None:
             return False
 
-        ## Compute which horizontal/vertical angle ranges to cast rays in
-        if target_crosses_ahead and target_crosses_behind:
-            # No optimizations feasible here. Just send all rays.
-            h_range = (-viewAngles[0] / 2, viewAngles[0] / 2)
-            v_range = (-viewAngles[1] / 2, viewAngles[1] / 2)
-
-            view_ranges = [(h_range, v_range)]
-
-        elif target_crosses_behind:
-            # We can keep the view angles oriented around the front of the object and
-            # consider the spherical angles oriented around the back of the object.
-            # We can then check for impossible visibility/optimize which rays will be cast.
-
-            # Extract the viewAngle ranges
-            va_h_range = (-viewAngles[0] / 2, viewAngles[0] / 2)
-            va_v_range = (-viewAngles[1] / 2, viewAngles[1] / 2)
-
-            # Convert spherical angles to be centered around the back of the viewing object.
-            left_points = spherical_angles[:, 0] >= 0
-            right_points = spherical_angles[:, 0] < 0
-
-            spherical_angles[:, 0][left_points] = (
-                spherical_angles[:, 0][left_points] - np.pi
-            )
-            spherical_angles[:, 0][right_points] = (
-                spherical_angles[:, 0][right_points] + np.pi
-            )
-
-            sphere_h_range = (
-                np.min(spherical_angles[:, 0]),
-                np.max(spherical_angles[:, 0]),
-            )
-            sphere_v_range = (
-                np.min(spherical_angles[:, 1]),
-                np.max(spherical_angles[:, 1]),
-            )
-
-            # Extract the overlapping ranges in the horizontal and vertical view angles.
-            # Note that the spherical range must cross the back plane and the view angles
-            # must cross the front plane (and are centered on these points),
-            # which means we can just add up each side of the ranges and see if they add up to
-            # greater than or equal to Pi. If none do, then it's impossible for object to overlap
-            # with the viewAngle range.
-
-            # Otherwise we can extract the overlapping v_ranges and use those going forwards.
-            overlapping_v_range = (
-                np.clip(sphere_v_range[0], va_v_range[0], va_v_range[1]),
-                np.clip(sphere_v_range[1], va_v_range[0], va_v_range[1]),
-            )
-            view_ranges = []
-
-            if abs(va_h_range[0]) + abs(sphere_h_range[1]) > math.pi:
-                h_range = (va_h_range[0], -math.pi + sphere_h_range[1])
-                view_ranges.append((h_range, overlapping_v_range))
-
-            if abs(va_h_range[1]) + abs(sphere_h_range[0]) > math.pi:
-                h_range = (math.pi + sphere_h_range[0], va_h_range[1])
-                view_ranges.append((h_range, overlapping_v_range))
-
-            if len(view_ranges) == 0:
-                return False
-
-        else:
-            # We can immediately check for impossible visbility/optimize which rays
-            # will be cast.
-
-            # Check if view range and spherical angles overlap in horizontal or
-            # vertical dimensions. If not, return False
-            if (np.max(spherical_angles[:, 0]) < -viewAngles[0] / 2) or (
-                np.min(spherical_angles[:, 0]) > viewAngles[0] / 2
-            ):
-                return False
-
-            # Compute trimmed view angles
-            h_min = np.clip(
-                np.min(spherical_angles[:, 0]), -viewAngles[0] / 2, viewAngles[0] / 2
-            )
-            h_max = np.clip(
-                np.max(spherical_angles[:, 0]), -viewAngles[0] / 2, viewAngles[0] / 2
-            )
-            v_min = np.clip(
-                np.min(spherical_angles[:, 1]), -viewAngles[1] / 2, viewAngles[1] / 2
-            )
-            v_max = np.clip(
-                np.max(spherical_angles[:, 1]), -viewAngles[1] / 2, viewAngles[1] / 2
-            )
-
-            h_range = (h_min, h_max)
-            v_range = (v_min, v_max)
-
-            view_ranges = [(h_range, v_range)]
-
-        ## Generate candidate rays
-        candidate_ray_list = []
-
-        for h_range, v_range in view_ranges:
-            h_size = h_range[1] - h_range[0]
-            v_size = v_range[1] - v_range[0]
-
-            assert h_size > 0
-            assert v_size > 0
-
-            scaled_v_ray_count = math.ceil(v_size / (viewAngles[1]) * rayCount[1])
-            v_angles = np.linspace(v_range[0], v_range[1], scaled_v_ray_count)
-
-            # If altitudeScaling is true, we will scale the number of rays by the cosine of the altitude
-            # to get a uniform spread.
-            if altitudeScaling:
-                h_ray_counts = np.maximum(
-                    np.ceil(np.cos(v_angles) * h_size / (viewAngles[0]) * rayCount[0]), 1
-                ).astype(int)
-                h_angles_list = [
-                    np.linspace(h_range[0], h_range[1], h_ray_count)
-                    for h_ray_count in h_ray_counts
-                ]
-                angle_matrices = [
-                    np.column_stack(
-                        [
-                            h_angles_list[i],
-                            np.repeat([v_angles[i]], len(h_angles_list[i])),
-                        ]
-                    )
-                    for i in range(len(v_angles))
-                ]
-                angle_matrix = np.concatenate(angle_matrices, axis=0)
-            else:
-                scaled_h_ray_count = math.ceil(h_size / (viewAngles[0]) * rayCount[0])
-                h_angles = np.linspace(h_range[0], h_range[1], scaled_h_ray_count)
-                angle_matrix = np.column_stack(
-                    [np.repeat(h_angles, len(v_angles)), np.tile(v_angles, len(h_angles))]
-                )
-
-            ray_vectors = np.zeros((len(angle_matrix[:, 0]), 3))
-
-            ray_vectors[:, 0] = -np.sin(angle_matrix[:, 0])
-            ray_vectors[:, 1] = np.cos(angle_matrix[:, 0])
-            ray_vectors[:, 2] = np.tan(
-                angle_matrix[:, 1]
-            )  # At 90 deg, np returns super large number
-
-            ray_vectors /= np.linalg.norm(ray_vectors, axis=1)[:, np.newaxis]
-            candidate_ray_list.append(ray_vectors)
-
-        ray_vectors = np.concatenate(candidate_ray_list, axis=0)
-
-        if orientation is not None:
-            ray_vectors = orientation.getRotation().apply(ray_vectors)
-
         ## DEBUG ##
         # Show all original candidate rays
         if debug:
@@ -532,22 +308,9 @@ def canSee(
             return False
 
         # Create the single candidate ray and check that it's within viewAngles.
-        if orientation is not None:
-            target_loc = orientation._inverseRotation.apply([target_loc])[0]
-
-        target_vertex = target_loc - position
-        candidate_ray = target_vertex / np.linalg.norm(target_vertex)
-
-        candidate_ray_list = np.array([candidate_ray])
-
-        azimuth = (
-            np.mod(
-                np.arctan2(candidate_ray[1], candidate_ray[0]) - math.pi / 2 + np.pi,
-                2 * np.pi,
-            )
-            - np.pi
+        candidate_ray_list, inView = _pointRay(
+            position, orientation, viewAngles, target_loc
         )
-        altitude = np.arcsin(candidate_ray[2])
 
         ## DEBUG ##
         # Show all original candidate rays
@@ -573,9 +336,7 @@ def canSee(
             render_scene.show()
 
         # Check if this ray is within our view cone.
-        if not (-viewAngles[0] / 2 <= azimuth <= viewAngles[0] / 2) or not (
-            -viewAngles[1] / 2 <= altitude <= viewAngles[1] / 2
-        ):
+        if not inView:
             return False
 
         # Now check if occluding objects block sight to target
@@ -602,3 +363,558 @@ def canSee(
         return True
     else:
         assert False, target
+
+
+class VisibilityEngine:
+    """Engine answering many visibility queries together.
+
+    Gives the same results as calling `canSee` (through the ``canSee`` methods of
+    `Point`, `OrientedPoint`, and `Object`) for each query separately, but shares
+    work between the queries. The candidate rays of each query are generated as in
+    `canSee`, and split into the same shuffled batches; then the first batch of every
+    query is cast at once, then the second batch of every query not yet known to be
+    visible, and so on. Each such cast uses a two-level acceleration structure over
+    all the objects involved in the queries (as targets or occluders):
+
+    * at the top level, the rays are tested against the bounding boxes of all the
+      objects with NumPy, keeping for each object only the rays whose segment of
+      interest (up to the visible distance, or up to the target point) crosses its
+      box and whose query involves the object;
+    * at the bottom level, those rays are cast against the object's mesh using the
+      BVH which trimesh builds over its triangles (and caches with the mesh).
+
+    So each object's mesh is queried once per batch, no matter how many queries it
+    is involved in, and occluders far from the viewer or off to the side cost
+    nothing.
+
+    An engine caches the bounding boxes of the objects, so a new one should be
+    created whenever objects may have moved (e.g. for each sample, or at each time
+    step of a simulation).
+    """
+
+    def __init__(self):
+        self._objects = []
+        self._indices = {}  # maps id() of each object to its index in _objects
+        self._bounds = None
+
+    def _indexOf(self, obj):
+        index = self._indices.get(id(obj))
+        if index is None:
+            index = self._indices[id(obj)] = len(self._objects)
+            self._objects.append(obj)
+            self._bounds = None
+        return index
+
+    def canSee(self, queries):
+        """Check the visibility of targets from viewers, accounting for occlusion.
+
+        Args:
+            queries: A sequence of triples ``(viewer, target, occludingObjects)``, where
+                ``viewer`` is a `Point`, `OrientedPoint`, or `Object`, ``target`` is a
+                `Point`, `OrientedPoint`, `Object`, or `Vector`, and
+                ``occludingObjects`` is a sequence of objects which can occlude it.
+
+        Returns:
+            A list of bools giving the result of
+            ``viewer.canSee(target, occludingObjects=occludingObjects)`` for each query.
+        """
+        from scenic.core.object_types import Point2D
+
+        results = [False] * len(queries)
+        batches = []  # for each query, a list of (origin, rays, limit, target) tuples
+        occluders = []
+        for query, (viewer, target, occludingObjects) in enumerate(queries):
+            if isinstance(viewer, Point2D) and not occludingObjects:
+                results[query] = viewer._canSee2D(target)
+                batches.append(())
+                occluders.append(())
+                continue
+            params = viewer._viewParameters()
+            # Filter occluding objects that are obviously infeasible, as in canSee.
+            position, visibleDistance = params["position"], params["visibleDistance"]
+            occluders.append(
+                [
+                    self._indexOf(obj)
+                    for obj in occludingObjects
+                    if position.distanceTo(obj) <= visibleDistance
+                ]
+            )
+            result = self._rayBatches(params, target)
+            if isinstance(result, bool):
+                results[query] = result
+                batches.append(())
+            else:
+                batches.append(result)
+
+        # Which objects can occlude the target of each query
+        occluderMask = np.zeros((len(queries), len(self._objects)), dtype=bool)
+        for query, indices in enumerate(occluders):
+            occluderMask[query, indices] = True
+
+        pending = [query for query in range(len(queries)) if batches[query]]
+        step = 0
+        while pending:
+            rays = [(query, *batches[query][step]) for query in pending]
+            for query in self._castRays(rays, occluderMask):
+                results[query] = True
+            step += 1
+            pending = [
+                query
+                for query in pending
+                if not results[query] and step < len(batches[query])
+            ]
+        return results
+
+    def _rayBatches(self, params, target):
+        """Generate the batches of rays to cast for a query, in order.
+
+        Args:
+            params: The view parameters of the viewer (see ``_viewParameters``).
+            target: The target of the query.
+
+        Returns:
+            The result of the query, if it can be determined without casting rays;
+            otherwise a list of tuples ``(origin, rays, limit, target)``, where
+            ``limit`` is the distance up to which hits count and ``target`` is the
+            index of the target object, or -1 if the target is a point at distance
+            ``limit``.
+        """
+        from scenic.core.object_types import Object, Point
+
+        position, orientation = params["position"], params["orientation"]
+        visibleDistance, viewAngles = params["visibleDistance"], params["viewAngles"]
+        rayCount, altitudeScaling = _rayCounts(
+            position,
+            viewAngles,
+            params["rayCount"],
+            params["rayDensity"],
+            params["distanceScaling"],
+            target,
+        )
+        origin = np.array(position.coordinates, dtype=float)
+
+        def pointRay(target_loc):
+            # As in the Point/Vector case of canSee.
+            distance = position.distanceTo(target_loc)
+            if distance > visibleDistance:
+                return []
+            ray, inView = _pointRay(position, orientation, viewAngles, target_loc)
+            if not inView:
+                return []
+            if orientation is not None:
+                ray = orientation.getRotation().apply(ray)
+            return [(origin, np.asarray(ray, dtype=float), distance, -1)]
+
+        if isinstance(target, Object):
+            # First check whether the center of the object is visible, if it
+            # contains its center, as in canSee.
+            batches = pointRay(target.position) if target.shape.containsCenter else []
+            if target.distanceTo(position) > visibleDistance:
+                return batches or False
+            rays = _candidateRays(
+                position,
+                orientation,
+                viewAngles,
+                rayCount,
+                altitudeScaling,
+                target.occupiedSpace,
+            )
+            if rays is None:
+                return batches or False
+            # Use the same batches as canSee.
+            ray_indices = np.arange(len(rays))
+            rng = np.random.default_rng(seed=42)
+            rng.shuffle(ray_indices)
+            index = self._indexOf(target)
+            for target_ray_indices in batched(ray_indices, BATCH_SIZE):
+                batch = rays[np.asarray(target_ray_indices)]
+                batches.append((origin, batch, visibleDistance, index))
+            return batches
+        elif isinstance(target, Region):
+            raise NotImplementedError
+        elif isinstance(target, (Point, Vector)):
+            return pointRay(toVector(target)) or False
+        else:
+            assert False, target
+
+    def _castRays(self, rays, occluderMask):
+        """Cast batches of rays for several queries at once.
+
+        Args:
+            rays: A list of tuples ``(query, origin, rays, limit, target)``, as returned
+                by `_rayBatches` but with the index of the query prepended.
+            occluderMask: Array indicating which objects can occlude each query.
+
+        Returns:
+            The indices of the queries for which some ray hits the target without
+            being occluded.
+        """
+        counts = [len(batch[2]) for batch in rays]
+        directions = np.concatenate([batch[2] for batch in rays])
+        origins = np.repeat([batch[1] for batch in rays], counts, axis=0)
+        limits = np.repeat([batch[3] for batch in rays], counts)
+        rayQueries = np.repeat([batch[0] for batch in rays], counts)
+        rayTargets = np.repeat([batch[4] for batch in rays], counts)
+
+        # First cast each ray against its target, to find the closest hit within the
+        # visible distance; rays for points already have the distance to the point.
+        targetDistances = np.where(rayTargets < 0, limits, np.inf)
+        for index, candidates in self._crossing(
+            rayTargets[:, None] == np.arange(len(self._objects)),
+            origins,
+            directions,
+            limits,
+        ):
+            hitRays, distances = self._intersect(index, candidates, origins, directions)
+            inRange = distances <= limits[hitRays]
+            np.minimum.at(targetDistances, hitRays[inRange], distances[inRange])
+
+        # Then cast the rays which hit their targets against the occluders; a ray is
+        # occluded if it hits an occluder no further away than the target.
+        occluded = ~np.isfinite(targetDistances)
+        live = np.flatnonzero(~occluded)
+        for index, candidates in self._crossing(
+            occluderMask[rayQueries[live]],
+            origins[live],
+            directions[live],
+            targetDistances[live],
+        ):
+            candidates = live[candidates]
+            hitRays, distances = self._intersect(index, candidates, origins, directions)
+            occluded[hitRays[distances <= targetDistances[hitRays]]] = True
+
+        return np.unique(rayQueries[~occluded]).tolist()
+
+    def _crossing(self, relevant, origins, directions, limits):
+        """Find the rays to cast against each object.
+
+        Args:
+            relevant: Array indicating which objects are relevant to each ray.
+            origins, directions, limits: The rays, and the distances along them up to
+                which hits matter.
+
+        Yields:
+            Pairs ``(index, rays)`` giving the index of an object and the indices of
+            the relevant rays whose segments cross the object's bounding box.
+        """
+        if self._bounds is None:
+            bounds = [obj.occupiedSpace.mesh.bounds for obj in self._objects]
+            bounds = np.array(bounds, dtype=float).reshape(-1, 2, 3)
+            # Pad the boxes so that rays grazing them are still cast at the lower level.
+            padding = 1e-6 * (1 + np.abs(bounds).max(axis=(1, 2)))
+            self._bounds = (
+                bounds[:, 0] - padding[:, None],
+                bounds[:, 1] + padding[:, None],
+            )
+        lows, highs = self._bounds
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inverses = 1 / directions
+            for index in np.flatnonzero(relevant.any(axis=0)):
+                candidates = np.flatnonzero(relevant[:, index])
+
+                # Slab test of the segments of the rays against the bounding box;
+                # comparisons with NaNs are false, which errs on the side of casting.
+                rayOrigins = origins[candidates]
+                first = (lows[index] - rayOrigins) * inverses[candidates]
+                second = (highs[index] - rayOrigins) * inverses[candidates]
+                near = np.minimum(first, second).max(axis=1)
+                far = np.maximum(first, second).min(axis=1)
+                missed = (near > far) | (far < 0) | (near > limits[candidates])
+                candidates = candidates[~missed]
+                if len(candidates) > 0:
+                    yield index, candidates
+
+    def _intersect(self, index, candidates, origins, directions):
+        # Cast the given rays against the mesh of an object, returning the indices
+        # of the rays with hits and the distances to the hits.
+        rayOrigins = origins[candidates]
+        mesh = self._objects[index].occupiedSpace.mesh
+        locations, indices, _ = mesh.ray.intersects_location(
+            ray_origins=rayOrigins, ray_directions=directions[candidates]
+        )
+        if len(locations) == 0:
+            return candidates[:0], np.zeros(0)
+        distances = np.linalg.norm(locations - rayOrigins[indices], axis=1)
+        return candidates[indices], distances
+
+
+def _rayCounts(position, viewAngles, rayCount, rayDensity, distanceScaling, target):
+    # Number of rays to cast in each dimension for `canSee`, and whether to scale
+    # the number of horizontal rays with the altitude.
+    if rayCount is None:
+        rayCount = (
+            math.degrees(viewAngles[0]) * rayDensity,
+            math.degrees(viewAngles[1]) * rayDensity,
+        )
+
+        if distanceScaling:
+            target_distance = target.position.distanceTo(position)
+
+            rayCount = (rayCount[0] * target_distance, rayCount[1] * target_distance)
+
+        altitudeScaling = True
+    else:
+        # Do not scale ray counts with altitude or distance if explicitly given
+        altitudeScaling = False
+    return rayCount, altitudeScaling
+
+
+def _candidateRays(
+    position, orientation, viewAngles, rayCount, altitudeScaling, target_region
+):
+    """Compute the directions of the candidate rays which may hit a target region.
+
+    Implements steps 2-5 of the algorithm for Objects described in `canSee`.
+
+    Returns:
+        An array of unit ray directions in global coordinates, or `None` if the target
+        cannot be visible.
+    """
+    # Orient the object so that it has the same relative position and orientation to the
+    # origin as it did to the viewer
+    target_vertices = target_region.mesh.vertices - np.array(position.coordinates)
+
+    if orientation is not None:
+        target_vertices = orientation._inverseRotation.apply(target_vertices)
+
+    # Add additional points along each edge that could potentially have a higher altitude
+    # than the endpoints.
+    vec_1s = np.asarray(target_vertices[target_region.mesh.edges[:, 0], :])
+    vec_2s = np.asarray(target_vertices[target_region.mesh.edges[:, 1], :])
+    x1, y1, z1 = vec_1s[:, 0], vec_1s[:, 1], vec_1s[:, 2]
+    x2, y2, z2 = vec_2s[:, 0], vec_2s[:, 1], vec_2s[:, 2]
+    D = x1 * x2 + y1 * y2
+    N = (x1**2 + y1**2) * z2 - D * z1
+    M = (x2**2 + y2**2) * z1 - D * z2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_vals = N / (N + M)  # t values that can be an altitude local optimum
+
+    # Keep only points where the t_value is between 0 and 1
+    t_mask = np.logical_and(t_vals > 0, t_vals < 1)
+    interpolated_points = vec_1s[t_mask] + t_vals[t_mask][:, None] * (
+        vec_2s[t_mask] - vec_1s[t_mask]
+    )
+
+    target_vertices = np.concatenate((target_vertices, interpolated_points), axis=0)
+
+    ## Check if the object crosses the y axis ahead and/or behind the viewer
+
+    # Extract the two vectors that are part of each edge crossing the y axis.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y_cross_edges = (vec_1s[:, 0] / vec_2s[:, 0]) < 0
+    vec_1s = vec_1s[y_cross_edges]
+    vec_2s = vec_2s[y_cross_edges]
+
+    # Figure out for which t value the vectors cross the y axis
+    t = (-vec_1s[:, 0]) / (vec_2s[:, 0] - vec_1s[:, 0])
+
+    # Figure out what the y value is when the y axis is crossed
+    y_intercept_points = t * (vec_2s[:, 1] - vec_1s[:, 1]) + vec_1s[:, 1]
+
+    # If the object crosses ahead and behind the object, or through 0,
+    # we will not optimize ray casting.
+    target_crosses_ahead = np.any(y_intercept_points >= 0)
+    target_crosses_behind = np.any(y_intercept_points <= 0)
+
+    ## Compute the horizontal/vertical angle ranges which bound the object
+    ## (from the origin facing forwards)
+    spherical_angles = np.zeros((len(target_vertices[:, 0]), 2))
+
+    spherical_angles[:, 0] = np.arctan2(target_vertices[:, 1], target_vertices[:, 0])
+    spherical_angles[:, 1] = np.arcsin(
+        target_vertices[:, 2] / (np.linalg.norm(target_vertices, axis=1))
+    )
+
+    # Align azimuthal angle with y axis.
+    spherical_angles[:, 0] = spherical_angles[:, 0] - math.pi / 2
+
+    # Normalize angles between (-Pi,Pi)
+    spherical_angles[:, 0] = np.mod(spherical_angles[:, 0] + np.pi, 2 * np.pi) - np.pi
+    spherical_angles[:, 1] = np.mod(spherical_angles[:, 1] + np.pi, 2 * np.pi) - np.pi
+
+    # First we check if the vertical angles overlap with the vertical view angles.
+    # If not, then the object cannot be visible.
+    if (
+        np.min(spherical_angles[:, 1]) > viewAngles[1] / 2
+        or np.max(spherical_angles[:, 1]) < -viewAngles[1] / 2
+    ):
+        return None
+
+    ## Compute which horizontal/vertical angle ranges to cast rays in
+    if target_crosses_ahead and target_crosses_behind:
+        # No optimizations feasible here. Just send all rays.
+        h_range = (-viewAngles[0] / 2, viewAngles[0] / 2)
+        v_range = (-viewAngles[1] / 2, viewAngles[1] / 2)
+
+        view_ranges = [(h_range, v_range)]
+
+    elif target_crosses_behind:
+        # We can keep the view angles oriented around the front of the object and
+        # consider the spherical angles oriented around the back of the object.
+        # We can then check for impossible visibility/optimize which rays will be cast.
+
+        # Extract the viewAngle ranges
+        va_h_range = (-viewAngles[0] / 2, viewAngles[0] / 2)
+        va_v_range = (-viewAngles[1] / 2, viewAngles[1] / 2)
+
+        # Convert spherical angles to be centered around the back of the viewing object.
+        left_points = spherical_angles[:, 0] >= 0
+        right_points = spherical_angles[:, 0] < 0
+
+        spherical_angles[:, 0][left_points] = spherical_angles[:, 0][left_points] - np.pi
+        spherical_angles[:, 0][right_points] = (
+            spherical_angles[:, 0][right_points] + np.pi
+        )
+
+        sphere_h_range = (
+            np.min(spherical_angles[:, 0]),
+            np.max(spherical_angles[:, 0]),
+        )
+        sphere_v_range = (
+            np.min(spherical_angles[:, 1]),
+            np.max(spherical_angles[:, 1]),
+        )
+
+        # Extract the overlapping ranges in the horizontal and vertical view angles.
+        # Note that the spherical range must cross the back plane and the view angles
+        # must cross the front plane (and are centered on these points),
+        # which means we can just add up each side of the ranges and see if they add up to
+        # greater than or equal to Pi. If none do, then it's impossible for object to overlap
+        # with the viewAngle range.
+
+        # Otherwise we can extract the overlapping v_ranges and use those going forwards.
+        overlapping_v_range = (
+            np.clip(sphere_v_range[0], va_v_range[0], va_v_range[1]),
+            np.clip(sphere_v_range[1], va_v_range[0], va_v_range[1]),
+        )
+        view_ranges = []
+
+        if abs(va_h_range[0]) + abs(sphere_h_range[1]) > math.pi:
+            h_range = (va_h_range[0], -math.pi + sphere_h_range[1])
+            view_ranges.append((h_range, overlapping_v_range))
+
+        if abs(va_h_range[1]) + abs(sphere_h_range[0]) > math.pi:
+            h_range = (math.pi + sphere_h_range[0], va_h_range[1])
+            view_ranges.append((h_range, overlapping_v_range))
+
+        if len(view_ranges) == 0:
+            return None
+
+    else:
+        # We can immediately check for impossible visbility/optimize which rays
+        # will be cast.
+
+        # Check if view range and spherical angles overlap in horizontal or
+        # vertical dimensions. If not, return None
+        if (np.max(spherical_angles[:, 0]) < -viewAngles[0] / 2) or (
+            np.min(spherical_angles[:, 0]) > viewAngles[0] / 2
+        ):
+            return None
+
+        # Compute trimmed view angles
+        h_min = np.clip(
+            np.min(spherical_angles[:, 0]), -viewAngles[0] / 2, viewAngles[0] / 2
+        )
+        h_max = np.clip(
+            np.max(spherical_angles[:, 0]), -viewAngles[0] / 2, viewAngles[0] / 2
+        )
+        v_min = np.clip(
+            np.min(spherical_angles[:, 1]), -viewAngles[1] / 2, viewAngles[1] / 2
+        )
+        v_max = np.clip(
+            np.max(spherical_angles[:, 1]), -viewAngles[1] / 2, viewAngles[1] / 2
+        )
+
+        h_range = (h_min, h_max)
+        v_range = (v_min, v_max)
+
+        view_ranges = [(h_range, v_range)]
+
+    ## Generate candidate rays
+    candidate_ray_list = []
+
+    for h_range, v_range in view_ranges:
+        h_size = h_range[1] - h_range[0]
+        v_size = v_range[1] - v_range[0]
+
+        assert h_size > 0
+        assert v_size > 0
+
+        scaled_v_ray_count = math.ceil(v_size / (viewAngles[1]) * rayCount[1])
+        v_angles = np.linspace(v_range[0], v_range[1], scaled_v_ray_count)
+
+        # If altitudeScaling is true, we will scale the number of rays by the cosine of the altitude
+        # to get a uniform spread.
+        if altitudeScaling:
+            h_ray_counts = np.maximum(
+                np.ceil(np.cos(v_angles) * h_size / (viewAngles[0]) * rayCount[0]), 1
+            ).astype(int)
+            h_angles_list = [
+                np.linspace(h_range[0], h_range[1], h_ray_count)
+                for h_ray_count in h_ray_counts
+            ]
+            angle_matrices = [
+                np.column_stack(
+                    [
+                        h_angles_list[i],
+                        np.repeat([v_angles[i]], len(h_angles_list[i])),
+                    ]
+                )
+                for i in range(len(v_angles))
+            ]
+            angle_matrix = np.concatenate(angle_matrices, axis=0)
+        else:
+            scaled_h_ray_count = math.ceil(h_size / (viewAngles[0]) * rayCount[0])
+            h_angles = np.linspace(h_range[0], h_range[1], scaled_h_ray_count)
+            angle_matrix = np.column_stack(
+                [np.repeat(h_angles, len(v_angles)), np.tile(v_angles, len(h_angles))]
+            )
+
+        ray_vectors = np.zeros((len(angle_matrix[:, 0]), 3))
+
+        ray_vectors[:, 0] = -np.sin(angle_matrix[:, 0])
+        ray_vectors[:, 1] = np.cos(angle_matrix[:, 0])
+        ray_vectors[:, 2] = np.tan(
+            angle_matrix[:, 1]
+        )  # At 90 deg, np returns super large number
+
+        ray_vectors /= np.linalg.norm(ray_vectors, axis=1)[:, np.newaxis]
+        candidate_ray_list.append(ray_vectors)
+
+    ray_vectors = np.concatenate(candidate_ray_list, axis=0)
+
+    if orientation is not None:
+        ray_vectors = orientation.getRotation().apply(ray_vectors)
+
+    return ray_vectors
+
+
+def _pointRay(position, orientation, viewAngles, target_loc):
+    """Compute the single candidate ray for the visibility of a point.
+
+    Returns:
+        A pair consisting of an array holding the ray direction in the viewer's local
+        coordinates, and whether that direction is within the viewer's view angles.
+    """
+    if orientation is not None:
+        target_loc = orientation._inverseRotation.apply([target_loc])[0]
+
+    target_vertex = target_loc - position
+    candidate_ray = target_vertex / np.linalg.norm(target_vertex)
+
+    candidate_ray_list = np.array([candidate_ray])
+
+    azimuth = (
+        np.mod(
+            np.arctan2(candidate_ray[1], candidate_ray[0]) - math.pi / 2 + np.pi,
+            2 * np.pi,
+        )
+        - np.pi
+    )
+    altitude = np.arcsin(candidate_ray[2])
+
+    inView = (-viewAngles[0] / 2 <= azimuth <= viewAngles[0] / 2) and (
+        -viewAngles[1] / 2 <= altitude <= viewAngles[1] / 2
+    )
+    return candidate_ray_list, inView
@@ -0,0 +1,18 @@
+"""Headless differential-drive kinematic simulator.
+
+This simulator runs dynamic scenarios written for the robotics domain
+(:obj:`scenic.domains.robotics`) without an external simulator, integrating
+unicycle kinematics for all differential-drive robots at once with NumPy. The
+wheel base, maximum wheel speed, motor lag and wheel noise are configurable, and
+simulations run as fast as possible unless real-time pacing is requested, so
+that large numbers of episodes can be run for parameter sweeps::
+
+    simulator = DiffDriveSimulator(wheelBase=0.085, motorLag=0.1, wheelNoise=0.05)
+    simulation = simulator.simulate(scene, maxSteps=600)
+
+Scenarios can also use the world model :doc:`scenic.simulators.diffdrive.model`,
+which selects this simulator and reads its parameters from global parameters.
+Collisions are not modeled.
+"""
+
+from .simulator import DiffDriveSimulation, DiffDriveSimulator
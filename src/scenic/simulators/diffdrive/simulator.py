@@ -0,0 +1,188 @@
+"""Differential-drive kinematic simulator implementation."""
+
+import math
+import random
+import time
+
+import numpy as np
+
+from scenic.core.simulators import Simulation, Simulator
+from scenic.core.vectors import Vector, alwaysGlobalOrientation
+from scenic.domains.robotics.actions import DifferentialDrive
+
+
+class DiffDriveSimulator(Simulator):
+    """`Simulator` integrating differential-drive kinematics for robots.
+
+    All robots supporting `DifferentialDrive` are integrated together as NumPy
+    arrays; other objects stay where they are. Motor speeds in percent are mapped
+    linearly to wheel speeds, which follow their setpoints with a first-order lag
+    and may be perturbed by noise.
+
+    Args:
+        wheelBase (float): Distance between the wheels, in meters.
+        maxWheelSpeed (float): Wheel ground speed at 100% motor speed, in m/s.
+        motorLag (float): Time constant of the motors' response to a new
+            setpoint, in seconds; 0 for an instantaneous response.
+        wheelNoise (float): Standard deviation of the multiplicative noise applied
+            to each wheel's speed at each time step (e.g. 0.05 for 5%), modeling
+            slip and motor variation.
+        timestep (float): Default length of a time step in seconds.
+        realtime (bool): Whether to pace simulations to run in real time. By
+            default they run as fast as possible.
+        seed (int): Seed for the noise. If `None`, a seed is drawn from Python's
+            `random` module, so that simulations are reproducible when Scenic's
+            random seed is set.
+    """
+
+    def __init__(
+        self,
+        wheelBase=0.085,
+        maxWheelSpeed=1.0,
+        motorLag=0,
+        wheelNoise=0,
+        *,
+        timestep=0.05,
+        realtime=False,
+        seed=None,
+    ):
+        super().__init__()
+        if wheelBase <= 0:
+            raise ValueError(f"wheelBase must be positive, not {wheelBase}")
+        if motorLag < 0 or wheelNoise < 0:
+            raise ValueError("motorLag and wheelNoise must be nonnegative")
+        self.wheelBase = wheelBase
+        self.maxWheelSpeed = maxWheelSpeed
+        self.motorLag = motorLag
+        self.wheelNoise = wheelNoise
+        self.timestep = timestep
+        self.realtime = realtime
+        self.seed = seed
+
+    def createSimulation(self, scene, *, timestep, **kwargs):
+        if timestep is None:
+            timestep = self.timestep
+        return DiffDriveSimulation(scene, self, timestep=timestep, **kwargs)
+
+
+class DiffDriveSimulation(Simulation):
+    """`Simulation` object for `DiffDriveSimulator`.
+
+    The state of the robots is kept in arrays indexed by robot: positions ``xy``,
+    global headings ``heading``, and current wheel speeds ``wheelSpeeds`` (left,
+    right) in m/s.
+    """
+
+    def __init__(self, scene, simulator, **kwargs):
+        self.wheelBase = simulator.wheelBase
+        self.maxWheelSpeed = simulator.maxWheelSpeed
+        self.motorLag = simulator.motorLag
+        self.wheelNoise = simulator.wheelNoise
+        self.realtime = simulator.realtime
+        seed = simulator.seed
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.rng = np.random.default_rng(seed)
+
+        self.robots = []
+        self.robotIndex = {}
+        self._globalParent = []
+        self._initialXY = []
+        self._initialHeading = []
+        self._elevation = []
+        self._nextDeadline = None
+        super().__init__(scene, **kwargs)
+
+    def createObjectInSimulator(self, obj):
+        if not isinstance(obj, DifferentialDrive):
+            return  # static object
+        self.robotIndex[obj] = len(self.robots)
+        self.robots.append(obj)
+        self._globalParent.append(alwaysGlobalOrientation(obj.parentOrientation))
+        self._initialXY.append((obj.position.x, obj.position.y))
+        self._initialHeading.append(obj.heading)
+        self._elevation.append(obj.position.z)
+
+    def setup(self):
+        super().setup()
+        numRobots = len(self.robots)
+        self.xy = np.array(self._initialXY, dtype=float).reshape(numRobots, 2)
+        self.heading = np.array(self._initialHeading, dtype=float)
+        self.elevation = np.array(self._elevation, dtype=float)
+        self.wheelSpeeds = np.zeros((numRobots, 2))
+        self.commands = np.zeros((numRobots, 2))
+        self.linearSpeed = np.zeros(numRobots)
+        self.yawRate = np.zeros(numRobots)
+        if self.motorLag > 0:
+            self.lagFactor = 1 - math.exp(-self.timestep / self.motorLag)
+        else:
+            self.lagFactor = 1
+        self._nextDeadline = time.monotonic() + self.timestep
+
+    def step(self):
+        if self.robots:
+            self._integrate()
+        if self.realtime:
+            slack = self._nextDeadline - time.monotonic()
+            if slack > 0:
+                time.sleep(slack)
+            self._nextDeadline = max(self._nextDeadline, time.monotonic()) + self.timestep
+
+    def _integrate(self):
+        dt = self.timestep
+        commands = self.commands
+        for i, robot in enumerate(self.robots):
+            commands[i] = (robot.leftMotorSpeed, robot.rightMotorSpeed)
+        targets = commands * (self.maxWheelSpeed / 100)
+
+        wheelSpeeds = self.wheelSpeeds
+        wheelSpeeds += (targets - wheelSpeeds) * self.lagFactor
+        actual = wheelSpeeds
+        if self.wheelNoise > 0:
+            actual = wheelSpeeds * (
+                1 + self.wheelNoise * self.rng.standard_normal(wheelSpeeds.shape)
+            )
+
+        # Unicycle model, integrated at the midpoint heading of the step.
+        # Headings are measured counterclockwise from the +Y axis.
+        left, right = actual[:, 0], actual[:, 1]
+        speed = (left + right) / 2
+        yawRate = (right - left) / self.wheelBase
+        midHeading = self.heading + yawRate * (dt / 2)
+        self.xy[:, 0] -= speed * np.sin(midHeading) * dt
+        self.xy[:, 1] += speed * np.cos(midHeading) * dt
+        self.heading += yawRate * dt
+        self.heading[:] = np.remainder(self.heading + math.pi, 2 * math.pi) - math.pi
+        self.linearSpeed = speed
+        self.yawRate = yawRate
+
+    def getProperties(self, obj, properties):
+        index = self.robotIndex.get(obj)
+        if index is None:
+            return {prop: getattr(obj, prop) for prop in properties}
+
+        x, y = self.xy[index]
+        heading = float(self.heading[index])
+        speed = float(self.linearSpeed[index])
+        yawRate = float(self.yawRate[index])
+        if self._globalParent[index]:
+            yaw = heading
+        else:
+            yaw, _, _ = obj.parentOrientation.globalToLocalAngles(heading, 0, 0)
+
+        values = dict(
+            position=Vector(x, y, self.elevation[index]),
+            yaw=yaw,
+            pitch=0,
+            roll=0,
+            velocity=Vector(-speed * math.sin(heading), speed * math.cos(heading), 0),
+            speed=abs(speed),
+            angularVelocity=Vector(0, 0, yawRate),
+            angularSpeed=abs(yawRate),
+        )
+        if "elevation" in properties:
+            values["elevation"] = obj.elevation
+        for prop in properties:
+            if prop not in values:
+                values[prop] = getattr(obj, prop)
+        return values
@@ -0,0 +1,21 @@
+"""Interface for running robotics scenarios on physical robots.
+
+This interface closes the loop between Scenic and real differential-drive
+robots: robot poses are read from a motion capture system (e.g. an OptiTrack
+NatNet stream) and motor setpoints chosen by behaviors from
+:obj:`scenic.domains.robotics` are forwarded to the robots over a pluggable
+`Transport`. Scenarios should use the world model
+:doc:`scenic.simulators.realrobot.model`, and can then be run by creating a
+`RealRobotSimulator` from a pose source and a transport::
+
+    simulator = RealRobotSimulator(estimator, transport, timestep=0.05)
+    simulator.simulate(scene, maxSteps=1200)
+
+Simulations run in real time at a fixed rate, and keep track of how many steps
+missed their deadline. For testing without hardware, a `LoopbackTransport`
+records commands instead of sending them, and recorded NatNet sessions can be
+replayed as a pose source (see :file:`mocap/run_scenic.py`).
+"""
+
+from .simulator import RealRobotSimulation, RealRobotSimulator
+from .transports import LoopbackTransport, Transport
@@ -0,0 +1,213 @@
+"""Simulator interface for physical robots tracked by motion capture."""
+
+import time
+
+from scipy.spatial.transform import Rotation
+
+from scenic.core.simulators import Simulation, SimulationCreationError, Simulator
+from scenic.core.vectors import Orientation, Vector
+
+# Change of basis from a Y-up motion capture frame (the Motive default) to
+# Scenic's Z-up frame: (x, y, z) -> (x, -z, y).
+_Y_UP_TO_Z_UP = Rotation.from_matrix([[1, 0, 0], [0, 0, -1], [0, 1, 0]])
+
+
+class RealRobotSimulator(Simulator):
+    """`Simulator` running scenarios on physical robots.
+
+    Args:
+        poseSource: Source of robot poses, such as the ``MultiMocapEstimator``
+            from :file:`mocap/mocap_estimator.py`. It must have a method
+            ``get_pose(id)`` returning the latest pose of the given rigid body
+            (an object with attributes ``x``, ``y``, ``z``, ``qx``, ``qy``,
+            ``qz`` and ``qw``), or `None` if the body is not being tracked.
+        transport (`Transport`): Transport for sending motor setpoints.
+        timestep (float): Default length of a time step in seconds.
+        upAxis (str): Up axis of the motion capture frame, ``"y"`` (the default
+            in Motive) or ``"z"``.
+        realtime (bool): Whether to pace simulations to run in real time. This
+            should only be disabled when replaying recorded poses.
+        latencyCompensation (bool): Whether to read poses interpolated to the
+            current server time rather than the latest received poses. Requires
+            the pose source to provide ``get_pose_at(id, t)`` and
+            ``server_time_now()``.
+        trackingTimeout (float): How long to wait, in seconds, for a robot to
+            appear in the pose stream when starting a simulation.
+    """
+
+    def __init__(
+        self,
+        poseSource,
+        transport,
+        timestep=0.05,
+        *,
+        upAxis="y",
+        realtime=True,
+        latencyCompensation=False,
+        trackingTimeout=1.0,
+    ):
+        super().__init__()
+        if upAxis not in ("y", "z"):
+            raise ValueError(f'upAxis must be "y" or "z", not {upAxis!r}')
+        self.poseSource = poseSource
+        self.transport = transport
+        self.timestep = timestep
+        self.upAxis = upAxis
+        self.realtime = realtime
+        self.latencyCompensation = latencyCompensation
+        self.trackingTimeout = trackingTimeout
+
+    def createSimulation(self, scene, *, timestep, **kwargs):
+        if timestep is None:
+            timestep = self.timestep
+        return RealRobotSimulation(scene, self, timestep=timestep, **kwargs)
+
+    def destroy(self):
+        self.transport.close()
+        super().destroy()
+
+
+class RealRobotSimulation(Simulation):
+    """`Simulation` object for physical robots.
+
+    Each time step executes the agents' actions, sends the resulting motor
+    setpoints of every robot over the transport in one batch, and then waits
+    until the step's deadline. Steps whose work was not finished by their
+    deadline are counted as misses, and the schedule is restarted from the
+    late step rather than trying to catch up.
+
+    Attributes:
+        deadlineMisses (int): Number of steps which missed their deadline.
+        stepSlack (list): For each step, the time in seconds remaining until its
+            deadline when its work was done (negative for missed deadlines).
+        trackingDropouts (int): Number of times a robot's pose was unavailable,
+            in which case its last known pose was used.
+    """
+
+    def __init__(self, scene, simulator, **kwargs):
+        self.poseSource = simulator.poseSource
+        self.transport = simulator.transport
+        self.upAxis = simulator.upAxis
+        self.realtime = simulator.realtime
+        self.latencyCompensation = simulator.latencyCompensation
+        self.trackingTimeout = simulator.trackingTimeout
+        self.robots = []
+        self.deadlineMisses = 0
+        self.stepSlack = []
+        self.trackingDropouts = 0
+        self._lastPoses = {}
+        self._nextDeadline = None
+        super().__init__(scene, **kwargs)
+
+    def createObjectInSimulator(self, obj):
+        rigidBodyId = getattr(obj, "rigidBodyId", None)
+        if rigidBodyId is None:
+            return  # static object
+
+        deadline = time.monotonic() + self.trackingTimeout
+        while self.poseSource.get_pose(rigidBodyId) is None:
+            if time.monotonic() > deadline:
+                raise SimulationCreationError(
+                    f"rigid body {rigidBodyId} of {obj} is not being tracked"
+                )
+            time.sleep(0.01)
+        self.robots.append(obj)
+
+    def setup(self):
+        super().setup()
+        self.transport.connect([robot.rigidBodyId for robot in self.robots])
+        self._nextDeadline = time.monotonic() + self.timestep
+
+    def executeActions(self, allActions):
+        super().executeActions(allActions)
+        commands = {
+            robot.rigidBodyId: (robot.leftMotorSpeed, robot.rightMotorSpeed)
+            for robot in self.robots
+        }
+        if commands:
+            self.transport.send(commands)
+
+    def step(self):
+        now = time.monotonic()
+        slack = self._nextDeadline - now
+        self.stepSlack.append(slack)
+        if slack < 0:
+            self.deadlineMisses += 1
+            self._nextDeadline = now + self.timestep
+        else:
+            if self.realtime:
+                time.sleep(slack)
+            self._nextDeadline += self.timestep
+
+    def getProperties(self, obj, properties):
+        if getattr(obj, "rigidBodyId", None) is None:
+            return {prop: getattr(obj, prop) for prop in properties}
+
+        position, rotation = self._readPose(obj)
+        now = time.monotonic()
+        orientation = Orientation(rotation)
+        yaw, pitch, roll = obj.parentOrientation.localAnglesFor(orientation)
+
+        last = self._lastPoses.get(obj)
+        if last is None:
+            velocity = Vector(0, 0, 0)
+            angularVelocity = Vector(0, 0, 0)
+        else:
+            lastPosition, lastRotation, lastTime = last
+            dt = now - lastTime
+            if dt > 0:
+                velocity = (position - lastPosition) / dt
+                delta = rotation * lastRotation.inv()
+                angularVelocity = Vector(*(delta.as_rotvec() / dt))
+            else:
+                velocity, angularVelocity = obj.velocity, obj.angularVelocity
+        self._lastPoses[obj] = (position, rotation, now)
+
+        values = dict(
+            position=position,
+            yaw=yaw,
+            pitch=pitch,
+            roll=roll,
+            velocity=velocity,
+            speed=velocity.norm(),
+            angularVelocity=angularVelocity,
+            angularSpeed=angularVelocity.norm(),
+        )
+        if "elevation" in properties:
+            values["elevation"] = position.z
+        for prop in properties:
+            if prop not in values:
+                values[prop] = getattr(obj, prop)
+        return values
+
+    def _readPose(self, obj):
+        source = self.poseSource
+        if self.latencyCompensation:
+            pose = source.get_pose_at(obj.rigidBodyId, source.server_time_now())
+        else:
+            pose = source.get_pose(obj.rigidBodyId)
+        if pose is None:
+            # Tracking lost: reuse the last known pose
+            self.trackingDropouts += 1
+            position, rotation, _ = self._lastPoses[obj]
+            return position, rotation
+
+        rotation = Rotation.from_quat((pose.qx, pose.qy, pose.qz, pose.qw))
+        if self.upAxis == "y":
+            position = Vector(pose.x, -pose.z, pose.y)
+            rotation = _Y_UP_TO_Z_UP * rotation * _Y_UP_TO_Z_UP.inv()
+        else:
+            position = Vector(pose.x, pose.y, pose.z)
+        return position, rotation
+
+    def destroy(self):
+        # Never leave robots driving after a simulation ends.
+        if self.robots:
+            self.transport.send({robot.rigidBodyId: (0, 0) for robot in self.robots})
+        if self.verbosity >= 1 and self.stepSlack:
+            worst = min(self.stepSlack)
+            print(
+                f"  Real-time steps: {len(self.stepSlack)}, "
+                f"deadline misses: {self.deadlineMisses}, "
+                f"worst slack: {1000 * worst:.1f} ms"
+            )
@@ -0,0 +1,63 @@
+"""Transports carrying motor setpoints from Scenic to physical robots."""
+
+
+class Transport:
+    """Channel for sending motor setpoints to a set of physical robots.
+
+    Robots are identified by their ``rigidBodyId``. Subclasses must implement
+    `send`; `connect` and `close` may be overridden if the transport holds
+    resources such as radio connections.
+    """
+
+    def connect(self, robotIds):
+        """Prepare to send commands to the given robots.
+
+        Called when a simulation starts, with the IDs of all its robots.
+        """
+        pass
+
+    def send(self, commands):
+        """Send new motor setpoints.
+
+        Args:
+            commands (dict): Maps robot IDs to pairs of left and right motor
+                speeds, in percent of full speed (-100 to 100).
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the transport."""
+        pass
+
+
+class LoopbackTransport(Transport):
+    """Transport which records commands instead of sending them anywhere.
+
+    Args:
+        callback: Function called with each batch of commands, e.g. to drive
+            a simulated stand-in for the robots.
+
+    Attributes:
+        history (list): Every batch of commands sent, in order.
+        latest (dict): The most recent setpoint sent to each robot.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.robotIds = set()
+        self.history = []
+        self.latest = {}
+        self.closed = False
+
+    def connect(self, robotIds):
+        self.robotIds.update(robotIds)
+
+    def send(self, commands):
+        commands = dict(commands)
+        self.history.append(commands)
+        self.latest.update(commands)
+        if self.callback:
+            self.callback(commands)
+
+    def close(self):
+        self.closed = True
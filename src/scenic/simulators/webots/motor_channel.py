@@ -0,0 +1,143 @@
+"""Binary channel for motor commands from the Scenic supervisor to robots.
+
+Messages set during a time step are buffered and sent right before the supervisor
+steps the simulation. Motor setpoints are buffered per robot, so a robot whose left
+and right motors are both set costs one record rather than two messages.
+
+Each robot listens on its own Webots channel (by default `ROBOT_CHANNEL_BASE` plus
+its robot ID), and each flush sends one packet per channel, so a robot controller
+only ever receives its own commands and the total work grows linearly with the
+number of robots. Robots may also share a channel, in which case they share packets
+and each controller skips the records of other robots by ID alone. Packets are
+little-endian:
+
+* motor packet: header ``<BH`` (`MOTOR_PACKET`, record count), followed by one
+  ``<Hff`` record per robot (robot ID, left speed, right speed);
+* waypoint packet: ``<BHi`` (`WAYPOINT_PACKET`, robot ID, waypoint number).
+
+Speeds are in percent of the motor's maximum velocity. Robot controllers learn
+their ID and channel from their ``customData`` field (see `robotCustomData`); see
+the robot controller in :file:`examples/webots/robotics` for a decoder using
+`struct.unpack_from`.
+"""
+
+import struct
+
+MOTOR_PACKET = 0x4D  # "M"
+WAYPOINT_PACKET = 0x57  # "W"
+
+#: First of the per-robot channels, well clear of the low channel numbers worlds
+#: typically use for shared communication.
+ROBOT_CHANNEL_BASE = 100
+
+motorHeader = struct.Struct("<BH")
+motorRecord = struct.Struct("<Hff")
+waypointMessage = struct.Struct("<BHi")
+
+
+def encodeMotorPacket(commands):
+    """Encode a dict mapping robot IDs to (left, right) speeds as one packet."""
+    packet = bytearray(motorHeader.size + len(commands) * motorRecord.size)
+    motorHeader.pack_into(packet, 0, MOTOR_PACKET, len(commands))
+    offset = motorHeader.size
+    for robotId, (left, right) in commands.items():
+        motorRecord.pack_into(packet, offset, robotId, left, right)
+        offset += motorRecord.size
+    return bytes(packet)
+
+
+def robotCustomData(robotId, channel):
+    """The ``customData`` string telling a robot controller its ID and channel."""
+    return f"{robotId} {channel}"
+
+
+def decodeMotorPacket(packet):
+    """Decode a motor packet into a dict mapping robot IDs to (left, right)."""
+    kind, count = motorHeader.unpack_from(packet, 0)
+    if kind != MOTOR_PACKET:
+        raise ValueError(f"not a motor packet (type 0x{kind:02X})")
+    commands = {}
+    for i in range(count):
+        robotId, left, right = motorRecord.unpack_from(
+            packet, motorHeader.size + i * motorRecord.size
+        )
+        commands[robotId] = (left, right)
+    return commands
+
+
+class MotorChannel:
+    """Buffers robot commands and sends them through a Webots emitter.
+
+    Args:
+        emitter: Emitter device of the supervisor, or `None` to discard all
+            commands (e.g. in worlds without robots).
+
+    Attributes:
+        packetsSent (int): Number of packets sent so far.
+        bytesSent (int): Total size of the packets sent so far.
+    """
+
+    def __init__(self, emitter):
+        self.emitter = emitter
+        self.defaultChannel = emitter.getChannel() if emitter else None
+        self.currentChannel = self.defaultChannel
+        self.robotChannels = {}
+        self.pending = {}
+        self.pendingEvents = []
+        self.packetsSent = 0
+        self.bytesSent = 0
+
+    @classmethod
+    def forSupervisor(cls, supervisor, deviceName="emitter"):
+        """Create a channel using the named emitter device of a supervisor."""
+        return cls(supervisor.getDevice(deviceName))
+
+    def addRobot(self, robotId, channel=None):
+        """Register a robot, returning the Webots channel it should listen on.
+
+        Args:
+            robotId (int): ID of the robot.
+            channel (int): Webots channel to route the robot's commands to; if
+                `None`, the robot gets its own channel.
+        """
+        if channel is None:
+            channel = ROBOT_CHANNEL_BASE + robotId
+        self.robotChannels[robotId] = channel
+        return channel
+
+    def setMotors(self, robotId, left, right):
+        """Set the motor speeds to send to a robot at the next `flush`.
+
+        Later calls for the same robot in the same time step replace earlier ones.
+        """
+        self.pending[robotId] = (left, right)
+
+    def sendWaypointReached(self, robotId, waypointNum):
+        """Notify a robot that it reached a waypoint at the next `flush`."""
+        self.pendingEvents.append(
+            (robotId, waypointMessage.pack(WAYPOINT_PACKET, robotId, waypointNum))
+        )
+
+    def flush(self):
+        """Send all buffered messages, with one motor packet per channel."""
+        if self.pending:
+            byChannel = {}
+            for robotId, speeds in self.pending.items():
+                channel = self.robotChannels.get(robotId, self.defaultChannel)
+                byChannel.setdefault(channel, {})[robotId] = speeds
+            for channel, commands in byChannel.items():
+                self._send(channel, encodeMotorPacket(commands))
+            self.pending.clear()
+        for robotId, packet in self.pendingEvents:
+            self._send(self.robotChannels.get(robotId, self.defaultChannel), packet)
+        self.pendingEvents.clear()
+
+    def _send(self, channel, packet):
+        if self.emitter is None:
+            return
+        if channel != self.currentChannel:
+            self.emitter.setChannel(channel)
+            self.currentChannel = channel
+        self.emitter.send(packet)
+        self.packetsSent += 1
+        self.bytesSent += len(packet)
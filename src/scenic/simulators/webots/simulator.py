@@ -21,12 +21,15 @@ from os import path
 import tempfile
 from textwrap import dedent
 
+import numpy
+from scipy.spatial.transform import Rotation
 import trimesh
 
 from scenic.core.regions import MeshVolumeRegion
 from scenic.core.simulators import Simulation, Simulator
 from scenic.core.type_support import toOrientation
 from scenic.core.vectors import Vector
+from scenic.simulators.webots.motor_channel import MotorChannel, robotCustomData
 from scenic.simulators.webots.utils import ENU, WebotsCoordinateSystem
 
 
@@ -65,6 +68,8 @@ class WebotsSimulation(Simulation):
         supervisor: Webots supervisor node used for the simulation. This is
             exposed for the use of scenarios which need to call Webots APIs
             directly; e.g. :scenic:`simulation().supervisor.setLabel({...})`.
+        motorChannel (`MotorChannel`): Channel carrying motor commands to robot
+            controllers, or `None` if the scenario has no robots.
     """
 
     def __init__(self, scene, supervisor, coordinateSystem=ENU, *, timestep, **kwargs):
@@ -73,6 +78,10 @@ class WebotsSimulation(Simulation):
         self.mode2D = scene.compileOptions.mode2D
         self.nextAdHocObjectId = 1
         self.usedObjectNames = defaultdict(lambda: 0)
+        self.motorChannel = None
+        self.nextRobotId = 0
+        # Handles for reading back the state of each Webots object every time step
+        self.nodeHandles = {}
 
         # directory to store proto files for adhoc webots objects
         self.tmpMeshDir = tempfile.mkdtemp()
@@ -141,13 +150,17 @@ class WebotsSimulation(Simulation):
         obj.webotsName = name
         obj.webotsSupervisor = self.supervisor
 
+        offsetOrientation = toOrientation(obj.rotationOffset)
+        handles = NodeHandles(obj, webotsObj, offsetOrientation)
+        self.nodeHandles[obj] = handles
+
         # Set the fields of the Webots object:
 
         # position
         if self.mode2D:  # 2D compatibility mode
             # Set initial elevation if unspecified
             if obj.elevation is None:
-                pos = webotsObj.getField("translation").getSFVec3f()
+                pos = handles.translation.getSFVec3f()
                 spos = self.coordinateSystem.positionToScenic(pos)
                 obj.elevation = spos[2]
 
@@ -155,16 +168,15 @@ class WebotsSimulation(Simulation):
             pos = self.coordinateSystem.positionFromScenic(
                 Vector(obj.position.x, obj.position.y, obj.elevation) + obj.positionOffset
             )
-            webotsObj.getField("translation").setSFVec3f(pos)
+            handles.translation.setSFVec3f(pos)
         else:
             pos = self.coordinateSystem.positionFromScenic(
                 obj.position + obj.positionOffset
             )
-            webotsObj.getField("translation").setSFVec3f(pos)
+            handles.translation.setSFVec3f(pos)
 
         # orientation
-        offsetOrientation = toOrientation(obj.rotationOffset)
-        webotsObj.getField("rotation").setSFRotation(
+        handles.rotation.setSFRotation(
             self.coordinateSystem.orientationFromScenic(
                 obj.orientation, offsetOrientation
             )
@@ -210,19 +222,22 @@ class WebotsSimulation(Simulation):
         self._setupRobotFields(obj, webotsObj)
 
     def step(self):
-        # Collect and execute actions from behaviors
-        self._collectAndExecuteActions()
-        
+        # Actions were applied by executeActions, which buffered any robot
+        # commands; send them all at once, one packet per channel.
+        if self.motorChannel:
+            self.motorChannel.flush()
+
         # Step the simulation
         ms = round(1000 * self.timestep)
         self.supervisor.step(ms)
 
     def getProperties(self, obj, properties):
-        webotsObj = getattr(obj, "webotsObject", None)
-        if not webotsObj:  # static object with no Webots counterpart
+        handles = self.nodeHandles.get(obj)
+        if not handles:  # static object with no Webots counterpart
             return {prop: getattr(obj, prop) for prop in properties}
+        webotsObj = handles.node
 
-        pos = webotsObj.getField("translation").getSFVec3f()
+        pos = handles.translation.getSFVec3f()
         x, y, z = self.coordinateSystem.positionToScenic(pos)
         lx, ly, lz, ax, ay, az = webotsObj.getVelocity()
         vx, vy, vz = self.coordinateSystem.positionToScenic((lx, ly, lz))
@@ -230,9 +245,8 @@ class WebotsSimulation(Simulation):
         speed = math.hypot(*velocity)
         angularSpeed = math.hypot(ax, ay, az)
 
-        offsetOrientation = toOrientation(obj.rotationOffset)
         globalOrientation = self.coordinateSystem.orientationToScenic(
-            webotsObj.getField("rotation").getSFRotation(), offsetOrientation
+            handles.rotation.getSFRotation(), handles.offsetOrientation
         )
         yaw, pitch, roll = obj.parentOrientation.localAnglesFor(globalOrientation)
 
@@ -248,13 +262,54 @@ class WebotsSimulation(Simulation):
             elevation=z,
         )
 
-        if hasattr(obj, "battery"):
-            field = webotsObj.getField("battery")
-            val = (field.getMFFloat(0), obj.battery[1], obj.battery[2])
+        if handles.battery:
+            val = (handles.battery.getMFFloat(0), obj.battery[1], obj.battery[2])
             values["battery"] = val
 
         return values
 
+    def getPropertiesBatch(self, objects):
+        allHandles = [self.nodeHandles.get(obj) for obj in objects]
+        if not all(allHandles):
+            return None  # static objects with no Webots counterpart
+
+        # Read all the fields first, then convert them together.
+        coordinateSystem = self.coordinateSystem
+        positions = coordinateSystem.positionsToScenic(
+            [handles.translation.getSFVec3f() for handles in allHandles]
+        )
+        velocities = numpy.array(
+            [handles.node.getVelocity() for handles in allHandles], dtype=float
+        )
+        velocity = coordinateSystem.positionsToScenic(velocities[:, :3])
+        angularVelocity = velocities[:, 3:]
+        globalRotations = coordinateSystem.orientationsToScenic(
+            [handles.rotation.getSFRotation() for handles in allHandles],
+            [handles.offsetOrientation.q for handles in allHandles],
+        )
+        parentRotations = Rotation.from_quat([obj.parentOrientation.q for obj in objects])
+        angles = (parentRotations.inv() * globalRotations).as_euler("ZXY")
+
+        values = dict(
+            position=positions,
+            velocity=velocity,
+            speed=numpy.linalg.norm(velocity, axis=1),
+            angularSpeed=numpy.linalg.norm(angularVelocity, axis=1),
+            angularVelocity=angularVelocity,
+            yaw=angles[:, 0],
+            pitch=angles[:, 1],
+            roll=angles[:, 2],
+            elevation=positions[:, 2],
+        )
+
+        if allHandles[0].battery:
+            values["battery"] = [
+                (handles.battery.getMFFloat(0), obj.battery[1], obj.battery[2])
+                for handles, obj in zip(allHandles, objects)
+            ]
+
+        return values
+
     def destroy(self):
         # Destroy adhoc objects generated at the beginning of the simulation
         for i in range(1, self.nextAdHocObjectId):
@@ -275,15 +330,52 @@ class WebotsSimulation(Simulation):
                 if field:
                     field.setSFFloat(float(getattr(obj, fieldName)))
 
-    def _collectAndExecuteActions(self):
-        """Collect and execute actions from all objects with behaviors."""
-        for obj in self.scene.objects:
-            if hasattr(obj, '_currentBehavior') and obj._currentBehavior:
-                # Collect actions from the behavior
-                if hasattr(obj._currentBehavior, '_collectActions'):
-                    actions = obj._currentBehavior._collectActions()
-                    for action in actions:
-                        action.applyTo(obj, self)
+        # Binary motor channel, for robots whose controllers take motor commands
+        if hasattr(obj, "_sendMotorCommand"):
+            if self.motorChannel is None:
+                self.motorChannel = MotorChannel.forSupervisor(self.supervisor)
+            robotId = getattr(obj, "webotsRobotId", None)
+            if robotId is None:
+                while self.nextRobotId in self.motorChannel.robotChannels:
+                    self.nextRobotId += 1
+                robotId = self.nextRobotId
+            channel = getattr(obj, "webotsChannel", None)
+            customData = getattr(obj, "customData", None)
+            if customData and channel is None:
+                # Robot controllers learn their channel from customData, so if the
+                # scenario sets it the controller stays on the default channel.
+                channel = self.motorChannel.defaultChannel
+            channel = self.motorChannel.addRobot(robotId, channel)
+            obj.webotsRobotId = robotId
+            obj.webotsChannel = channel
+            obj.webotsMotorChannel = self.motorChannel
+            # Robot controllers learn their ID and channel from customData
+            if not customData:
+                field = getFieldSafe(webotsObj, "customData")
+                if field:
+                    field.setSFString(robotCustomData(robotId, channel))
+
+
+class NodeHandles:
+    """Handles to the Webots node of an object and the fields read every time step.
+
+    Looking up fields is relatively expensive, so we do it once when the object is
+    created. The battery field is only looked up if the object's class has a
+    dynamic ``battery`` property, since otherwise it is never read back.
+    """
+
+    __slots__ = ("node", "translation", "rotation", "battery", "offsetOrientation")
+
+    def __init__(self, obj, node, offsetOrientation):
+        self.node = node
+        self.translation = node.getField("translation")
+        self.rotation = node.getField("rotation")
+        if "battery" in obj._simulatorProvidedProperties:
+            self.battery = node.getField("battery")
+        else:
+            self.battery = None
+        self.offsetOrientation = offsetOrientation
+
 
 def getFieldSafe(webotsObject, fieldName):
     """Get field from webots object. Return null if no such field exists.
@@ -80,6 +80,31 @@ class WebotsCoordinateSystem:
         orientation = target * offset.inverse
         return orientation
 
+    def positionsToScenic(self, positions):
+        """Convert an array of Webots positions to an array of Scenic positions."""
+        positions = np.asarray(positions, dtype=float)
+        return positions[:, self.axisMap] * self.mult
+
+    def orientationsToScenic(self, webotsOrientations, offsets) -> R:
+        """Convert an array of Webots orientations to Scenic orientations.
+
+        Vectorized version of `orientationToScenic`.
+
+        Args:
+            webotsOrientations: Array of Webots orientations, one per row.
+            offsets: Array of the quaternions of the orientation offsets to remove,
+                one per row.
+
+        Returns:
+            A SciPy `Rotation` holding all the converted orientations.
+        """
+        if self.system != "ENU":
+            raise ValueError("Coordinate systems other than ENU is not fully supported")
+
+        webotsOrientations = np.asarray(webotsOrientations, dtype=float)
+        rotvecs = webotsOrientations[:, :3] * webotsOrientations[:, 3:]
+        return R.from_rotvec(rotvecs) * R.from_quat(offsets).inv()
+
 
 ENU = WebotsCoordinateSystem("ENU")  #: The ENU coordinate system (the Webots default).
 NUE = WebotsCoordinateSystem("NUE")  #: The NUE coordinate system.
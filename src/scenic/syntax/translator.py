@@ -23,13 +23,16 @@ import ast
 import builtins
 from contextlib import contextmanager
 import dataclasses
+import functools
 import hashlib
 import importlib
 import importlib.abc
 import importlib.util
 import inspect
 import io
+import marshal
 import os
+import pickle
 import sys
 import time
 import types
@@ -42,8 +45,6 @@ from scenic.core.errors import InvalidScenarioError, PythonCompileError
 from scenic.core.lazy_eval import needsLazyEvaluation
 import scenic.core.pruning as pruning
 from scenic.core.utils import cached_property
-from scenic.syntax.compiler import compileScenicAST
-from scenic.syntax.parser import parse_string
 import scenic.syntax.veneer as veneer
 
 ### THE TOP LEVEL: compiling a Scenic program
@@ -274,6 +275,10 @@ def compileStream(stream, namespace, compileOptions, filename):
         3. Compile and execute the Python AST.
         4. Extract the global state (e.g. objects).
            This is done by the `storeScenarioStateIn` function.
+
+    If the code comes from a file whose translation was cached by a previous
+    compilation (see `translationCachePath`), steps 1 and 2 and the compilation of
+    the Python AST are skipped.
     """
     if errors.verbosityLevel >= 2:
         veneer.verbosePrint(f"  Compiling Scenic module from {filename}...")
@@ -284,26 +289,18 @@ def compileStream(stream, namespace, compileOptions, filename):
         exec(compile(preamble, "<veneer>", "exec"), namespace)
         namespace[namespaceReference] = namespace
 
-        # Parse the source
-        source = stream.read().decode("utf-8")
-        scenic_tree = parse_string(source, "exec", filename=filename)
-
-        if dumpScenicAST:
-            print(f"### Begin Scenic AST of {filename}")
-            print(dump(scenic_tree, include_attributes=False, indent=4))
-            print("### End Scenic AST")
-
-        # Compile the Scenic AST into a Python AST
-        tree, requirements = compileScenicAST(scenic_tree, filename=filename)
-        astHasher = hashlib.blake2b(digest_size=4)
-        astHasher.update(ast.dump(tree).encode())
+        # Translate the source into Python, reusing a cached translation if possible
+        source = stream.read()
+        translation = None
+        cachePath = translationCachePath(filename)
+        if cachePath and not (dumpScenicAST or dumpFinalAST):
+            translation = loadTranslation(cachePath, source, filename)
+        if translation is None:
+            translation = translate(source.decode("utf-8"), filename)
+            if cachePath:
+                saveTranslation(cachePath, source, filename, translation)
+        code, requirements, astHash, pythonSource = translation
 
-        if dumpFinalAST:
-            print(f"### Begin final AST of {filename}")
-            print(dump(tree, include_attributes=True, indent=4))
-            print("### End final AST")
-
-        pythonSource = astToSource(tree)
         if dumpASTPython:
             if pythonSource is None:
                 raise RuntimeError(
@@ -314,14 +311,10 @@ def compileStream(stream, namespace, compileOptions, filename):
             print(pythonSource)
             print("### End Python equivalent of final AST")
 
-        # Compile the Python AST tree
-        code = compileTranslatedTree(tree, filename)
-
         # Execute it
         executeCodeIn(code, namespace)
 
         # Extract scenario state from veneer and store it
-        astHash = astHasher.digest()
         storeScenarioStateIn(namespace, requirements, astHash, compileOptions)
     finally:
         veneer.deactivate()
@@ -331,6 +324,45 @@ def compileStream(stream, namespace, compileOptions, filename):
     return code, pythonSource
 
 
+def translate(source, filename):
+    """Translate Scenic code into Python.
+
+    Returns:
+        A tuple consisting of the compiled Python code, the syntax of the requirements
+        it contains, a hash of its AST, and the equivalent Python source (or `None`
+        if it could not be generated).
+    """
+    # The parser and compiler are slow to import, and not needed when all
+    # translations are cached.
+    from scenic.syntax.compiler import compileScenicAST
+    from scenic.syntax.parser import parse_string
+
+    # Parse the source
+    scenic_tree = parse_string(source, "exec", filename=filename)
+
+    if dumpScenicAST:
+        print(f"### Begin Scenic AST of {filename}")
+        print(dump(scenic_tree, include_attributes=False, indent=4))
+        print("### End Scenic AST")
+
+    # Compile the Scenic AST into a Python AST
+    tree, requirements = compileScenicAST(scenic_tree, filename=filename)
+    astHasher = hashlib.blake2b(digest_size=4)
+    astHasher.update(ast.dump(tree).encode())
+
+    if dumpFinalAST:
+        print(f"### Begin final AST of {filename}")
+        print(dump(tree, include_attributes=True, indent=4))
+        print("### End final AST")
+
+    pythonSource = astToSource(tree)
+
+    # Compile the Python AST tree
+    code = compileTranslatedTree(tree, filename)
+
+    return code, requirements, astHasher.digest(), pythonSource
+
+
 def dump(
     node: ast.AST,
     annotate_fields: bool = True,
@@ -363,6 +395,7 @@ dumpScenicAST = False
 dumpFinalAST = False
 dumpASTPython = False
 usePruning = True
+cacheTranslations = True
 
 ## Preamble
 # (included at the beginning of every module to be translated;
@@ -551,6 +584,108 @@ def compileTranslatedTree(tree, filename):
         raise PythonCompileError(e) from None
 
 
+## Caching translations
+
+# Version of the format of cached translations; increment when changing it.
+translationCacheVersion = 1
+
+
+def translationCachePath(filename):
+    """Get the path where the translation of a Scenic file is cached.
+
+    Like Python's bytecode caches, translations are stored in a ``__pycache__``
+    directory next to the file, or under `sys.pycache_prefix` if it is set (see
+    `importlib.util.cache_from_source`). They are keyed by the contents and path of
+    the file and the implementation of the translator, but not by compile options or
+    global parameters, which only affect the execution of the translated code.
+
+    Returns:
+        The path, or `None` if caching is disabled or **filename** is not a file
+        (e.g. when compiling a string).
+    """
+    tag = sys.implementation.cache_tag
+    if not cacheTranslations or tag is None or not os.path.isfile(filename):
+        return None
+    directory = os.path.dirname(importlib.util.cache_from_source(filename))
+    name = os.path.basename(filename)
+    return os.path.join(directory, f"{name}.{tag}.scenic-translation")
+
+
+def loadTranslation(path, source, filename):
+    """Load a cached translation, returning `None` if it is missing or outdated."""
+    try:
+        with open(path, "rb") as stream:
+            key = stream.read(32)
+            if key != translationKey(source, filename):
+                return None
+            digest = stream.read(32)
+            data = stream.read()
+    except OSError:
+        return None
+    # Check the data is intact before unpickling it, since unpickling corrupted data
+    # can fail in arbitrary ways.
+    if digest != hashlib.blake2b(data, digest_size=32).digest():
+        return None
+    codeData, requirements, astHash, pythonSource = pickle.loads(data)
+    code = marshal.loads(codeData)
+    if errors.verbosityLevel >= 2:
+        veneer.verbosePrint(f"  Using cached translation from {path}.")
+    return code, requirements, astHash, pythonSource
+
+
+def saveTranslation(path, source, filename, translation):
+    """Cache a translation, as returned by `translate`.
+
+    Like Python's bytecode caches, nothing is written if `sys.dont_write_bytecode`
+    is set (e.g. by the ``-B`` option).
+    """
+    if sys.dont_write_bytecode:
+        return
+    code, requirements, astHash, pythonSource = translation
+    data = pickle.dumps((marshal.dumps(code), requirements, astHash, pythonSource))
+    # Write to a temporary file first, so that concurrent compilations never see
+    # an incomplete translation.
+    tempPath = f"{path}.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tempPath, "wb") as stream:
+            stream.write(translationKey(source, filename))
+            stream.write(hashlib.blake2b(data, digest_size=32).digest())
+            stream.write(data)
+        os.replace(tempPath, path)
+    except OSError:
+        # Caching is only an optimization (and the directory may not be writable).
+        try:
+            os.remove(tempPath)
+        except OSError:
+            pass
+
+
+def translationKey(source, filename):
+    """Digest identifying the translation of the given source code."""
+    hasher = hashlib.blake2b(digest_size=32)
+    hasher.update(translatorFingerprint())
+    hasher.update(filename.encode())
+    hasher.update(source)
+    return hasher.digest()
+
+
+@functools.lru_cache(maxsize=None)
+def translatorFingerprint():
+    """Bytes identifying the implementation of the translator.
+
+    Changes to the parser or compiler (e.g. when developing Scenic) invalidate all
+    cached translations.
+    """
+    stream = io.BytesIO()
+    stream.write(importlib.util.MAGIC_NUMBER)
+    stream.write(bytes([translationCacheVersion]))
+    for module in ("scenic.syntax.parser", "scenic.syntax.compiler", __name__):
+        stat = os.stat(importlib.util.find_spec(module).origin)
+        stream.write(f"{stat.st_mtime_ns}:{stat.st_size};".encode())
+    return stream.getvalue()
+
+
 ### TRANSLATION PHASE SIX: Python execution
 
 
@@ -1,7 +1,10 @@
 import math
+import random
+import sys
 import typing
 import warnings
 
+import numpy
 import numpy.linalg
 import pytest
 import scipy.stats
@@ -11,6 +14,8 @@ from scenic.core.distributions import (
     Normal,
     Options,
     Range,
+    Samplable,
+    SamplingPlan,
     TruncatedNormal,
     distributionFunction,
     distributionMethod,
@@ -154,6 +159,88 @@ def test_bucketed_options(similarDistributions):
     similarDistributions(o, o.bucket())
 
 
+# Sampling plans
+
+
+def test_sampling_plan_order():
+    x = Range(0, 1)
+    y = Options([x, 2 * x])
+    z = x + y
+    plan = SamplingPlan([z, 5, y, x])
+    assert len(plan) == len(plan.nodes) == 6
+    index = {id(node): i for i, node in enumerate(plan.nodes)}
+    assert index[id(x)] < index[id(y)] < index[id(z)] < index[id(5)]
+    for i, parents in enumerate(plan.parents):
+        assert all(parent < i for parent in parents)
+
+    for seed in range(10):
+        random.seed(seed)
+        expected = Samplable.sampleAll([z, 5, y, x])
+        state = random.getstate()
+        random.seed(seed)
+        values = plan.sample()
+        assert random.getstate() == state
+        for node in (x, y, z, 5):
+            assert values[node] == expected[node]
+
+
+def test_sampling_plan_deep():
+    # Deeper than the recursion limit, which Samplable.sample would hit
+    x = Range(0, 1)
+    for i in range(3 * sys.getrecursionlimit()):
+        x = x + 1
+    value = SamplingPlan([x]).sample()[x]
+    assert 3 * sys.getrecursionlimit() <= value <= 3 * sys.getrecursionlimit() + 1
+
+
+def test_sampling_plan_resample():
+    x = Range(0, 1)
+    y = Range(0, 1)
+    z = Range(0, 1)
+    s = x + y
+    plan = SamplingPlan([s, z])
+    index = {id(node): i for i, node in enumerate(plan.nodes)}
+    assert plan.cone([s]) == tuple(sorted(index[id(n)] for n in (x, y, s)))
+    assert plan.cone([y]) == tuple(sorted(index[id(n)] for n in (y, s)))
+    assert plan.cone([z, 4]) == (index[id(z)],)
+    assert plan.cone([4]) == ()
+
+    values = plan.sample()
+    newValues = plan.resample(values, plan.cone([y]))
+    assert newValues[x] == values[x] and newValues[z] == values[z]
+    assert newValues[y] != values[y]
+    assert newValues[s] == newValues[x] + newValues[y]
+
+
+def test_sampling_plan_batch():
+    x = Range(0, 1)
+    n = TruncatedNormal(0, 1, -1, 2)
+    i = DiscreteRange(1, 3)
+    w = DiscreteRange(0, 2, weights=(1, 0, 3))
+    o = Options({2.5: 1, x: 1, n: 2})
+    s = 2 * x - n / 4 + o
+    u = Range(x, 2 * x) + i  # dependencies batched
+    opaque = Options([x, "a"])  # non-numeric options
+    plan = SamplingPlan([s, u, i, w, opaque])
+    batch = plan.sampleBatch(500, numpy.random.default_rng(0))
+    for node in (x, n, i, w, o, s, u):
+        assert node in batch.columns
+    assert opaque not in batch.columns
+
+    assert batch.columns[i].dtype.kind == "i"
+    assert set(batch.columns[w].tolist()) == {0, 2}
+    for index in range(batch.count):
+        values = batch.sample(index)
+        vx, vn, vi, vo, vu = (values[node] for node in (x, n, i, o, u))
+        assert 0 <= vx <= 1 and -1 <= vn <= 2
+        assert type(vi) is int and 1 <= vi <= 3
+        assert vo in (2.5, vx, vn)
+        assert values[s] == pytest.approx(2 * vx - vn / 4 + vo)
+        assert vx + vi <= vu <= 2 * vx + vi
+        assert values[opaque] in (vx, "a")
+    assert 0.2 < numpy.mean(batch.columns[x]) < 0.8
+
+
 # Decorators for supporting random arguments
 
 
@@ -93,6 +93,19 @@ def test_pickle_scenario():
     assert o1.x != o2.x
 
 
+def test_pickle_scenario_after_sampling():
+    scenario = compileScenic(
+        """
+        ego = new Object at (Range(1, 2), 0)
+        other = new Object at (5, 0)
+    """
+    )
+    sampleScene(scenario)  # builds non-picklable collision checking state
+    unpickled = tryPickling(scenario, checkEquivalence=False)
+    scene = sampleScene(unpickled)
+    assert 1 <= scene.egoObject.x <= 2
+
+
 def test_pickle_scene():
     scene = sampleSceneFrom("ego = new Object at Range(1, 2) @ 3")
     tryPickling(scene)
@@ -1,17 +1,20 @@
 import math
 from pathlib import Path
+import time
 
 import fcl
+import numpy
 import pytest
 import shapely.geometry
 import trimesh.voxel
 
+from scenic.core import regions
 from scenic.core.distributions import RandomControlFlowError, Range
 from scenic.core.object_types import Object, OrientedPoint
 from scenic.core.regions import *
 from scenic.core.shapes import ConeShape, MeshShape
 from scenic.core.vectors import Orientation, VectorField
-from tests.utils import deprecationTest, sampleSceneFrom
+from tests.utils import compileScenic, deprecationTest, sampleScene, sampleSceneFrom
 
 
 def assertPolygonsEqual(p1, p2, prec=1e-6):
@@ -346,6 +349,179 @@ def test_mesh_surface_region_sampling():
         assert x == 1 or x == -1 or y == 1 or y == -1 or z == 1 or z == -1
 
 
+def test_mesh_volume_region_sampling_uniform():
+    numpy.random.seed(0)
+
+    # Convex mesh, sampled using tetrahedra: 7/8 of a cone's volume is in its lower half
+    cone = MeshVolumeRegion(ConeShape().mesh, dimensions=(2, 2, 2))
+    assert isinstance(cone._samplingTable, regions._TetrahedralSamplingTable)
+    pts = trimesh.transform_points(cone._samplingTable.sample(10_000), cone._transform)
+    assert cone.mesh.contains(pts).all()
+    assert numpy.mean(pts[:, 2] < 0) == pytest.approx(7 / 8, abs=0.02)
+
+    # Nonconvex mesh, sampled using voxels: an L shape with arms of volumes 2 and 1
+    mesh = trimesh.boolean.union(
+        [
+            trimesh.creation.box((2, 1, 1)),
+            trimesh.creation.box(
+                (1, 1, 1), trimesh.transformations.translation_matrix((0.5, 1, 0))
+            ),
+        ]
+    )
+    region = MeshVolumeRegion(mesh, centerMesh=False)
+    assert not region.isConvex
+    assert isinstance(region._samplingTable, regions._VoxelSamplingTable)
+    pts = [region.uniformPointInner() for _ in range(3000)]
+    assert region.mesh.contains(pts).all()
+    assert numpy.mean([y > 0.5 for _, y, _ in pts]) == pytest.approx(1 / 3, abs=0.03)
+    pts = region._samplingTable.sample(3000)
+    assert 2000 < len(pts) <= 3000
+    assert region.mesh.contains(pts).all()
+    assert numpy.mean(pts[:, 1] > 0.5) == pytest.approx(1 / 3, abs=0.03)
+
+
+def lShapedMesh():
+    # An L shape with arms of volumes 2 and 1, which is not convex
+    return trimesh.boolean.union(
+        [
+            trimesh.creation.box((2, 1, 1)),
+            trimesh.creation.box(
+                (1, 1, 1), trimesh.transformations.translation_matrix((0.5, 1, 0))
+            ),
+        ]
+    )
+
+
+def test_mesh_volume_region_sampling_table_shared():
+    numpy.random.seed(0)
+    scenario = compileScenic(
+        """
+        ego = new Object at (Range(-5, 5), Range(-5, 5), 0),
+            facing (Range(0, 360) deg, Range(0, 90) deg, 0),
+            with shape ConeShape(), with width Range(1, 3), with length 4
+        """
+    )
+    scenes = [sampleScene(scenario) for _ in range(4)]
+    shape = scenes[0].egoObject.shape
+    assert all(scene.egoObject.shape is shape for scene in scenes)
+
+    # All placements and scalings of the shape draw from the shape's table.
+    for scene in scenes:
+        region = scene.egoObject.occupiedSpace
+        pts = [region.uniformPointInner() for _ in range(5)]
+        assert region.mesh.contains(pts).all()
+        assert "_cached__samplingTable" not in region.__dict__
+    assert "_cached__samplingTable" in shape.__dict__
+
+
+def test_mesh_volume_region_sampling_table_shared_lazy():
+    # Points in the space occupied by a randomly-placed object are drawn from the
+    # region the lazy occupiedSpace samples to, which should also use the shape.
+    scenario = compileScenic(
+        """
+        table = new Object at (Range(-5, 5), Range(-5, 5), 0), facing Range(0, 360) deg,
+            with shape ConeShape(), with width 2, with length 3
+        ego = new Object in table.occupiedSpace, with width 0.05, with length 0.05,
+            with height 0.05, with allowCollisions True
+        """
+    )
+    for _ in range(3):
+        scene = sampleScene(scenario)
+        table = scene.objects[1]
+        assert table.occupiedSpace.containsPoint(scene.egoObject.position)
+    assert "_cached__samplingTable" in table.shape.__dict__
+
+
+def test_mesh_volume_region_sampling_random_placement():
+    # Regions obtained by sampling a randomly-placed nonconvex region, or the space
+    # occupied by an object with a random shape, share the tables of their meshes.
+    annulus = MeshVolumeRegion(
+        trimesh.creation.annulus(1, 2, 1), position=(Range(-5, 5), Range(-5, 5), 0)
+    )
+    scenario = compileScenic(
+        """
+        import trimesh
+        shape = Uniform(ConeShape(), MeshShape(trimesh.creation.annulus(1, 2, 1)))
+        table = new Object at (Range(-5, 5), Range(-5, 5), 0), with shape shape
+        ego = new Object in table.occupiedSpace, with width 0.05, with length 0.05,
+            with height 0.05, with allowCollisions True
+        """
+    )
+    start = time.perf_counter()
+    for _ in range(30):
+        region = annulus.sample()
+        assert region.containsPoint(region.uniformPointInner())
+        scene = sampleScene(scenario)
+        assert scene.objects[1].occupiedSpace.containsPoint(scene.egoObject.position)
+    # Building a table for every sample takes about 0.3 s each
+    assert time.perf_counter() - start < 5
+
+
+def test_mesh_volume_region_sampling_shape_uniform():
+    numpy.random.seed(0)
+    shape = MeshShape(lShapedMesh())
+    region = MeshVolumeRegion(
+        shape.mesh,
+        dimensions=(4, 4, 2),
+        position=(1, 2, 3),
+        rotation=Orientation.fromEuler(math.pi / 2, 0, 0),
+        centerMesh=False,
+        _shape=shape,
+    )
+    pts = numpy.array([region.uniformPointInner() for _ in range(3000)])
+    assert isinstance(shape._samplingTable, regions._VoxelSamplingTable)
+    assert region.mesh.contains(pts).all()
+    # The arm of volume 1 is rotated to the low x half of the mesh.
+    arm = region.mesh.bounds[0][0] + 2
+    assert numpy.mean(pts[:, 0] < arm) == pytest.approx(1 / 3, abs=0.03)
+
+
+def test_mesh_surface_region_sampling_uniform():
+    numpy.random.seed(0)
+    r = BoxRegion(dimensions=(1, 2, 4)).getSurfaceRegion()
+    pts = numpy.array([r.uniformPointInner() for _ in range(5000)])
+    # The top and bottom faces make up 4 of the 28 square units of area
+    assert numpy.mean(numpy.abs(pts[:, 2]) == 2) == pytest.approx(4 / 28, abs=0.02)
+
+
+def test_mesh_contains_batch():
+    numpy.random.seed(0)
+    # An L shape, which is not convex, and a box, which is
+    mesh = trimesh.boolean.union(
+        [
+            trimesh.creation.box((2, 1, 1)),
+            trimesh.creation.box(
+                (1, 1, 1), trimesh.transformations.translation_matrix((0.5, 1, 0))
+            ),
+        ]
+    )
+    for region in (MeshVolumeRegion(mesh, centerMesh=False), BoxRegion()):
+        pts = numpy.random.uniform(-1.5, 2, (500, 3))
+        expected = [region.containsPoint(Vector(*pt)) for pt in pts]
+        assert list(region.containsPoints(pts)) == expected
+        objs = [
+            Object._with(
+                position=Vector(*numpy.random.uniform(-1, 1.5, 3)),
+                width=size,
+                length=size,
+                height=size,
+            )
+            for size in numpy.random.uniform(0.05, 0.5, 30)
+        ]
+        expected = [region.containsObject(obj) for obj in objs]
+        assert 0 < sum(expected) < len(objs)
+        assert list(region.containsObjects(objs)) == expected
+
+        # Same results once the signed distance grid is used
+        region._distanceGridThreshold = 0
+        assert list(region.containsPoints(pts)) == [
+            region.containsPoint(Vector(*pt)) for pt in pts
+        ]
+        assert list(region.containsObjects(objs)) == expected
+        assert "_cached__distanceGrid" in region.__dict__
+        assert not list(region.containsObjects([]))
+
+
 def test_mesh_intersects():
     r1 = BoxRegion(dimensions=(1, 1, 1))
     r2 = BoxRegion(dimensions=(2, 2, 2))
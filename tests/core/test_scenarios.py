@@ -1,7 +1,25 @@
+import itertools
+import multiprocessing
+import random
+from types import SimpleNamespace
+
+import fcl
+import numpy
 import pytest
 
-from scenic.core.distributions import Range
-from tests.utils import compileScenic
+from scenic.core.distributions import Range, RejectionException, Samplable
+from scenic.core.requirements import (
+    BlanketCollisionRequirement,
+    ContainmentGroupRequirement,
+    ContainmentRequirement,
+    IntersectionGroupRequirement,
+    IntersectionRequirement,
+    NonVisibilityRequirement,
+    VisibilityGroupRequirement,
+    VisibilityRequirement,
+)
+from scenic.core.sample_checking import AdaptiveChecker, WeightedAcceptanceChecker
+from tests.utils import compileScenic, pickle_test
 
 
 def test_nonexistent_scenario_local_1():
@@ -59,3 +77,508 @@ def test_condition_scenario_params_2():
     assert all(0.5 <= x <= 0.51 for x in xs)
     assert any(0.505 <= x for x in xs)
     assert any(x < 0.505 for x in xs)
+
+
+## Parallel generation
+
+# N.B. worker processes are spawned during testing, requiring pickling.
+
+
+def test_sampling_plan_scenario():
+    scenario = compileScenic(
+        """
+        param p = Range(0, 1)
+        ego = new Object at Range(-5, 5) @ Normal(0, 1), facing Range(0, 1)
+        other = new Object ahead of ego by Options([2, 3, globalParameters.p])
+        new Object at other offset by (Range(-1, 1) @ 3), with foo other.position.x
+        require (distance to other) < 4
+        """
+    )
+    assert scenario.samplingPlan is scenario.samplingPlan
+    for seed in range(10):
+        random.seed(seed)
+        numpy.random.seed(seed)
+        expected = Samplable.sampleAll(scenario.dependencies)
+        state = random.getstate(), numpy.random.get_state()[1].tolist()
+        random.seed(seed)
+        numpy.random.seed(seed)
+        sample = scenario.samplingPlan.sample()
+        assert (random.getstate(), numpy.random.get_state()[1].tolist()) == state
+        for obj in scenario.objects:
+            assert sample[obj].position == expected[obj].position
+            assert sample[obj].heading == expected[obj].heading
+        assert sample[scenario.objects[2]].foo == expected[scenario.objects[2]].foo
+        param = scenario.params["p"]
+        assert sample[param] == expected[param]
+
+    # Conditioning requires recompiling the plan
+    plan = scenario.samplingPlan
+    scene, _ = scenario.generate(maxIterations=100)
+    scenario.conditionOn(scene=scene, objects=(0,))
+    assert scenario.samplingPlan is not plan
+    scene2, _ = scenario.generate(maxIterations=100)
+    assert scene2.egoObject.position == scene.egoObject.position
+
+
+def test_batch_sampling():
+    scenario = compileScenic(
+        """
+        x = Range(0, 1)
+        y = Normal(0, 1) * 2 + x
+        require x > 0.9
+        require y < 1
+        ego = new Object at (Range(-5, 5) @ 0) + (x @ 0), with foo x, with bar y
+        other = new Object at 20 @ 0
+        require (distance to other) < 30
+        """
+    )
+
+    # Batch checking rejects exactly the candidates failing the first two
+    # requirements (the third involves objects, which are not batched)
+    batch = scenario.samplingPlan.sampleBatch(200, numpy.random.default_rng(0))
+    assert scenario.objects[0] not in batch.columns
+    rejections = scenario.checker.checkBatch(batch)
+    assert any(rejection is None for rejection in rejections)
+    for index, rejection in enumerate(rejections):
+        ego = batch.sample(index)[scenario.objects[0]]
+        assert (rejection is None) == (ego.foo > 0.9 and ego.bar < 1)
+        assert -5 <= ego.position.x - ego.foo <= 5 and ego.position.y == 0
+
+    def generate(batchSize):
+        scenario.configureSampling(batchSize=batchSize)
+        random.seed(7)
+        scenes, iterations = scenario.generateBatch(5, maxIterations=5000)
+        for scene in scenes:
+            assert scene.egoObject.foo > 0.9 and scene.egoObject.bar < 1
+        return [scene.egoObject.position for scene in scenes], iterations
+
+    positions, iterations = generate(64)
+    assert iterations > 5
+    assert generate(64) == (positions, iterations)
+    assert generate(16)[0] != positions
+    assert generate(None)[0] != positions
+    with pytest.raises(ValueError):
+        scenario.configureSampling(batchSize=0)
+
+
+def test_batch_checking_plain_requirements_only():
+    scenario = compileScenic(
+        """
+        calls = []
+        def check(value):
+            calls.append(value)
+            return value > 0.5
+        x = Range(0, 1)
+        y = Range(0, 1)
+        require -x * 2 + y / 4 < -1
+        require x > 0.6 and y < 0.9
+        require max(x, 0.5) > 0.7
+        require check(y)
+        require 0.2 < x < 0.9
+        ego = new Object at (x @ y)
+        """
+    )
+    batch = scenario.samplingPlan.sampleBatch(100, numpy.random.default_rng(0))
+    results = [req.falsifiedByBatch(batch) for req in scenario.userRequirements]
+    x, y = batch.sample(0)[scenario.objects[0]].position[:2]
+    assert results[0].dtype == bool and results[0][0] == (not -x * 2 + y / 4 < -1)
+    assert all(result is None for result in results[1:])
+    namespace = scenario.userRequirements[3].proposition.atomics()[0].closure.__globals__
+    assert namespace["calls"] == []  # the closures were never run on the batch
+
+    scenario.configureSampling(batchSize=16)
+    scene, _ = scenario.generate(maxIterations=5000)
+    x, y = scene.egoObject.position[:2]
+    assert x > 0.7 and 0.5 < y < 0.9
+
+
+def test_incremental_resampling():
+    scenario = compileScenic(
+        """
+        ego = new Object at Range(-10, 10) @ 0
+        others = [new Object at Range(-10, 10) @ 10 * i for i in range(1, 6)]
+        require ego.position.x > 5
+        """
+    )
+    scenario.configureSampling(incremental=True)
+    scene, _ = scenario.generate(maxIterations=1000)
+    assert scene.egoObject.position.x > 5
+
+    # Violations of the requirement only resample the ego
+    random.seed(0)
+    while True:
+        sample = scenario.samplingPlan.sample()
+        if scenario.checker.checkRequirements(sample) is not None:
+            break
+    assert scenario.checker.violatedRequirement is scenario.userRequirements[0]
+    newSample = scenario.samplingPlan.resample(sample, scenario._resamplingCone(sample))
+    assert newSample[scenario.egoObject] is not sample[scenario.egoObject]
+    for obj in scenario.objects[1:]:
+        assert newSample[obj] is sample[obj]
+
+    def generate(incremental):
+        scenario.configureSampling(incremental=incremental)
+        random.seed(3)
+        scenes, iterations = scenario.generateBatch(10)
+        return [scene.egoObject.position for scene in scenes], iterations
+
+    positions, iterations = generate(True)
+    assert generate(True) == (positions, iterations)
+    assert all(position.x > 5 for position in positions)
+    assert generate(False)[0] != positions
+
+    with pytest.raises(ValueError):
+        scenario.configureSampling(batchSize=10, incremental=True)
+    with pytest.raises(ValueError):
+        scenario.configureSampling(incremental=True, restartInterval=0)
+
+
+def test_incremental_resampling_cone_deterministic():
+    scenario = compileScenic(
+        """
+        ego = new Object at Range(-10, 10) @ 0
+        other = new Object at Range(-10, 10) @ 10
+        require ego.position.x > 5
+        require other.position.x > 5
+        """
+    )
+    scenario.configureSampling(incremental=True)
+    random.seed(0)
+    while True:
+        sample = scenario.samplingPlan.sample()
+        if sample[scenario.objects[0]].position.x <= 5 and (
+            sample[scenario.objects[1]].position.x <= 5
+        ):
+            break
+
+    # Whichever requirement the checker found first, the first violated one in
+    # declaration order determines what gets resampled
+    first, second = scenario.userRequirements
+    for found in (first, second):
+        scenario.checker.violatedRequirement = found
+        state = random.getstate()
+        newSample = scenario.samplingPlan.resample(
+            sample, scenario._resamplingCone(sample)
+        )
+        assert random.getstate() != state
+        assert newSample[scenario.objects[0]] is not sample[scenario.objects[0]]
+        assert newSample[scenario.objects[1]] is sample[scenario.objects[1]]
+
+
+def test_adaptive_checker():
+    scenario = compileScenic(
+        """
+        workspace = Workspace(RectangularRegion(0 @ 0, 0, 30, 30))
+        ego = new Object in workspace
+        for i in range(6):
+            new Object in workspace, with width Range(1, 5)
+        require ego.position.x > 0
+        """
+    )
+    assert isinstance(scenario.checker, AdaptiveChecker)
+
+    # Prefilters agree with the exact tests whenever they are conclusive
+    cascades = scenario.checker.cascades
+    assert any(prefilter for _, prefilter in cascades)
+    random.seed(0)
+    for _ in range(100):
+        try:
+            sample = scenario.samplingPlan.sample()
+        except RejectionException:
+            continue
+        for req, prefilter in cascades:
+            if prefilter and req.active:
+                result = prefilter(sample)
+                assert result is None or result == req.falsifiedBy(sample)
+
+    # The checker does not affect which scenes are generated
+    def generate(checker):
+        scenario.setSampleChecker(checker)
+        random.seed(1)
+        scenes, iterations = scenario.generateBatch(5)
+        return [scene.egoObject.position for scene in scenes], iterations
+
+    assert generate(AdaptiveChecker(sortInterval=1)) == generate(
+        WeightedAcceptanceChecker()
+    )
+
+    with pytest.raises(ValueError):
+        AdaptiveChecker(decay=0)
+    with pytest.raises(ValueError):
+        AdaptiveChecker(sortInterval=0)
+
+
+def test_adaptive_checker_optional_requirements():
+    checked = []
+
+    class Requirement:
+        def __init__(self, name, optional, active):
+            self.name, self.optional, self.active = name, optional, active
+            self.violationMsg = name
+
+        def prefilter(self):
+            return None
+
+        def falsifiedBy(self, sample):
+            checked.append(self.name)
+            return False
+
+    reqs = [
+        Requirement("first", optional=False, active=True),
+        Requirement("activeOptional", optional=True, active=True),
+        Requirement("second", optional=False, active=False),
+        Requirement("inactiveOptional", optional=True, active=False),
+    ]
+    checker = AdaptiveChecker()
+    checker.setRequirements(reqs)
+    assert checker.checkRequirements({}) is None
+    assert checked == ["first"]
+
+    # Once a later mandatory requirement is active, the optional one is worth checking
+    reqs[2].active = True
+    checked.clear()
+    assert checker.checkRequirements({}) is None
+    assert checked == ["first", "activeOptional", "second"]
+
+
+def test_blanket_collision_persistent():
+    scenario = compileScenic(
+        """
+        for i in range(5):
+            new Object at (4 * i, 0, 0), with width 2
+        new Object at (Range(0, 16), Range(-2, 2), 0), with allowCollisions Uniform(True, False)
+        new Object at (Range(0, 16), Range(-2, 2), 0), with shape Uniform(BoxShape(), ConeShape())
+        ego = new Object at (Range(0, 16), Range(-2, 2), 0)
+        """
+    )
+    (req,) = (
+        req
+        for req in scenario.defaultRequirements
+        if isinstance(req, BlanketCollisionRequirement)
+    )
+
+    # The persistent collision manager agrees with a fresh one on every sample
+    random.seed(0)
+    collisions = 0
+    for _ in range(60):
+        sample = scenario.samplingPlan.sample()
+        collision = req.falsifiedBy(sample)
+        fresh = BlanketCollisionRequirement(req.objects)
+        assert collision == fresh.falsifiedBy(sample)
+        if collision:
+            collisions += 1
+            objA, objB = req.violationDependencies()
+            assert sample[objA].intersects(sample[objB])
+    assert 0 < collisions < 60
+    # Only the objects with random positions need updating between samples
+    randomObjects = [req.objects[i] for i in req._randomIndices]
+    assert len(randomObjects) == 3
+    assert all(isinstance(obj.position, Samplable) for obj in randomObjects)
+
+
+def test_blanket_collision_shared_geometry():
+    # Objects with identical shapes can share the same FCL geometry
+    class Obj:
+        def __init__(self, geom, x, static):
+            self.allowCollisions = False
+            self._hasStaticBounds = static
+            self.occupiedSpace = SimpleNamespace(
+                _fclData=(geom, fcl.Transform(numpy.array([x, 0, 0])))
+            )
+
+    box, otherBox = fcl.Box(1, 1, 1), fcl.Box(1, 1, 1)
+    objects = [Obj(box, 0, True), Obj(box, 10, False), Obj(box, 10.5, False)]
+    req = BlanketCollisionRequirement(objects)
+    sample = {obj: obj for obj in objects}
+    assert req.falsifiedBy(sample)
+    assert req.violationDependencies() == (objects[1], objects[2])
+
+    # Both random objects switching to another shared geometry
+    for obj in objects[1:]:
+        obj.occupiedSpace._fclData = (otherBox, obj.occupiedSpace._fclData[1])
+    objects[1].occupiedSpace._fclData[1].setTranslation(numpy.array([0.5, 0, 0]))
+    assert req.falsifiedBy(sample)
+    assert req.violationDependencies() == (objects[0], objects[1])
+
+
+def test_containment_group():
+    scenario = compileScenic(
+        """
+        workspace = Workspace(BoxRegion(dimensions=(10, 10, 10)))
+        region = BoxRegion(dimensions=(4, 4, 4))
+        for i in range(3):
+            new Object in workspace, with width Range(1, 3), with allowCollisions True
+        new Object in region, with regionContainedIn region, with allowCollisions True
+        """
+    )
+    groups = [
+        req
+        for req in scenario.defaultRequirements
+        if isinstance(req, ContainmentGroupRequirement)
+    ]
+    assert len(groups) == 1
+    (group,) = groups
+    assert group.objects == scenario.objects[:3]
+    assert group.container is scenario.workspace.region
+    singles = [
+        req
+        for req in scenario.defaultRequirements
+        if isinstance(req, ContainmentRequirement)
+    ]
+    assert [req.obj for req in singles] == [scenario.objects[3]]
+
+    # Same results and messages as the individual requirements
+    individual = [ContainmentRequirement(obj, group.container) for obj in group.objects]
+    random.seed(0)
+    violations = 0
+    for _ in range(30):
+        sample = scenario.samplingPlan.sample()
+        violated = next((req for req in individual if req.falsifiedBy(sample)), None)
+        assert group.falsifiedBy(sample) == (violated is not None)
+        if violated:
+            violations += 1
+            assert group.violationMsg == violated.violationMsg
+            assert group.violationDependencies() == (violated.obj, violated.container)
+    assert 0 < violations < 30
+
+
+def test_intersection_group():
+    scenario = compileScenic(
+        """
+        workspace = Workspace(RectangularRegion(0 @ 0, 0, 20, 20))
+        for i in range(10):
+            new Object in workspace, facing Range(0, 360) deg, with width Range(1, 3)
+        new Object in workspace, with allowCollisions Uniform(True, False)
+        """
+    )
+    groups = [
+        req
+        for req in scenario.defaultRequirements
+        if isinstance(req, IntersectionGroupRequirement)
+    ]
+    assert len(groups) == 1
+    assert not any(
+        isinstance(req, IntersectionRequirement) for req in scenario.defaultRequirements
+    )
+    (group,) = groups
+    assert group.objects == scenario.objects
+
+    # Same results and messages as the pairwise requirements
+    pairwise = [
+        IntersectionRequirement(a, b) for a, b in itertools.combinations(group.objects, 2)
+    ]
+    random.seed(0)
+    violations = 0
+    for _ in range(50):
+        sample = scenario.samplingPlan.sample()
+        violated = next((req for req in pairwise if req.falsifiedBy(sample)), None)
+        assert group.falsifiedBy(sample) == (violated is not None)
+        if violated:
+            violations += 1
+            assert group.violationMsg == violated.violationMsg
+            assert group.violationDependencies() == (violated.objA, violated.objB)
+    assert 0 < violations < 50
+
+    # Candidate pairs are exactly the pairs of overlapping spheres
+    objects = [sample[obj] for obj in scenario.objects]
+    expected = [
+        [i, j]
+        for i, j in itertools.combinations(range(len(objects)), 2)
+        if objects[i].position.distanceTo(objects[j].position)
+        <= objects[i].radius + objects[j].radius
+    ]
+    assert IntersectionGroupRequirement.candidatePairs(objects) == expected
+    assert IntersectionGroupRequirement.candidatePairs(objects[:1]) == ()
+
+
+def test_visibility_group():
+    scenario = compileScenic(
+        """
+        workspace = Workspace(RectangularRegion(0 @ 0, 0, 30, 30))
+        ego = new Object at (0, 0), with visibleDistance 12,
+            with viewAngles (120 deg, 60 deg)
+        for i in range(3):
+            new Object in RectangularRegion(0 @ 6, 0, 10, 10), with requireVisible True
+        other = new Object in workspace, with visibleDistance 5
+        new Object in workspace, with width 4, with allowCollisions True
+        new Object in workspace, visible from other
+        new Object in workspace, not visible from other
+        """
+    )
+    groups = [
+        req
+        for req in scenario.defaultRequirements
+        if isinstance(req, VisibilityGroupRequirement)
+    ]
+    assert len(groups) == 1
+    assert not any(
+        isinstance(req, VisibilityRequirement) for req in scenario.defaultRequirements
+    )
+    (group,) = groups
+    assert len(group.requirements) == 5
+    assert any(isinstance(req, NonVisibilityRequirement) for req in group.requirements)
+
+    # Same results and messages as the individual requirements
+    random.seed(0)
+    violations = 0
+    for _ in range(20):
+        sample = scenario.samplingPlan.sample()
+        violated = next(
+            (req for req in group.requirements if req.falsifiedBy(sample)), None
+        )
+        assert group.falsifiedBy(sample) == (violated is not None)
+        if violated:
+            violations += 1
+            assert group.violationMsg == violated.violationMsg
+            assert group.violationDependencies() == (violated.source, violated.target)
+    assert 0 < violations < 20
+
+
+@pickle_test
+def test_generate_batch_parallel():
+    scenario = compileScenic(
+        """
+        ego = new Object at Range(-10, 10) @ 0
+        other = new Object at Range(-10, 10) @ 0
+        require (distance to other) < 5
+        param x = Range(0, 1)
+    """
+    )
+
+    def sample(workers):
+        random.seed(42)
+        scenes, iterations = scenario.generateBatch(6, workers=workers)
+        assert iterations >= 6
+        for scene in scenes:
+            assert scene.egoObject.distanceTo(scene.objects[1]) < 5
+        return [scene.params["x"] for scene in scenes]
+
+    xs = sample(2)
+    assert len(set(xs)) == 6
+    assert sample(2) == xs
+    assert sample(3) == xs
+
+    with pytest.raises(RejectionException):
+        scenario.generateBatch(6, maxIterations=6, workers=2)
+
+
+@pickle_test
+def test_generate_parallel_stream():
+    scenario = compileScenic("ego = new Object with foo Range(0, 1)")
+    stream = scenario.generateParallel(None, 2)
+    foos = [next(stream)[0].egoObject.foo for _ in range(5)]
+    stream.close()
+    assert len(set(foos)) == 5
+
+
+@pickle_test
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="requires fork"
+)
+def test_generate_parallel_fork():
+    scenario = compileScenic("ego = new Object with foo Range(0, 1)")
+    random.seed(1)
+    forked = [scene for scene, _ in scenario.generateParallel(3, 2, context="fork")]
+    random.seed(1)
+    spawned, _ = scenario.generateBatch(3, workers=2)
+    assert [s.egoObject.foo for s in forked] == [s.egoObject.foo for s in spawned]
@@ -0,0 +1,111 @@
+import base64
+import json
+import os
+
+import pytest
+
+from scenic.core.simulation_farm import SimulationFarm
+from scenic.core.simulators import DummySimulator
+from tests.utils import compileScenic, pickle_test, sampleScene
+
+# Worker processes are spawned during testing, requiring the scenario (and the
+# simulator factories below) to be pickled.
+pytestmark = pickle_test
+
+
+def driftingSimulator(worker):
+    return DummySimulator(drift=worker + 1)
+
+
+def dummySimulator(worker):
+    return DummySimulator()
+
+
+def crash(worker):
+    os._exit(3)
+
+
+def test_results_and_replays(tmpdir):
+    scenario = compileScenic(
+        """
+        behavior Drift():
+            while True:
+                take 1
+        ego = new Object with foo Range(0, 1), with behavior Drift
+        record initial ego.foo as foo
+        record ego.position as positions
+        """
+    )
+    results = os.path.join(tmpdir, "results.jsonl")
+    replays = os.path.join(tmpdir, "replays")
+    farm = SimulationFarm(
+        scenario,
+        2,
+        simulatorFactory=driftingSimulator,
+        results=results,
+        replayDir=replays,
+        maxSteps=3,
+    )
+    metrics = farm.run(5)
+    assert (metrics.completed, metrics.rejected, metrics.failed) == (5, 0, 0)
+    assert metrics.steps == 15
+    assert metrics.throughput > 0
+    assert all(0 <= u <= 1 for u in metrics.utilization)
+    assert "5 simulations" in metrics.summary()
+
+    with open(results) as f:
+        lines = [json.loads(line) for line in f]
+    assert sorted(line["index"] for line in lines) == list(range(5))
+    for line in lines:
+        assert line["status"] == "completed"
+        assert line["terminationType"] == "timeLimit"
+        # Each worker has its own simulator
+        drift = line["worker"] + 1
+        assert line["records"]["positions"][-1] == [3, [0, 3 * drift, 0]]
+
+        scene = scenario.sceneFromBytes(base64.b64decode(line["scene"]))
+        assert scene.objects[0].foo == line["records"]["foo"]
+        with open(line["replay"], "rb") as f:
+            simulation = scenario.simulationFromBytes(
+                f.read(), DummySimulator(drift=drift), maxSteps=3
+            )
+        assert simulation.result.records["foo"] == line["records"]["foo"]
+
+    # Results are appended
+    SimulationFarm(scenario, 1, driftingSimulator, results=results, maxSteps=1).run(1)
+    with open(results) as f:
+        assert len(f.readlines()) == 6
+
+
+def test_rejections_and_failures():
+    scenario = compileScenic(
+        """
+        param mode = Discrete({0: 1, 1: 1, 2: 1})
+        behavior Foo():
+            wait
+            if globalParameters.mode == 1:
+                require False
+            elif globalParameters.mode == 2:
+                raise RuntimeError("oops")
+        ego = new Object with behavior Foo
+        """
+    )
+    scenes = [sampleScene(scenario, maxIterations=100) for _ in range(12)]
+    modes = [scene.params["mode"] for scene in scenes]
+    farm = SimulationFarm(scenario, 3, simulatorFactory=dummySimulator, maxSteps=2)
+    metrics = farm.run(scenes=scenes)
+    assert metrics.simulations == 12
+    assert metrics.completed == modes.count(0)
+    assert metrics.rejected == modes.count(1)
+    assert metrics.failed == modes.count(2)
+
+    # The count is of completed simulations
+    metrics = farm.run(2)
+    assert metrics.completed == 2
+
+
+def test_worker_crash():
+    scenario = compileScenic("ego = new Object")
+    farm = SimulationFarm(scenario, 1, simulatorFactory=crash)
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        farm.run(1)
@@ -1,6 +1,12 @@
+import pickle
+from types import SimpleNamespace
+
+import numpy
 import pytest
 
 from scenic.core.simulators import DummySimulation, DummySimulator, Simulation
+from scenic.core.trajectories import TrajectoryStore
+from scenic.core.vectors import Vector
 from tests.utils import compileScenic, sampleResultFromScene, sampleSceneFrom
 
 
@@ -94,3 +100,243 @@ def test_simulator_bad_scheduler():
     simulator = TestSimulator()
     with pytest.raises(RuntimeError):
         result = simulator.simulate(scene, maxSteps=2)
+
+
+@pytest.mark.parametrize("spill", (False, True))
+def test_trajectory_store(spill, tmp_path):
+    scenario = compileScenic(
+        """
+        scenario Main():
+            setup:
+                ego = new Object at (1, 2), facing 90 deg
+            compose:
+                do Wait() for 70 steps
+                do Spawn()
+        scenario Wait():
+            pass
+        scenario Spawn():
+            new Object at (5, 0)
+        """,
+        scenario="Main",
+    )
+    scene, _ = scenario.generate(maxIterations=1)
+    simulator = DummySimulator(drift=1)
+    trajectoryDirectory = tmp_path if spill else None
+    simulation = simulator.simulate(
+        scene, maxSteps=100, trajectoryDirectory=trajectoryDirectory
+    )
+    result = simulation.result
+    trajectory = result.trajectory
+    assert len(trajectory) == 101
+    assert trajectory[0] == (Vector(1, 2, 0),)
+    assert trajectory[69] == (Vector(1, 71, 0),)
+    assert trajectory[70] == (Vector(1, 72, 0), Vector(5, 0, 0))
+    assert trajectory[-1] == (Vector(1, 102, 0), Vector(5, 30, 0))
+    assert result.finalState == trajectory[-1]
+    assert trajectory[69:71] == (trajectory[69], trajectory[70])
+    assert isinstance(trajectory[:2], tuple)
+    assert len(tuple(trajectory)) == 101
+    # The view can be used in place of a tuple
+    assert trajectory + (None,) == tuple(trajectory) + (None,)
+    assert (None,) + trajectory == (None,) + tuple(trajectory)
+    assert hash(trajectory) == hash(tuple(trajectory))
+    assert {trajectory: 1}[tuple(trajectory)] == 1
+
+    store = result.trajectoryStore
+    assert list(store.counts[68:71]) == [1, 1, 2]
+    positions = store.array("position")
+    assert positions.shape[:2] == (101, 2)
+    assert list(positions[:, 0, 1]) == list(range(2, 103))
+    headings = store.array("heading")
+    assert headings.shape == (101, 2, 1)
+    assert headings[-1, 0, 0] == pytest.approx(1.5707963)
+    assert not store.array("velocity")[:, 0].any()
+
+    copy = pickle.loads(pickle.dumps(result))
+    assert copy.trajectory == trajectory
+    assert copy.trajectoryStore.spillDirectory is None
+
+
+@pytest.mark.parametrize("spill", (False, True))
+def test_trajectory_store_object_columns(spill, tmp_path):
+    store = TrajectoryStore(
+        ("position", "velocity", "speed"), spillDirectory=tmp_path if spill else None
+    )
+    a = SimpleNamespace(position=Vector(1, 2, 3), velocity=Vector(0, 1, 0), speed=1.0)
+    b = SimpleNamespace(position=Vector(4, 5, 6), velocity=None, speed=2.0)
+    store.record([a])
+    store.record([a, b])  # a velocity which is not a Vector
+    a.speed = None
+    store.record([a, b])  # a speed which is not a number
+
+    assert [store.vectors(step, "velocity") for step in range(3)] == [
+        (Vector(0, 1, 0),),
+        (Vector(0, 1, 0), None),
+        (Vector(0, 1, 0), None),
+    ]
+    velocities = store.array("velocity")
+    assert velocities.shape == (3, 2) and velocities[0, 1] is None
+    assert list(store.array("speed")[:, 0]) == [1.0, 1.0, None]
+    positions = store.array("position")
+    assert positions.shape[2] == 3
+    assert list(positions[2, 1]) == [4, 5, 6]
+    assert store.vectors(2) == (a.position, b.position)
+    copy = pickle.loads(pickle.dumps(store))
+    assert [copy.vectors(step, "velocity") for step in range(3)] == [
+        store.vectors(step, "velocity") for step in range(3)
+    ]
+
+    # Properties without numeric values from the start
+    store = TrajectoryStore(("position", "velocity"))
+    store.record([])
+    store.record([b])
+    store.record([a, b])
+    assert list(store.array("velocity")[2]) == [Vector(0, 1, 0), None]
+    assert store.vectors(0, "velocity") == ()
+    assert store.vectors(2) == (a.position, b.position)
+
+
+def test_trajectory_non_numeric_property():
+    class TestSimulation(DummySimulation):
+        trajectoryProperties = DummySimulation.trajectoryProperties + ("mode",)
+
+    class TestSimulator(DummySimulator):
+        def createSimulation(self, scene, **kwargs):
+            return TestSimulation(scene, **kwargs)
+
+    scene = sampleSceneFrom(
+        """
+        ego = new Object at (1, 2), with mode None
+        other = new Object at (5, 5), with mode "fast"
+        """
+    )
+    result = TestSimulator().simulate(scene, maxSteps=2).result
+    assert result.trajectory[-1] == (Vector(1, 2, 0), Vector(5, 5, 0))
+    modes = result.trajectoryStore.array("mode")
+    assert modes.shape == (3, 2)
+    assert list(modes[:, 0]) == [None, None, None]
+    assert list(modes[:, 1]) == ["fast", "fast", "fast"]
+
+
+def test_trajectory_custom_state():
+    class TestSimulation(DummySimulation):
+        def currentState(self):
+            return self.currentTime
+
+    class TestSimulator(DummySimulator):
+        def createSimulation(self, scene, **kwargs):
+            return TestSimulation(scene, **kwargs)
+
+    scene = sampleSceneFrom("ego = new Object")
+    result = TestSimulator().simulate(scene, maxSteps=3).result
+    assert result.trajectory == (0, 1, 2, 3)
+    assert result.trajectoryStore is None
+
+
+def test_properties_batch():
+    class TestSimulation(DummySimulation):
+        batches = []
+        plans = 0
+
+        def _propertyPlan(self, obj):
+            TestSimulation.plans += 1
+            return super()._propertyPlan(obj)
+
+        def getProperties(self, obj, properties):
+            assert False, "getProperties should not be called"
+
+        def getPropertiesBatch(self, objects):
+            self.batches.append(len(objects))
+            values = super().getPropertiesBatch(objects)
+            values["position"] = numpy.array([(i, self.currentTime, 0) for i in range(2)])
+            values["speed"] = numpy.arange(len(objects))
+            return values
+
+    class TestSimulator(DummySimulator):
+        def createSimulation(self, scene, **kwargs):
+            return TestSimulation(scene, **kwargs)
+
+    scene = sampleSceneFrom(
+        """
+        ego = new Object at (5, 5)
+        other = new Object at (10, 0)
+        record final other.speed as speed
+        """
+    )
+    result = TestSimulator().simulate(scene, maxSteps=2).result
+    assert result.trajectory[-1] == (Vector(0, 2, 0), Vector(1, 2, 0))
+    assert TestSimulation.batches == [2, 2, 2]
+    assert TestSimulation.plans == 2  # computed once per object, not every step
+    assert result.records["speed"] == 1
+    assert type(result.records["speed"]) is float
+
+
+def test_properties_types_per_object():
+    class TestSimulation(DummySimulation):
+        batches = []
+
+        def getPropertiesBatch(self, objects):
+            self.batches.append(len(objects))
+            values = super().getPropertiesBatch(objects)
+            values["foo"] = [obj.foo for obj in objects]
+            return values
+
+    class TestSimulator(DummySimulator):
+        def createSimulation(self, scene, **kwargs):
+            return TestSimulation(scene, **kwargs)
+
+    scene = sampleSceneFrom(
+        """
+        class TestObj:
+            foo[dynamic]: None
+
+        ego = new TestObj at (5, 5), with foo 1.5
+        other = new TestObj at (10, 0)
+        record final ego.foo as egoFoo
+        record final other.foo as otherFoo
+        """
+    )
+    simulation = TestSimulator().simulate(scene, maxSteps=2)
+    assert simulation.result.records["egoFoo"] == 1.5
+    assert simulation.result.records["otherFoo"] is None
+    assert TestSimulation.batches == [2, 1, 1, 1, 1]
+    assert simulation._batchGroups == {
+        simulation._objectPlans[0]: [0],
+        simulation._objectPlans[1]: [1],
+    }
+
+
+def test_properties_batch_bad_type():
+    class TestSimulation(DummySimulation):
+        def getPropertiesBatch(self, objects):
+            values = super().getPropertiesBatch(objects)
+            values["speed"] = ["fast"] * len(objects)
+            return values
+
+    class TestSimulator(DummySimulator):
+        def createSimulation(self, scene, **kwargs):
+            return TestSimulation(scene, **kwargs)
+
+    scene = sampleSceneFrom("ego = new Object")
+    with pytest.raises(RuntimeError) as e:
+        TestSimulator().simulate(scene, maxSteps=1)
+    assert 'property "speed" with type str' in str(e)
+
+
+def test_properties_batch_fallback():
+    class TestSimulation(DummySimulation):
+        def getProperties(self, obj, properties):
+            values = super().getProperties(obj, properties)
+            values["position"] += Vector(0, 1)
+            return values
+
+        def getPropertiesBatch(self, objects):
+            return None
+
+    class TestSimulator(DummySimulator):
+        def createSimulation(self, scene, **kwargs):
+            return TestSimulation(scene, **kwargs)
+
+    scene = sampleSceneFrom("ego = new Object")
+    simulation = TestSimulator().simulate(scene, maxSteps=2)
+    assert simulation.result.trajectory[-1] == (Vector(0, 3, 0),)
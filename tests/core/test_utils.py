@@ -4,7 +4,7 @@ import numpy
 import pytest
 import trimesh
 
-from scenic.core.utils import repairMesh, unifyMesh
+from scenic.core.utils import AliasTable, repairMesh, unifyMesh
 
 
 @pytest.mark.slow
@@ -60,3 +60,18 @@ def test_unify_mesh():
     fixed_mesh = unifyMesh(bad_mesh)
     assert fixed_mesh.is_volume
     assert fixed_mesh.body_count == 3
+
+
+def test_alias_table():
+    weights = [1, 0, 3, 2, 0.5, 3.5]
+    table = AliasTable(weights)
+    assert len(table) == len(weights)
+    numpy.random.seed(0)
+    draws = table.sample(100_000)
+    frequencies = numpy.bincount(draws, minlength=len(weights)) / len(draws)
+    assert frequencies == pytest.approx(numpy.array(weights) / sum(weights), abs=0.01)
+    assert frequencies[1] == 0
+
+    for bad in ([], [0, 0], [1, -1]):
+        with pytest.raises(ValueError):
+            AliasTable(bad)
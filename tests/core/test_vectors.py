@@ -1,4 +1,6 @@
+import numpy
 import pytest
+from scipy.spatial.transform import Rotation
 
 from scenic.core.distributions import Options, underlyingFunction
 from scenic.core.lazy_eval import (
@@ -52,6 +54,66 @@ def test_orientation_localAnglesFor():
         assert target.approxEq(parent * local)
 
 
+def randomAngles():
+    return [random.uniform(-math.pi, math.pi) for _ in range(3)]
+
+
+@pytest.mark.filterwarnings("ignore:Gimbal lock")
+@pytest.mark.parametrize(
+    "angles",
+    [
+        (0, 0, 0),
+        (math.pi, 0, 0),
+        (-math.pi, 0, 0),
+        (0.3, math.pi / 2, 0.2),
+        (0.3, -math.pi / 2, 0.2),
+        (1, 2, 3),
+    ],
+)
+def test_orientation_matches_scipy_special(angles):
+    o = Orientation.fromEuler(*angles)
+    r = Rotation.from_euler("ZXY", angles)
+    assert o.q == pytest.approx(r.as_quat())
+    assert o.eulerAngles == pytest.approx(r.as_euler("ZXY"), abs=1e-9)
+
+
+def test_orientation_matches_scipy():
+    for i in range(100):
+        angles = randomAngles()
+        o = Orientation.fromEuler(*angles)
+        r = Rotation.from_euler("ZXY", angles)
+        assert o.q == pytest.approx(r.as_quat())
+        assert o.eulerAngles == pytest.approx(r.as_euler("ZXY"))
+        assert o.inverse.q == pytest.approx(r.inv().as_quat())
+
+        heading = angles[0]
+        h = Orientation._fromHeading(heading)
+        assert h.q == pytest.approx(Rotation.from_rotvec([0, 0, heading]).as_quat())
+
+        otherAngles = randomAngles()
+        other = Orientation.fromEuler(*otherAngles)
+        otherR = Rotation.from_euler("ZXY", otherAngles)
+        assert (o * other).q == pytest.approx((r * otherR).as_quat())
+        local = o.localAnglesFor(other)
+        assert local == pytest.approx((r.inv() * otherR).as_euler("ZXY"))
+
+        v = Vector(*[random.uniform(-10, 10) for _ in range(3)])
+        assert v.rotatedBy(o) == pytest.approx(tuple(r.apply(v)))
+        offset = Vector(*[random.uniform(-10, 10) for _ in range(3)])
+        expected = tuple(numpy.array(v) + r.apply(offset))
+        assert v.offsetLocally(o, offset) == pytest.approx(expected)
+
+
+def test_orientation_rotation_roundtrip():
+    r = Rotation.from_euler("ZXY", randomAngles())
+    o = Orientation(r)
+    assert o.r is r
+    assert tuple(o.q) == tuple(r.as_quat())
+    o2 = Orientation.fromEuler(*randomAngles())
+    assert Orientation(o2.r) == o2
+    assert o2.getRotation().as_quat() == pytest.approx(o2.q)
+
+
 def test_distribution_method_encapsulation():
     vf = VectorField("Foo", lambda pos: 0)
     pt = vf.followFrom(Vector(0, 0), Options([1, 2]), steps=1)
@@ -0,0 +1,127 @@
+import random
+
+import pytest
+
+from scenic.core.vectors import Vector
+from scenic.core.visibility import VisibilityEngine
+from tests.utils import compileScenic, sampleScene
+
+
+def visibilityQueries(objects):
+    queries = []
+    for viewer in objects:
+        for target in objects:
+            if target is viewer:
+                continue
+            occluders = tuple(obj for obj in objects if obj not in (viewer, target))
+            queries.append((viewer, target, occluders))
+            queries.append((viewer, target.position, occluders))
+    return queries
+
+
+@pytest.mark.parametrize("rayDensity", (1, 4))
+def test_engine_matches_canSee(rayDensity):
+    scenario = compileScenic(
+        f"""
+        workspace = Workspace(RectangularRegion((0, 0), 0, 24, 24))
+        for i in range(4):
+            new Object in workspace, facing Range(0, 360) deg,
+                with viewRayDensity {rayDensity}, with visibleDistance 15,
+                with width Range(0.5, 3), with length Range(0.5, 3),
+                with height Range(0.5, 3)
+        for i in range(2):
+            new Object in workspace, with shape SpheroidShape(),
+                with viewRayDensity {rayDensity}, with viewAngles (60 deg, 40 deg)
+        new OrientedPoint in workspace, with viewRayDensity {rayDensity}
+        new Point in workspace, with viewRayDensity {rayDensity}
+        """
+    )
+    random.seed(0)
+    for _ in range(2):
+        scene = sampleScene(scenario, maxIterations=100)
+        objects = scene.objects
+        queries = visibilityQueries(objects)
+        queries += [(scene.objects[0], Vector(1, 2, 0), ()), (objects[1], objects[2], ())]
+        expected = [
+            viewer.canSee(target, occludingObjects=occ) for viewer, target, occ in queries
+        ]
+        assert VisibilityEngine().canSee(queries) == expected
+        assert any(expected) and not all(expected)
+
+
+def test_engine_occluders_near_visible_distance():
+    # Occluders around the visible distance of the viewers, some of which canSee
+    # filters out before casting any rays.
+    scenario = compileScenic(
+        """
+        ego = new Object at (0, 0), with visibleDistance 10, with viewRayDensity 2,
+            with allowCollisions True, with requireVisible False
+        for i in range(6):
+            new Object at Vector(0, Range(8, 12)).rotatedBy(Range(-40, 40) deg),
+                facing Range(0, 360) deg, with visibleDistance Range(6, 12),
+                with viewRayDensity 2,
+                with width Range(0.5, 3), with length Range(0.5, 3),
+                with allowCollisions True, with requireVisible False
+        """
+    )
+    random.seed(1)
+    for _ in range(3):
+        scene = sampleScene(scenario, maxIterations=100)
+        queries = visibilityQueries(scene.objects)
+        expected = [
+            viewer.canSee(target, occludingObjects=occ) for viewer, target, occ in queries
+        ]
+        assert VisibilityEngine().canSee(queries) == expected
+        assert any(expected) and not all(expected)
+
+
+def test_engine_occlusion():
+    scene = sampleScene(
+        compileScenic(
+            """
+            ego = new Object at (0, 0), with visibleDistance 20,
+                with viewAngles (90 deg, 60 deg)
+            wall = new Object at (0, 5), with width 10, with length 0.5, with height 5
+            hidden = new Object at (0, 10)
+            seen = new Object at (-1, 3)
+            ball = new Object at (0.9, 2.5, 0.9), with shape SpheroidShape(),
+                with width 2, with length 2, with height 2
+            """
+        )
+    )
+    ego, wall, hidden, seen, ball = scene.objects
+    engine = VisibilityEngine()
+    results = engine.canSee(
+        [
+            (ego, hidden, (wall,)),
+            (ego, hidden, ()),
+            (ego, hidden.position, (wall,)),
+            (ego, seen, (wall, hidden)),
+            (ego, Vector(0, 30), ()),  # too far away
+            (ego, Vector(0, -2), ()),  # behind the viewer
+            (ego, Vector(0, 4), (ball,)),  # passes through the ball's bounding box
+        ]
+    )
+    assert results == [False, True, False, True, False, False, True]
+    assert engine.canSee([]) == []
+
+
+def test_engine_2d():
+    scenario = compileScenic(
+        """
+        workspace = Workspace(RectangularRegion((0, 0), 0, 30, 30))
+        for i in range(5):
+            new Object in workspace, facing Range(0, 360) deg, with visibleDistance 10,
+                with requireVisible False
+        """,
+        mode2D=True,
+    )
+    random.seed(0)
+    scene = sampleScene(scenario, maxIterations=100)
+    queries = visibilityQueries(scene.objects)
+    queries += [(viewer, target, ()) for viewer, target, _ in queries]
+    expected = [
+        viewer.canSee(target, occludingObjects=occ) for viewer, target, occ in queries
+    ]
+    assert VisibilityEngine().canSee(queries) == expected
+    assert any(expected) and not all(expected)
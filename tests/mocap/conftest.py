@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The mocap tools are standalone scripts rather than part of the scenic
+# package, so make them importable for these tests.
+mocapDir = os.path.join(os.path.dirname(__file__), "..", "..", "mocap")
+sys.path.insert(0, os.path.abspath(mocapDir))
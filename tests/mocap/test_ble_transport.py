@@ -0,0 +1,119 @@
+import time
+
+from ble_transport import BleTransport, encode_legacy
+from fake_gatt import FakeGattServer
+import pytest
+
+
+def make_transport(server, robots, **kwargs):
+    kwargs.setdefault("backoff_initial", 0.01)
+    return BleTransport(robots, client_factory=server.client_factory, **kwargs)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_latest_value_wins():
+    server = FakeGattServer(write_delay=0.02)
+    transport = make_transport(server, {1: "AA"})
+    transport.start()
+    wait_for(lambda: transport.stats()[1].connected)
+    payloads = [bytes([i]) for i in range(50)]
+    for payload in payloads:
+        transport.submit(1, payload)
+    assert transport.wait_idle(timeout=2)
+    received = server.received("AA")
+    stats = transport.stats()[1]
+    transport.close()
+
+    assert received[-1] == payloads[-1]
+    assert received == sorted(received)  # never delivered out of order
+    assert len(received) < 5
+    assert stats.sent == len(received)
+    assert stats.sent + stats.dropped == len(payloads)
+    assert 0 < stats.mean_latency <= stats.max_latency
+
+
+def test_slow_robot_does_not_delay_others():
+    server = FakeGattServer()
+    transport = make_transport(server, {1: "AA", 2: "BB"})
+    transport.start()
+    wait_for(lambda: all(s.connected for s in transport.stats().values()))
+    server.write_delay = 0.2
+    transport.submit(1, b"slow")
+    time.sleep(0.01)
+    server.write_delay = 0.0
+    for i in range(10):
+        transport.submit(2, bytes([i]))
+        wait_for(lambda: not transport.busy(2), timeout=0.1)
+    assert server.received("BB") == [bytes([i]) for i in range(10)]
+    assert transport.busy(1)
+    transport.close()
+
+
+def test_reconnect_with_backoff():
+    server = FakeGattServer()
+    server.refuse_connections["AA"] = 3
+    transport = make_transport(server, {1: "AA"})
+    transport.submit(1, b"first")
+    transport.start()
+    assert transport.wait_idle(timeout=2)
+    assert server.received("AA") == [b"first"]
+    assert server.connect_attempts["AA"] == 4
+    assert transport.stats()[1].reconnects == 3
+
+    # Losing the link: the newest setpoint is delivered after reconnecting
+    server.connect_delay = 0.05
+    server.drop_link("AA")
+    transport.submit(1, b"stale")
+    transport.submit(1, b"fresh")
+    assert transport.wait_idle(timeout=2)
+    assert server.received("AA") == [b"first", b"fresh"]
+    stats = transport.stats()[1]
+    assert stats.connected
+    assert stats.reconnects == 4
+    transport.close()
+    assert not server.clients
+
+
+def test_write_timeout_reconnects():
+    server = FakeGattServer(write_delay=0.5)
+    transport = make_transport(server, {1: "AA"}, write_timeout=0.05)
+    transport.start()
+    transport.submit(1, b"x")
+    wait_for(lambda: transport.stats()[1].failed >= 1)
+    server.write_delay = 0.0
+    assert transport.wait_idle(timeout=2)
+    assert server.received("AA") == [b"x"]
+    transport.close()
+
+
+def test_realrobot_transport_interface():
+    server = FakeGattServer()
+    transport = make_transport(server, {1: "AA", 2: "BB"}, encoder=encode_legacy)
+    with pytest.raises(KeyError):
+        transport.connect([1, 3])
+    transport.connect([1, 2])
+    transport.send({1: (50, 50), 2: (-20, -20)})
+    assert transport.wait_idle(timeout=2)
+    transport.send({1: (50, -10)})
+    assert transport.wait_idle(timeout=2)
+    transport.close()
+    assert server.received("AA") == [b"F", b"S"]
+    assert server.received("BB") == [b"B"]
+    assert encode_legacy(0, 0) == b"S"
+
+
+def test_close_flushes_pending():
+    server = FakeGattServer(write_delay=0.02)
+    transport = make_transport(server, {1: "AA"})
+    transport.start()
+    wait_for(lambda: transport.stats()[1].connected)
+    transport.submit(1, b"F")
+    transport.submit(1, b"S")
+    transport.close()
+    assert server.received("AA")[-1] == b"S"
@@ -0,0 +1,136 @@
+from PythonClient import FastDecoder
+from PythonClient.NatNetClient import NatNetClient
+import numpy as np
+import pytest
+
+BODIES = [
+    (3, (0.5, -1.25, 0.02), (0.0, 0.0, 0.3826834, 0.9238795), 0.001, True),
+    (8, (-1.0, 2.0, 0.03), (0.0, 0.0, 0.0, 1.0), 0.002, False),
+    (15, (0.25, 0.75, 0.0), (0.1, 0.2, 0.3, 0.9273618), 0.0, True),
+]
+
+EXTRAS = dict(
+    marker_sets=[("pololu", [(0.1, 0.2, 0.3), (0.4, 0.5, 0.6)]), ("all", [])],
+    legacy_markers=[(1.0, 2.0, 3.0)],
+    skeletons=[(1, [(65537, (1, 1, 1), (0, 0, 0, 1), 0.0, True)])],
+    labeled_markers=[(7, (0.0, 1.0, 2.0), 0.01), (9, (3.0, 4.0, 5.0), 0.02)],
+    force_plates=[(1, [[1.0, 2.0, 3.0], [4.0]])],
+    devices=[(2, [[5.0, 6.0]])],
+    timestamp=12.5,
+)
+
+
+def legacyRigidBodies(packet, major, minor):
+    client = NatNetClient()
+    client._NatNetClient__nat_net_requested_version = [major, minor, 0, 0]
+    frames = []
+    client.new_frame_with_data_listener = frames.append
+    client._NatNetClient__process_message(packet)
+    (frame,) = frames
+    bodies = frame["mocap_data"].rigid_body_data.rigid_body_list
+    return frame, bodies
+
+
+@pytest.mark.parametrize("major,minor", [(3, 1), (4, 0), (4, 1), (4, 2)])
+def test_matches_legacy_decoder(major, minor):
+    packet = FastDecoder.pack_frame_of_data(42, BODIES, major, minor, **EXTRAS)
+    frame, expected = legacyRigidBodies(packet, major, minor)
+
+    decoder = FastDecoder.RigidBodyFrameDecoder()
+    bodies = decoder.decode(packet, major, minor)
+    assert decoder.frame_number == frame["frame_number"] == 42
+    assert decoder.timestamp == frame["timestamp"] == 12.5
+    assert len(bodies) == len(expected) == 3
+    for row, rb in zip(bodies, expected):
+        assert row["id"] == rb.id_num
+        assert tuple(row["pos"]) == pytest.approx(rb.pos)
+        assert tuple(row["quat"]) == pytest.approx(rb.rot)
+        assert row["error"] == pytest.approx(rb.error)
+        assert row["valid"] == rb.tracking_valid
+
+
+@pytest.mark.parametrize("major,minor", [(3, 1), (4, 0), (4, 1), (4, 2)])
+def test_suffix_matches_legacy_decoder(major, minor):
+    packet = FastDecoder.pack_frame_of_data(
+        42,
+        BODIES,
+        major,
+        minor,
+        stamps=(1001, 1002, 1003),
+        prec_timestamp=(1700000000, 123456789),
+        params=0x3,
+        **EXTRAS,
+    )
+    frame, _ = legacyRigidBodies(packet, major, minor)
+    suffix = frame["mocap_data"].suffix_data
+    assert suffix.param == 0x3 and suffix.is_recording
+
+    decoder = FastDecoder.RigidBodyFrameDecoder()
+    decoder.decode(packet, major, minor)
+    assert decoder.timestamp == suffix.timestamp == 12.5
+    assert decoder.stamp_camera_mid_exposure == suffix.stamp_camera_mid_exposure
+    assert decoder.stamp_data_received == suffix.stamp_data_received
+    assert decoder.stamp_transmit == suffix.stamp_transmit
+    assert decoder.frame_params == suffix.param
+    if FastDecoder.has_size_fields(major, minor):
+        assert decoder.prec_timestamp_secs == suffix.prec_timestamp_secs
+        assert decoder.prec_timestamp_frac_secs == suffix.prec_timestamp_frac_secs
+        assert suffix.prec_timestamp_secs == 1700000000
+
+
+def test_output_array_is_reused():
+    decoder = FastDecoder.RigidBodyFrameDecoder(max_rigid_bodies=4)
+    storage = decoder.rigid_bodies
+    decoder.decode(FastDecoder.pack_frame_of_data(1, BODIES), 4, 1)
+    bodies = decoder.decode(FastDecoder.pack_frame_of_data(2, BODIES[:1]), 4, 1)
+    assert decoder.rigid_bodies is storage
+    assert len(bodies) == 1 and bodies.base is storage
+    assert bodies[0]["id"] == 3
+
+
+def test_capacity_grows():
+    many = [(i, (i, 0, 0), (0, 0, 0, 1), 0.0, True) for i in range(10)]
+    decoder = FastDecoder.RigidBodyFrameDecoder(max_rigid_bodies=4)
+    bodies = decoder.decode(FastDecoder.pack_frame_of_data(1, many), 4, 1)
+    assert len(decoder.rigid_bodies) >= 10
+    assert np.array_equal(bodies["id"], np.arange(10))
+    assert np.array_equal(bodies["pos"][:, 0], np.arange(10))
+
+
+def test_non_frame_packets_ignored():
+    decoder = FastDecoder.RigidBodyFrameDecoder()
+    assert decoder.decode(b"\x01\x00\x00\x00", 4, 1) is None
+    with pytest.raises(ValueError):
+        decoder.decode(FastDecoder.pack_frame_of_data(1, BODIES), 2, 9)
+
+
+def test_client_fast_path_listeners():
+    client = NatNetClient()
+    client._NatNetClient__nat_net_requested_version = [4, 1, 0, 0]
+    client.set_use_fast_decoder(True)
+    frames, calls = [], []
+    client.rigid_body_frame_listener = lambda n, t, rbs: frames.append((n, t, rbs.copy()))
+    client.rigid_body_listener = lambda *args: calls.append(args)
+    client.new_frame_with_data_listener = lambda data: pytest.fail("legacy path used")
+    client._NatNetClient__process_message(
+        FastDecoder.pack_frame_of_data(5, BODIES, **EXTRAS)
+    )
+    ((number, timestamp, rbs),) = frames
+    assert (number, timestamp) == (5, 12.5)
+    assert list(rbs["id"]) == [3, 8, 15]
+    assert [call[0] for call in calls] == [3, 8, 15]
+    assert calls[0][1] == pytest.approx(BODIES[0][1])
+    assert calls[0][2] == pytest.approx(BODIES[0][2])
+
+
+def test_packet_recording_round_trip(tmp_path):
+    from PythonClient import PacketRecording
+
+    packets = [FastDecoder.pack_frame_of_data(i, BODIES) for i in range(3)]
+    path = tmp_path / "session.natnet"
+    recorder = PacketRecording.PacketRecorder(path)
+    for packet in packets:
+        recorder(packet)
+    recorder.close()
+    assert recorder.packet_count == 3
+    assert [p for _, p in PacketRecording.read_packets(path)] == packets
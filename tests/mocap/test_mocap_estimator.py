@@ -0,0 +1,124 @@
+import threading
+
+from PythonClient import FastDecoder
+from mocap_estimator import HISTORY_DTYPE, MultiMocapEstimator, PoseHistory, slerp
+import numpy as np
+import pytest
+from scipy.spatial.transform import Rotation, Slerp
+
+
+def frame(*bodies):
+    rows = np.zeros(len(bodies), dtype=FastDecoder.RIGID_BODY_DTYPE)
+    for row, (body_id, pos, quat, valid) in zip(rows, bodies):
+        row["id"], row["pos"], row["quat"], row["valid"] = body_id, pos, quat, valid
+    return rows
+
+
+def yaw(angle):
+    return Rotation.from_euler("z", angle).as_quat()
+
+
+def test_ring_buffer_wraps():
+    history = PoseHistory(size=4)
+    assert history.latest() is None
+    for i in range(10):
+        history.append(i, i / 10, 0.0, (i, 0, 0), (0, 0, 0, 1))
+    assert history.latest()["frame"] == 9
+    last = history.last(10)
+    assert last.dtype == HISTORY_DTYPE
+    assert list(last["frame"]) == [7, 8, 9]  # one slot is kept free for the writer
+    assert list(history.last(2)["frame"]) == [8, 9]
+
+
+def test_tracks_multiple_bodies():
+    est = MultiMocapEstimator(target_ids=[1, 2], start=False)
+    est.on_frame(
+        10,
+        1.0,
+        frame(
+            (1, (1, 2, 3), yaw(0), True),
+            (2, (4, 5, 6), yaw(0), True),
+            (3, (7, 8, 9), yaw(0), True),
+        ),
+    )
+    est.on_frame(
+        11, 1.1, frame((1, (1.5, 2, 3), yaw(0), True), (2, (9, 9, 9), yaw(0), False))
+    )
+    assert est.ids() == [1, 2]
+    assert est.get_pose(1).x == 1.5
+    assert est.get_pose(2).x == 4  # invalid sample ignored
+    assert est.get_pose(3) is None
+    history = est.get_history(1, 5)
+    assert list(history["frame"]) == [10, 11]
+    assert list(history["timestamp"]) == [1.0, 1.1]
+    assert len(est.get_history(42, 5)) == 0
+
+
+def test_get_pose_at_interpolates():
+    est = MultiMocapEstimator(start=False)
+    est.on_frame(0, 0.0, frame((1, (0, 0, 0), yaw(0), True)))
+    est.on_frame(1, 1.0, frame((1, (1, 2, 0), yaw(1.0), True)))
+
+    pose = est.get_pose_at(1, 0.25)
+    assert (pose.x, pose.y) == pytest.approx((0.25, 0.5))
+    assert pose.get_euler_zyx()[0] == pytest.approx(0.25)
+
+    expected = Slerp([0, 1], Rotation.from_quat([yaw(0), yaw(1.0)]))([0.7]).as_quat()[0]
+    assert slerp(yaw(0), yaw(1.0), 0.7) == pytest.approx(expected)
+
+    # Clamped before the history, extrapolated (boundedly) after it
+    assert est.get_pose_at(1, -5).x == 0
+    assert est.get_pose_at(1, 1.02, max_extrapolation=0.05).x == pytest.approx(1.02)
+    assert est.get_pose_at(1, 9, max_extrapolation=0.05).x == pytest.approx(1.05)
+
+
+def test_slerp_short_path():
+    q = slerp(yaw(0.1), -yaw(0.3), 0.5)
+    assert Rotation.from_quat(q).as_euler("zyx")[0] == pytest.approx(0.2)
+
+
+def test_concurrent_reads_are_consistent():
+    # Every sample has x == frame, so a torn read would show up as a mismatch.
+    history = PoseHistory(size=8)
+    done = threading.Event()
+
+    def writer():
+        for i in range(20000):
+            history.append(i, float(i), 0.0, (i, 0, 0), (0, 0, 0, 1))
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    while not done.is_set():
+        samples = history.last(4)
+        assert np.array_equal(samples["frame"], samples["pose"][:, 0])
+        assert np.all(np.diff(samples["frame"]) == 1)
+    thread.join()
+
+
+def test_replay_recording(tmp_path):
+    from PythonClient import PacketRecording
+
+    path = tmp_path / "session.natnet"
+    packets = [
+        FastDecoder.pack_frame_of_data(
+            i, [(1, (i, 0, 0), yaw(0), 0.0, True)], timestamp=i / 100
+        )
+        for i in range(5)
+    ]
+    PacketRecording.write_packets(path, packets, period=0.01)
+
+    est = MultiMocapEstimator(start=False)
+    replayer = PacketRecording.PacketReplayer(path, est.on_frame, speed=None)
+    replayer.run()
+    assert replayer.frame_count == 5
+    assert est.get_pose(1).x == 4
+    assert list(est.get_history(1, 5)["frame"]) == [0, 1, 2, 3, 4]
+
+    # Real-time replay on a background thread
+    est = MultiMocapEstimator(start=False)
+    replayer = PacketRecording.PacketReplayer(path, est.on_frame)
+    replayer.start()
+    replayer.thread.join(timeout=5)
+    replayer.stop()
+    assert est.get_pose(1).x == 4
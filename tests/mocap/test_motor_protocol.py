@@ -0,0 +1,123 @@
+import random
+import time
+
+from ble_transport import BleTransport
+from fake_gatt import FakeGattServer
+import motor_protocol as mp
+import pytest
+
+
+def test_round_trip():
+    frame = mp.encode(7, 12.34, -100, duration=0.25, resync=True)
+    assert len(frame) == mp.FRAME_SIZE_WITH_DURATION
+    assert mp.decode(frame) == mp.Setpoint(7, 12.34, -100, 0.25, True)
+
+    frame = mp.encode(0x1FFFF, 250, -250)  # wraps and saturates
+    assert len(frame) == mp.FRAME_SIZE
+    assert mp.decode(frame) == mp.Setpoint(0xFFFF, 100, -100)
+
+
+def test_crc_detects_corruption():
+    frame = bytearray(mp.encode(1, 50, 50))
+    assert mp.crc16(b"123456789") == 0x29B1  # CRC-16/CCITT-FALSE check value
+    for i in range(1, len(frame)):
+        corrupted = bytearray(frame)
+        corrupted[i] ^= 0x10
+        with pytest.raises(ValueError):
+            mp.decode(bytes(corrupted))
+
+
+def test_batch_fits_ble_writes():
+    encoder = mp.SetpointEncoder()
+    batch = encoder.encode_batch([(10, 20), (30, 40, 1.5), (-5, 5)])
+    writes = mp.split_writes(batch)
+    assert all(len(write) <= mp.MAX_WRITE_SIZE for write in writes)
+    assert b"".join(writes) == batch
+    parser = mp.FrameParser()
+    setpoints = [sp for write in writes for sp in parser.feed(write)]
+    assert [(sp.seq, sp.left, sp.right, sp.duration) for sp in setpoints] == [
+        (0, 10, 20, None),
+        (1, 30, 40, 1.5),
+        (2, -5, 5, None),
+    ]
+    assert [sp.resync for sp in setpoints] == [True, False, False]
+
+
+def test_parser_resynchronizes():
+    encoder = mp.SetpointEncoder()
+    good = [encoder(i, -i) for i in range(5)]
+    corrupted = bytearray(good[1])
+    corrupted[5] ^= 0xFF
+    stream = (
+        b"\x00S" + good[0] + bytes(corrupted) + b"S\xa5" + good[2] + good[2] + good[3]
+    )
+    parser = mp.FrameParser()
+    out = []
+    for i in range(0, len(stream), 3):  # arbitrary fragmentation
+        out += parser.feed(stream[i : i + 3])
+    out += parser.feed(good[4])
+    # Legacy commands are only accepted until the first valid frame
+    assert out[0] == "S" and out[1].seq == 0
+    assert out.count("S") == 1
+    assert [sp.seq for sp in out if isinstance(sp, mp.Setpoint)] == [0, 2, 3, 4]
+    assert parser.crc_errors >= 1
+    assert parser.stale == 1  # the duplicated frame
+
+    # A new session is accepted even though its numbers went backwards
+    parser.feed(mp.SetpointEncoder()(1, 1))
+    assert parser.last_seq == 0
+
+
+def test_corrupted_frames_give_no_commands():
+    rng = random.Random(0)
+    frames = [mp.encode(1, 0.70, 0.0)]  # contains a legacy "F" byte
+    frames += [
+        mp.encode(
+            rng.randrange(0x10000),
+            rng.uniform(-100, 100),
+            rng.uniform(-100, 100),
+            rng.choice((None, rng.uniform(0, 60))),
+            rng.random() < 0.5,
+        )
+        for _ in range(200)
+    ]
+    for frame in frames:
+        for i in range(1, len(frame)):
+            corrupted = bytearray(frame)
+            corrupted[i] ^= rng.randrange(1, 0x100)
+            parser = mp.FrameParser()
+            assert parser.feed(bytes(corrupted)) == []
+            # The next valid frame is still found
+            good = mp.encode(2, 10, 20)
+            assert parser.feed(good) == [mp.decode(good)]
+            assert parser.feed(b"F") == []
+
+
+def test_loopback_throughput():
+    # Every frame sent through the transport must come out of the robot-side
+    # parser unchanged, as long as the producer waits for each write.
+    parsed = []
+    parser = mp.FrameParser()
+    server = FakeGattServer(
+        on_write=lambda address, data: parsed.extend(parser.feed(data))
+    )
+    transport = BleTransport({1: "AA"}, client_factory=server.client_factory)
+    transport.start()
+    rng = random.Random(0)
+    commands = [(rng.uniform(-100, 100), rng.uniform(-100, 100)) for _ in range(500)]
+    start = time.monotonic()
+    for left, right in commands:
+        transport.send({1: (left, right)})
+        while transport.busy(1):
+            pass
+    elapsed = time.monotonic() - start
+    transport.close()
+
+    assert len(parsed) == len(commands)
+    for setpoint, (left, right) in zip(parsed, commands):
+        assert setpoint.left == pytest.approx(left, abs=0.005)
+        assert setpoint.right == pytest.approx(right, abs=0.005)
+    assert [sp.seq for sp in parsed] == list(range(len(commands)))
+    assert transport.stats()[1].dropped == 0
+    # Far above what a real HM-10 link can carry (~100 frames/s at 9600 baud)
+    assert len(commands) / elapsed > 500
@@ -0,0 +1,103 @@
+import math
+
+import pytest
+
+from scenic.core.vectors import Vector
+from scenic.simulators.diffdrive import DiffDriveSimulator
+from tests.utils import compileScenic, sampleScene
+
+
+def driveScene(left, right, params={}):
+    scenario = compileScenic(
+        f"""
+        model scenic.simulators.diffdrive.model
+        behavior Drive():
+            while True:
+                take SetMotorAction({left}, {right})
+        ego = new PololuRobot at (1, 2), facing 0 deg,
+            with behavior Drive()
+        record final (ego.position, ego.heading, ego.speed, ego.velocity,
+                      ego.angularVelocity) as state
+        """,
+        mode2D=True,
+        params=params,
+    )
+    return scenario, sampleScene(scenario)
+
+
+def test_straight_and_spin():
+    _, scene = driveScene(50, 50)
+    simulator = DiffDriveSimulator(maxWheelSpeed=1.0)
+    simulation = simulator.simulate(scene, maxSteps=20, timestep=0.05)
+    position, heading, speed, velocity, _ = simulation.result.records["state"]
+    # Actions are applied before each step, so the robot drove for 20 steps
+    assert tuple(position) == pytest.approx((1, 2.5, 0))
+    assert heading == pytest.approx(0)
+    assert speed == pytest.approx(0.5)
+    assert tuple(velocity) == pytest.approx((0, 0.5, 0))
+
+    _, scene = driveScene(-50, 50)
+    simulator = DiffDriveSimulator(wheelBase=0.1, maxWheelSpeed=1.0)
+    simulation = simulator.simulate(scene, maxSteps=10, timestep=0.05)
+    position, heading, speed, _, angularVelocity = simulation.result.records["state"]
+    assert tuple(position) == pytest.approx((1, 2, 0))
+    assert heading == pytest.approx(5.0 - 2 * math.pi)  # 10 rad/s for 0.5 s
+    assert speed == pytest.approx(0)
+    assert tuple(angularVelocity) == pytest.approx((0, 0, 10))
+
+
+def test_arc_stays_on_circle():
+    # Unequal wheel speeds drive the robot around a circle of radius
+    # wheelBase * (vl + vr) / (2 * (vr - vl)), here 0.2 m centered at (0.8, 2).
+    _, scene = driveScene(30, 50)
+    simulator = DiffDriveSimulator(wheelBase=0.1, maxWheelSpeed=1.0)
+    simulation = simulator.simulate(scene, maxSteps=200, timestep=0.01)
+    center = Vector(0.8, 2, 0)
+    for positions in simulation.result.trajectory:
+        assert positions[0].distanceTo(center) == pytest.approx(0.2, abs=1e-4)
+
+
+def test_motor_lag_and_noise():
+    _, scene = driveScene(100, 100)
+
+    def finalState(simulator):
+        simulation = simulator.simulate(scene, maxSteps=10)
+        return simulation.result.records["state"]
+
+    ideal = finalState(DiffDriveSimulator())
+    lagged = finalState(DiffDriveSimulator(motorLag=0.2))
+    assert lagged[0].y < ideal[0].y
+    assert lagged[2] < ideal[2]
+
+    def noisy(seed):
+        return finalState(DiffDriveSimulator(wheelNoise=0.1, seed=seed))[0]
+
+    assert noisy(1) == noisy(1)
+    assert noisy(1) != noisy(2)
+    assert noisy(1).x != pytest.approx(1)  # noise also perturbs the heading
+
+    with pytest.raises(ValueError):
+        DiffDriveSimulator(wheelBase=0)
+
+
+def test_model_parameters():
+    scenario, _ = driveScene(0, 0, params={"wheelBase": 0.2, "motorLag": "0.5"})
+    simulator = scenario.getSimulator()
+    assert isinstance(simulator, DiffDriveSimulator)
+    assert simulator.wheelBase == 0.2
+    assert simulator.motorLag == 0.5
+    assert simulator.wheelNoise == 0
+
+
+def test_patrol(loadLocalScenario):
+    scenario = loadLocalScenario("patrol.scenic", mode2D=True)
+    scene, _ = scenario.generate(maxIterations=1)
+    simulator = scenario.getSimulator()
+    simulation = simulator.simulate(scene, maxSteps=400)
+    trajectory = simulation.result.trajectory
+    # The square track robot reaches its first corner, and the patrolling
+    # robot visits both of its waypoints.
+    assert any(pos[0].distanceTo(Vector(-1.5, 1.5, 0)) < 0.15 for pos in trajectory)
+    assert any(pos[1].distanceTo(Vector(1.5, -1, 0)) < 0.15 for pos in trajectory)
+    assert any(pos[1].distanceTo(Vector(1.5, 1, 0)) < 0.15 for pos in trajectory)
+    assert all(pos[2] == Vector(0, 0, 0) for pos in trajectory)
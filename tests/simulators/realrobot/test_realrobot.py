@@ -0,0 +1,117 @@
+import math
+import time
+from types import SimpleNamespace
+
+import pytest
+from scipy.spatial.transform import Rotation
+
+from scenic.core.simulators import SimulationCreationError
+from scenic.core.vectors import Vector
+from scenic.simulators.realrobot import LoopbackTransport, RealRobotSimulator
+
+
+class KinematicRobots:
+    """Stand-in for the motion capture system and the robots it tracks.
+
+    Integrates differential-drive kinematics whenever new motor setpoints are
+    sent, and reports poses in Motive's Y-up frame.
+    """
+
+    def __init__(self, poses, timestep, maxSpeed=1.0, wheelBase=0.1, delay=0):
+        self.poses = dict(poses)  # ID -> (x, y, yaw) in Scenic coordinates
+        self.timestep = timestep
+        self.maxSpeed = maxSpeed
+        self.wheelBase = wheelBase
+        self.delay = delay
+
+    def get_pose(self, robotId):
+        if self.delay:
+            time.sleep(self.delay)
+        if robotId not in self.poses:
+            return None
+        x, y, yaw = self.poses[robotId]
+        qx, qy, qz, qw = Rotation.from_euler("y", yaw).as_quat()
+        return SimpleNamespace(x=x, y=0.0, z=-y, qx=qx, qy=qy, qz=qz, qw=qw)
+
+    def drive(self, commands):
+        for robotId, (left, right) in commands.items():
+            x, y, yaw = self.poses[robotId]
+            vl = left / 100 * self.maxSpeed
+            vr = right / 100 * self.maxSpeed
+            speed = (vl + vr) / 2
+            yaw += (vr - vl) / self.wheelBase * self.timestep
+            x -= speed * math.sin(yaw) * self.timestep
+            y += speed * math.cos(yaw) * self.timestep
+            self.poses[robotId] = (x, y, yaw)
+
+
+def test_square_track(loadLocalScenario):
+    scenario = loadLocalScenario("square.scenic", mode2D=True)
+    scene, _ = scenario.generate(maxIterations=1)
+    robots = KinematicRobots({1: (-1.5, 0, 0), 2: (1.5, 0, math.pi)}, timestep=0.05)
+    transport = LoopbackTransport(robots.drive)
+    simulator = RealRobotSimulator(robots, transport, timestep=0.05, realtime=False)
+    simulation = simulator.simulate(scene, maxSteps=100)
+
+    # Positions and headings come from the pose source
+    first = simulation.result.trajectory[0]
+    assert tuple(first[0]) == pytest.approx((-1.5, 0, 0), abs=1e-6)
+    assert tuple(first[1]) == pytest.approx((1.5, 0, 0), abs=1e-6)
+    assert any(
+        pos[0].distanceTo(Vector(-1.5, 1.5, 0)) < 0.15
+        for pos in simulation.result.trajectory
+    )
+    assert any(
+        pos[1].distanceTo(Vector(1.5, -1, 0)) < 0.15
+        for pos in simulation.result.trajectory
+    )
+
+    # Every robot got a setpoint each step, and was stopped at the end
+    assert transport.robotIds == {1, 2}
+    assert len(transport.history) == 101
+    assert transport.history[-1] == {1: (0, 0), 2: (0, 0)}
+    simulator.destroy()
+    assert transport.closed
+
+
+def test_orientation(loadLocalScenario):
+    scenario = loadLocalScenario("square.scenic", mode2D=True)
+    scene, _ = scenario.generate(maxIterations=1)
+    robots = KinematicRobots({1: (0, 1, 0.5), 2: (2, 0, -1)}, timestep=0.05)
+    simulator = RealRobotSimulator(robots, LoopbackTransport(), realtime=False)
+    simulation = simulator.simulate(scene, maxSteps=1)
+    yaw, pitch, roll, otherYaw = simulation.result.records["angles"]
+    assert yaw == pytest.approx(0.5)
+    assert pitch == pytest.approx(0, abs=1e-9)
+    assert roll == pytest.approx(0, abs=1e-9)
+    assert otherYaw == pytest.approx(-1)
+
+
+def test_untracked_robot(loadLocalScenario):
+    scenario = loadLocalScenario("square.scenic", mode2D=True)
+    scene, _ = scenario.generate(maxIterations=1)
+    robots = KinematicRobots({1: (0, 0, 0)}, timestep=0.05)
+    simulator = RealRobotSimulator(
+        robots, LoopbackTransport(), realtime=False, trackingTimeout=0.05
+    )
+    with pytest.raises(SimulationCreationError):
+        simulator.simulate(scene, maxSteps=1)
+
+
+def test_deadline_misses(loadLocalScenario):
+    scenario = loadLocalScenario("square.scenic", mode2D=True)
+    scene, _ = scenario.generate(maxIterations=1)
+
+    # Fast enough for the timestep: all deadlines met and the run is paced
+    robots = KinematicRobots({1: (-1.5, 0, 0), 2: (1.5, 0, math.pi)}, timestep=0.02)
+    simulator = RealRobotSimulator(robots, LoopbackTransport(robots.drive), timestep=0.02)
+    start = time.monotonic()
+    simulation = simulator.simulate(scene, maxSteps=10)
+    assert time.monotonic() - start >= 0.2
+    assert len(simulation.stepSlack) == 10
+
+    # Too slow: pose reads alone overrun every step
+    robots.delay = 0.02
+    simulation = simulator.simulate(scene, maxSteps=5)
+    assert simulation.deadlineMisses >= 4
+    assert all(slack < 0 for slack in simulation.stepSlack[1:])
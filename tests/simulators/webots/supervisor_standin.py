@@ -0,0 +1,145 @@
+"""Stand-in for the Webots supervisor API, for testing without Webots.
+
+Implements just enough of the ``controller`` module's `Supervisor`, `Node`,
+`Field` and `Emitter` classes for `WebotsSimulation` to create objects, step,
+and read back their state. Every API call is counted in `StandInSupervisor.calls`
+so tests can check how much work the interface does per step.
+"""
+
+from collections import Counter
+import ctypes
+
+
+class StandInField:
+    def __init__(self, supervisor, value):
+        self._ref = ctypes.c_void_p(1)
+        self.supervisor = supervisor
+        self.value = value
+
+    def _get(self, kind):
+        self.supervisor.calls[f"get{kind}"] += 1
+        return self.value
+
+    def _set(self, kind, value):
+        self.supervisor.calls[f"set{kind}"] += 1
+        self.value = value
+
+    def getSFVec3f(self):
+        return list(self._get("SFVec3f"))
+
+    def setSFVec3f(self, value):
+        self._set("SFVec3f", list(value))
+
+    def getSFRotation(self):
+        return list(self._get("SFRotation"))
+
+    def setSFRotation(self, value):
+        self._set("SFRotation", list(value))
+
+    def getSFFloat(self):
+        return self._get("SFFloat")
+
+    def setSFFloat(self, value):
+        self._set("SFFloat", value)
+
+    def getSFString(self):
+        return self._get("SFString")
+
+    def setSFString(self, value):
+        self._set("SFString", value)
+
+    def getCount(self):
+        return len(self.value)
+
+    def getMFNode(self, index):
+        return self.value[index]
+
+
+class MissingField:
+    _ref = ctypes.c_void_p(None)
+
+
+class StandInNode:
+    def __init__(self, supervisor, typeName, **fields):
+        self.supervisor = supervisor
+        self.typeName = typeName
+        self.fields = {
+            name: StandInField(supervisor, value) for name, value in fields.items()
+        }
+        self.velocity = [0, 0, 0, 0, 0, 0]
+
+    def getTypeName(self):
+        return self.typeName
+
+    def getField(self, name):
+        self.supervisor.calls["getField"] += 1
+        return self.fields.get(name, MissingField())
+
+    def getVelocity(self):
+        self.supervisor.calls["getVelocity"] += 1
+        return list(self.velocity)
+
+    def restartController(self):
+        pass
+
+
+class StandInEmitter:
+    def __init__(self, channel=1):
+        self.channel = channel
+        self.sent = []  # (channel, packet) pairs
+
+    def getChannel(self):
+        return self.channel
+
+    def setChannel(self, channel):
+        self.channel = channel
+
+    def send(self, packet):
+        self.sent.append((self.channel, bytes(packet)))
+
+
+class StandInSupervisor:
+    """Stand-in supervisor for a world with the given robots.
+
+    Args:
+        robots: DEF names of robot nodes to create; robots are placed in a row.
+    """
+
+    def __init__(self, robots=(), coordinateSystem="ENU", basicTimeStep=32):
+        self.calls = Counter()
+        self.basicTimeStep = basicTimeStep
+        self.steps = 0
+        self.emitter = StandInEmitter()
+        worldInfo = StandInNode(self, "WorldInfo", coordinateSystem=coordinateSystem)
+        self.nodes = {}
+        for i, name in enumerate(robots):
+            self.nodes[name] = StandInNode(
+                self,
+                "Robot",
+                translation=[i, 0, 0],
+                rotation=[0, 0, 1, 0],
+                customData="",
+                controller="simple_robot_controller",
+            )
+        self.root = StandInNode(self, "Group", children=[worldInfo, *self.nodes.values()])
+
+    def getRoot(self):
+        return self.root
+
+    def getFromDef(self, name):
+        self.calls["getFromDef"] += 1
+        return self.nodes.get(name)
+
+    def getDevice(self, name):
+        self.calls["getDevice"] += 1
+        return self.emitter if name == "emitter" else None
+
+    def getBasicTimeStep(self):
+        return self.basicTimeStep
+
+    def simulationResetPhysics(self):
+        pass
+
+    def step(self, ms):
+        self.steps += 1
+        return 0
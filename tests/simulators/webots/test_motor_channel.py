@@ -0,0 +1,179 @@
+import struct
+
+import pytest
+
+from scenic.simulators.webots import WebotsSimulator
+from scenic.simulators.webots.motor_channel import (
+    MOTOR_PACKET,
+    ROBOT_CHANNEL_BASE,
+    WAYPOINT_PACKET,
+    MotorChannel,
+    decodeMotorPacket,
+    encodeMotorPacket,
+    motorHeader,
+    motorRecord,
+)
+from tests.simulators.webots.supervisor_standin import StandInEmitter, StandInSupervisor
+from tests.utils import compileScenic, sampleEgo, sampleScene
+
+
+def test_packet_round_trip():
+    commands = {0: (50.0, -25.0), 7: (100.0, 0.0)}
+    packet = encodeMotorPacket(commands)
+    assert len(packet) == motorHeader.size + 2 * motorRecord.size
+    assert decodeMotorPacket(packet) == commands
+
+    # Robot-side decoding of a single record
+    robotId, left, right = struct.unpack_from("<Hff", packet, motorHeader.size)
+    assert (robotId, left, right) == (0, 50.0, -25.0)
+
+    with pytest.raises(ValueError):
+        decodeMotorPacket(bytes([WAYPOINT_PACKET, 0, 0]))
+
+
+def test_coalescing():
+    emitter = StandInEmitter()
+    channel = MotorChannel(emitter)
+    channel.flush()
+    assert emitter.sent == []
+
+    for robotId in range(3):
+        channel.setMotors(robotId, 10, 10)
+        channel.setMotors(robotId, 10, 20)
+    channel.flush()
+    packets = [packet for _, packet in emitter.sent]
+    assert len(packets) == 1
+    assert packets[0][0] == MOTOR_PACKET
+    assert decodeMotorPacket(packets[0]) == {i: (10, 20) for i in range(3)}
+    assert channel.packetsSent == 1
+    assert channel.bytesSent == len(packets[0])
+
+    channel.sendWaypointReached(2, 5)
+    channel.flush()
+    assert struct.unpack("<BHi", emitter.sent[-1][1]) == (WAYPOINT_PACKET, 2, 5)
+
+    # Without an emitter, commands are discarded
+    channel = MotorChannel(None)
+    channel.setMotors(0, 1, 1)
+    channel.flush()
+    assert channel.packetsSent == 0
+
+
+def test_robot_model():
+    scenario = compileScenic(
+        """
+        model scenic.simulators.webots.robotics_model
+        ego = new WebotsPololuRobot
+        """,
+        mode2D=True,
+    )
+    robot = sampleEgo(scenario)
+    robot.setMotors(30, 40)  # no channel yet: nothing to send to
+
+    emitter = StandInEmitter()
+    robot.webotsMotorChannel = MotorChannel(emitter)
+    robot.webotsRobotId = 4
+    robot.setMotors(30, 40)
+    robot._sendWaypointReached(1)
+    robot.webotsMotorChannel.flush()
+    packets = [packet for _, packet in emitter.sent]
+    assert len(packets) == 2
+    assert decodeMotorPacket(packets[0]) == {4: (30, 40)}
+
+
+def test_channel_routing():
+    emitter = StandInEmitter(channel=1)
+    channel = MotorChannel(emitter)
+    assert channel.addRobot(0) == ROBOT_CHANNEL_BASE
+    assert channel.addRobot(1, channel=7) == 7
+    assert channel.addRobot(2, channel=7) == 7
+
+    for robotId in range(4):
+        channel.setMotors(robotId, robotId, -robotId)
+    channel.sendWaypointReached(0, 3)
+    channel.flush()
+    routed = {ch: decodeMotorPacket(p) for ch, p in emitter.sent if p[0] == MOTOR_PACKET}
+    assert routed == {
+        ROBOT_CHANNEL_BASE: {0: (0, 0)},
+        7: {1: (1, -1), 2: (2, -2)},
+        1: {3: (3, -3)},  # unregistered robots use the emitter's own channel
+    }
+    assert emitter.sent[-1] == (
+        ROBOT_CHANNEL_BASE,
+        struct.pack("<BHi", WAYPOINT_PACKET, 0, 3),
+    )
+
+
+def test_simulation_routes_each_robot():
+    numRobots = 20
+    names = [f"POLOLU_ROBOT_{i}" for i in range(numRobots)]
+    supervisor = StandInSupervisor(robots=names)
+    scenario = compileScenic(
+        f"""
+        model scenic.simulators.webots.robotics_model
+        behavior Drive(speed):
+            while True:
+                take SetMotorAction(speed, -speed)
+        ego = new WebotsPololuRobot at (0, 0), with webotsName "POLOLU_ROBOT_0",
+            with behavior Drive(0)
+        for i in range(1, {numRobots}):
+            new WebotsPololuRobot at (i, 0), with webotsName f"POLOLU_ROBOT_{{i}}",
+                with behavior Drive(i)
+        """,
+        mode2D=True,
+    )
+    scene = sampleScene(scenario)
+    simulator = WebotsSimulator(supervisor)
+    simulation = simulator.simulate(scene, maxSteps=3)
+    assert supervisor.steps == 3
+
+    # Each robot was told its ID and channel, and gets exactly one record per
+    # step on its own channel.
+    received = {}
+    for obj in simulation.objects:
+        customData = supervisor.nodes[obj.webotsName].fields["customData"].value
+        robotId, robotChannel = map(int, customData.split())
+        assert robotChannel == ROBOT_CHANNEL_BASE + robotId
+        received[robotId] = [
+            decodeMotorPacket(p)
+            for ch, p in supervisor.emitter.sent
+            if ch == robotChannel
+        ]
+    assert len(supervisor.emitter.sent) == 3 * numRobots
+    assert supervisor.calls["getDevice"] == 1
+    for robotId, packets in received.items():
+        assert len(packets) == 3
+        assert all(list(packet) == [robotId] for packet in packets)
+
+
+def test_simulation_custom_data_uses_default_channel():
+    supervisor = StandInSupervisor(robots=["POLOLU_ROBOT_0", "POLOLU_ROBOT_1"])
+    scenario = compileScenic(
+        """
+        model scenic.simulators.webots.robotics_model
+        behavior Drive(speed):
+            while True:
+                take SetMotorAction(speed, -speed)
+        ego = new WebotsPololuRobot at (0, 0), with webotsName "POLOLU_ROBOT_0",
+            with customData "scenario data", with behavior Drive(1)
+        new WebotsPololuRobot at (1, 0), with webotsName "POLOLU_ROBOT_1",
+            with behavior Drive(2)
+        """,
+        mode2D=True,
+    )
+    defaultChannel = supervisor.emitter.getChannel()
+    WebotsSimulator(supervisor).simulate(sampleScene(scenario), maxSteps=2)
+
+    # The robot with its own customData cannot be told a channel, so its
+    # commands go out on the emitter's default channel.
+    fields = supervisor.nodes["POLOLU_ROBOT_0"].fields
+    assert fields["customData"].value == "scenario data"
+    otherId, otherChannel = map(
+        int, supervisor.nodes["POLOLU_ROBOT_1"].fields["customData"].value.split()
+    )
+    assert otherChannel == ROBOT_CHANNEL_BASE + otherId
+    received = {}
+    for channel, packet in supervisor.emitter.sent:
+        for speeds in decodeMotorPacket(packet).values():
+            received.setdefault(channel, set()).add(speeds)
+    assert received == {defaultChannel: {(1.0, -1.0)}, otherChannel: {(2.0, -2.0)}}
@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+from scenic.simulators.webots import WebotsSimulator
+from tests.simulators.webots.supervisor_standin import StandInSupervisor
+from tests.utils import compileScenic, sampleScene
+
+
+def runRobots(count, maxSteps):
+    names = [f"POLOLU_ROBOT_{i}" for i in range(count)]
+    supervisor = StandInSupervisor(robots=names)
+    scenario = compileScenic(
+        f"""
+        model scenic.simulators.webots.robotics_model
+        for i in range({count}):
+            new WebotsPololuRobot at (i, 0), with webotsName f"POLOLU_ROBOT_{{i}}"
+        """,
+        mode2D=True,
+    )
+    scene = sampleScene(scenario)
+    simulation = WebotsSimulator(supervisor).simulate(scene, maxSteps=maxSteps)
+    return supervisor, simulation
+
+
+def test_field_handles_cached():
+    supervisor, _ = runRobots(3, maxSteps=1)
+    lookups = supervisor.calls["getField"]
+    supervisor, simulation = runRobots(3, maxSteps=5)
+    assert supervisor.calls["getField"] == lookups
+    assert supervisor.calls["getSFVec3f"] > 5 * 3
+    assert "getMFFloat" not in supervisor.calls
+
+
+def test_batched_properties():
+    supervisor, simulation = runRobots(4, maxSteps=1)
+    for i, node in enumerate(supervisor.nodes.values()):
+        node.fields["translation"].value = [i, 2 * i, 0.5]
+        angle = 0.3 * (i + 1)
+        node.fields["rotation"].value = [0, math.sin(i), math.cos(i), angle]
+        node.velocity = [i, 1, 0, 0, 0, -i]
+
+    objects = simulation.objects
+    batch = simulation.getPropertiesBatch(objects)
+    properties = set(objects[0]._simulatorProvidedProperties)
+    assert set(batch) == properties
+    for i, obj in enumerate(objects):
+        values = simulation.getProperties(obj, properties)
+        for prop, value in values.items():
+            if prop in ("position", "velocity", "angularVelocity"):
+                assert tuple(batch[prop][i]) == pytest.approx(tuple(value))
+            else:
+                assert batch[prop][i] == pytest.approx(value)
@@ -1,4 +1,5 @@
 import pkgutil
+import subprocess
 import sys
 
 import pytest
@@ -37,3 +38,98 @@ def test_iter_modules(request, monkeypatch):
     modules = set(info.name for info in pkgutil.iter_modules([""]))
     assert "helper" in modules
     assert "helper2" in modules
+
+
+def test_translation_cache(tmp_path, monkeypatch):
+    import scenic.syntax.parser as parser
+    import scenic.syntax.translator as translator
+
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    helper = tmp_path / "cacheHelper.scenic"
+    helper.write_text("param helperParam = 1\n")
+    main = tmp_path / "cacheMain.scenic"
+    main.write_text("import cacheHelper\nego = new Object at (1, 2)\n")
+
+    def compile():
+        return translator.scenarioFromFile(main, params={"p": 1})
+
+    scenario = compile()
+    assert tuple(scenario.egoObject.position) == (1, 2, 0)
+    for path in (main, helper):
+        assert translator.loadTranslation(
+            translator.translationCachePath(str(path)), path.read_bytes(), str(path)
+        )
+
+    # Cached translations are used even with different compile options
+    def failToParse(*args, **kwargs):
+        raise AssertionError("cached translation not used")
+
+    with monkeypatch.context() as context:
+        context.setattr(parser, "parse_string", failToParse)
+        scenario = compile()
+        assert scenario.params["helperParam"] == 1
+        translator.scenarioFromFile(main, mode2D=True)
+
+    # Changing an imported file invalidates its translation only
+    helper.write_text("param helperParam = 2\n")
+    parsed = []
+    parse = parser.parse_string
+
+    def recordParse(source, *args, filename, **kwargs):
+        parsed.append(filename)
+        return parse(source, *args, filename=filename, **kwargs)
+
+    with monkeypatch.context() as context:
+        context.setattr(parser, "parse_string", recordParse)
+        scenario = compile()
+    assert scenario.params["helperParam"] == 2
+    assert parsed == [str(helper)]
+
+    # Corrupted caches and disabled caching fall back on translating
+    with open(translator.translationCachePath(str(main)), "r+b") as stream:
+        stream.seek(40)
+        stream.write(b"garbage")
+    assert compile().params["helperParam"] == 2
+    monkeypatch.setattr(translator, "cacheTranslations", False)
+    assert translator.translationCachePath(str(main)) is None
+    assert compile().params["helperParam"] == 2
+
+
+def test_translation_cache_location(tmp_path, monkeypatch):
+    import scenic.syntax.translator as translator
+
+    main = tmp_path / "cacheMain.scenic"
+    main.write_text("ego = new Object\n")
+    localCache = tmp_path / "__pycache__"
+
+    # No translations are written if bytecode is not
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    translator.scenarioFromFile(main)
+    assert not localCache.exists()
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+
+    # Translations are written under the bytecode cache prefix if there is one
+    prefix = tmp_path / "prefix"
+    monkeypatch.setattr(sys, "pycache_prefix", str(prefix))
+    path = translator.translationCachePath(str(main))
+    assert path.startswith(str(prefix))
+    translator.scenarioFromFile(main)
+    assert translator.loadTranslation(path, main.read_bytes(), str(main))
+    assert not localCache.exists()
+
+
+def test_lazy_imports():
+    # Heavy dependencies are only imported by the features needing them
+    code = """if True:
+        import sys
+        import scenic
+        assert "scenic.syntax.translator" not in sys.modules
+        assert "trimesh" not in sys.modules
+        import scenic.core.sensors as sensors
+        assert "cv2" not in sys.modules
+        assert "PIL.Image" not in sys.modules
+        assert sensors.Files("frame.png").handler is sensors.pilHandler
+        scenic.scenarioFromString("ego = new Object")
+        assert "scenic.syntax.parser" in sys.modules
+    """
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -1,6 +1,7 @@
 """Tests for the 'scenic' command-line tool."""
 
 import inspect
+import json
 import os
 import re
 import subprocess
@@ -106,3 +107,25 @@ def test_time(runAndGetRecordR):
         options=["--time", "5"],
     )
     assert r == "10"
+
+
+def test_jobs(tmpdir):
+    path = os.path.join(tmpdir, "test.sc")
+    header = "import scenic\nsimulator scenic.core.simulators.DummySimulator()"
+    program = "ego = new Object with foo Range(0, 1)\nrecord initial ego.foo as r"
+
+    def recorded(jobs):
+        results = os.path.join(tmpdir, f"results{jobs}.jsonl")
+        opts = ["-S", "--time", "2", "--count", "4", "--seed", "7"]
+        opts += ["--jobs", jobs, "--results", results]
+        lines = run(path, program, opts, header=header)
+        assert any(line.startswith("Ran 4 simulations") for line in lines)
+        with open(results) as f:
+            results = [json.loads(line) for line in f]
+        assert all(result["steps"] == 2 for result in results)
+        return {result["index"]: result["records"]["r"] for result in results}
+
+    values = recorded("2")
+    assert sorted(values) == [0, 1, 2, 3]
+    assert len(set(values.values())) == 4
+    assert recorded("3") == values
@@ -0,0 +1,82 @@
+"""Benchmark the persistent collision manager of BlanketCollisionRequirement.
+
+For each benchmark scenario, draws a fixed set of raw samples and checks the
+blanket collision requirement on each of them, once reusing the requirement's
+collision manager across samples (as during rejection sampling) and once
+rebuilding it for every sample, and reports the samples checked per second.
+
+Usage: python benchmark_blanket_collision.py [--samples 200] [benchmark ...]
+"""
+
+import argparse
+import random
+import time
+
+import numpy
+
+import scenic
+from scenic.core.distributions import RejectionException
+from scenic.core.requirements import BlanketCollisionRequirement
+
+BENCHMARKS = [
+    ("narrowGoalOld.scenic", {"mode2D": True}),
+    ("narrowGoalNew.scenic", {}),
+    ("city_intersection.scenic", {}),
+    ("vacuum.scenic", {"numToys": 0}),
+    ("vacuum.scenic", {"numToys": 4}),
+    ("vacuum.scenic", {"numToys": 16}),
+]
+
+
+def drawSamples(scenario, count):
+    random.seed(0)
+    numpy.random.seed(0)
+    samples = []
+    while len(samples) < count:
+        try:
+            samples.append(scenario.samplingPlan.sample())
+        except RejectionException:
+            pass
+    return samples
+
+
+def timeChecks(makeRequirement, samples):
+    results = []
+    start = time.perf_counter()
+    for sample in samples:
+        results.append(makeRequirement().falsifiedBy(sample))
+    return len(samples) / (time.perf_counter() - start), results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("benchmarks", nargs="*", help="names of benchmarks to run")
+    args = parser.parse_args()
+
+    print(
+        f"{'benchmark':45} {'objects':>7} {'fresh':>10} {'persistent':>10} {'speedup':>8}"
+    )
+    for path, params in BENCHMARKS:
+        name = f"{path[:-7]} {params}"
+        if args.benchmarks and path[:-7] not in args.benchmarks:
+            continue
+        params = params.copy()
+        mode2D = params.pop("mode2D", False)
+        scenario = scenic.scenarioFromFile(path, params=params, mode2D=mode2D)
+        samples = drawSamples(scenario, args.samples)
+        objects = scenario.objects
+        for sample in samples:  # precompute the geometry of the sampled objects
+            for obj in objects:
+                sample[obj].occupiedSpace._fclData
+
+        fresh, freshResults = timeChecks(
+            lambda: BlanketCollisionRequirement(objects), samples
+        )
+        requirement = BlanketCollisionRequirement(objects)
+        persistent, results = timeChecks(lambda: requirement, samples)
+        assert results == freshResults, f"{name}: results differ"
+        print(
+            f"{name:45} {len(objects):7} {fresh:10.0f} {persistent:10.0f} "
+            f"{persistent / fresh:7.2f}x"
+        )
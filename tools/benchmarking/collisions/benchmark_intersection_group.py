@@ -0,0 +1,78 @@
+"""Benchmark pairwise intersection requirements against a grouped requirement.
+
+For scenes of increasing numbers of objects placed uniformly at random in a square
+workspace (scaled to keep the density of objects constant), checks the same raw
+samples with an `AdaptiveChecker` holding one `IntersectionRequirement` per pair
+of objects and with one holding a single `IntersectionGroupRequirement`, and
+reports the mean time to check a sample with each.
+
+Usage: python benchmark_intersection_group.py [--samples 20] [--density 0.01] [count ...]
+"""
+
+import argparse
+import itertools
+import math
+import random
+import time
+
+import scenic
+from scenic.core.distributions import RejectionException
+from scenic.core.requirements import IntersectionGroupRequirement, IntersectionRequirement
+from scenic.core.sample_checking import AdaptiveChecker
+
+
+def makeScenario(count, density):
+    side = math.sqrt(count / density)
+    return scenic.scenarioFromString(
+        f"workspace = Workspace(RectangularRegion(0 @ 0, 0, {side}, {side}))\n"
+        f"for i in range({count}):\n"
+        f"    new Object in workspace, facing Range(0, 360) deg\n"
+    )
+
+
+def drawSamples(scenario, count):
+    random.seed(0)
+    samples = []
+    while len(samples) < count:
+        try:
+            samples.append(scenario.samplingPlan.sample())
+        except RejectionException:
+            pass
+    return samples
+
+
+def timeChecks(requirements, samples):
+    checker = AdaptiveChecker()
+    checker.setRequirements(requirements)
+    outcomes = []
+    start = time.perf_counter()
+    for sample in samples:
+        outcomes.append(checker.checkRequirements(sample) is None)
+    return (time.perf_counter() - start) / len(samples), outcomes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--density", type=float, default=0.01, help="objects per m^2")
+    parser.add_argument("counts", nargs="*", type=int, default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'objects':>7} {'pairs':>8} {'pairwise':>12} {'grouped':>12} {'speedup':>8}")
+    for count in args.counts:
+        scenario = makeScenario(count, args.density)
+        samples = drawSamples(scenario, args.samples)
+        objects = scenario.objects
+        pairwise = [
+            IntersectionRequirement(a, b) for a, b in itertools.combinations(objects, 2)
+        ]
+        pairwiseTime, pairwiseOutcomes = timeChecks(pairwise, samples)
+        groupTime, groupOutcomes = timeChecks(
+            [IntersectionGroupRequirement(objects)], samples
+        )
+        assert pairwiseOutcomes == groupOutcomes, f"{count} objects: outcomes differ"
+        print(
+            f"{count:7} {len(pairwise):8} {1000 * pairwiseTime:9.3f} ms "
+            f"{1000 * groupTime:9.3f} ms {pairwiseTime / groupTime:7.2f}x",
+            flush=True,
+        )
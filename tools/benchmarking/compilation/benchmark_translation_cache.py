@@ -0,0 +1,55 @@
+"""Benchmark compiling scenarios with and without cached translations.
+
+For each benchmark scenario, compiles it with caching of translations disabled (so
+that it and every Scenic module it imports are parsed and compiled to Python) and
+then with a warm cache, and reports the median compilation time of each.
+
+Usage: python benchmark_translation_cache.py [--trials 3] [benchmark ...]
+"""
+
+import argparse
+from pathlib import Path
+import statistics
+import time
+
+import scenic
+import scenic.syntax.translator as translator
+
+EXAMPLES = Path(__file__).parent.parent.parent.parent / "examples"
+BENCHMARKS = [
+    ("webots/vacuum/vacuum.scenic", {}),
+    ("webots/mars/narrowGoal.scenic", {}),
+    ("webots/city_intersection/city_intersection.scenic", {}),
+    ("webots/generic/adhoc.scenic", {}),
+]
+
+
+def timeCompilation(path, params, trials):
+    times = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        scenic.scenarioFromFile(path, params=params)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("benchmarks", nargs="*", help="names of benchmarks to run")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':30} {'uncached':>10} {'cached':>10} {'speedup':>8}")
+    for path, params in BENCHMARKS:
+        path = EXAMPLES / path
+        if args.benchmarks and path.stem not in args.benchmarks:
+            continue
+        translator.cacheTranslations = False
+        uncached = timeCompilation(path, params, args.trials)
+        translator.cacheTranslations = True
+        scenic.scenarioFromFile(path, params=params)  # warm up the cache
+        cached = timeCompilation(path, params, args.trials)
+        print(
+            f"{path.stem:30} {uncached:8.3f} s {cached:8.3f} s {uncached / cached:7.2f}x",
+            flush=True,
+        )
@@ -0,0 +1,88 @@
+"""Microbenchmark batched containment queries on mesh volume regions.
+
+For several meshes, compares answering containment queries for points and for
+objects placed at random in and around a `MeshVolumeRegion` one at a time (using
+`MeshVolumeRegion.containsPoint` and `MeshVolumeRegion.containsObject`) against
+answering them all at once (using `MeshVolumeRegion.containsPoints` and
+`MeshVolumeRegion.containsObjects`). Each batch of queries is repeated several
+times, as during rejection sampling, so that the batched queries can benefit from
+the signed distance grid they build once enough queries have been made.
+
+Usage: python benchmark_mesh_containment.py [--points 1000] [--objects 10] [--rounds 5]
+"""
+
+import argparse
+from pathlib import Path
+import time
+
+import numpy
+
+from scenic.core.object_types import Object
+from scenic.core.regions import MeshVolumeRegion
+from scenic.core.shapes import BoxShape, ConeShape, MeshShape, SpheroidShape
+from scenic.core.vectors import Vector
+
+MESHES = Path(__file__).parent.parent.parent.parent / "assets" / "meshes"
+
+
+def meshes():
+    yield "box", BoxShape().mesh
+    yield "cone", ConeShape().mesh
+    yield "spheroid", SpheroidShape().mesh
+    for name in ("dining_table", "chair", "couch", "webots_rock_large"):
+        yield name, MeshShape.fromFile(MESHES / f"{name}.obj.bz2").mesh
+
+
+def timeRounds(query, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = list(query())
+    return 1000 * (time.perf_counter() - start) / rounds, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--objects", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'mesh':18} {'queries':8} {'count':>6} {'single':>11} {'batched':>11} "
+        f"{'speedup':>8}"
+    )
+    for name, mesh in meshes():
+        numpy.random.seed(0)
+        region = MeshVolumeRegion(mesh, dimensions=(10, 10, 10))
+        points = numpy.random.uniform(-6, 6, (args.points, 3))
+        objects = [
+            Object._with(
+                position=Vector(*numpy.random.uniform(-5, 5, 3)),
+                width=size,
+                length=size,
+                height=size,
+            )
+            for size in numpy.random.uniform(0.1, 2, args.objects)
+        ]
+        for kind, single, batched, count in (
+            (
+                "points",
+                lambda: (region.containsPoint(Vector(*point)) for point in points),
+                lambda: region.containsPoints(points),
+                len(points),
+            ),
+            (
+                "objects",
+                lambda: (region.containsObject(obj) for obj in objects),
+                lambda: region.containsObjects(objects),
+                len(objects),
+            ),
+        ):
+            singleTime, singleResult = timeRounds(single, args.rounds)
+            batchedTime, batchedResult = timeRounds(batched, args.rounds)
+            assert singleResult == batchedResult, f"{name} {kind}: results differ"
+            print(
+                f"{name:18} {kind:8} {count:6} {singleTime:8.1f} ms "
+                f"{batchedTime:8.1f} ms {singleTime / batchedTime:7.1f}x",
+                flush=True,
+            )
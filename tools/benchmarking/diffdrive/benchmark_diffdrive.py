@@ -0,0 +1,61 @@
+"""Benchmark headless episodes of the differential-drive kinematic simulator.
+
+Runs a patrol scenario (every robot follows `PatrolBehavior` around a square)
+repeatedly, sweeping the motor lag and wheel noise of the simulator as a
+sim-to-real study would, and reports the number of episodes per minute and the
+number of simulated robot-steps per second.
+
+Usage: python benchmark_diffdrive.py [--robots 1 10] [--episodes 50] [--steps 200]
+"""
+
+import argparse
+import itertools
+import time
+
+import scenic
+from scenic.simulators.diffdrive import DiffDriveSimulator
+
+SCENARIO = """
+model scenic.simulators.diffdrive.model
+
+waypoints = [(-1.5, 1.5), (1.5, 1.5), (1.5, -1.5), (-1.5, -1.5)]
+ego = new PololuRobot at (-1.5, 0), facing 0 deg,
+    with behavior PatrolBehavior(waypoints)
+for i in range(1, globalParameters.numRobots):
+    new PololuRobot at (Range(-1, 1), Range(-1, 1)),
+        with behavior PatrolBehavior(waypoints)
+"""
+
+
+def run(numRobots, episodes, steps):
+    scenario = scenic.scenarioFromString(
+        SCENARIO, mode2D=True, params={"numRobots": numRobots}
+    )
+    sweep = itertools.cycle(itertools.product((0, 0.05, 0.1), (0, 0.02, 0.05)))
+    start = time.perf_counter()
+    for _ in range(episodes):
+        motorLag, wheelNoise = next(sweep)
+        scene, _ = scenario.generate(maxIterations=1000)
+        simulator = DiffDriveSimulator(motorLag=motorLag, wheelNoise=wheelNoise)
+        simulator.simulate(scene, maxSteps=steps)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--robots", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--episodes", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'robots':>6} {'steps':>6} {'episodes/min':>12} {'robot-steps/s':>13}")
+    for numRobots in args.robots:
+        elapsed = run(numRobots, args.episodes, args.steps)
+        print(
+            f"{numRobots:>6} {args.steps:>6} {60 * args.episodes / elapsed:>12.0f} "
+            f"{numRobots * args.steps * args.episodes / elapsed:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Check the time taken to import Scenic against a budget.
+
+For each module below, imports it in fresh interpreters run with ``python -X
+importtime`` and reports the median cumulative import time, the modules it
+should not load (since they are only needed by features used later), and any of
+those which were loaded anyway. Exits with a nonzero status if any module is over
+its budget or loads a module it should not, so that this script can be used as a
+regression test.
+
+Usage: python benchmark_import_time.py [--runs 5] [--scale 1.0] [module ...]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Modules which load slowly and are only needed by particular features.
+HEAVY = ("trimesh", "shapely", "scipy", "fcl", "cv2", "PIL.Image", "scenic.syntax.parser")
+
+# Heavy modules needed by the core of Scenic (trimesh itself imports PIL.Image).
+CORE = ("trimesh", "shapely", "scipy", "fcl", "PIL.Image")
+
+# Module, budget for its import time in seconds, and heavy modules it may load.
+BUDGETS = [
+    ("scenic", 0.15, ()),
+    ("scenic.syntax.translator", 1.5, CORE),
+    ("scenic.simulators.webots", 1.5, CORE),
+]
+
+
+def importTime(module):
+    """Cumulative import time of a module in a fresh interpreter, in seconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        # Lines have the form "import time: self [us] | cumulative | imported package"
+        if line.startswith("import time:") and line.split("|")[-1].strip() == module:
+            return int(line.split("|")[1]) / 1e6
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def loadedModules(module):
+    """Heavy modules loaded when importing a module in a fresh interpreter."""
+    code = (
+        f"import sys, {module}\n"
+        f"print(' '.join(name for name in {HEAVY!r} if name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="factor to apply to all budgets"
+    )
+    parser.add_argument("modules", nargs="*", help="names of modules to check")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':28} {'median':>10} {'budget':>10}  unexpected heavy modules")
+    for module, budget, allowed in BUDGETS:
+        if args.modules and module not in args.modules:
+            continue
+        budget *= args.scale
+        median = statistics.median(importTime(module) for _ in range(args.runs))
+        unexpected = [name for name in loadedModules(module) if name not in allowed]
+        over = median > budget
+        failed = failed or over or bool(unexpected)
+        print(
+            f"{module:28} {median:8.3f} s {budget:8.3f} s  "
+            f"{' '.join(unexpected) or '-'}{'  OVER BUDGET' if over else ''}",
+            flush=True,
+        )
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,76 @@
+"""Microbenchmark uniform sampling from mesh regions.
+
+For several meshes, compares drawing points uniformly from a `MeshVolumeRegion` or
+`MeshSurfaceRegion` using their precomputed sampling tables against the previous
+implementation, which called trimesh's rejection sampler for volumes (with
+`MeshVolumeRegion.num_samples` candidates) and its surface sampler for surfaces.
+
+Usage: python benchmark_mesh_sampling.py [--draws 2000]
+"""
+
+import argparse
+from pathlib import Path
+import time
+
+import trimesh
+
+from scenic.core.distributions import RejectionException
+from scenic.core.regions import MeshSurfaceRegion, MeshVolumeRegion
+from scenic.core.shapes import BoxShape, ConeShape, MeshShape, SpheroidShape
+
+MESHES = Path(__file__).parent.parent.parent.parent / "assets" / "meshes"
+
+
+def meshes():
+    yield "box", BoxShape().mesh
+    yield "cone", ConeShape().mesh
+    yield "spheroid", SpheroidShape().mesh
+    for name in ("dining_table", "chair", "couch", "webots_rock_large"):
+        yield name, MeshShape.fromFile(MESHES / f"{name}.obj.bz2").mesh
+
+
+def timeDraws(draw, draws):
+    start = time.perf_counter()
+    for _ in range(draws):
+        try:
+            draw()
+        except RejectionException:
+            pass
+    return 1e6 * (time.perf_counter() - start) / draws
+
+
+def oldVolumeDraw(region):
+    mesh, count = region.mesh, region.num_samples
+    return lambda: trimesh.sample.volume_mesh(mesh, count)
+
+
+def oldSurfaceDraw(region):
+    mesh = region.mesh
+    return lambda: trimesh.sample.sample_surface(mesh, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--draws", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(
+        f"{'mesh':18} {'kind':8} {'faces':>6} {'table':>9} {'old':>11} {'new':>11} "
+        f"{'speedup':>8}"
+    )
+    for name, mesh in meshes():
+        for kind, regionType, oldDraw in (
+            ("volume", MeshVolumeRegion, oldVolumeDraw),
+            ("surface", MeshSurfaceRegion, oldSurfaceDraw),
+        ):
+            region = regionType(mesh, dimensions=(2, 2, 2))
+            start = time.perf_counter()
+            region._samplingTable
+            build = 1000 * (time.perf_counter() - start)
+            old = timeDraws(oldDraw(region), args.draws)
+            new = timeDraws(region.uniformPointInner, args.draws)
+            print(
+                f"{name:18} {kind:8} {len(mesh.faces):6} {build:6.1f} ms "
+                f"{old:8.1f} us {new:8.1f} us {old / new:7.1f}x",
+                flush=True,
+            )
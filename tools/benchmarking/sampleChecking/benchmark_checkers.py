@@ -0,0 +1,73 @@
+"""Benchmark the time sample checkers spend on rejected samples.
+
+For each benchmark scenario, generates the same scenes from the same seed with
+each sample checker (checkers do not affect which samples are drawn, so every
+checker sees the same samples), and reports the mean time spent checking each
+rejected sample.
+
+Usage: python benchmark_checkers.py [--scenes 10] [--trials 3] [benchmark ...]
+"""
+
+import argparse
+from pathlib import Path
+import random
+import statistics
+import time
+
+from benchmark_sampling_plan import BENCHMARKS, make_scenario
+
+from scenic.core.sample_checking import AdaptiveChecker, WeightedAcceptanceChecker
+
+CHECKERS = {
+    "WeightedAcceptance_100": lambda: WeightedAcceptanceChecker(bufferSize=100),
+    "Adaptive": AdaptiveChecker,
+}
+
+
+def timeRejections(scenario, makeChecker, scenes, trials):
+    """Median over trials of the mean time (in ms) to check a rejected sample."""
+    means = []
+    for trial in range(trials):
+        scenario.setSampleChecker(makeChecker())
+        checker = scenario.checker
+        checkRequirements = checker.checkRequirements
+        rejectedTime, rejected = 0, 0
+
+        def timedCheck(sample):
+            nonlocal rejectedTime, rejected
+            start = time.perf_counter()
+            rejection = checkRequirements(sample)
+            if rejection is not None:
+                rejectedTime += time.perf_counter() - start
+                rejected += 1
+            return rejection
+
+        checker.checkRequirements = timedCheck
+        random.seed(trial)
+        scenario.generateBatch(scenes)
+        means.append(1000 * rejectedTime / rejected if rejected else 0)
+    return statistics.median(means)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenes", type=int, default=10)
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("benchmarks", nargs="*", help="names of benchmarks to run")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':45}" + "".join(f" {name:>22}" for name in CHECKERS))
+    for path, params in BENCHMARKS:
+        name = f"{Path(path).stem} {params}"
+        if args.benchmarks and Path(path).stem not in args.benchmarks:
+            continue
+        try:
+            scenario = make_scenario(path, params)
+        except Exception as e:
+            print(f"{name:45} skipped ({type(e).__name__}: {e})")
+            continue
+        times = (
+            timeRejections(scenario, makeChecker, args.scenes, args.trials)
+            for makeChecker in CHECKERS.values()
+        )
+        print(f"{name:45}" + "".join(f" {t:19.3f} ms" for t in times), flush=True)
@@ -0,0 +1,56 @@
+"""Benchmark incremental resampling against ordinary rejection sampling.
+
+For each benchmark scenario, generates the same number of scenes from the same
+seed with and without incremental resampling (see `Scenario.configureSampling`),
+and reports the total number of iterations and the time taken by each.
+
+Usage: python benchmark_incremental.py [--scenes 10] [--trials 3] [benchmark ...]
+"""
+
+import argparse
+from pathlib import Path
+import random
+import statistics
+import time
+
+from benchmark_sampling_plan import BENCHMARKS, make_scenario
+
+
+def timeGeneration(scenario, incremental, scenes, trials):
+    scenario.configureSampling(incremental=incremental)
+    times, iterations = [], []
+    for trial in range(trials):
+        random.seed(trial)
+        start = time.perf_counter()
+        _, its = scenario.generateBatch(scenes)
+        times.append(time.perf_counter() - start)
+        iterations.append(its)
+    return statistics.median(times), statistics.median(iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenes", type=int, default=10)
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("benchmarks", nargs="*", help="names of benchmarks to run")
+    args = parser.parse_args()
+
+    print(
+        f"{'benchmark':45} {'full its':>8} {'time':>7} {'incr its':>8} {'time':>7} "
+        f"{'speedup':>8}"
+    )
+    for path, params in BENCHMARKS:
+        name = f"{Path(path).stem} {params}"
+        if args.benchmarks and Path(path).stem not in args.benchmarks:
+            continue
+        try:
+            scenario = make_scenario(path, params)
+        except Exception as e:
+            print(f"{name:45} skipped ({type(e).__name__}: {e})")
+            continue
+        fullTime, fullIts = timeGeneration(scenario, False, args.scenes, args.trials)
+        incrTime, incrIts = timeGeneration(scenario, True, args.scenes, args.trials)
+        print(
+            f"{name:45} {fullIts:8.0f} {fullTime:7.2f} {incrIts:8.0f} {incrTime:7.2f} "
+            f"{fullTime / incrTime:7.2f}x"
+        )
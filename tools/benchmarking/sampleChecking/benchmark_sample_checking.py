@@ -9,7 +9,7 @@ from multiprocess import Process
 from threadpoolctl import threadpool_limits
 
 import scenic
-from scenic.core.sample_checking import WeightedAcceptanceChecker
+from scenic.core.sample_checking import AdaptiveChecker, WeightedAcceptanceChecker
 
 MAX_TIME = 20 * 60
 TRIALS_PER = {1: 25, 10: 10, 100: 5}
@@ -41,6 +41,7 @@ SAMPLE_CHECKERS = [
     "WeightedAcceptanceChecker_1",
     "WeightedAcceptanceChecker_10",
     "WeightedAcceptanceChecker_100",
+    "AdaptiveChecker",
 ]
 
 NUM_CORES = 16
@@ -67,6 +68,8 @@ def run_benchmark(scenario, sample_checker, num_scenes):
         scenario.setSampleChecker(WeightedAcceptanceChecker(bufferSize=10))
     elif sample_checker == "WeightedAcceptanceChecker_100":
         scenario.setSampleChecker(WeightedAcceptanceChecker(bufferSize=100))
+    elif sample_checker == "AdaptiveChecker":
+        scenario.setSampleChecker(AdaptiveChecker())
 
     with threadpool_limits(limits=NUM_CORES, user_api="blas"):
         scenario.generateBatch(numScenes=num_scenes)
@@ -0,0 +1,88 @@
+"""Benchmark the compiled sampling plan against recursive sampling.
+
+For each benchmark scenario, draws the same number of raw samples (without checking
+requirements, so that only the cost of sampling is measured) using the recursive
+`Samplable.sampleAll` and using the scenario's compiled `SamplingPlan`, checks
+that both consumed the random number generators identically, and reports the
+number of sampling iterations per second of each.
+
+Usage: python benchmark_sampling_plan.py [--iterations 2000] [benchmark ...]
+"""
+
+import argparse
+from pathlib import Path
+import random
+import time
+
+import numpy
+
+import scenic
+from scenic.core.distributions import RejectionException, Samplable
+
+BENCHMARKS = [
+    ("narrowGoalOld.scenic", {"mode2D": True}),
+    ("bumperToBumper.scenic", {"mode2D": True}),
+    ("badlyParkedCarPullingIn.scenic", {"mode2D": True}),
+    ("adjacentOpposingPair.scenic", {"mode2D": True}),
+    ("carInFront.scenic", {"mode2D": True}),
+    ("mediumTraffic.scenic", {"mode2D": True}),
+    ("opposingPair.scenic", {"mode2D": True}),
+    ("angledPlatoonInFront.scenic", {"mode2D": True}),
+    ("parkedPlatoon.scenic", {"mode2D": True}),
+    ("bypassing_03.scenic", {"mode2D": True}),
+    ("pedestrian_02.scenic", {"mode2D": True}),
+    ("narrowGoalNew.scenic", {}),
+    ("city_intersection.scenic", {}),
+    ("vacuum.scenic", {"numToys": 4}),
+    ("vacuum.scenic", {"numToys": 16}),
+]
+
+
+def make_scenario(path, params):
+    params = params.copy()
+    mode2D = params.pop("mode2D", False)
+    return scenic.scenarioFromFile(
+        Path("benchmarks") / path, params=params, mode2D=mode2D
+    )
+
+
+def timeSampling(sampler, iterations, seed=0):
+    random.seed(seed)
+    numpy.random.seed(seed)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        try:
+            sampler()
+        except RejectionException:
+            pass
+    elapsed = time.perf_counter() - start
+    state = (random.getstate(), numpy.random.get_state()[1].tolist())
+    return iterations / elapsed, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("benchmarks", nargs="*", help="names of benchmarks to run")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':45} {'nodes':>6} {'recursive':>10} {'plan':>10} {'speedup':>8}")
+    for path, params in BENCHMARKS:
+        name = f"{Path(path).stem} {params}"
+        if args.benchmarks and Path(path).stem not in args.benchmarks:
+            continue
+        try:
+            scenario = make_scenario(path, params)
+        except Exception as e:
+            print(f"{name:45} skipped ({type(e).__name__}: {e})")
+            continue
+        plan = scenario.samplingPlan
+        recursive, state = timeSampling(
+            lambda: Samplable.sampleAll(scenario.dependencies), args.iterations
+        )
+        compiled, planState = timeSampling(plan.sample, args.iterations)
+        assert planState == state, f"{name}: sampling plan is not bit-identical"
+        print(
+            f"{name:45} {len(plan):6} {recursive:10.0f} {compiled:10.0f} "
+            f"{compiled / recursive:7.2f}x"
+        )
@@ -0,0 +1,102 @@
+"""Benchmark reading back object properties in `Simulation.updateObjects`.
+
+For scenarios with increasing numbers of agents, runs a simulation with
+`DummySimulator` and reports the median time per time step spent in
+`Simulation.updateObjects` when the interface provides `getPropertiesBatch`
+(as `DummySimulation` does), when it only provides `getProperties`, and with the
+previous implementation of `updateObjects`, which checked the type of every
+property with `isinstance`, rebuilt the set of properties of every object, and
+called the clearer of every cached property of every object.
+
+Usage: python benchmark_update_objects.py [--steps 500] [count ...]
+"""
+
+import argparse
+import numbers
+import statistics
+import time
+
+import scenic
+from scenic.core.simulators import DummySimulation, DummySimulator, Simulation
+
+
+class TimedSimulation(DummySimulation):
+    def __init__(self, *args, **kwargs):
+        self.updateTimes = []
+        super().__init__(*args, **kwargs)
+
+    def updateObjects(self):
+        start = time.perf_counter()
+        super().updateObjects()
+        self.updateTimes.append(time.perf_counter() - start)
+
+
+class PerObjectSimulation(TimedSimulation):
+    getPropertiesBatch = Simulation.getPropertiesBatch
+
+
+class OldSimulation(TimedSimulation):
+    def updateObjects(self):
+        start = time.perf_counter()
+        for obj in self.objects:
+            dynTypes = obj._simulatorProvidedProperties
+            properties = set(dynTypes)
+            values = self.getProperties(obj, properties)
+            assert properties == set(values), properties ^ set(values)
+            for prop, value in values.items():
+                ty = dynTypes[prop]
+                if ty is float and isinstance(value, numbers.Real):
+                    value = float(value)
+                elif ty is type(None):
+                    ty = type(value)
+                    dynTypes[prop] = ty
+                if not isinstance(value, ty):
+                    raise RuntimeError(f'bad type for property "{prop}"')
+                setattr(obj, prop, value)
+            obj._recomputeDynamicFinals()
+            for clearer in obj._cache_clearers.values():
+                clearer(obj)
+        self.updateTimes.append(time.perf_counter() - start)
+
+
+class TimedSimulator(DummySimulator):
+    def __init__(self, simulationClass):
+        super().__init__(drift=0.1)
+        self.simulationClass = simulationClass
+
+    def createSimulation(self, scene, **kwargs):
+        return self.simulationClass(scene, drift=self.drift, **kwargs)
+
+
+def makeScene(count):
+    scenario = scenic.scenarioFromString(
+        "behavior Idle():\n"
+        "    while True:\n"
+        "        wait\n"
+        f"for i in range({count}):\n"
+        "    new Object at (2 * i, 0), with behavior Idle\n"
+    )
+    scene, _ = scenario.generate(maxIterations=1)
+    return scene
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("counts", nargs="*", type=int, default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(f"{'agents':>6} {'old':>10} {'per-object':>10} {'batched':>10} {'speedup':>8}")
+    for count in args.counts:
+        scene = makeScene(count)
+        times = []
+        for simulationClass in (OldSimulation, PerObjectSimulation, TimedSimulation):
+            simulator = TimedSimulator(simulationClass)
+            simulation = simulator.simulate(scene, maxSteps=args.steps)
+            times.append(1e6 * statistics.median(simulation.updateTimes))
+        old, perObject, batched = times
+        print(
+            f"{count:6} {old:7.1f} us {perObject:7.1f} us {batched:7.1f} us "
+            f"{old / batched:7.2f}x",
+            flush=True,
+        )
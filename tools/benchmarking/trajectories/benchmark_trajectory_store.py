@@ -0,0 +1,92 @@
+"""Benchmark recording simulation trajectories.
+
+For several numbers of objects, moves the objects for many time steps (giving each
+a fresh `Vector` position and velocity every step, as simulator interfaces do) and
+records the trajectory in three ways: the old way, as a list of tuples of the
+objects' positions; with a `TrajectoryStore` recording position, heading, and
+velocity in memory; and with a store spilled to a memory-mapped file. Reports the
+time per step, including moving the objects, and the memory retained by the
+trajectory at the end.
+
+Usage: python benchmark_trajectory_store.py [--steps 20000] [count ...]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from scenic.core.simulators import Simulation
+from scenic.core.trajectories import TrajectoryStore
+from scenic.core.vectors import Vector
+
+
+class FakeObject:
+    def __init__(self, i):
+        self.i = i
+        self.step(0)
+
+    def step(self, t):
+        self.position = Vector(float(self.i), 0.01 * t, 0.0)
+        self.heading = 0.001 * t
+        self.velocity = Vector(0.0, 1.0, 0.0)
+
+
+def run(make, count, steps):
+    # Time the whole loop, so that garbage collection passes triggered by the
+    # objects retained in the trajectory are included.
+    objects = [FakeObject(i) for i in range(count)]
+    trajectory, record = make()
+    start = time.perf_counter()
+    for t in range(steps):
+        for obj in objects:
+            obj.step(t)
+        record(objects)
+    perStep = 1e6 * (time.perf_counter() - start) / steps
+    del trajectory, record
+
+    # Measure the memory retained by the trajectory in a separate run, since
+    # tracing allocations slows everything down.
+    tracemalloc.start()
+    trajectory, record = make()
+    for t in range(steps):
+        for obj in objects:
+            obj.step(t)
+        record(objects)
+    del objects, record
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return perStep, memory / 2**20
+
+
+def tuples():
+    trajectory = []
+    return trajectory, lambda objects: trajectory.append(
+        tuple(obj.position for obj in objects)
+    )
+
+
+def store(spillDirectory=None):
+    store = TrajectoryStore(Simulation.trajectoryProperties, spillDirectory)
+    return store, store.record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("counts", nargs="*", type=int, default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(f"{'objects':>7} {'storage':8} {'time/step':>11} {'memory':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.counts:
+            for name, make in (
+                ("tuples", tuples),
+                ("store", store),
+                ("spilled", lambda: store(directory)),
+            ):
+                perStep, memory = run(make, count, args.steps)
+                print(
+                    f"{count:7} {name:8} {perStep:8.2f} us {memory:7.2f} MiB",
+                    flush=True,
+                )
@@ -0,0 +1,121 @@
+"""Microbenchmarks for Orientation and Vector arithmetic.
+
+Compares the current tuple-based quaternion kernel with the previous
+implementation, which stored a SciPy `Rotation` in every `Orientation` and went
+through SciPy for every operation (reproduced here on top of the SciPy rotations
+of the same orientations). Also checks that both give the same results.
+
+Usage: python benchmark_orientation_kernel.py [--number 20000] [--repeat 7]
+"""
+
+import argparse
+import math
+import random
+import timeit
+
+from scipy.spatial.transform import Rotation
+
+from scenic.core.vectors import Orientation, Vector
+
+
+def oldFromEuler(yaw, pitch, roll):
+    r = Rotation.from_euler("ZXY", [yaw, pitch, roll], degrees=False)
+    return r, r.as_quat()
+
+
+def oldFromHeading(heading):
+    r = Rotation.from_rotvec([0, 0, heading], degrees=False)
+    return r, r.as_quat()
+
+
+def oldRotatedBy(vector, r):
+    return Vector(*r.apply(vector.coordinates))
+
+
+def oldOffsetLocally(vector, r, offset):
+    ox, oy, oz = r.apply(offset)
+    x, y, z = vector
+    return Vector(x + ox, y + oy, z + oz)
+
+
+def oldMul(r1, r2):
+    r = r1 * r2
+    return r, r.as_quat()
+
+
+def oldLocalAnglesFor(r1, r2):
+    inverse = r1.inv()
+    inverse.as_quat()
+    local = inverse * r2
+    local.as_quat()
+    return local.as_euler("ZXY", degrees=False)
+
+
+def check(parent, target, vector, offset):
+    pr, tr = parent.r, target.r
+    pairs = [
+        (vector.rotatedBy(parent), oldRotatedBy(vector, pr)),
+        (vector.offsetLocally(parent, offset), oldOffsetLocally(vector, pr, offset)),
+        ((parent * target).q, oldMul(pr, tr)[1]),
+        (parent.localAnglesFor(target), oldLocalAnglesFor(pr, tr)),
+    ]
+    return max(abs(a - b) for new, old in pairs for a, b in zip(new, old))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(0)
+    angles = [random.uniform(-math.pi, math.pi) for _ in range(3)]
+    parent = Orientation.fromEuler(*angles)
+    target = Orientation.fromEuler(*[random.uniform(-math.pi, math.pi) for _ in range(3)])
+    vector, offset = Vector(1, 2, 3), Vector(0.5, -1, 2)
+    pr, tr = parent.r, target.r
+
+    cases = [
+        (
+            "rotatedBy",
+            lambda: oldRotatedBy(vector, pr),
+            lambda: vector.rotatedBy(parent),
+        ),
+        (
+            "offsetLocally",
+            lambda: oldOffsetLocally(vector, pr, offset),
+            lambda: vector.offsetLocally(parent, offset),
+        ),
+        (
+            "localAnglesFor",
+            lambda: oldLocalAnglesFor(pr, tr),
+            # Don't reuse the cached inverse and Euler angles between iterations.
+            lambda: Orientation._fromQuat(parent._quat).localAnglesFor(target),
+        ),
+        ("__mul__", lambda: oldMul(pr, tr), lambda: parent * target),
+        (
+            "fromEuler",
+            lambda: oldFromEuler(*angles),
+            lambda: Orientation._fromEuler(*angles),
+        ),
+        (
+            "_fromHeading",
+            lambda: oldFromHeading(angles[0]),
+            lambda: Orientation._fromHeading(angles[0]),
+        ),
+    ]
+
+    print(f"max difference from SciPy: {check(parent, target, vector, offset):.2e}")
+    print(f"{'operation':>15} {'old us':>8} {'new us':>8} {'speedup':>8}")
+    for name, old, new in cases:
+        times = []
+        for func in (old, new):
+            best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+            times.append(1e6 * best / args.number)
+        print(
+            f"{name:>15} {times[0]:>8.2f} {times[1]:>8.2f} {times[0] / times[1]:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark the batched VisibilityEngine against individual canSee calls.
+
+For each of the visibility benchmark scenarios in this directory (and an extra
+scenario with several viewers and targets in a field of occluders), samples a
+scene and then checks the visibility of every object from every viewer, with all
+other objects as occluders: first by calling `canSee` for each (viewer, target)
+pair, then with a single `VisibilityEngine` query. Checks that both give the same
+results, and reports the median time of each over several repetitions.
+
+Usage: python benchmark_visibility_engine.py [--densities 1 2] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+import scenic
+from scenic.core.visibility import VisibilityEngine, canSee
+
+# The other scenarios in this directory do not currently compile (they load meshes
+# from outside the repository or use older syntax), so are not included here.
+BENCHMARKS = [
+    "enclosed_occluded.scenic",
+    "enclosed_visible.scenic",
+]
+
+FIELD = """
+import visibility_benchmarking
+
+class OccludingSphere:
+    shape: SpheroidShape()
+    length: Range(1, 1.5)
+    width: Range(1, 1.5)
+    height: Range(1, 1.5)
+    allowCollisions: True
+
+class Viewer:
+    viewRayDensity: globalParameters.viewRayDensity
+    visibleDistance: 30
+    allowCollisions: True
+
+ego = new Viewer at (0, 0, 0)
+for i in range(3):
+    new Viewer at (Range(-5, 5), Range(-2, 0), 0), facing Range(-30, 30) deg
+for _ in range(50):
+    new OccludingSphere in BoxRegion(position=(0, 6, 0), dimensions=(12, 2, 6))
+for _ in range(8):
+    new Object in BoxRegion(position=(0, 12, 0), dimensions=(12, 2, 6)),
+        with allowCollisions True
+"""
+
+
+def visibilityQueries(scene):
+    viewers = [obj for obj in scene.objects if hasattr(obj, "viewRayDensity")]
+    viewers = [
+        obj for obj in viewers if obj is scene.egoObject or obj.visibleDistance == 30
+    ]
+    queries = []
+    for viewer in viewers:
+        for target in scene.objects:
+            if target is viewer:
+                continue
+            occluders = tuple(
+                obj
+                for obj in scene.objects
+                if obj is not viewer and obj is not target and obj.occluding
+            )
+            queries.append((viewer, target, occluders))
+    return queries
+
+
+def individually(queries):
+    # Call canSee directly, since the canSee methods cache their results.
+    return [
+        canSee(**viewer._viewParameters(), target=target, occludingObjects=occluders)
+        for viewer, target, occluders in queries
+    ]
+
+
+def timed(func, queries, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(queries)
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--densities", type=float, nargs="+", default=[1, 2])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    random.seed(0)
+    print(
+        f"{'benchmark':>34} {'density':>7} {'pairs':>5} {'canSee ms':>10} "
+        f"{'engine ms':>10} {'speedup':>8}"
+    )
+    for name in BENCHMARKS + ["field of viewers"]:
+        for density in args.densities:
+            params = {"viewRayDensity": density}
+            if name in BENCHMARKS:
+                scenario = scenic.scenarioFromFile(name, params=params)
+            else:
+                scenario = scenic.scenarioFromString(FIELD, params=params)
+            scene, _ = scenario.generate(maxIterations=float("inf"))
+            queries = visibilityQueries(scene)
+            expected, old = timed(individually, queries, args.repeat)
+            results, new = timed(
+                lambda queries: VisibilityEngine().canSee(queries), queries, args.repeat
+            )
+            assert results == expected, (name, density)
+            print(
+                f"{name:>34} {density:>7g} {len(queries):>5} {1000 * old:>10.1f} "
+                f"{1000 * new:>10.1f} {old / new:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
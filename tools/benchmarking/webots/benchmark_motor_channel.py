@@ -0,0 +1,145 @@
+"""Benchmark motor command messaging between the Webots supervisor and robots.
+
+Compares the old per-call JSON messages (two per robot per step, each looked up,
+encoded and decoded separately) with the packed binary motor channel, either with
+all robots sharing one channel (one packet per step, which every robot scans for
+its own record) or with each robot on its own channel (one small packet per robot
+per step, so each robot only receives its own). Webots itself is not needed: a
+stand-in supervisor records the emitted packets with the channel they were sent
+on, and every robot controller is modeled as decoding every packet it receives.
+
+Usage: python benchmark_motor_channel.py [--robots 1 50] [--steps 2000]
+"""
+
+import argparse
+import json
+import struct
+import time
+
+from scenic.simulators.webots.motor_channel import MotorChannel
+
+MOTOR_HEADER = struct.Struct("<BH")
+MOTOR_RECORD = struct.Struct("<Hff")
+
+
+class StandInEmitter:
+    def __init__(self):
+        self.channel = 1
+        self.queue = []
+
+    def getChannel(self):
+        return self.channel
+
+    def setChannel(self, channel):
+        self.channel = channel
+
+    def send(self, packet):
+        self.queue.append((self.channel, packet))
+
+
+class StandInSupervisor:
+    def __init__(self):
+        self.emitter = StandInEmitter()
+
+    def getDevice(self, name):
+        return self.emitter
+
+
+def legacyStep(supervisor, speeds):
+    # What WebotsRobot._sendMotorCommand used to do on every setLeftMotor and
+    # setRightMotor call.
+    for left, right in speeds:
+        for _ in range(2):
+            emitter = supervisor.getDevice("emitter")
+            command = {
+                "type": "motor_command",
+                "left_speed": left,
+                "right_speed": right,
+            }
+            emitter.send(json.dumps(command).encode("utf-8"))
+
+
+def legacyReceive(packets, numRobots):
+    for robotId in range(numRobots):
+        for _, packet in packets:
+            command = json.loads(packet)
+            command["left_speed"], command["right_speed"]
+
+
+def binaryStep(channel, speeds):
+    for robotId, (left, right) in enumerate(speeds):
+        channel.setMotors(robotId, left, right)
+        channel.setMotors(robotId, left, right)
+    channel.flush()
+
+
+def binaryReceive(packets, numRobots, channels):
+    for robotId in range(numRobots):
+        for channel, packet in packets:
+            if channel != channels.get(robotId, channel):
+                continue  # filtered out by the robot's receiver
+            _, count = MOTOR_HEADER.unpack_from(packet, 0)
+            for i in range(count):
+                rid, left, right = MOTOR_RECORD.unpack_from(
+                    packet, MOTOR_HEADER.size + i * MOTOR_RECORD.size
+                )
+                if rid == robotId:
+                    break
+
+
+def run(numRobots, steps, mode):
+    supervisor = StandInSupervisor()
+    channel = MotorChannel.forSupervisor(supervisor)
+    if mode == "routed":
+        for robotId in range(numRobots):
+            channel.addRobot(robotId)
+    binary = mode != "json"
+    speeds = [(50.0 + i % 7, 50.0 - i % 5) for i in range(numRobots)]
+    sendTime = receiveTime = 0
+    messages = bytesSent = 0
+    for _ in range(steps):
+        start = time.perf_counter()
+        if binary:
+            binaryStep(channel, speeds)
+        else:
+            legacyStep(supervisor, speeds)
+        middle = time.perf_counter()
+        packets = supervisor.emitter.queue
+        supervisor.emitter.queue = []
+        if binary:
+            binaryReceive(packets, numRobots, channel.robotChannels)
+        else:
+            legacyReceive(packets, numRobots)
+        end = time.perf_counter()
+        sendTime += middle - start
+        receiveTime += end - middle
+        messages += len(packets)
+        bytesSent += sum(len(packet) for _, packet in packets)
+    return sendTime, receiveTime, messages, bytesSent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--robots", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--steps", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(
+        f"{'robots':>6} {'channel':>7} {'msgs/step':>9} {'bytes/step':>10} "
+        f"{'send us/step':>12} {'recv us/step':>12} {'cmds/s':>10}"
+    )
+    for numRobots in args.robots:
+        for mode in ("json", "shared", "routed"):
+            sendTime, receiveTime, messages, bytesSent = run(numRobots, args.steps, mode)
+            total = sendTime + receiveTime
+            print(
+                f"{numRobots:>6} {mode:>7} "
+                f"{messages / args.steps:>9.1f} {bytesSent / args.steps:>10.0f} "
+                f"{1e6 * sendTime / args.steps:>12.1f} "
+                f"{1e6 * receiveTime / args.steps:>12.1f} "
+                f"{numRobots * args.steps / total:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark reading back object states from the Webots supervisor each time step.
+
+Compares the old per-object reads (looking up the translation and rotation fields
+of every node on every step and converting each object's state separately) with
+the cached field handles and with the batched path, which converts the states of
+all objects at once with NumPy. Webots itself is not needed: the stand-in
+supervisor from the test suite counts every API call made.
+
+Usage: python benchmark_supervisor_reads.py [--robots 1 10 100] [--steps 200]
+"""
+
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from scenic.core.type_support import toOrientation
+from scenic.core.vectors import Vector
+from scenic.simulators.webots import WebotsSimulator
+from tests.simulators.webots.supervisor_standin import StandInSupervisor
+from tests.utils import compileScenic, sampleScene
+
+
+def legacyGetProperties(simulation, obj, properties):
+    # What WebotsSimulation.getProperties used to do.
+    webotsObj = simulation.nodeHandles[obj].node
+    pos = webotsObj.getField("translation").getSFVec3f()
+    x, y, z = simulation.coordinateSystem.positionToScenic(pos)
+    lx, ly, lz, ax, ay, az = webotsObj.getVelocity()
+    vx, vy, vz = simulation.coordinateSystem.positionToScenic((lx, ly, lz))
+    velocity = Vector(vx, vy, vz)
+    offsetOrientation = toOrientation(obj.rotationOffset)
+    globalOrientation = simulation.coordinateSystem.orientationToScenic(
+        webotsObj.getField("rotation").getSFRotation(), offsetOrientation
+    )
+    yaw, pitch, roll = obj.parentOrientation.localAnglesFor(globalOrientation)
+    return dict(
+        position=Vector(x, y, z),
+        velocity=velocity,
+        speed=math.hypot(*velocity),
+        angularSpeed=math.hypot(ax, ay, az),
+        angularVelocity=Vector(ax, ay, az),
+        yaw=yaw,
+        pitch=pitch,
+        roll=roll,
+        elevation=z,
+    )
+
+
+def makeSimulation(numRobots):
+    names = [f"POLOLU_ROBOT_{i}" for i in range(numRobots)]
+    supervisor = StandInSupervisor(robots=names)
+    scenario = compileScenic(
+        f"""
+        model scenic.simulators.webots.robotics_model
+        for i in range({numRobots}):
+            new WebotsPololuRobot at (i, 0), with webotsName f"POLOLU_ROBOT_{{i}}"
+        """,
+        mode2D=True,
+    )
+    scene = sampleScene(scenario)
+    simulation = WebotsSimulator(supervisor).simulate(scene, maxSteps=1)
+    for i, node in enumerate(supervisor.nodes.values()):
+        node.fields["rotation"].value = [0, 0, 1, 0.1 * i]
+        node.velocity = [1, 0, 0, 0, 0, 0.5]
+    return supervisor, simulation
+
+
+def run(numRobots, steps, mode):
+    supervisor, simulation = makeSimulation(numRobots)
+    objects = simulation.objects
+    properties = set(objects[0]._simulatorProvidedProperties)
+    times = []
+    supervisor.calls.clear()
+    for _ in range(steps):
+        start = time.perf_counter()
+        if mode == "old":
+            for obj in objects:
+                legacyGetProperties(simulation, obj, properties)
+        elif mode == "cached":
+            for obj in objects:
+                simulation.getProperties(obj, properties)
+        else:
+            simulation.getPropertiesBatch(objects)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), sum(supervisor.calls.values()) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--robots", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'robots':>6} {'reads':>7} {'API calls/step':>14} {'us/step':>10}")
+    for numRobots in args.robots:
+        for mode in ("old", "cached", "batched"):
+            elapsed, calls = run(numRobots, args.steps, mode)
+            print(f"{numRobots:>6} {mode:>7} {calls:>14.0f} {1e6 * elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()